@@ -36,12 +36,13 @@ python manage.py migrate --noinput 2>&1 || echo "[WARN] Migrations échouées, l
 echo "[2/3] Collecte des fichiers statiques..."
 python manage.py collectstatic --noinput 2>&1 || echo "[WARN] Collectstatic échoué"
 
-# Démarrage de Gunicorn
-echo "[3/3] Démarrage de Gunicorn sur le port 8080..."
-exec gunicorn saga.wsgi:application \
+# Démarrage de Gunicorn (application, classe et nombre de workers : gunicorn_config.py,
+# SAGA_SERVER_MODE=asgi pour les workers uvicorn)
+echo "[3/3] Démarrage de Gunicorn sur le port 8080 (mode ${SAGA_SERVER_MODE:-wsgi})..."
+exec gunicorn \
+    --config gunicorn_config.py \
     --bind 0.0.0.0:8080 \
-    --workers 3 \
-    --threads 2 \
+    --threads "${GUNICORN_THREADS:-2}" \
     --timeout 120 \
     --access-logfile - \
     --error-logfile - \
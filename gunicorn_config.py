@@ -3,13 +3,76 @@ Configuration de Gunicorn pour l'application Django.
 """
 import multiprocessing
 import os
+import sys
 
-# Nombre de workers optimisé pour Heroku
-workers = 1  # Réduit à 1 worker pour éviter les timeouts
+# Mode de service : 'wsgi' (workers sync, historique) ou 'asgi' (workers uvicorn,
+# vues async pour les appels sortants Orange Money / Expo). Voir docs/ASGI_DEPLOIEMENT.md
+SERVER_MODE = os.getenv('SAGA_SERVER_MODE', 'wsgi').lower()
+if SERVER_MODE not in ('wsgi', 'asgi'):
+    raise ValueError(f"SAGA_SERVER_MODE invalide: {SERVER_MODE} (attendu: wsgi ou asgi)")
 
-# Configuration des workers
-worker_class = 'sync'  # Plus simple et plus rapide
-threads = 1
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'saga.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'saga.wsgi:application'
+    worker_class = 'sync'  # Plus simple et plus rapide
+
+
+def _memory_limit_mb():
+    """Mémoire disponible pour le conteneur : SAGA_MEMORY_LIMIT_MB, sinon limite cgroup"""
+    if os.getenv('SAGA_MEMORY_LIMIT_MB'):
+        return int(os.getenv('SAGA_MEMORY_LIMIT_MB'))
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as limit_file:
+                value = limit_file.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 50:
+            return int(value) // (1024 * 1024)
+    return None
+
+
+def compute_workers(mode=SERVER_MODE, cpu_count=None, memory_limit_mb=None, shared_cache=None):
+    """
+    Nombre de workers :
+        plafond_cpu     = 2 x CPU + 1 (wsgi, workers bloquants) | CPU + 1 (asgi, boucle d'événements)
+        plafond_memoire = (mémoire - SAGA_MEMORY_RESERVED_MB) // SAGA_WORKER_MEMORY_MB
+        workers         = max(1, min(plafond_cpu, plafond_memoire))
+    WEB_CONCURRENCY (Heroku, Elestio) reste prioritaire.
+
+    Sans cache partagé (REDIS_URL), un seul worker : le cache LocMem est propre à
+    chaque processus, et le verrou de synchronisation B2B (cache.add) ou les
+    invalidations par version du cache n'y seraient pas vus des autres workers.
+    """
+    if shared_cache is None:
+        shared_cache = bool(os.getenv('REDIS_URL'))
+    if not shared_cache:
+        if int(os.getenv('WEB_CONCURRENCY') or 1) > 1:
+            print(
+                "[gunicorn] WEB_CONCURRENCY ignoré : sans REDIS_URL le cache est propre à "
+                "chaque processus, 1 seul worker est lancé",
+                file=sys.stderr,
+            )
+        return 1
+    if os.getenv('WEB_CONCURRENCY'):
+        return max(1, int(os.getenv('WEB_CONCURRENCY')))
+    cpu_count = cpu_count or multiprocessing.cpu_count()
+    cpu_cap = 2 * cpu_count + 1 if mode == 'wsgi' else cpu_count + 1
+    memory_limit_mb = memory_limit_mb if memory_limit_mb is not None else _memory_limit_mb()
+    if memory_limit_mb is None:
+        return cpu_cap
+    reserved_mb = int(os.getenv('SAGA_MEMORY_RESERVED_MB', '128'))
+    worker_mb = int(os.getenv('SAGA_WORKER_MEMORY_MB', '200'))
+    memory_cap = (memory_limit_mb - reserved_mb) // worker_mb
+    return max(1, min(cpu_cap, memory_cap))
+
+
+workers = compute_workers()
+
+# Configuration des workers (threads n'est utilisé que par les workers gthread)
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
 worker_connections = 1000
 
 # Timeouts réduits pour éviter H12
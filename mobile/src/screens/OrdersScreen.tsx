@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useMemo, useRef } from 'react';
+import React, { useEffect, useState, useRef } from 'react';
 import {
   View,
   Text,
@@ -12,22 +12,14 @@ import { Ionicons } from '@expo/vector-icons';
 import { useNavigation, useFocusEffect, useRoute } from '@react-navigation/native';
 import * as WebBrowser from 'expo-web-browser';
 import { COLORS, API_ENDPOINTS } from '../utils/constants';
-import { formatWeightQuantity, formatPrice } from '../utils/helpers';
+import { formatPrice } from '../utils/helpers';
 import apiClient from '../services/api';
 import { useAppDispatch } from '../store/hooks';
 import { clearUnreadCount } from '../store/slices/notificationSlice';
 import { notificationService } from '../services/notificationService';
 import LoadingSpinner from '../components/LoadingSpinner';
 
-type OrderItemLite = {
-  id: number;
-  product_title: string;
-  quantity: number;
-  price: number;
-  weight_unit?: string | null;
-  is_weighted?: boolean;
-};
-
+// Ligne d'historique (GET /cart/orders/) : sans articles, détail dans OrderDetail
 type OrderLite = {
   id: number;
   order_number: string;
@@ -35,16 +27,8 @@ type OrderLite = {
   status_label: string;
   total: number;
   created_at: string;
-  items: OrderItemLite[];
-};
-
-type OrderApiItem = {
-  id: number;
-  product?: { title?: string };
-  quantity: number;
-  price: number;
-  weight_unit?: string | null;
-  is_weighted?: boolean;
+  item_count: number;
+  first_item_title: string;
 };
 
 type OrderApi = {
@@ -53,9 +37,13 @@ type OrderApi = {
   status: string;
   total: number;
   created_at: string;
-  items: OrderApiItem[];
+  item_count?: number;
+  first_item_title?: string;
 };
 
+// Taille de page de l'historique (paramètre `limit`, curseur `next_cursor`)
+const ORDERS_PAGE_SIZE = 20;
+
 type FilterStatus = 'all' | 'draft' | 'confirmed' | 'shipped' | 'delivered' | 'cancelled';
 
 const FILTER_OPTIONS: { value: FilterStatus; label: string }[] = [
@@ -72,9 +60,15 @@ const OrdersScreen: React.FC = () => {
   const route = useRoute<any>();
   const notifDispatch = useAppDispatch();
   const [orders, setOrders] = useState<OrderLite[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(false);
+  const [isFetchingMore, setIsFetchingMore] = useState(false);
   const [refreshing, setRefreshing] = useState(false);
   const [selectedFilter, setSelectedFilter] = useState<FilterStatus>('all');
+  // Filtre courant pour le polling (le callback de focus est créé une seule fois)
+  const selectedFilterRef = useRef<FilterStatus>('all');
+  const ordersRef = useRef<OrderLite[]>([]);
+  ordersRef.current = orders;
   const pollingIntervalRef = useRef<NodeJS.Timeout | null>(null);
   const isScreenFocusedRef = useRef(false);
 
@@ -103,48 +97,55 @@ const OrdersScreen: React.FC = () => {
       status_label: formatStatusLabel(order.status),
       total: order.total,
       created_at: order.created_at,
-      items: (order.items || []).map((item) => ({
-        id: item.id,
-        product_title: item.product?.title || 'Produit',
-        quantity: item.quantity,
-        price: item.price,
-        weight_unit: item.weight_unit,
-        is_weighted: item.is_weighted,
-      })),
+      item_count: order.item_count ?? 0,
+      first_item_title: order.first_item_title || 'Produit',
     }));
 
-  const loadOrders = async (silent = false) => {
+  // Une page de l'historique, la plus récente en premier, filtrée côté serveur par statut
+  const fetchOrdersPage = async (filter: FilterStatus, cursor?: string | null) => {
+    const params: Record<string, string | number> = { limit: ORDERS_PAGE_SIZE };
+    if (cursor) {
+      params.cursor = cursor;
+    }
+    if (filter !== 'all') {
+      params.status = filter;
+    }
+    const response = await apiClient.get(API_ENDPOINTS.CART_ORDERS, { params });
+    const raw = response.data;
+    const apiOrders: OrderApi[] = Array.isArray(raw?.orders) ? raw.orders : [];
+    return { list: mapOrders(apiOrders), cursor: (raw?.next_cursor as string | null) ?? null };
+  };
+
+  const loadOrders = async (silent = false, filter: FilterStatus = selectedFilterRef.current) => {
     try {
       if (!silent) {
         setIsLoading(true);
       }
-      const response = await apiClient.get(API_ENDPOINTS.CART_ORDERS);
-      const raw = response.data;
-      const apiOrders: OrderApi[] = Array.isArray(raw?.orders)
-        ? raw.orders
-        : Array.isArray(raw)
-        ? raw
-        : Array.isArray(raw?.results)
-        ? raw.results
-        : [];
-
-      let list = mapOrders(apiOrders);
+      const page = await fetchOrdersPage(filter);
+      if (filter !== selectedFilterRef.current) {
+        // Réponse d'un filtre abandonné entre-temps
+        return;
+      }
 
-      if (list.length === 0) {
-        const fallbackResponse = await apiClient.get(API_ENDPOINTS.ORDERS);
-        const fallbackRaw = fallbackResponse.data;
-        const fallbackOrders: OrderApi[] = Array.isArray(fallbackRaw?.orders)
-          ? fallbackRaw.orders
-          : Array.isArray(fallbackRaw)
-          ? fallbackRaw
-          : Array.isArray(fallbackRaw?.results)
-          ? fallbackRaw.results
+      if (silent) {
+        // Rafraîchissement : la première page remplace les commandes récentes,
+        // les pages plus anciennes déjà chargées sont conservées
+        const refreshedIds = new Set(page.list.map((order) => order.id));
+        const oldest = page.list[page.list.length - 1];
+        const older = page.cursor && oldest
+          ? ordersRef.current.filter(
+              (order) => !refreshedIds.has(order.id) && order.created_at < oldest.created_at
+            )
           : [];
-        list = mapOrders(fallbackOrders);
+        setOrders([...page.list, ...older]);
+        if (older.length === 0) {
+          setNextCursor(page.cursor);
+        }
+      } else {
+        setOrders(page.list);
+        setNextCursor(page.cursor);
       }
-      
-      setOrders(list);
-      return list;
+      return page.list;
     } catch (error: any) {
       // Si c'est une erreur de mode hors ligne, gérer silencieusement
       if (error.isOfflineBlocked || error.code === 'OFFLINE_MODE_FORCED') {
@@ -160,11 +161,48 @@ const OrdersScreen: React.FC = () => {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor || isFetchingMore || isLoading) {
+      return;
+    }
+    const filter = selectedFilter;
+    try {
+      setIsFetchingMore(true);
+      const page = await fetchOrdersPage(filter, nextCursor);
+      if (filter !== selectedFilterRef.current) {
+        return;
+      }
+      setOrders((previous) => {
+        const loadedIds = new Set(previous.map((order) => order.id));
+        return [...previous, ...page.list.filter((order) => !loadedIds.has(order.id))];
+      });
+      setNextCursor(page.cursor);
+    } catch (error: any) {
+      if (error.isOfflineBlocked || error.code === 'OFFLINE_MODE_FORCED') {
+        return;
+      }
+      console.error('[OrdersScreen] ❌ Error loading more orders:', error?.message || 'Erreur inconnue');
+    } finally {
+      setIsFetchingMore(false);
+    }
+  };
+
   const onRefresh = async () => {
     setRefreshing(true);
     await loadOrders(true);
   };
 
+  const selectFilter = (filter: FilterStatus) => {
+    if (filter === selectedFilterRef.current) {
+      return;
+    }
+    selectedFilterRef.current = filter;
+    setSelectedFilter(filter);
+    setOrders([]);
+    setNextCursor(null);
+    loadOrders(false, filter);
+  };
+
   // Rafraîchir quand l'écran est focus
   useFocusEffect(
     React.useCallback(() => {
@@ -248,21 +286,14 @@ const OrdersScreen: React.FC = () => {
     return d.toLocaleDateString('fr-FR', { day: '2-digit', month: '2-digit', year: 'numeric' });
   };
 
-  // Filtrer les commandes selon le filtre sélectionné
-  const filteredOrders = useMemo(() => {
-    let filtered: OrderLite[];
-    if (selectedFilter === 'all') {
-      filtered = orders;
-    } else {
-      filtered = orders.filter(order => order.status === selectedFilter);
+  // Résumé des articles : titre du premier article et nombre des autres
+  const formatItemsSummary = (order: OrderLite) => {
+    if (order.item_count <= 1) {
+      return order.first_item_title;
     }
-    
-    const sorted = [...filtered].sort(
-      (a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-    );
-
-    return sorted;
-  }, [orders, selectedFilter]);
+    const others = order.item_count - 1;
+    return `${order.first_item_title} et ${others} autre${others > 1 ? 's' : ''} article${others > 1 ? 's' : ''}`;
+  };
 
   return (
     <ScrollView 
@@ -289,7 +320,7 @@ const OrdersScreen: React.FC = () => {
                 styles.filterChip,
                 selectedFilter === filter.value && styles.filterChipActive
               ]}
-              onPress={() => setSelectedFilter(filter.value)}
+              onPress={() => selectFilter(filter.value)}
             >
               <Text
                 style={[
@@ -307,7 +338,7 @@ const OrdersScreen: React.FC = () => {
       <View style={styles.content}>
         {isLoading ? (
           <LoadingSpinner />
-        ) : filteredOrders.length === 0 ? (
+        ) : orders.length === 0 ? (
           <View style={styles.emptyContainer}>
             <Ionicons
               name="receipt-outline"
@@ -323,7 +354,7 @@ const OrdersScreen: React.FC = () => {
           </View>
         ) : (
           <View style={{ gap: 12 }}>
-            {filteredOrders.map((order) => (
+            {orders.map((order) => (
               <TouchableOpacity
                 key={order.id}
                 style={styles.orderCard}
@@ -337,16 +368,12 @@ const OrdersScreen: React.FC = () => {
                 </View>
                 <Text style={styles.orderDate}>Créée le {formatDate(order.created_at)}</Text>
                 <View style={styles.itemsList}>
-                  {order.items.map((item) => (
-                    <View key={item.id} style={styles.itemRow}>
-                      <Text style={styles.itemTitle}>{item.product_title}</Text>
-                      <Text style={styles.itemQty}>
-                        {item.is_weighted && item.weight_unit
-                          ? `${formatWeightQuantity(Number(item.quantity))} ${item.weight_unit}`
-                          : `x${Math.round(Number(item.quantity))}`}
-                      </Text>
-                    </View>
-                  ))}
+                  <View style={styles.itemRow}>
+                    <Text style={styles.itemTitle} numberOfLines={2}>{formatItemsSummary(order)}</Text>
+                    <Text style={styles.itemQty}>
+                      {`${order.item_count} article${order.item_count > 1 ? 's' : ''}`}
+                    </Text>
+                  </View>
                 </View>
                 <View style={styles.totalRow}>
                   <Text style={styles.totalLabel}>Total</Text>
@@ -354,6 +381,15 @@ const OrdersScreen: React.FC = () => {
                 </View>
               </TouchableOpacity>
             ))}
+            {nextCursor ? (
+              <TouchableOpacity style={styles.footerLoader} onPress={loadMore} disabled={isFetchingMore}>
+                {isFetchingMore ? (
+                  <ActivityIndicator size="small" color={COLORS.PRIMARY} />
+                ) : (
+                  <Text style={styles.footerText}>Charger plus</Text>
+                )}
+              </TouchableOpacity>
+            ) : null}
           </View>
         )}
       </View>
@@ -504,6 +540,16 @@ const styles = StyleSheet.create({
     fontWeight: '700',
     color: COLORS.TEXT,
   },
+  footerLoader: {
+    padding: 20,
+    alignItems: 'center',
+    justifyContent: 'center',
+  },
+  footerText: {
+    fontSize: 14,
+    color: COLORS.PRIMARY,
+    fontWeight: '600',
+  },
 });
 
 export default OrdersScreen;
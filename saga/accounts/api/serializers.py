@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from ..models import Shopper, ShippingAddress
 from cart.models import Order, OrderItem
+from cart.api.serializers import OrderSummarySerializer as CartOrderSummarySerializer
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -51,6 +52,27 @@ class OrderSerializer(serializers.ModelSerializer):
     def get_status_label(self, obj):
         return obj.get_status_display()
 
+
+class OrderSummarySerializer(CartOrderSummarySerializer):
+    """Ligne de l'historique des commandes, champs et format de OrderSerializer sans les articles"""
+    total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta(CartOrderSummarySerializer.Meta):
+        fields = [
+            'id',
+            'order_number',
+            'status',
+            'status_label',
+            'payment_method',
+            'is_paid',
+            'total',
+            'created_at',
+            'item_count',
+            'first_item_title',
+            'first_item_image',
+        ]
+        read_only_fields = fields
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = Shopper
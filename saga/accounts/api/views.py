@@ -1,6 +1,7 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -9,9 +10,13 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.core import signing
 from django.utils import timezone
-from ..models import Shopper, ShippingAddress, LoyaltyHistory
-from .serializers import UserSerializer, AddressSerializer, OrderSerializer
+from ..authentication import invalidate_principal
+from ..models import Shopper, ShippingAddress, LoyaltyAccount, LOYALTY_TIERS
+from .serializers import UserSerializer, AddressSerializer, OrderSummarySerializer
 from cart.models import Order, Cart, CartItem
+from cart.order_history import (
+    ORDER_SUMMARY_FIELDS, history_queryset, order_history_page, parse_page_size, parse_status,
+)
 
 User = get_user_model()
 
@@ -306,39 +311,18 @@ class LoyaltyInfoView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        from cart.models import Order
-        from django.db.models import Sum
-        
-        loyalty_tiers = [
-            {"name": "Bronze", "min_points": 0, "color": "#CD7F32"},
-            {"name": "Argent", "min_points": 20, "color": "#C0C0C0"},
-            {"name": "Or", "min_points": 50, "color": "#FFD700"},
-            {"name": "Diamant", "min_points": 100, "color": "#B9F2FF"},
-        ]
-
-        # Compter les commandes de l'utilisateur
-        total_orders = Order.objects.filter(
-            user=request.user,
-            status__in=['delivered', 'shipped', 'confirmed']
-        ).count()
-        
-        # Calculer le total dépensé (commandes livrées uniquement)
-        total_spent_result = Order.objects.filter(
-            user=request.user,
-            status='delivered'
-        ).aggregate(
-            total=Sum('total')
-        )
-        total_spent = float(total_spent_result['total'] or 0)
-        
-        # Calculer les points de fidélité (1 point par 1000 FCFA dépensés)
-        loyalty_points = int(total_spent / 1000) if total_spent > 0 else 0
-        
+        # Lecture unique par clé primaire du grand livre (aucune écriture)
+        account = LoyaltyAccount.objects.filter(pk=request.user.pk).first()
+        if account is None:
+            account = LoyaltyAccount(user_id=request.user.pk)
+
+        loyalty_tiers = LOYALTY_TIERS
+        total_orders = account.total_orders
+        total_spent = float(account.total_spent)
+        loyalty_points = account.loyalty_points
+
         # Déterminer le niveau de fidélité
-        current_tier_index = 0
-        for idx, tier in enumerate(loyalty_tiers):
-            if loyalty_points >= tier["min_points"]:
-                current_tier_index = idx
+        current_tier_index = LoyaltyAccount.get_tier_index(loyalty_points)
         current_tier = loyalty_tiers[current_tier_index]
         loyalty_level = current_tier["name"]
         loyalty_level_color = current_tier["color"]
@@ -376,34 +360,8 @@ class LoyaltyInfoView(APIView):
             salt="loyalty-qr",
         )
 
-        # Historiser uniquement si le statut a changé
-        last_history = LoyaltyHistory.objects.filter(user=request.user).first()
-        if (
-            not last_history
-            or last_history.loyalty_points != loyalty_points
-            or last_history.loyalty_level != loyalty_level
-            or last_history.total_spent != total_spent
-            or last_history.total_orders != total_orders
-        ):
-            LoyaltyHistory.objects.create(
-                user=request.user,
-                loyalty_points=loyalty_points,
-                loyalty_level=loyalty_level,
-                total_spent=total_spent,
-                total_orders=total_orders,
-                metadata={"source": "api"},
-            )
-
-        history_items = [
-            {
-                "loyalty_points": item.loyalty_points,
-                "loyalty_level": item.loyalty_level,
-                "total_spent": item.total_spent,
-                "total_orders": item.total_orders,
-                "created_at": item.created_at.isoformat(),
-            }
-            for item in LoyaltyHistory.objects.filter(user=request.user)[:10]
-        ]
+        # Historique dénormalisé, maintenu par le grand livre
+        history_items = account.recent_history or []
         
         return Response({
             'fidelys_number': request.user.fidelys_number,
@@ -426,48 +384,37 @@ class LoyaltyInfoView(APIView):
 
 class OrdersListView(generics.ListAPIView):
     """
-    Liste des commandes de l'utilisateur connecté (pour le mobile).
-    Retourne toutes les commandes sans pagination.
+    Historique des commandes de l'utilisateur connecté (pour le mobile).
+    Lignes légères (cart.order_history), la plus récente en premier, par pages de
+    `limit`, filtrables par `status` ; la page suivante est annoncée dans l'en-tête
+    Link (paramètre `cursor`). Les articles sont servis par le détail de la commande.
     """
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = OrderSerializer
-    pagination_class = None  # Désactiver la pagination pour retourner toutes les commandes
+    serializer_class = OrderSummarySerializer
+    pagination_class = None
 
-    def get_queryset(self):
-        """
-        Retourne les commandes triées par statut (actives en premier) puis par date de création.
-        Ordre de priorité des statuts (alignés avec B2B):
-        1. draft, confirmed, shipped (commandes actives)
-        2. delivered (livrées)
-        3. cancelled (annulées)
-        """
-        from django.db.models import Case, When, IntegerField
-        
-        # Définir l'ordre de priorité des statuts (alignés avec B2B)
-        status_priority = Case(
-            When(status=Order.DRAFT, then=1),
-            When(status=Order.CONFIRMED, then=2),
-            When(status=Order.SHIPPED, then=3),
-            When(status=Order.DELIVERED, then=4),
-            When(status=Order.CANCELLED, then=5),
-            default=6,
-            output_field=IntegerField()
-        )
-        
-        # Récupérer toutes les commandes de l'utilisateur
-        queryset = Order.objects.filter(user=self.request.user)
-        
-        # Annoter avec l'ordre de priorité des statuts
-        queryset = queryset.annotate(status_order=status_priority)
-        
-        # Sélectionner les relations pour optimiser les requêtes
-        queryset = queryset.select_related('shipping_address')
-        queryset = queryset.prefetch_related('items__product')
-        
-        # Trier par statut puis par date
-        queryset = queryset.order_by('status_order', '-created_at')
-        
-        return queryset
+    def get_queryset(self, order_status=None):
+        return history_queryset(self.request.user, order_status).only(*ORDER_SUMMARY_FIELDS)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            order_status = parse_status(request.query_params.get('status'))
+        except ValueError:
+            return Response({'error': 'Statut invalide.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            orders, next_cursor = order_history_page(
+                self.get_queryset(order_status),
+                request.query_params.get('cursor'),
+                parse_page_size(request.query_params.get('limit')),
+            )
+        except ValueError:
+            return Response({'error': 'Curseur invalide.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response(self.get_serializer(orders, many=True).data)
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+            response['Link'] = f'<{next_url}>; rel="next"'
+        return response
 
 
 class ChangePasswordView(APIView):
@@ -537,6 +484,7 @@ class LogoutView(APIView):
         except TokenError:
             # Token déjà expiré ou invalide — on considère le logout réussi
             pass
+        invalidate_principal(request.user.pk)
         return Response(
             {'message': 'Déconnexion réussie.'},
             status=status.HTTP_200_OK
@@ -0,0 +1,99 @@
+"""
+Authentification JWT de l'API mobile avec résolution du Shopper en cache.
+
+JWTAuthentication (simplejwt) relit l'utilisateur en base à chaque requête. Ici le
+principal est conservé quelques secondes dans le cache par défaut, sous une clé indexée
+par l'ID utilisateur et sa version de jeton. Toute modification du compte (mot de
+passe, profil, désactivation), la déconnexion (LogoutView), un changement de 2FA ou
+la suppression du compte incrémente la version : le principal en cache devient
+obsolète sans suppression explicite, y compris s'il était en cours de rechargement.
+
+La version n'est vue par tous les workers que si le cache est partagé entre processus
+(Redis, REDIS_URL). Avec un cache propre à chaque processus (LocMem, configuration par
+défaut), une déconnexion ne serait vue que du worker qui l'a traitée : le principal
+est alors relu en base à chaque requête, comme avec JWTAuthentication.
+
+Option JWT_TRUST_CATALOGUE_CLAIMS : sur les endpoints du catalogue en lecture
+(méthodes décorées par core.http_cache.catalogue_cache), le principal est construit
+à partir des claims du jeton (TokenUser), sans accès à la base ni au cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.cache_versions import bump_cache_version, get_cache_version, shared_cache_enabled
+
+PRINCIPAL_CACHE_TIMEOUT = 60  # secondes
+
+
+def _token_version_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+
+def get_token_version(user_id):
+    """Retourne la version de jeton courante d'un utilisateur"""
+    return get_cache_version(_token_version_key(user_id))
+
+
+def invalidate_principal(user_id):
+    """Rend obsolète le principal en cache d'un utilisateur"""
+    bump_cache_version(_token_version_key(user_id))
+
+
+def principal_cache_enabled():
+    """Vrai si le cache par défaut est partagé entre processus (révocation vue de tous les workers)"""
+    return shared_cache_enabled()
+
+
+def principal_cache_key(user_id):
+    return f'auth:principal:{user_id}:v{get_token_version(user_id)}'
+
+
+def trusts_token_claims(request):
+    """Vrai si la requête vise un endpoint du catalogue en lecture et que l'option est active"""
+    if not getattr(settings, 'JWT_TRUST_CATALOGUE_CLAIMS', False) or request.method not in SAFE_METHODS:
+        return False
+    view = (getattr(request, 'parser_context', None) or {}).get('view')
+    handler = getattr(view, getattr(view, 'action', None) or request.method.lower(), None)
+    return getattr(handler, 'trusts_token_claims', False)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication dont le Shopper est lu depuis le cache partagé, s'il y en a un"""
+
+    trust_claims = False
+
+    def authenticate(self, request):
+        # Une instance d'authentification par requête (APIView.get_authenticators)
+        self.trust_claims = trusts_token_claims(request)
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if self.trust_claims:
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        if not principal_cache_enabled():
+            return super().get_user(validated_token)
+
+        key = principal_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Lecture en base, utilisateur actif et révocation vérifiés par simplejwt
+            user = super().get_user(validated_token)
+            cache.set(key, user, getattr(settings, 'JWT_PRINCIPAL_CACHE_TIMEOUT', PRINCIPAL_CACHE_TIMEOUT))
+            return user
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
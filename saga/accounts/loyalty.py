@@ -0,0 +1,123 @@
+"""
+Grand livre de fidélité.
+
+Les totaux de fidélité (commandes, montant dépensé, points, niveau) sont
+maintenus de façon incrémentale à chaque transition de statut ou changement de
+montant d'une commande, au lieu d'être recalculés à chaque lecture.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import LoyaltyAccount, LoyaltyHistory, LOYALTY_HISTORY_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Statuts comptabilisés dans le nombre de commandes
+COUNTED_ORDER_STATUSES = ('confirmed', 'shipped', 'delivered')
+# Seules les commandes livrées comptent dans le montant dépensé
+SPENT_ORDER_STATUS = 'delivered'
+
+
+def _order_contribution(status, total):
+    """Retourne la contribution (commandes, montant) d'une commande dans un statut donné"""
+    if not status:
+        return 0, Decimal('0')
+    orders = 1 if status in COUNTED_ORDER_STATUSES else 0
+    spent = Decimal(str(total or 0)) if status == SPENT_ORDER_STATUS else Decimal('0')
+    return orders, spent
+
+
+def _snapshot(account):
+    return {
+        "loyalty_points": account.loyalty_points,
+        "loyalty_level": account.loyalty_level,
+        "total_spent": float(account.total_spent),
+        "total_orders": account.total_orders,
+    }
+
+
+def _record_history(account, source):
+    """Historise l'état du compte et met à jour l'historique récent dénormalisé"""
+    history = LoyaltyHistory.objects.create(
+        user_id=account.user_id,
+        metadata={"source": source},
+        **_snapshot(account)
+    )
+    entry = _snapshot(account)
+    entry["created_at"] = history.created_at.isoformat()
+    account.recent_history = ([entry] + list(account.recent_history or []))[:LOYALTY_HISTORY_SIZE]
+
+
+def apply_order_transition(user_id, old_status, new_status, total, source='order', old_total=None):
+    """
+    Répercute le passage d'une commande de (old_status, old_total) à (new_status, total)
+    sur le grand livre de l'utilisateur.
+
+    old_status vaut None pour une nouvelle commande ; new_status vaut None
+    pour une commande supprimée. old_total (total tel que comptabilisé jusqu'ici)
+    vaut total par défaut : seule une modification du montant le distingue.
+    """
+    if not user_id:
+        return None
+    if old_total is None:
+        old_total = total
+
+    old_orders, old_spent = _order_contribution(old_status, old_total)
+    new_orders, new_spent = _order_contribution(new_status, total)
+    orders_delta = new_orders - old_orders
+    spent_delta = new_spent - old_spent
+    if not orders_delta and not spent_delta:
+        return None
+
+    with transaction.atomic():
+        account, _ = LoyaltyAccount.objects.select_for_update().get_or_create(user_id=user_id)
+        previous = _snapshot(account)
+        account.total_orders = max(0, account.total_orders + orders_delta)
+        account.total_spent = max(Decimal('0'), account.total_spent + spent_delta)
+        account.refresh_tier()
+        if _snapshot(account) != previous:
+            _record_history(account, source)
+        account.save()
+    return account
+
+
+def rebuild_loyalty_ledger(user_ids=None):
+    """
+    Recalcule entièrement les comptes de fidélité à partir des commandes.
+
+    Retourne le nombre de comptes modifiés.
+    """
+    from cart.models import Order
+
+    orders = Order.objects.filter(user__isnull=False)
+    if user_ids is not None:
+        orders = orders.filter(user_id__in=user_ids)
+    totals = orders.values('user_id').annotate(
+        total_orders=Count('id', filter=Q(status__in=COUNTED_ORDER_STATUSES)),
+        total_spent=Sum('total', filter=Q(status=SPENT_ORDER_STATUS)),
+    ).order_by()
+    totals_by_user = {row['user_id']: row for row in totals}
+
+    accounts = LoyaltyAccount.objects.all()
+    if user_ids is not None:
+        accounts = accounts.filter(user_id__in=user_ids)
+    existing = {account.user_id: account for account in accounts}
+
+    changed = 0
+    with transaction.atomic():
+        for user_id in set(totals_by_user) | set(existing):
+            row = totals_by_user.get(user_id, {})
+            account = existing.get(user_id) or LoyaltyAccount(user_id=user_id)
+            previous = _snapshot(account)
+            account.total_orders = row.get('total_orders') or 0
+            account.total_spent = row.get('total_spent') or Decimal('0')
+            account.refresh_tier()
+            if _snapshot(account) == previous:
+                continue
+            _record_history(account, 'rebuild')
+            account.save()
+            changed += 1
+    return changed
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from accounts.loyalty import rebuild_loyalty_ledger
+
+
+class Command(BaseCommand):
+    help = "Recalcule les comptes de fidélité à partir de l'historique des commandes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Limiter le recalcul à un utilisateur (option répétable)",
+        )
+
+    def handle(self, *args, **options):
+        changed = rebuild_loyalty_ledger(options["user_ids"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Grand livre de fidélité recalculé : {changed} compte(s) mis à jour.")
+        )
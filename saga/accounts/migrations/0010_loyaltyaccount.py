@@ -0,0 +1,60 @@
+# Generated by Django 4.2.10 on 2026-10-19 15:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+
+
+LOYALTY_TIERS = [(100, 'Diamant'), (50, 'Or'), (20, 'Argent'), (0, 'Bronze')]
+
+
+def populate_loyalty_accounts(apps, schema_editor):
+    """Initialise le grand livre de fidélité à partir des commandes existantes"""
+    Order = apps.get_model('cart', 'Order')
+    LoyaltyAccount = apps.get_model('accounts', 'LoyaltyAccount')
+    totals = Order.objects.filter(user__isnull=False).values('user_id').annotate(
+        total_orders=Count('id', filter=Q(status__in=['confirmed', 'shipped', 'delivered'])),
+        total_spent=Sum('total', filter=Q(status='delivered')),
+    ).order_by()
+    accounts = []
+    for row in totals:
+        total_spent = row['total_spent'] or 0
+        loyalty_points = int(total_spent // 1000) if total_spent > 0 else 0
+        loyalty_level = next(name for min_points, name in LOYALTY_TIERS if loyalty_points >= min_points)
+        accounts.append(LoyaltyAccount(
+            user_id=row['user_id'],
+            total_orders=row['total_orders'],
+            total_spent=total_spent,
+            loyalty_points=loyalty_points,
+            loyalty_level=loyalty_level,
+        ))
+    LoyaltyAccount.objects.bulk_create(accounts, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_historicalshopper_notifications_enabled_and_more'),
+        ('cart', '0004_order_status_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoyaltyAccount',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='loyalty_account', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('loyalty_points', models.PositiveIntegerField(default=0)),
+                ('loyalty_level', models.CharField(choices=[('Bronze', 'Bronze'), ('Argent', 'Argent'), ('Or', 'Or'), ('Diamant', 'Diamant')], default='Bronze', max_length=20)),
+                ('recent_history', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Compte fidélité',
+                'verbose_name_plural': 'Comptes fidélité',
+            },
+        ),
+        migrations.RunPython(populate_loyalty_accounts, migrations.RunPython.noop),
+    ]
@@ -177,6 +177,53 @@ class LoyaltyHistory(models.Model):
         return f"{self.user.email} - {self.loyalty_level} - {self.loyalty_points} pts"
 
 
+# Paliers de fidélité (1 point par 1000 FCFA dépensés sur les commandes livrées)
+LOYALTY_TIERS = [
+    {"name": "Bronze", "min_points": 0, "color": "#CD7F32"},
+    {"name": "Argent", "min_points": 20, "color": "#C0C0C0"},
+    {"name": "Or", "min_points": 50, "color": "#FFD700"},
+    {"name": "Diamant", "min_points": 100, "color": "#B9F2FF"},
+]
+LOYALTY_POINT_VALUE = 1000
+LOYALTY_HISTORY_SIZE = 10
+
+
+class LoyaltyAccount(models.Model):
+    """
+    Grand livre de fidélité : totaux courants d'un utilisateur.
+
+    Mis à jour à chaque transition de statut de commande (voir accounts.loyalty),
+    lu par clé primaire par les vues de fidélité.
+    """
+    user = models.OneToOneField(Shopper, on_delete=models.CASCADE, primary_key=True, related_name="loyalty_account")
+    total_orders = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    loyalty_points = models.PositiveIntegerField(default=0)
+    loyalty_level = models.CharField(max_length=20, choices=LOYALTY_LEVEL_CHOICES, default="Bronze")
+    recent_history = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Compte fidélité"
+        verbose_name_plural = "Comptes fidélité"
+
+    def __str__(self):
+        return f"{self.user_id} - {self.loyalty_level} - {self.loyalty_points} pts"
+
+    @staticmethod
+    def get_tier_index(loyalty_points):
+        current_tier_index = 0
+        for idx, tier in enumerate(LOYALTY_TIERS):
+            if loyalty_points >= tier["min_points"]:
+                current_tier_index = idx
+        return current_tier_index
+
+    def refresh_tier(self):
+        """Recalcule les points et le niveau à partir du total dépensé"""
+        self.loyalty_points = int(self.total_spent // LOYALTY_POINT_VALUE) if self.total_spent > 0 else 0
+        self.loyalty_level = LOYALTY_TIERS[self.get_tier_index(self.loyalty_points)]["name"]
+
+
 class ShippingAddress(models.Model):
     CITY_CHOICES = [
         ('BKO', 'Bamako'),
@@ -3,11 +3,17 @@ from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
 from django.contrib.auth.signals import user_login_failed, user_logged_in
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from accounts.authentication import invalidate_principal
+
 
 logger = logging.getLogger('security')
 
+# Champs dont l'écriture seule n'invalide pas le principal JWT en cache
+PRINCIPAL_BOOKKEEPING_FIELDS = frozenset({'last_login', 'updated_at'})
+
 
 def _get_client_ip(request):
     if not request:
@@ -55,3 +61,34 @@ def reset_failed_login_counter(sender, request, user, **kwargs):
     client_ip = _get_client_ip(request)
     if client_ip:
         cache.delete(f"login_failed:{client_ip}")
+
+
+@receiver(post_delete, sender='cart.Order')
+def remove_deleted_order_from_loyalty_ledger(sender, instance, **kwargs):
+    """Retire une commande supprimée des totaux de fidélité de son utilisateur"""
+    from accounts.loyalty import apply_order_transition
+    # Retirer ce qui a été comptabilisé : état chargé de la base, pas d'éventuelles modifications en mémoire
+    status = getattr(instance, '_loaded_status', instance.status)
+    total = getattr(instance, '_loaded_total', instance.total)
+    apply_order_transition(instance.user_id, status, None, total, source='order_deleted')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_principal(sender, instance, update_fields=None, **kwargs):
+    """Mot de passe, profil, désactivation ou suppression : principal JWT en cache obsolète"""
+    # Écritures de suivi (last_login à chaque connexion) : le principal reste valable
+    if update_fields and set(update_fields) <= PRINCIPAL_BOOKKEEPING_FIELDS:
+        return
+    invalidate_principal(instance.pk)
+
+
+@receiver(post_save, sender='otp_totp.TOTPDevice')
+@receiver(post_delete, sender='otp_totp.TOTPDevice')
+@receiver(post_save, sender='accounts.TOTPDevice')
+@receiver(post_delete, sender='accounts.TOTPDevice')
+@receiver(post_save, sender='otp_static.StaticDevice')
+@receiver(post_delete, sender='otp_static.StaticDevice')
+def invalidate_principal_on_2fa_change(sender, instance, **kwargs):
+    """Activation, confirmation ou suppression d'un appareil 2FA"""
+    invalidate_principal(instance.user_id)
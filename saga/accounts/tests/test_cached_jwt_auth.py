@@ -0,0 +1,102 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django_otp.plugins.otp_totp.models import TOTPDevice
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import CachedJWTAuthentication
+
+User = get_user_model()
+
+
+# Cache partagé entre processus (comme Redis en production) : seul cas où le principal est mis en cache
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='saga-test-cache-'),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class CachedJWTAuthenticationTestCase(TestCase):
+    """Résolution du Shopper JWT depuis le cache et invalidation"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='client@example.com', password='motdepasse-solide')
+        self.refresh = RefreshToken.for_user(self.user)
+        self.header = f'Bearer {self.refresh.access_token}'
+
+    def authenticate(self):
+        request = APIView().initialize_request(APIRequestFactory().get('/api/profile/', HTTP_AUTHORIZATION=self.header))
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_principal_served_from_cache_until_account_changes(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+        self.user.set_password('nouveau-motdepasse')
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+        TOTPDevice.objects.create(user=self.user, name='default', confirmed=False)
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_last_login_write_keeps_principal(self):
+        self.authenticate()
+        update_last_login(None, self.user)
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+        self.user.is_active = False
+        self.user.save(update_fields=['is_active'])
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_process_local_cache_reads_database_every_time(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            for _ in range(2):
+                with self.assertNumQueries(1):
+                    self.assertEqual(self.authenticate(), self.user)
+
+    def test_logout_invalidates_principal(self):
+        self.authenticate()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.header)
+        response = client.post('/api/token/logout/', {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    def test_catalogue_reads_trust_token_claims_when_enabled(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.header)
+
+        response = client.get('/api/products/')
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+        with override_settings(JWT_TRUST_CATALOGUE_CLAIMS=True):
+            response = client.get('/api/products/')
+            self.assertEqual(response.status_code, 200)
+            self.assertIsInstance(response.wsgi_request.user, TokenUser)
+            self.assertEqual(response.wsgi_request.user.id, self.user.pk)
+
+            # Hors catalogue : toujours le Shopper
+            response = client.get('/api/profile/')
+            self.assertEqual(response.wsgi_request.user, self.user)
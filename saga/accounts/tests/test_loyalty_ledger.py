@@ -0,0 +1,114 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.loyalty import rebuild_loyalty_ledger
+from accounts.models import LoyaltyAccount, LoyaltyHistory
+from cart.models import Order
+
+User = get_user_model()
+
+
+class LoyaltyLedgerTestCase(TestCase):
+    """Tests du grand livre de fidélité"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='fidele@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _create_order(self, total):
+        return Order.objects.create(
+            user=self.user,
+            subtotal=Decimal(total),
+            shipping_cost=Decimal('0'),
+            total=Decimal(total),
+        )
+
+    def test_ledger_follows_status_transitions(self):
+        order = self._create_order('25000')
+        self.assertFalse(LoyaltyAccount.objects.filter(pk=self.user.pk).exists())
+
+        order.mark_as_paid()
+        account = LoyaltyAccount.objects.get(pk=self.user.pk)
+        self.assertEqual(account.total_orders, 1)
+        self.assertEqual(account.loyalty_points, 0)
+
+        order.mark_as_shipped()
+        order.mark_as_delivered()
+        account.refresh_from_db()
+        self.assertEqual(account.total_orders, 1)
+        self.assertEqual(account.total_spent, Decimal('25000'))
+        self.assertEqual(account.loyalty_points, 25)
+        self.assertEqual(account.loyalty_level, 'Argent')
+
+        order.cancel('retour')
+        account.refresh_from_db()
+        self.assertEqual(account.total_orders, 0)
+        self.assertEqual(account.total_spent, Decimal('0'))
+        self.assertEqual(account.loyalty_level, 'Bronze')
+
+    def test_loyalty_info_is_a_single_read_without_writes(self):
+        order = self._create_order('60000')
+        order.mark_as_paid()
+        order.mark_as_delivered()
+        history_count = LoyaltyHistory.objects.count()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('accounts_api:loyalty_info'))
+
+        # Les middlewares ont leurs propres requêtes : seules celles de la vue nous intéressent
+        loyalty_queries = [q['sql'] for q in queries if 'loyalty' in q['sql']]
+        self.assertEqual(len(loyalty_queries), 1)
+        self.assertTrue(loyalty_queries[0].startswith('SELECT'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['loyalty_points'], 60)
+        self.assertEqual(response.data['loyalty_level'], 'Or')
+        self.assertEqual(response.data['total_orders'], 1)
+        self.assertEqual(response.data['history'][0]['loyalty_points'], 60)
+        self.assertEqual(LoyaltyHistory.objects.count(), history_count)
+
+    def test_loyalty_info_without_orders(self):
+        response = self.client.get(reverse('accounts_api:loyalty_info'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['loyalty_points'], 0)
+        self.assertEqual(response.data['loyalty_level'], 'Bronze')
+        self.assertEqual(response.data['history'], [])
+
+    def test_rebuild_restores_drifted_ledger(self):
+        order = self._create_order('30000')
+        order.mark_as_paid()
+        order.mark_as_delivered()
+        LoyaltyAccount.objects.filter(pk=self.user.pk).update(total_orders=7, loyalty_points=0)
+
+        self.assertEqual(rebuild_loyalty_ledger(), 1)
+
+        account = LoyaltyAccount.objects.get(pk=self.user.pk)
+        self.assertEqual(account.total_orders, 1)
+        self.assertEqual(account.loyalty_points, 30)
+
+    def test_ledger_follows_total_edits_and_deletion(self):
+        order = self._create_order('30000')
+        order.mark_as_paid()
+        order.mark_as_delivered()
+
+        # Montant corrigé sur une commande livrée, depuis une instance rechargée
+        order = Order.objects.get(pk=order.pk)
+        order.total = Decimal('45000')
+        order.save()
+        account = LoyaltyAccount.objects.get(pk=self.user.pk)
+        self.assertEqual(account.total_spent, Decimal('45000'))
+        self.assertEqual(rebuild_loyalty_ledger(), 0)
+
+        # Modification en mémoire non enregistrée puis suppression : retirer le montant comptabilisé
+        order.total = Decimal('1')
+        order.delete()
+        account.refresh_from_db()
+        self.assertEqual((account.total_orders, account.total_spent), (0, Decimal('0')))
+        self.assertEqual(rebuild_loyalty_ledger(), 0)
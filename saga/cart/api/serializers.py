@@ -172,4 +172,40 @@ class OrderSerializer(serializers.ModelSerializer):
             'items',
             'status_history',
             'metadata',
-        ]
\ No newline at end of file
+        ]
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Ligne de l'historique des commandes (cart.order_history) : sans articles ni produits"""
+    status_label = serializers.CharField(source='get_status_display', read_only=True)
+    item_count = serializers.IntegerField(source='summary.item_count', read_only=True)
+    first_item_title = serializers.CharField(source='summary.first_item_title', read_only=True)
+    first_item_image = serializers.SerializerMethodField()
+    subtotal = serializers.FloatField()
+    shipping_cost = serializers.FloatField()
+    total = serializers.FloatField()
+
+    class Meta:
+        model = Order
+        fields = [
+            'id',
+            'order_number',
+            'status',
+            'status_label',
+            'payment_method',
+            'is_paid',
+            'created_at',
+            'subtotal',
+            'shipping_cost',
+            'total',
+            'item_count',
+            'first_item_title',
+            'first_item_image',
+        ]
+        read_only_fields = fields
+
+    def get_first_item_image(self, obj):
+        url = getattr(obj, 'thumbnail_url', '')
+        request = self.context.get('request')
+        if url and request and url.startswith('/') and not url.startswith('//'):
+            return request.build_absolute_uri(url)
+        return url or None
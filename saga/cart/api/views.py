@@ -9,11 +9,15 @@ from django.core.cache import cache
 from django.utils import timezone
 from django.urls import reverse
 from decimal import Decimal
-from .serializers import CartSerializer, CartItemSerializer, OrderSerializer
+from .serializers import CartSerializer, CartItemSerializer, OrderSerializer, OrderSummarySerializer
 from cart.models import Cart, CartItem, Order, OrderItem
+from cart.order_history import (
+    ORDER_SUMMARY_FIELDS, history_queryset, order_history_page, parse_page_size, parse_status,
+)
 from product.models import Product, Phone, ShippingMethod
 from accounts.models import ShippingAddress
 from cart.services import CartService
+from cart.payment_config import resolve_cart_shipping
 from cart.orange_money_service import orange_money_service
 from inventory.services import OrderSyncService
 import stripe
@@ -617,16 +621,12 @@ class CartViewSet(viewsets.ModelViewSet):
             )
             return Response({'error': errors[0] if errors else 'Panier invalide'}, status=status.HTTP_400_BAD_REQUEST)
             
-        cart_items = cart.cart_items.select_related(
-            'product',
-            'variant'
-        ).prefetch_related(
-            'colors',
-            'sizes',
-            'product__shipping_methods'
+        shipping_resolution = resolve_cart_shipping(
+            cart.cart_items.select_related('variant').prefetch_related('colors', 'sizes')
         )
+        cart_items = shipping_resolution.items
 
-        default_shipping_method = ShippingMethod.objects.first()
+        default_shipping_method = shipping_resolution.default_method
         default_method_option = None
         if default_shipping_method:
             default_method_option = {
@@ -807,17 +807,7 @@ class CartViewSet(viewsets.ModelViewSet):
                             metadata=metadata
                         )
 
-                    for item in group['items']:
-                        order_item = OrderItem.objects.create(
-                            order=order,
-                            product=item.product,
-                            quantity=item.quantity,
-                            price=item.get_unit_price()
-                        )
-                        if item.colors.exists():
-                            order_item.colors.set(item.colors.all())
-                        if item.sizes.exists():
-                            order_item.sizes.set(item.sizes.all())
+                    OrderItem.create_from_cart_items(order, group['items'], price=CartItem.get_unit_price)
 
                     group_orders.append({
                         'order': order,
@@ -1453,14 +1443,24 @@ class CartViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='orders', permission_classes=[IsAuthenticated])
     def orders(self, request):
-        orders = (
-            Order.objects.filter(user=request.user)
-            .select_related('shipping_address', 'shipping_method')
-            .prefetch_related('items__product', 'status_history')
-            .order_by('-created_at')
-        )
-        serializer = OrderSerializer(orders, many=True, context={'request': request})
-        return Response({'orders': serializer.data})
+        """
+        Historique paginé par curseur (cart.order_history), filtrable par `status` ;
+        articles dans order_detail
+        """
+        try:
+            order_status = parse_status(request.query_params.get('status'))
+        except ValueError:
+            return Response({'error': 'Statut invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            orders, next_cursor = order_history_page(
+                history_queryset(request.user, order_status).only(*ORDER_SUMMARY_FIELDS),
+                request.query_params.get('cursor'),
+                parse_page_size(request.query_params.get('limit')),
+            )
+        except ValueError:
+            return Response({'error': 'Curseur invalide'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = OrderSummarySerializer(orders, many=True, context={'request': request})
+        return Response({'orders': serializer.data, 'next_cursor': next_cursor})
 
     @action(detail=False, methods=['get'], url_path='orders/(?P<order_id>[^/.]+)', permission_classes=[IsAuthenticated])
     def order_detail(self, request, order_id=None):
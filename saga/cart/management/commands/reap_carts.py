@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cart.tasks import DEFAULT_REAPER_BATCH_SIZE, reap_carts
+
+
+class Command(BaseCommand):
+    help = "Purge les paniers abandonnés (à planifier en cron, ex. toutes les heures)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "CART_REAPER_BATCH_SIZE", DEFAULT_REAPER_BATCH_SIZE),
+            help="Nombre d'identifiants de paniers examinés par transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Affiche ce qui serait supprimé sans rien supprimer",
+        )
+
+    def handle(self, *args, **options):
+        report = reap_carts(batch_size=options["batch_size"], dry_run=options["dry_run"])
+
+        prefix = "[DRY RUN] " if report["dry_run"] else ""
+        for rule, count in report["rules"].items():
+            self.stdout.write(f"{prefix}{rule}: {count} panier(s)")
+        for label, count in report["deleted"].items():
+            self.stdout.write(f"- {label}: {count} ligne(s) supprimée(s)")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{sum(report['rules'].values())} panier(s) expiré(s) "
+                f"en {report['batches']} lot(s), {report['duration']:.2f}s."
+            )
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from cart.models import Order
+from cart.order_history import refresh_order_summary
+
+
+class Command(BaseCommand):
+    help = "Construit les lignes d'historique des commandes (OrderSummary) manquantes ou toutes avec --all"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recalcule aussi les lignes existantes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Nombre d'identifiants de commandes lus par requête",
+        )
+
+    def handle(self, *args, **options):
+        orders = Order.objects.order_by("id")
+        if not options["all"]:
+            orders = orders.filter(summary__isnull=True)
+
+        count = 0
+        for order_id in orders.values_list("id", flat=True).iterator(chunk_size=options["batch_size"]):
+            refresh_order_summary(order_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{count} ligne(s) d'historique construite(s)."))
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0004_order_status_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSummary',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='cart.order')),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('first_item_title', models.CharField(blank=True, max_length=200)),
+                ('first_item_image', models.CharField(blank=True, max_length=500)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,7 +1,9 @@
 import logging
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connection, models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.db.models import Sum, F
 from product.models import Product, Color, Size, ShippingMethod
 from django.conf import settings
@@ -115,16 +117,7 @@ class Cart(models.Model):
             cart = cls.objects.filter(session_key=session_key).first()
             
             if not cart:
-                # Vérifier qu'il n'y a pas trop de paniers anonymes (protection anti-spam)
-                anonymous_carts_count = cls.objects.filter(session_key__isnull=False).count()
-                if anonymous_carts_count > 1000:  # Limite arbitraire
-                    # Supprimer les anciens paniers anonymes
-                    old_carts = cls.objects.filter(
-                        session_key__isnull=False,
-                        created_at__lt=timezone.now() - timezone.timedelta(hours=24)
-                    )
-                    old_carts.delete()
-                
+                # La purge des paniers abandonnés est faite hors requête (cart.tasks.reap_carts)
                 cart = cls.objects.create(session_key=session_key)
         
         return cart
@@ -290,6 +283,9 @@ class Order(models.Model):
 
     def _log_time_event(self, event_label):
         logger = logging.getLogger('saga.cart')
+        # Trace de diagnostic des fuseaux horaires : formatée seulement si le niveau DEBUG est actif
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
         default_tz = timezone.get_default_timezone()
         def _format_dt(value):
             if not value:
@@ -303,7 +299,7 @@ class Order(models.Model):
                 'local': local_value.isoformat(),
             }
 
-        logger.info(
+        logger.debug(
             "[order_time] event=%s order_id=%s order_number=%s tz=%s use_tz=%s created_at=%s updated_at=%s paid_at=%s now=%s now_local=%s",
             event_label,
             self.id,
@@ -336,12 +332,63 @@ class Order(models.Model):
                 str(e),
             )
 
+    def _update_loyalty_ledger(self, old_status, new_status, total, old_total=None):
+        if not self.user_id:
+            return
+        try:
+            from accounts.loyalty import apply_order_transition
+            apply_order_transition(self.user_id, old_status, new_status, total, old_total=old_total)
+        except Exception as e:
+            logger = logging.getLogger('saga.cart')
+            logger.warning(
+                "Loyalty ledger update failed: order=%s old=%s new=%s error=%s",
+                self.id,
+                old_status,
+                new_status,
+                str(e),
+            )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Statut et montant tels que chargés, pour détecter une transition sans relire la ligne
+        if 'status' in field_names and 'total' in field_names:
+            instance._loaded_status = values[field_names.index('status')]
+            instance._loaded_total = values[field_names.index('total')]
+        return instance
+
+    def _get_previous_state(self):
+        """(statut, total) enregistrés en base avant cette sauvegarde"""
+        if hasattr(self, '_loaded_status'):
+            return self._loaded_status, self._loaded_total
+        # Instance construite hors from_db (ou champ différé) : relire le statut et le montant
+        return Order.objects.filter(pk=self.pk).values_list('status', 'total').first() or (None, None)
+
+    def _allocate_order_number(self):
+        """
+        Réserve l'identifiant dans la séquence de la table avant l'insertion,
+        pour écrire le numéro de commande dans le même INSERT.
+        """
+        if connection.vendor != 'postgresql':
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id'))",
+                [self._meta.db_table]
+            )
+            self.id = cursor.fetchone()[0]
+        self.order_number = f"CMD-{timezone.now().strftime('%Y%m%d')}-{self.id:04d}"
+        return True
+
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        previous_status = None
-        if not is_new:
-            previous_status = Order.objects.filter(pk=self.pk).values_list('status', flat=True).first()
-        if not self.order_number:
+        is_new = self._state.adding
+        previous_status, previous_total = (None, None) if is_new else self._get_previous_state()
+        numbered_here = not self.order_number
+
+        if is_new and not self.order_number and self.pk is None and self._allocate_order_number():
+            kwargs['force_insert'] = True
+            super().save(*args, **kwargs)
+        elif not self.order_number:
             # Sauvegarder d'abord pour avoir un ID
             super().save(*args, **kwargs)
             # Générer le numéro de commande
@@ -349,15 +396,25 @@ class Order(models.Model):
             # Sauvegarder à nouveau avec le numéro de commande
             kwargs['force_insert'] = False
             super().save(*args, **kwargs)
-            if is_new:
-                self._log_time_event('order_created')
-                self._log_status_change(previous_status, self.status, note='initial')
-            elif previous_status and previous_status != self.status:
-                self._log_status_change(previous_status, self.status)
         else:
             super().save(*args, **kwargs)
-            if previous_status and previous_status != self.status:
-                self._log_status_change(previous_status, self.status)
+        # Valeurs désormais en base : un champ exclu de update_fields garde sa valeur précédente
+        update_fields = kwargs.get('update_fields')
+        saved_status = self.status if is_new or update_fields is None or 'status' in update_fields else previous_status
+        saved_total = self.total if is_new or update_fields is None or 'total' in update_fields else previous_total
+        self._loaded_status, self._loaded_total = saved_status, saved_total
+
+        if is_new:
+            if numbered_here:
+                self._log_time_event('order_created')
+                self._log_status_change(None, self.status, note='initial')
+            self._update_loyalty_ledger(None, self.status, self.total)
+        elif previous_status:
+            if previous_status != saved_status:
+                self._log_status_change(previous_status, saved_status)
+            # Transition de statut ou montant modifié : le grand livre suit les deux
+            if (previous_status, previous_total) != (saved_status, saved_total):
+                self._update_loyalty_ledger(previous_status, saved_status, saved_total, old_total=previous_total)
 
     def get_total_items(self):
         return self.items.aggregate(total=models.Sum('quantity'))['total'] or 0
@@ -447,6 +504,62 @@ class OrderItem(models.Model):
     def __str__(self):
         return f"{self.quantity} of {self.product.title} in Order {self.order.id}"
 
+    @staticmethod
+    def default_cart_item_price(cart_item):
+        """Prix promotionnel du produit si disponible, sinon le prix normal"""
+        product = cart_item.product
+        return product.discount_price if hasattr(product, 'discount_price') and product.discount_price else product.price
+
+    @classmethod
+    def create_from_cart_items(cls, order, cart_items, price=None, with_options=True):
+        """
+        Convertit des articles de panier en articles de commande en écritures groupées :
+        un INSERT pour les articles, puis un par table de couleurs / tailles.
+
+        Args:
+            order: Commande cible
+            cart_items: QuerySet ou liste de CartItem
+            price: Fonction cart_item -> prix unitaire (défaut : default_cart_item_price)
+            with_options: Recopier les couleurs et tailles sélectionnées
+        """
+        price = price or cls.default_cart_item_price
+        if isinstance(cart_items, models.QuerySet):
+            cart_items = cart_items.select_related('product', 'variant')
+            if with_options:
+                cart_items = cart_items.prefetch_related('colors', 'sizes')
+        cart_items = list(cart_items)
+        if not cart_items:
+            return []
+        if with_options:
+            models.prefetch_related_objects(cart_items, 'colors', 'sizes')
+
+        order_items = cls.objects.bulk_create([
+            cls(order=order, product=item.product, quantity=item.quantity, price=price(item))
+            for item in cart_items
+        ])
+
+        if with_options:
+            color_links = []
+            size_links = []
+            for order_item, item in zip(order_items, cart_items):
+                color_links.extend(
+                    cls.colors.through(orderitem_id=order_item.pk, color_id=color.pk)
+                    for color in item.colors.all()
+                )
+                size_links.extend(
+                    cls.sizes.through(orderitem_id=order_item.pk, size_id=size.pk)
+                    for size in item.sizes.all()
+                )
+            if color_links:
+                cls.colors.through.objects.bulk_create(color_links)
+            if size_links:
+                cls.sizes.through.objects.bulk_create(size_links)
+
+        # bulk_create n'émet pas post_save : ligne d'historique mise à jour ici
+        from cart.order_history import refresh_order_summary
+        refresh_order_summary(order.pk)
+        return order_items
+
 
 class OrderStatusHistory(models.Model):
     order = models.ForeignKey(Order, related_name='status_history', on_delete=models.CASCADE)
@@ -458,3 +571,43 @@ class OrderStatusHistory(models.Model):
 
     class Meta:
         ordering = ['-changed_at']
+
+
+class OrderSummary(models.Model):
+    """
+    Ligne de l'historique des commandes (cart.order_history) : données des articles
+    dénormalisées pour lister les commandes sans charger leurs articles ni produits.
+    Statut et totaux sont lus sur la commande, jointe par clé primaire.
+    """
+    order = models.OneToOneField(Order, primary_key=True, related_name='summary', on_delete=models.CASCADE)
+    item_count = models.PositiveIntegerField(default=0)
+    first_item_title = models.CharField(max_length=200, blank=True)
+    # Clé de stockage ou URL externe de la miniature (les URLs signées expirent)
+    first_item_image = models.CharField(max_length=500, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Résumé de la commande {self.order_id}"
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def touch_cart_on_item_change(sender, instance, origin=None, **kwargs):
+    """
+    Article ajouté, modifié ou retiré : Cart.updated_at suit l'activité du panier,
+    dont la purge (cart.tasks.reap_carts) mesure la durée de vie.
+    """
+    if getattr(origin, 'model', type(origin)) is Cart:
+        # Suppression en cascade du panier lui-même (instance ou QuerySet de Cart)
+        return
+    Cart.objects.filter(pk=instance.cart_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def refresh_order_summary_on_item_change(sender, instance, **kwargs):
+    """Article ajouté, modifié ou retiré : ligne d'historique de sa commande à jour"""
+    if instance.order_id:
+        from cart.order_history import refresh_order_summary
+        # Mise à jour seule : pendant la suppression en cascade d'une commande, ne pas recréer la ligne
+        refresh_order_summary(instance.order_id, create=False)
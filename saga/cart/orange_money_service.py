@@ -14,9 +14,14 @@ from typing import Dict, Optional, Tuple
 from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
+from asgiref.sync import sync_to_async
+
+from saga.utils.async_http import async_http_client
 
 logger = logging.getLogger(__name__)
 
+ACCESS_TOKEN_CACHE_KEY = 'orange_money_access_token'
+
 
 class OrangeMoneyService:
     """
@@ -27,16 +32,22 @@ class OrangeMoneyService:
         self._config = None
         self._webhooks_config = None
         self.session = requests.Session()
-        self.session.timeout = 600  # Valeur par défaut
     
     @property
     def config(self):
         """Récupère la configuration Orange Money (toujours à jour)"""
         if self._config is None:
             self._config = settings.ORANGE_MONEY_CONFIG
-            self.session.timeout = self._config.get('timeout', 600)
         return self._config
     
+    @property
+    def timeout(self):
+        """
+        Timeout des appels à l'API (secondes). requests ignore un attribut
+        timeout posé sur la session : il est passé explicitement à chaque appel.
+        """
+        return self.config.get('timeout', 600)
+    
     @property
     def webhooks_config(self):
         """Récupère la configuration des webhooks (toujours à jour)"""
@@ -83,52 +94,72 @@ class OrangeMoneyService:
             return None
         
         # Vérifier le cache d'abord
-        cache_key = 'orange_money_access_token'
-        cached_token = cache.get(cache_key)
+        cached_token = cache.get(ACCESS_TOKEN_CACHE_KEY)
         if cached_token:
             logger.info("Token Orange Money récupéré depuis le cache")
             return cached_token
         
         try:
-            # Créer les credentials Basic Auth
-            credentials = f"{self.config['client_id']}:{self.config['client_secret']}"
-            encoded_credentials = base64.b64encode(credentials.encode()).decode()
-            
-            headers = {
+            request_kwargs = self._token_request()
+            logger.info(f"Demande de token Orange Money vers {self.config['token_url']}")
+            response = self.session.post(timeout=self.timeout, **request_kwargs)
+            return self._store_access_token(response)
+        except Exception as e:
+            logger.error(f"Exception lors de la récupération du token Orange Money: {str(e)}")
+            return None
+    
+    async def aget_access_token(self) -> Optional[str]:
+        """Version asynchrone de get_access_token (vues ASGI)"""
+        if not self.is_enabled():
+            logger.error("Orange Money n'est pas configuré correctement")
+            return None
+        
+        cached_token = await cache.aget(ACCESS_TOKEN_CACHE_KEY)
+        if cached_token:
+            logger.info("Token Orange Money récupéré depuis le cache")
+            return cached_token
+        
+        try:
+            request_kwargs = self._token_request()
+            logger.info(f"Demande de token Orange Money vers {self.config['token_url']}")
+            async with async_http_client(timeout=self.timeout) as client:
+                response = await client.post(**request_kwargs)
+            return await sync_to_async(self._store_access_token)(response)
+        except Exception as e:
+            logger.error(f"Exception lors de la récupération du token Orange Money: {str(e)}")
+            return None
+    
+    def _token_request(self) -> Dict:
+        """Paramètres de la requête de token (Basic Auth client_credentials)"""
+        credentials = f"{self.config['client_id']}:{self.config['client_secret']}"
+        encoded_credentials = base64.b64encode(credentials.encode()).decode()
+        return {
+            'url': self.config['token_url'],
+            'headers': {
                 'Authorization': f'Basic {encoded_credentials}',
                 'Content-Type': 'application/x-www-form-urlencoded',
                 'Accept': 'application/json'
-            }
-            
-            data = {
+            },
+            'data': {
                 'grant_type': 'client_credentials'
-            }
+            },
+        }
+    
+    def _store_access_token(self, response) -> Optional[str]:
+        """Extrait le token de la réponse (requests ou httpx) et le met en cache"""
+        if response.status_code == 200:
+            token_data = response.json()
+            access_token = token_data.get('access_token')
+            expires_in = token_data.get('expires_in', 3600)
             
-            logger.info(f"Demande de token Orange Money vers {self.config['token_url']}")
-            response = self.session.post(
-                self.config['token_url'],
-                headers=headers,
-                data=data
-            )
+            # Mettre en cache le token (expire 5 minutes avant la vraie expiration)
+            cache_timeout = max(expires_in - 300, 60)
+            cache.set(ACCESS_TOKEN_CACHE_KEY, access_token, cache_timeout)
             
-            if response.status_code == 200:
-                token_data = response.json()
-                access_token = token_data.get('access_token')
-                expires_in = token_data.get('expires_in', 3600)
-                
-                # Mettre en cache le token (expire 5 minutes avant la vraie expiration)
-                cache_timeout = max(expires_in - 300, 60)
-                cache.set(cache_key, access_token, cache_timeout)
-                
-                logger.info("Token Orange Money obtenu avec succès")
-                return access_token
-            else:
-                logger.error(f"Erreur lors de la récupération du token: {response.status_code} - {response.text}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Exception lors de la récupération du token Orange Money: {str(e)}")
-            return None
+            logger.info("Token Orange Money obtenu avec succès")
+            return access_token
+        logger.error(f"Erreur lors de la récupération du token: {response.status_code} - {response.text}")
+        return None
     
     def validate_payment_data(self, order_data: Dict) -> Tuple[bool, str]:
         """
@@ -189,28 +220,64 @@ class OrangeMoneyService:
         Returns:
             Tuple (success, response_data)
         """
-        if not self.is_enabled():
-            return False, {'error': 'Orange Money non configuré'}
-        
-        # Validation des données avant envoi
-        is_valid, error_message = self.validate_payment_data(order_data)
-        if not is_valid:
-            logger.error(f"Données de paiement invalides: {error_message}")
-            return False, {'error': f'Données invalides: {error_message}'}
+        error = self._payment_session_error(order_data)
+        if error:
+            return False, error
         
         access_token = self.get_access_token()
         if not access_token:
             return False, {'error': 'Impossible d\'obtenir le token d\'accès'}
         
         try:
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Accept': 'application/json',
-                'Content-Type': 'application/json'
-            }
-            
-            # Les URLs sont déjà complètes dans order_data
-            payment_data = {
+            logger.info(f"Création de session de paiement pour la commande {order_data['order_id']}")
+            response = self.session.post(
+                timeout=self.timeout, **self._payment_session_request(order_data, access_token)
+            )
+            return self._payment_session_result(response)
+        except Exception as e:
+            error_msg = f"Exception lors de la création de session: {str(e)}"
+            logger.error(error_msg)
+            return False, {'error': error_msg}
+    
+    async def acreate_payment_session(self, order_data: Dict) -> Tuple[bool, Dict]:
+        """Version asynchrone de create_payment_session (vues ASGI)"""
+        error = self._payment_session_error(order_data)
+        if error:
+            return False, error
+        
+        access_token = await self.aget_access_token()
+        if not access_token:
+            return False, {'error': 'Impossible d\'obtenir le token d\'accès'}
+        
+        try:
+            logger.info(f"Création de session de paiement pour la commande {order_data['order_id']}")
+            async with async_http_client(timeout=self.timeout) as client:
+                response = await client.post(**self._payment_session_request(order_data, access_token))
+            return await sync_to_async(self._payment_session_result)(response)
+        except Exception as e:
+            error_msg = f"Exception lors de la création de session: {str(e)}"
+            logger.error(error_msg)
+            return False, {'error': error_msg}
+    
+    def _payment_session_error(self, order_data: Dict) -> Optional[Dict]:
+        """Contrôles préalables à la création de session (configuration et données)"""
+        if not self.is_enabled():
+            return {'error': 'Orange Money non configuré'}
+        
+        # Validation des données avant envoi
+        is_valid, error_message = self.validate_payment_data(order_data)
+        if not is_valid:
+            logger.error(f"Données de paiement invalides: {error_message}")
+            return {'error': f'Données invalides: {error_message}'}
+        return None
+    
+    def _payment_session_request(self, order_data: Dict, access_token: str) -> Dict:
+        """Paramètres de la requête de création de session"""
+        # Les URLs sont déjà complètes dans order_data
+        return {
+            'url': self.config['webpayment_url'],
+            'headers': self._bearer_headers(access_token),
+            'json': {
                 'merchant_key': self.config['merchant_key'],
                 'currency': self.config['currency'],
                 'order_id': order_data['order_id'],
@@ -220,29 +287,25 @@ class OrangeMoneyService:
                 'notif_url': order_data['notif_url'],
                 'lang': self.config['language'],
                 'reference': order_data.get('reference', 'SagaKore')
-            }
-            
-            logger.info(f"Création de session de paiement pour la commande {order_data['order_id']}")
-            response = self.session.post(
-                self.config['webpayment_url'],
-                headers=headers,
-                json=payment_data
-            )
-            
-            if response.status_code == 201:
-                response_data = response.json()
-                logger.info(f"Session de paiement créée: {response_data.get('pay_token', 'N/A')}")
-                return True, response_data
-            else:
-                # Utiliser la nouvelle gestion d'erreurs
-                error_msg = self.handle_api_error(response)
-                logger.error(f"Erreur création session: {error_msg}")
-                return False, {'error': error_msg}
-                
-        except Exception as e:
-            error_msg = f"Exception lors de la création de session: {str(e)}"
-            logger.error(error_msg)
-            return False, {'error': error_msg}
+            },
+        }
+    
+    def _payment_session_result(self, response) -> Tuple[bool, Dict]:
+        if response.status_code == 201:
+            response_data = response.json()
+            logger.info(f"Session de paiement créée: {response_data.get('pay_token', 'N/A')}")
+            return True, response_data
+        # Utiliser la nouvelle gestion d'erreurs
+        error_msg = self.handle_api_error(response)
+        logger.error(f"Erreur création session: {error_msg}")
+        return False, {'error': error_msg}
+    
+    def _bearer_headers(self, access_token: str) -> Dict:
+        return {
+            'Authorization': f'Bearer {access_token}',
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
     
     def get_payment_url(self, pay_token: str, payment_url_from_api: str = None) -> str:
         """
@@ -287,7 +350,7 @@ class OrangeMoneyService:
         if status_code == 401:
             # Token expiré, on en demande un nouveau automatiquement
             logger.info("Token expiré, tentative de renouvellement automatique")
-            cache.delete('orange_money_access_token')
+            cache.delete(ACCESS_TOKEN_CACHE_KEY)
         
         elif status_code in [500, 502, 503]:
             # Orange Money a un problème
@@ -369,47 +432,66 @@ class OrangeMoneyService:
             return False, {'error': 'Impossible d\'obtenir le token d\'accès'}
         
         try:
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Accept': 'application/json',
-                'Content-Type': 'application/json'
-            }
-            
-            status_data = {
-                'order_id': order_id,
-                'amount': amount,
-                'pay_token': pay_token
-            }
-            
             logger.info(f"Vérification du statut pour la commande {order_id}")
             response = self.session.post(
-                self.config['status_url'],
-                headers=headers,
-                json=status_data
+                timeout=self.timeout, **self._transaction_status_request(order_id, amount, pay_token, access_token)
             )
-            
-            if response.status_code == 201:
-                response_data = response.json()
-                status = response_data.get('status', 'UNKNOWN')
-                logger.info(f"Statut récupéré: {status}")
-                
-                # Utiliser la nouvelle gestion des statuts
-                success, message = self.handle_transaction_status(status, order_id, response_data)
-                response_data['handled_status'] = success
-                response_data['status_message'] = message
-                
-                return True, response_data
-            else:
-                # Utiliser la nouvelle gestion d'erreurs
-                error_msg = self.handle_api_error(response)
-                logger.error(f"Erreur vérification statut: {error_msg}")
-                return False, {'error': error_msg}
-                
+            return self._transaction_status_result(response, order_id)
         except Exception as e:
             error_msg = f"Exception lors de la vérification du statut: {str(e)}"
             logger.error(error_msg)
             return False, {'error': error_msg}
     
+    async def acheck_transaction_status(self, order_id: str, amount: int, pay_token: str) -> Tuple[bool, Dict]:
+        """Version asynchrone de check_transaction_status (vues ASGI)"""
+        if not self.is_enabled():
+            return False, {'error': 'Orange Money non configuré'}
+        
+        access_token = await self.aget_access_token()
+        if not access_token:
+            return False, {'error': 'Impossible d\'obtenir le token d\'accès'}
+        
+        try:
+            logger.info(f"Vérification du statut pour la commande {order_id}")
+            async with async_http_client(timeout=self.timeout) as client:
+                response = await client.post(
+                    **self._transaction_status_request(order_id, amount, pay_token, access_token)
+                )
+            return await sync_to_async(self._transaction_status_result)(response, order_id)
+        except Exception as e:
+            error_msg = f"Exception lors de la vérification du statut: {str(e)}"
+            logger.error(error_msg)
+            return False, {'error': error_msg}
+    
+    def _transaction_status_request(self, order_id: str, amount: int, pay_token: str, access_token: str) -> Dict:
+        """Paramètres de la requête de statut de transaction"""
+        return {
+            'url': self.config['status_url'],
+            'headers': self._bearer_headers(access_token),
+            'json': {
+                'order_id': order_id,
+                'amount': amount,
+                'pay_token': pay_token
+            },
+        }
+    
+    def _transaction_status_result(self, response, order_id: str) -> Tuple[bool, Dict]:
+        if response.status_code == 201:
+            response_data = response.json()
+            status = response_data.get('status', 'UNKNOWN')
+            logger.info(f"Statut récupéré: {status}")
+            
+            # Utiliser la nouvelle gestion des statuts
+            success, message = self.handle_transaction_status(status, order_id, response_data)
+            response_data['handled_status'] = success
+            response_data['status_message'] = message
+            
+            return True, response_data
+        # Utiliser la nouvelle gestion d'erreurs
+        error_msg = self.handle_api_error(response)
+        logger.error(f"Erreur vérification statut: {error_msg}")
+        return False, {'error': error_msg}
+    
     def validate_webhook_notification(self, notification_data: Dict, notif_token: str) -> bool:
         """
         Valide une notification webhook Orange Money
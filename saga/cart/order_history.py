@@ -0,0 +1,160 @@
+"""
+Historique des commandes : projection légère et pagination par clé.
+
+Chaque commande a une ligne OrderSummary (nombre d'articles, titre et miniature du
+premier article) tenue à jour à chaque écriture d'article. Les listes d'historique
+lisent les commandes par (created_at, id) décroissants sur l'index (user, -created_at)
+avec leur ligne de résumé jointe : aucun article ni produit n'est chargé, quel que
+soit l'ancienneté du client. Les articles complets ne sont lus que par les vues de détail.
+"""
+import base64
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from cart.models import Order, OrderItem, OrderSummary
+from saga.storage_backends import ProductImageStorage
+from saga.utils.media_urls import get_storage, resolve_many
+
+ORDER_HISTORY_PAGE_SIZE = 20
+ORDER_HISTORY_MAX_PAGE_SIZE = 100
+EXTERNAL_URL_PREFIXES = ('http://', 'https://', '//')
+# Colonnes lues par les listes (OrderSummarySerializer) : projection pour QuerySet.only()
+ORDER_SUMMARY_FIELDS = (
+    'id', 'order_number', 'status', 'payment_method', 'is_paid', 'created_at',
+    'subtotal', 'shipping_cost', 'total',
+    'summary__item_count', 'summary__first_item_title', 'summary__first_item_image',
+)
+
+
+def thumbnail_reference(product):
+    """
+    Référence stable de la miniature d'un produit, même priorité que
+    Product.get_display_image_url : miniature miroir B2B ou URL B2B d'origine,
+    puis image locale. Clé de stockage plutôt qu'URL : les URLs signées expirent.
+    """
+    sources = product.get_b2b_source_urls()
+    if sources:
+        return (product.get_b2b_mirror().get(sources[0]) or {}).get('thumb') or sources[0]
+    if product.image:
+        return product.image.name
+    image_urls = product.image_urls if isinstance(product.image_urls, dict) else {}
+    if image_urls.get('main'):
+        return product._normalize_product_storage_path(image_urls['main'])
+    return ''
+
+
+def summary_values(order_id):
+    """Champs de la ligne d'historique d'une commande, calculés depuis ses articles"""
+    items = OrderItem.objects.filter(order_id=order_id)
+    first_item = (
+        items.select_related('product')
+        .only('product__title', 'product__image', 'product__image_urls', 'product__specifications')
+        .order_by('id')
+        .first()
+    )
+    product = first_item.product if first_item else None
+    return {
+        'item_count': items.count(),
+        'first_item_title': product.title if product else '',
+        'first_item_image': thumbnail_reference(product) if product else '',
+    }
+
+
+def refresh_order_summary(order_id, create=True):
+    """
+    Recalcule la ligne d'historique d'une commande. Avec create=False, seule une
+    ligne existante est mise à jour (les lignes manquantes sont créées à la lecture).
+    """
+    values = summary_values(order_id)
+    if create:
+        summary, _ = OrderSummary.objects.update_or_create(order_id=order_id, defaults=values)
+        return summary
+    OrderSummary.objects.filter(order_id=order_id).update(updated_at=timezone.now(), **values)
+    return None
+
+
+def encode_cursor(order):
+    """Curseur opaque positionné sur une commande"""
+    raw = f'{order.created_at.isoformat()}|{order.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(created_at, id) d'un curseur ; ValueError s'il est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        position = parse_datetime(created_at), int(pk)
+    except ValueError:
+        raise ValueError(f"Curseur invalide : {cursor!r}")
+    if position[0] is None:
+        raise ValueError(f"Curseur invalide : {cursor!r}")
+    return position
+
+
+def parse_page_size(value):
+    """Taille de page demandée, bornée ; taille par défaut si absente ou invalide"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return ORDER_HISTORY_PAGE_SIZE
+    return max(1, min(size, ORDER_HISTORY_MAX_PAGE_SIZE))
+
+
+def parse_status(value):
+    """Statut de commande demandé en filtre ; ValueError s'il est inconnu"""
+    if not value:
+        return None
+    if value not in dict(Order.STATUS_CHOICES):
+        raise ValueError(f"Statut inconnu : {value!r}")
+    return value
+
+
+def history_queryset(user, status=None):
+    """Commandes d'un utilisateur, éventuellement filtrées par statut"""
+    queryset = Order.objects.filter(user=user)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def order_history_page(queryset, cursor=None, limit=ORDER_HISTORY_PAGE_SIZE):
+    """
+    Page de commandes, la plus récente en premier, située après `cursor`.
+
+    Returns:
+        (commandes, curseur de la page suivante ou None). Chaque commande porte sa
+        ligne `summary` et `thumbnail_url` (miniature du premier article, résolue).
+
+    Raises:
+        ValueError: curseur invalide
+    """
+    queryset = queryset.select_related('summary').order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    orders = list(queryset[:limit + 1])
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    orders = orders[:limit]
+    attach_summaries(orders)
+    return orders, next_cursor
+
+
+def attach_summaries(orders):
+    """Crée les lignes d'historique manquantes et résout les miniatures de la page en un appel"""
+    for order in orders:
+        try:
+            order.summary
+        except OrderSummary.DoesNotExist:
+            # Commande antérieure à l'historique ou encore sans article
+            order.summary = refresh_order_summary(order.pk)
+
+    references = [order.summary.first_item_image for order in orders]
+    urls = resolve_many(
+        get_storage(ProductImageStorage),
+        [reference for reference in references if reference and not reference.startswith(EXTERNAL_URL_PREFIXES)],
+    )
+    for order, reference in zip(orders, references):
+        order.thumbnail_url = reference if reference.startswith(EXTERNAL_URL_PREFIXES) else urls.get(reference, '')
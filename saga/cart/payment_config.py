@@ -195,26 +195,163 @@ DISABLED_METHOD_MESSAGES = {
 # FONCTIONS UTILITAIRES POUR LES MÉTHODES DE LIVRAISON
 # =============================================================================
 
+class CartShippingResolution:
+    """
+    Résolution des méthodes de livraison d'un panier.
+
+    Les articles, leurs produits, fournisseurs et méthodes de livraison sont
+    chargés en deux requêtes (articles + M2M product.shipping_methods) ; les
+    méthodes communes, la répartition par fournisseur et les coûts sont
+    ensuite calculés en mémoire. Le résultat peut être réutilisé par toutes
+    les étapes d'un même checkout.
+    """
+
+    def __init__(self, cart_or_items):
+        # Accepte un objet Cart ou un QuerySet de cart_items
+        if hasattr(cart_or_items, 'cart_items'):
+            cart_items = cart_or_items.cart_items.all()
+        else:
+            cart_items = cart_or_items
+        self.items = list(
+            cart_items.select_related('product', 'product__supplier')
+            .prefetch_related('product__shipping_methods')
+        )
+        self._default_method = None
+        self._default_method_loaded = False
+
+    def __bool__(self):
+        return bool(self.items)
+
+    @property
+    def products(self):
+        return [item.product for item in self.items]
+
+    @staticmethod
+    def methods_for_product(product):
+        """Méthodes de livraison d'un produit (lues depuis le prefetch)"""
+        return list(product.shipping_methods.all())
+
+    @property
+    def available_methods(self):
+        """Union des méthodes de livraison des produits du panier"""
+        methods = {}
+        for product in self.products:
+            for method in self.methods_for_product(product):
+                methods.setdefault(method.id, method)
+        return [methods[key] for key in sorted(methods)]
+
+    @property
+    def common_methods(self):
+        """Méthodes de livraison communes à tous les produits du panier"""
+        products = self.products
+        if not products:
+            return []
+        common = {method.id: method for method in self.methods_for_product(products[0])}
+        for product in products[1:]:
+            product_ids = {method.id for method in self.methods_for_product(product)}
+            common = {key: method for key, method in common.items() if key in product_ids}
+        return [common[key] for key in sorted(common)]
+
+    @property
+    def default_method(self):
+        """Méthode commune par défaut, sinon la première méthode existante (une requête au plus)"""
+        if not self._default_method_loaded:
+            from product.models import ShippingMethod
+
+            common = self.common_methods
+            self._default_method = common[0] if common else ShippingMethod.objects.first()
+            self._default_method_loaded = True
+        return self._default_method
+
+    def shipping_cost(self, shipping_method):
+        """
+        Coût de livraison du panier avec une méthode donnée,
+        None si la méthode n'est pas disponible pour tous les produits
+        """
+        if not self.items:
+            return 0
+        method_id = getattr(shipping_method, 'id', shipping_method)
+        for product in self.products:
+            if method_id not in {method.id for method in self.methods_for_product(product)}:
+                return None
+        return shipping_method.price
+
+    @property
+    def suppliers_breakdown(self):
+        """
+        Produits du panier groupés par zone d'expédition du fournisseur.
+        Reconstruit à chaque appel (sans requête) car les appelants le modifient.
+        """
+        suppliers_data = {}
+
+        for item in self.items:
+            product = item.product
+            supplier = product.supplier
+
+            # Créer une clé basée sur l'adresse du fournisseur pour masquer le nom
+            if supplier and supplier.address:
+                supplier_key = f"Zone d'expédition : {supplier.address}"
+            elif supplier:
+                supplier_key = f"Zone d'expédition : {supplier.company_name}"
+            else:
+                supplier_key = "Zone d'expédition : SagaKore"
+
+            if supplier_key not in suppliers_data:
+                suppliers_data[supplier_key] = {
+                    'supplier': supplier,
+                    'supplier_name': supplier_key,
+                    'products': [],
+                    'total_items': 0,
+                    'subtotal': 0,
+                    'shipping_methods': set(),
+                    'selected_shipping_method': None,
+                    'shipping_cost': 0,
+                    'delivery_time': None
+                }
+
+            # Utiliser le prix promotionnel si disponible, sinon le prix normal
+            unit_price = product.discount_price if hasattr(product, 'discount_price') and product.discount_price else product.price
+
+            # Ajouter le produit
+            product_data = {
+                'product': product,
+                'quantity': item.quantity,
+                'unit_price': unit_price,
+                'total_price': unit_price * item.quantity,
+                'is_salam': product.is_salam
+            }
+
+            suppliers_data[supplier_key]['products'].append(product_data)
+            suppliers_data[supplier_key]['total_items'] += item.quantity
+            suppliers_data[supplier_key]['subtotal'] += unit_price * item.quantity
+
+            # Ajouter les méthodes de livraison du produit
+            suppliers_data[supplier_key]['shipping_methods'].update(self.methods_for_product(product))
+
+        return suppliers_data
+
+
+def resolve_cart_shipping(cart_or_items):
+    """
+    Retourne la résolution des méthodes de livraison d'un panier.
+    Accepte un objet Cart, un QuerySet de cart_items ou une résolution existante.
+    """
+    if isinstance(cart_or_items, CartShippingResolution):
+        return cart_or_items
+    return CartShippingResolution(cart_or_items)
+
+
 def get_available_shipping_methods_for_cart(cart):
     """
     Récupère les méthodes de livraison disponibles pour un panier
     en fonction des produits qu'il contient
     """
     from product.models import ShippingMethod
-    
-    # Récupérer tous les produits du panier
-    cart_products = [item.product for item in cart.cart_items.all()]
-    
-    if not cart_products:
+
+    resolution = resolve_cart_shipping(cart)
+    if not resolution:
         return ShippingMethod.objects.none()
-    
-    # Récupérer toutes les méthodes de livraison des produits du panier
-    shipping_methods = set()
-    for product in cart_products:
-        if product.shipping_methods.exists():
-            shipping_methods.update(product.shipping_methods.all())
-    
-    return list(shipping_methods)
+    return resolution.available_methods
 
 def get_common_shipping_methods_for_cart(cart_or_items):
     """
@@ -222,45 +359,17 @@ def get_common_shipping_methods_for_cart(cart_or_items):
     Accepte soit un objet Cart, soit un QuerySet de cart_items
     """
     from product.models import ShippingMethod
-    
-    # Si c'est un objet Cart, récupérer les cart_items
-    if hasattr(cart_or_items, 'cart_items'):
-        cart_items = cart_or_items.cart_items.all()
-    else:
-        # Sinon, c'est déjà un QuerySet de cart_items
-        cart_items = cart_or_items
-    
-    cart_products = [item.product for item in cart_items]
-    
-    if not cart_products:
+
+    resolution = resolve_cart_shipping(cart_or_items)
+    if not resolution:
         return ShippingMethod.objects.none()
-    
-    # Commencer avec les méthodes du premier produit
-    common_methods = set(cart_products[0].shipping_methods.all())
-    
-    # Intersection avec les méthodes des autres produits
-    for product in cart_products[1:]:
-        product_methods = set(product.shipping_methods.all())
-        common_methods = common_methods.intersection(product_methods)
-    
-    return list(common_methods)
+    return resolution.common_methods
 
 def calculate_shipping_cost_for_cart(cart, shipping_method):
     """
     Calcule le coût de livraison pour un panier avec une méthode donnée
     """
-    cart_products = [item.product for item in cart.cart_items.all()]
-    
-    if not cart_products:
-        return 0
-    
-    # Vérifier que la méthode est disponible pour tous les produits
-    for product in cart_products:
-        if shipping_method not in product.shipping_methods.all():
-            return None  # Méthode non disponible pour ce produit
-    
-    # Retourner le prix de la méthode de livraison
-    return shipping_method.price
+    return resolve_cart_shipping(cart).shipping_cost(shipping_method)
 
 # =============================================================================
 # NOUVELLES FONCTIONS - CALCUL PAR FOURNISSEUR
@@ -271,54 +380,7 @@ def get_cart_suppliers_breakdown(cart):
     Analyse le panier et groupe les produits par fournisseur
     Retourne un dictionnaire avec les informations par fournisseur
     """
-    suppliers_data = {}
-    
-    for item in cart.cart_items.all():
-        product = item.product
-        supplier = product.supplier
-        
-        # Créer une clé basée sur l'adresse du fournisseur pour masquer le nom
-        if supplier and supplier.address:
-            supplier_key = f"Zone d'expédition : {supplier.address}"
-        elif supplier:
-            supplier_key = f"Zone d'expédition : {supplier.company_name}"
-        else:
-            supplier_key = "Zone d'expédition : SagaKore"
-        
-        if supplier_key not in suppliers_data:
-            suppliers_data[supplier_key] = {
-                'supplier': supplier,
-                'supplier_name': supplier_key,
-                'products': [],
-                'total_items': 0,
-                'subtotal': 0,
-                'shipping_methods': set(),
-                'selected_shipping_method': None,
-                'shipping_cost': 0,
-                'delivery_time': None
-            }
-        
-        # Utiliser le prix promotionnel si disponible, sinon le prix normal
-        unit_price = product.discount_price if hasattr(product, 'discount_price') and product.discount_price else product.price
-        
-        # Ajouter le produit
-        product_data = {
-            'product': product,
-            'quantity': item.quantity,
-            'unit_price': unit_price,
-            'total_price': unit_price * item.quantity,
-            'is_salam': product.is_salam
-        }
-        
-        suppliers_data[supplier_key]['products'].append(product_data)
-        suppliers_data[supplier_key]['total_items'] += item.quantity
-        suppliers_data[supplier_key]['subtotal'] += unit_price * item.quantity
-        
-        # Ajouter les méthodes de livraison du produit
-        if product.shipping_methods.exists():
-            suppliers_data[supplier_key]['shipping_methods'].update(product.shipping_methods.all())
-    
-    return suppliers_data
+    return resolve_cart_shipping(cart).suppliers_breakdown
 
 def calculate_shipping_by_supplier(cart, selected_shipping_methods=None):
     """
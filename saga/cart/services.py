@@ -481,13 +481,7 @@ class CartService:
                 )
                 
                 # Créer les éléments de la commande Salam
-                for item in summary['salam_items']:
-                    OrderItem.objects.create(
-                        order=salam_order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
+                OrderItem.create_from_cart_items(salam_order, summary['salam_items'], with_options=False)
                 
                 # Créer la commande Classique
                 classic_payment_method = 'online_payment' if classic_payment_choice == 'immediate' else 'cash_on_delivery'
@@ -506,19 +500,7 @@ class CartService:
                 )
                 
                 # Créer les éléments de la commande Classique
-                for item in summary['classic_items']:
-                    order_item = OrderItem.objects.create(
-                        order=classic_order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
-                    
-                    # Ajouter les couleurs et tailles si présentes
-                    if item.colors.exists():
-                        order_item.colors.set(item.colors.all())
-                    if item.sizes.exists():
-                        order_item.sizes.set(item.sizes.all())
+                OrderItem.create_from_cart_items(classic_order, summary['classic_items'])
                 
                 # Vérifier que les commandes ont été créées
                 if not salam_order or not classic_order:
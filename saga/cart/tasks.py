@@ -0,0 +1,109 @@
+"""
+Tâches périodiques du panier : purge des paniers abandonnés
+
+La purge ne s'exécute plus dans le chemin des requêtes (Cart.get_or_create_cart)
+mais via la commande `reap_carts`, à planifier en cron.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, Min, OuterRef, Q
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REAPER_BATCH_SIZE = 1000
+
+
+def get_cart_reaper_rules(now=None):
+    """
+    Règles de purge : (nom, filtres, date limite sur updated_at).
+
+    Une durée de vie à 0 ou None désactive la règle correspondante.
+    """
+    now = now or timezone.now()
+    ttls = [
+        ('anonymous_empty', {'user__isnull': True, 'has_items': False},
+         timedelta(hours=getattr(settings, 'CART_ANONYMOUS_TTL_HOURS', 24) or 0)),
+        ('anonymous_with_items', {'user__isnull': True, 'has_items': True},
+         timedelta(hours=getattr(settings, 'CART_ANONYMOUS_WITH_ITEMS_TTL_HOURS', 24 * 7) or 0)),
+        ('authenticated_empty', {'user__isnull': False, 'has_items': False},
+         timedelta(days=getattr(settings, 'CART_AUTHENTICATED_TTL_DAYS', 90) or 0)),
+        ('authenticated_with_items', {'user__isnull': False, 'has_items': True},
+         timedelta(days=getattr(settings, 'CART_AUTHENTICATED_WITH_ITEMS_TTL_DAYS', 0) or 0)),
+    ]
+    return [(name, filters, now - ttl) for name, filters, ttl in ttls if ttl]
+
+
+def reap_carts(batch_size=None, dry_run=False, now=None):
+    """
+    Supprime les paniers expirés par tranches de clés primaires.
+
+    Chaque tranche [début, début + batch_size) est traitée dans sa propre
+    transaction, ce qui borne la durée des verrous quelle que soit la taille
+    de la table. Les règles sont réévaluées dans cette transaction, sur les
+    paniers verrouillés : un panier modifié depuis la sélection (article ajouté,
+    modifié ou retiré, qui met à jour Cart.updated_at) n'est pas supprimé.
+
+    Returns:
+        dict: rapport {'rules': {règle: nb paniers}, 'deleted': {modèle: nb lignes},
+        'batches': nb tranches, 'duration': secondes, 'dry_run': bool}
+    """
+    batch_size = batch_size or getattr(settings, 'CART_REAPER_BATCH_SIZE', DEFAULT_REAPER_BATCH_SIZE)
+    rules = get_cart_reaper_rules(now)
+    report = {
+        'rules': {name: 0 for name, _, _ in rules},
+        'deleted': {},
+        'batches': 0,
+        'duration': 0.0,
+        'dry_run': dry_run,
+    }
+    started = time.monotonic()
+
+    bounds = Cart.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+    if not rules or bounds['min_id'] is None:
+        return report
+
+    carts = Cart.objects.annotate(
+        has_items=Exists(CartItem.objects.filter(cart_id=OuterRef('pk')))
+    )
+    expired = Q()
+    for _, filters, cutoff in rules:
+        expired |= Q(updated_at__lt=cutoff, **filters)
+
+    for start in range(bounds['min_id'], bounds['max_id'] + 1, batch_size):
+        window = carts.filter(id__gte=start, id__lt=start + batch_size)
+        report['batches'] += 1
+
+        expired_ids = []
+        for name, filters, cutoff in rules:
+            ids = list(window.filter(updated_at__lt=cutoff, **filters).values_list('id', flat=True))
+            report['rules'][name] += len(ids)
+            expired_ids.extend(ids)
+
+        if not expired_ids or dry_run:
+            continue
+
+        with transaction.atomic():
+            locked_ids = list(
+                carts.filter(expired, id__in=expired_ids)
+                .select_for_update(of=('self',))
+                .values_list('id', flat=True)
+            )
+            if not locked_ids:
+                continue
+            _, deleted = Cart.objects.filter(id__in=locked_ids).delete()
+        for label, count in deleted.items():
+            report['deleted'][label] = report['deleted'].get(label, 0) + count
+
+    report['duration'] = time.monotonic() - started
+    logger.info(
+        "[cart_reaper] rules=%s deleted=%s batches=%s duration=%.2fs dry_run=%s",
+        report['rules'], report['deleted'], report['batches'], report['duration'], dry_run,
+    )
+    return report
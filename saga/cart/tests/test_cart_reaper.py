@@ -0,0 +1,110 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cart.models import Cart, CartItem
+from cart.tasks import reap_carts
+from product.models import Product
+
+
+User = get_user_model()
+
+
+@override_settings(
+    CART_ANONYMOUS_TTL_HOURS=24,
+    CART_ANONYMOUS_WITH_ITEMS_TTL_HOURS=24 * 7,
+    CART_AUTHENTICATED_TTL_DAYS=90,
+    CART_AUTHENTICATED_WITH_ITEMS_TTL_DAYS=0,
+)
+class CartReaperTestCase(TestCase):
+    """Tests de la purge des paniers abandonnés"""
+
+    def setUp(self):
+        self.product = Product.objects.create(title='Produit', slug='produit', price=Decimal('1000'))
+
+    def _cart(self, age, user=None, session_key=None, with_items=False):
+        cart = Cart.objects.create(user=user, session_key=session_key)
+        if with_items:
+            CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        # updated_at est auto_now : on vieillit le panier directement en base
+        Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now() - age)
+        return cart
+
+    def test_rules_by_cart_kind(self):
+        user = User.objects.create_user(email='actif@example.com', password='testpass123')
+        old_user = User.objects.create_user(email='ancien@example.com', password='testpass123')
+
+        expired = [
+            self._cart(timedelta(hours=30), session_key='anon-vide'),
+            self._cart(timedelta(days=8), session_key='anon-plein', with_items=True),
+            self._cart(timedelta(days=100), user=old_user),
+        ]
+        kept = [
+            self._cart(timedelta(hours=2), session_key='anon-recent'),
+            self._cart(timedelta(days=3), session_key='anon-plein-recent', with_items=True),
+            self._cart(timedelta(days=400), user=user, with_items=True),
+        ]
+
+        report = reap_carts(batch_size=2)
+
+        self.assertEqual(report['rules'], {
+            'anonymous_empty': 1,
+            'anonymous_with_items': 1,
+            'authenticated_empty': 1,
+        })
+        self.assertEqual(report['deleted']['cart.Cart'], 3)
+        self.assertEqual(report['deleted']['cart.CartItem'], 1)
+        self.assertEqual(report['batches'], 3)
+        self.assertFalse(Cart.objects.filter(pk__in=[c.pk for c in expired]).exists())
+        self.assertEqual(Cart.objects.filter(pk__in=[c.pk for c in kept]).count(), 3)
+
+    def test_dry_run_deletes_nothing(self):
+        self._cart(timedelta(hours=30), session_key='anon-vide')
+
+        report = reap_carts(dry_run=True)
+
+        self.assertEqual(report['rules']['anonymous_empty'], 1)
+        self.assertEqual(report['deleted'], {})
+        self.assertEqual(Cart.objects.count(), 1)
+
+    def test_item_activity_keeps_cart_alive(self):
+        cart = self._cart(timedelta(days=8), session_key='anon-actif', with_items=True)
+        item = cart.cart_items.get()
+        item.quantity = 2
+        item.save()
+
+        self.assertEqual(reap_carts()['rules']['anonymous_with_items'], 0)
+
+        CartItem.objects.create(cart=self._cart(timedelta(days=8), session_key='anon-ajout'), product=self.product)
+        Cart.objects.filter(session_key='anon-actif').update(updated_at=timezone.now() - timedelta(days=8))
+        cart.cart_items.all().delete()
+        self.assertTrue(Cart.objects.filter(session_key='anon-ajout').exists())
+        self.assertEqual(reap_carts()['deleted'], {})
+
+    def test_cart_touched_after_selection_is_kept(self):
+        cart = self._cart(timedelta(days=8), session_key='anon-plein', with_items=True)
+        expired = self._cart(timedelta(days=8), session_key='anon-oublie', with_items=True)
+        real_atomic = transaction.atomic
+
+        def atomic_after_concurrent_write(*args, **kwargs):
+            # Article ajouté par une requête entre la sélection et la suppression
+            CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+            return real_atomic(*args, **kwargs)
+
+        with mock.patch('cart.tasks.transaction.atomic', side_effect=atomic_after_concurrent_write):
+            with CaptureQueriesContext(connection) as queries:
+                report = reap_carts()
+
+        self.assertEqual(report['rules']['anonymous_with_items'], 2)
+        self.assertEqual(report['deleted']['cart.Cart'], 1)
+        self.assertTrue(Cart.objects.filter(pk=cart.pk).exists())
+        self.assertFalse(Cart.objects.filter(pk=expired.pk).exists())
+        # La cascade ne remet pas à jour le panier supprimé article par article
+        touched = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "cart_cart"')]
+        self.assertFalse([sql for sql in touched if sql.endswith(f'"id" = {expired.pk}')])
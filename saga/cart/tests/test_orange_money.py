@@ -3,7 +3,8 @@ Tests pour l'intégration Orange Money
 """
 
 import json
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, MagicMock, patch, Mock
+from asgiref.sync import async_to_sync
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -104,6 +105,36 @@ class OrangeMoneyServiceTest(TestCase):
         
         self.assertIsNone(token)
     
+    @patch('cart.orange_money_service.async_http_client')
+    @patch('cart.orange_money_service.settings.ORANGE_MONEY_CONFIG')
+    def test_acreate_payment_session_uses_async_client(self, mock_config, mock_client_factory):
+        """La version async partage la construction de requête et le traitement de réponse"""
+        mock_config.__getitem__.side_effect = lambda key: self.test_config[key]
+        mock_config.get.side_effect = lambda key, default=None: self.test_config.get(key, default)
+        cache.set('orange_money_access_token', 'cached_token')
+        
+        mock_response = Mock(status_code=201)
+        mock_response.json.return_value = {'pay_token': 'test_pay_token'}
+        client = MagicMock()
+        client.post = AsyncMock(return_value=mock_response)
+        mock_client_factory.return_value.__aenter__.return_value = client
+        
+        success, data = async_to_sync(self.service.acreate_payment_session)({
+            'order_id': 'CMD-1',
+            'amount': 100000,
+            'return_url': 'https://example.com/return',
+            'cancel_url': 'https://example.com/cancel',
+            'notif_url': 'https://example.com/notif',
+        })
+        
+        self.assertTrue(success)
+        self.assertEqual(data['pay_token'], 'test_pay_token')
+        mock_client_factory.assert_called_once_with(timeout=30)
+        kwargs = client.post.call_args.kwargs
+        self.assertEqual(kwargs['url'], self.test_config['webpayment_url'])
+        self.assertEqual(kwargs['headers']['Authorization'], 'Bearer cached_token')
+        self.assertEqual(kwargs['json']['order_id'], 'CMD-1')
+    
     def test_format_amount(self):
         """Test de formatage des montants"""
         # Test conversion FCFA vers centimes
@@ -197,7 +228,7 @@ class OrangeMoneyViewsTest(TestCase):
     
     @patch('cart.views.orange_money_service.refresh_config')
     @patch('cart.views.orange_money_service.is_enabled')
-    @patch('cart.views.orange_money_service.create_payment_session')
+    @patch('cart.views.orange_money_service.acreate_payment_session')
     def test_orange_money_payment_success(self, mock_create_session, mock_is_enabled, mock_refresh_config):
         """Test de création réussie d'une session de paiement"""
         mock_is_enabled.return_value = True
@@ -250,6 +281,48 @@ class OrangeMoneyViewsTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, reverse('cart:cart'))
     
+    @patch('cart.views.sync_order_to_b2b')
+    @patch('cart.views.orange_money_service.acheck_transaction_status')
+    def test_orange_money_return_success(self, mock_check_status, mock_sync):
+        """La vue async de retour confirme la commande et vide le panier"""
+        mock_check_status.return_value = (True, {
+            'status': 'SUCCESS',
+            'handled_status': True,
+            'status_message': 'Paiement effectué avec succès'
+        })
+        order = Order.objects.create(
+            user=self.user,
+            subtotal=1000.00,
+            shipping_cost=0,
+            total=1000.00,
+            payment_method=Order.MOBILE_MONEY,
+            status=Order.DRAFT
+        )
+        
+        self.client.force_login(self.user)
+        session = self.client.session
+        session['orange_money_order_id'] = order.id
+        session['orange_money_pay_token'] = 'test_pay_token'
+        session.save()
+        
+        response = self.client.get(reverse('cart:orange_money_return'))
+        
+        self.assertRedirects(
+            response, reverse('cart:order_success', kwargs={'order_id': order.id}), fetch_redirect_response=False
+        )
+        order.refresh_from_db()
+        self.assertTrue(order.is_paid)
+        self.assertEqual(order.status, Order.CONFIRMED)
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+        self.assertNotIn('orange_money_pay_token', self.client.session)
+        mock_check_status.assert_called_once_with(order.order_number, 100000, 'test_pay_token')
+    
+    def test_orange_money_return_requires_login(self):
+        """Sans utilisateur connecté, redirection vers la page de connexion"""
+        response = self.client.get(reverse('cart:orange_money_return'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(reverse('accounts:login')))
+    
     def test_orange_money_webhook_invalid_method(self):
         """Test du webhook avec une méthode HTTP invalide"""
         response = self.client.get(reverse('cart:orange_money_webhook'))
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from cart.models import Cart, CartItem, Order, OrderItem, OrderSummary
+from cart.order_history import decode_cursor, encode_cursor
+from product.models import Product
+
+User = get_user_model()
+
+
+class OrderHistoryTestCase(TestCase):
+    """Projection de l'historique des commandes et pagination par clé"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='historique@example.com', password='testpass123')
+        self.products = [
+            Product.objects.create(
+                title=f'Article {index}', price=Decimal('1000'), stock=10,
+                specifications={'b2b_image_urls': [f'https://cdn.example.com/{index}.jpg']},
+            )
+            for index in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_order(self, item_count=2, created_at=None):
+        order = Order.objects.create(
+            user=self.user, subtotal=Decimal('2000'), shipping_cost=Decimal('500'), total=Decimal('2500')
+        )
+        cart = Cart.objects.create()
+        for product in self.products[:item_count]:
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+        OrderItem.create_from_cart_items(order, cart.cart_items.all())
+        if created_at:
+            Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        return order
+
+    def test_summary_follows_item_changes(self):
+        order = self.create_order(item_count=2)
+        first_product = order.items.order_by('id')[0].product
+        summary = OrderSummary.objects.get(order=order)
+        self.assertEqual(summary.item_count, 2)
+        self.assertEqual(summary.first_item_title, first_product.title)
+        self.assertEqual(summary.first_item_image, first_product.get_b2b_source_urls()[0])
+
+        extra = OrderItem.objects.create(order=order, product=self.products[2], quantity=1, price=Decimal('1000'))
+        self.assertEqual(OrderSummary.objects.get(order=order).item_count, 3)
+        order.items.exclude(pk=extra.pk).delete()
+        summary = OrderSummary.objects.get(order=order)
+        self.assertEqual((summary.item_count, summary.first_item_title), (1, 'Article 2'))
+
+        # Suppression en cascade : la ligne n'est pas recréée par les signaux des articles
+        order.delete()
+        self.assertFalse(OrderSummary.objects.filter(order_id=order.pk).exists())
+
+    def test_keyset_pages_without_loading_items(self):
+        now = timezone.now()
+        orders = [self.create_order(created_at=now - timedelta(days=index)) for index in range(4)]
+        # Même date de création : départagées par id
+        tied = self.create_order(created_at=now - timedelta(days=1))
+        OrderSummary.objects.filter(order=orders[3]).delete()
+        expected = [orders[0].pk, tied.pk, orders[1].pk, orders[2].pk, orders[3].pk]
+
+        seen, cursor = [], None
+        with CaptureQueriesContext(connection) as queries:
+            while True:
+                params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+                response = self.client.get('/api/cart/orders/', params)
+                self.assertEqual(response.status_code, 200)
+                seen.extend(order['id'] for order in response.data['orders'])
+                cursor = response.data['next_cursor']
+                if not cursor:
+                    break
+
+        self.assertEqual(seen, expected)
+        first = response.data['orders'][0]
+        self.assertEqual(first['item_count'], 2)
+        self.assertEqual(first['first_item_image'], OrderSummary.objects.get(order_id=first['id']).first_item_image)
+        self.assertTrue(first['first_item_image'].startswith('https://cdn.example.com/'))
+        self.assertNotIn('items', first)
+        # Seule la ligne manquante (orders[3]) a relu des articles
+        item_reads = [q['sql'] for q in queries if 'FROM "cart_orderitem"' in q['sql']]
+        self.assertEqual(len(item_reads), 2)
+
+    def test_accounts_endpoint_link_header_and_invalid_cursor(self):
+        for _ in range(3):
+            self.create_order()
+
+        response = self.client.get('/api/orders/', {'limit': 2})
+        self.assertEqual(len(response.data), 2)
+        self.assertIn('rel="next"', response['Link'])
+        self.assertEqual(response.data[0]['total'], '2500.00')
+
+        response = self.client.get('/api/orders/', {'cursor': 'pas-un-curseur'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_status_filter_pages_on_server(self):
+        now = timezone.now()
+        delivered = [self.create_order(created_at=now - timedelta(days=index)) for index in range(3)]
+        Order.objects.filter(pk__in=[order.pk for order in delivered]).update(status=Order.DELIVERED)
+        self.create_order()
+
+        response = self.client.get('/api/cart/orders/', {'status': Order.DELIVERED, 'limit': 2})
+        self.assertEqual([order['id'] for order in response.data['orders']], [delivered[0].pk, delivered[1].pk])
+        response = self.client.get(
+            '/api/cart/orders/', {'status': Order.DELIVERED, 'cursor': response.data['next_cursor']}
+        )
+        self.assertEqual([order['id'] for order in response.data['orders']], [delivered[2].pk])
+        self.assertIsNone(response.data['next_cursor'])
+
+        self.assertEqual(len(self.client.get('/api/orders/', {'status': Order.DELIVERED}).data), 3)
+        self.assertEqual(self.client.get('/api/orders/', {'status': 'inconnu'}).status_code, 400)
+
+    def test_cursor_round_trip_and_web_history(self):
+        order = self.create_order()
+        self.assertEqual(decode_cursor(encode_cursor(order)), (order.created_at, order.pk))
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('cart:my_orders'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, order.summary.first_item_title)
+        self.assertContains(response, '2 articles')
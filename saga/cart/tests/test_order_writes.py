@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import ShippingAddress
+from cart.models import Cart, CartItem, Order, OrderStatusHistory
+from cart.services import CartService
+from product.models import Color, Product, ShippingMethod
+
+User = get_user_model()
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class OrderWritePathTestCase(TestCase):
+    """Tests du chemin d'écriture des commandes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='commande@example.com', password='testpass123')
+        self.address = ShippingAddress.objects.create(
+            user=self.user,
+            full_name='Client Test',
+            quarter='Quartier',
+            street_address='1 rue Test',
+            city='BKO',
+        )
+        self.shipping_method = ShippingMethod.objects.create(
+            name='Standard', price=Decimal('1000'), min_delivery_days=1, max_delivery_days=3
+        )
+        self.color = Color.objects.create(name='Rouge', code='#FF0000')
+
+    def _cart_with_items(self, count):
+        cart, _ = Cart.objects.get_or_create(user=self.user)
+        cart.cart_items.all().delete()
+        for i in range(count):
+            product = Product.objects.create(
+                title=f'Article {count}-{i}',
+                price=Decimal('1000'),
+                is_salam=i % 2 == 0,
+                stock=10,
+            )
+            item = CartItem.objects.create(cart=cart, product=product, quantity=1)
+            item.colors.add(self.color)
+        return cart
+
+    def _checkout_writes(self, cart):
+        with CaptureQueriesContext(connection) as queries:
+            orders = CartService.create_mixed_orders(cart, self.user, self.address, self.shipping_method)
+        writes = [q['sql'] for q in queries if q['sql'].lstrip().upper().startswith(WRITE_PREFIXES)]
+        return orders, writes
+
+    def test_order_created_with_a_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            order = Order.objects.create(
+                user=self.user,
+                subtotal=Decimal('1000'),
+                shipping_cost=Decimal('0'),
+                total=Decimal('1000'),
+            )
+        order_writes = [
+            q['sql'] for q in queries
+            if q['sql'].startswith(('INSERT INTO "cart_order"', 'UPDATE "cart_order"'))
+        ]
+        self.assertEqual(len(order_writes), 1)
+        self.assertEqual(order.order_number, f"CMD-{order.created_at.strftime('%Y%m%d')}-{order.id:04d}")
+        self.assertTrue(OrderStatusHistory.objects.filter(order=order, note='initial').exists())
+
+    def test_status_transition_uses_loaded_status(self):
+        order = Order.objects.create(
+            user=self.user,
+            subtotal=Decimal('1000'),
+            shipping_cost=Decimal('0'),
+            total=Decimal('1000'),
+        )
+        order = Order.objects.get(pk=order.pk)
+        with CaptureQueriesContext(connection) as queries:
+            order.cancel('test')
+        self.assertFalse(any(q['sql'].startswith('SELECT "cart_order"."status"') for q in queries))
+        self.assertEqual(order.status_history.filter(new_status=Order.CANCELLED).count(), 1)
+
+    def test_checkout_writes_do_not_grow_with_cart_size(self):
+        _, small_writes = self._checkout_writes(self._cart_with_items(4))
+        orders, large_writes = self._checkout_writes(self._cart_with_items(16))
+
+        self.assertEqual(len(small_writes), len(large_writes))
+        self.assertEqual(orders['salam_order'].items.count(), 8)
+        classic_items = orders['classic_order'].items.all()
+        self.assertEqual(len(classic_items), 8)
+        self.assertEqual(list(classic_items[0].colors.all()), [self.color])
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from cart.models import Cart, CartItem
+from cart.payment_config import (
+    calculate_shipping_by_supplier,
+    calculate_shipping_cost_for_cart,
+    get_common_shipping_methods_for_cart,
+    resolve_cart_shipping,
+)
+from product.models import Product, ShippingMethod
+from suppliers.models import Supplier
+
+
+User = get_user_model()
+
+
+class CartShippingResolutionTestCase(TestCase):
+    """Tests de la résolution des méthodes de livraison du panier"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='livraison@example.com', password='testpass123')
+        self.cart = Cart.objects.create(user=self.user)
+        self.standard = ShippingMethod.objects.create(
+            name='Standard', price=Decimal('1000'), min_delivery_days=3, max_delivery_days=5
+        )
+        self.express = ShippingMethod.objects.create(
+            name='Express', price=Decimal('3000'), min_delivery_days=1, max_delivery_days=2
+        )
+        self.suppliers = [
+            Supplier.objects.create(company_name=f'Fournisseur {i}', address=f'Zone {i}')
+            for i in range(3)
+        ]
+        for i in range(15):
+            product = Product.objects.create(
+                title=f'Produit {i}',
+                slug=f'produit-{i}',
+                price=Decimal('2000'),
+                supplier=self.suppliers[i % 3],
+            )
+            product.shipping_methods.add(self.standard)
+            if i % 2 == 0:
+                product.shipping_methods.add(self.express)
+            CartItem.objects.create(cart=self.cart, product=product, quantity=1)
+
+    def test_resolution_query_budget(self):
+        with self.assertNumQueries(2):
+            resolution = resolve_cart_shipping(self.cart)
+            self.assertEqual(resolution.common_methods, [self.standard])
+            self.assertEqual(resolution.available_methods, [self.standard, self.express])
+            self.assertEqual(resolution.default_method, self.standard)
+            self.assertEqual(resolution.shipping_cost(self.standard), Decimal('1000'))
+            self.assertIsNone(resolution.shipping_cost(self.express))
+            self.assertEqual(len(resolution.suppliers_breakdown), 3)
+
+        with self.assertNumQueries(0):
+            shipping = calculate_shipping_by_supplier(resolution)
+        self.assertEqual(shipping['total_shipping_cost'], Decimal('9000'))
+        self.assertEqual(shipping['summary']['total_items'], 15)
+
+    def test_legacy_helpers_accept_items_queryset(self):
+        classic_items = self.cart.cart_items.filter(product__title='Produit 0')
+        self.assertEqual(
+            get_common_shipping_methods_for_cart(classic_items),
+            [self.standard, self.express],
+        )
+        self.assertEqual(calculate_shipping_cost_for_cart(self.cart, self.express), None)
+
+    def test_empty_cart_falls_back_to_first_method(self):
+        self.cart.cart_items.all().delete()
+        resolution = resolve_cart_shipping(self.cart)
+        self.assertFalse(resolution)
+        self.assertEqual(resolution.default_method, ShippingMethod.objects.first())
+        self.assertEqual(calculate_shipping_cost_for_cart(self.cart, self.standard), 0)
@@ -3,10 +3,13 @@ from django.template.loader import render_to_string
 from product.models import Product
 
 from cart.models import Cart, CartItem, Order, OrderItem
+from cart.order_history import history_queryset, order_history_page
 from cart.services import CartService
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from asgiref.sync import sync_to_async
 
 from product.models import ShippingMethod, Size
 from product.models import Clothing
@@ -1170,20 +1173,8 @@ def payment_delivery(request):
                 
                 # Créer les éléments de la commande
                 print("\nCréation des éléments de la commande:")
-                for item in cart_items:
-                    print(f"- Article: {item.product.title} x{item.quantity}")
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
-                    if item.colors.exists():
-                        print(f"  - Couleurs: {', '.join(c.name for c in item.colors.all())}")
-                        order_item.colors.set(item.colors.all())
-                    if item.sizes.exists():
-                        print(f"  - Tailles: {', '.join(s.name for s in item.sizes.all())}")
-                        order_item.sizes.set(item.sizes.all())
+                order_items = OrderItem.create_from_cart_items(order, cart_items)
+                print(f"- {len(order_items)} article(s) ajouté(s)")
                 
                 print("✅ Commande et éléments créés avec succès")
                 
@@ -1261,9 +1252,9 @@ def payment_delivery(request):
     order_total = sum(item.get_total_price() for item in cart_items)
     
     # Récupérer les méthodes de livraison compatibles avec les produits du panier
-    from .payment_config import get_common_shipping_methods_for_cart
-    common_methods = get_common_shipping_methods_for_cart(cart_items)
-    default_shipping_method = common_methods[0] if common_methods else ShippingMethod.objects.first()
+    from .payment_config import resolve_cart_shipping
+    shipping_resolution = resolve_cart_shipping(cart_items)
+    default_shipping_method = shipping_resolution.default_method
     if default_shipping_method:
         shipping_cost = default_shipping_method.price
     else:
@@ -1281,7 +1272,7 @@ def payment_delivery(request):
         'order_total': order_total,
         'shipping_cost': shipping_cost,
         'total_with_shipping': total_with_shipping,
-        'shipping_methods': get_common_shipping_methods_for_cart(cart_items),
+        'shipping_methods': shipping_resolution.common_methods,
         'default_shipping_method': default_shipping_method,
         'form': form,
         'default_address': default_address,
@@ -1403,66 +1394,29 @@ def order_confirmation(request, order_id):
 @login_required
 def my_orders(request):
     """
-    Récupère toutes les commandes de l'utilisateur, triées par statut (actives en premier) 
-    puis par date de création (la plus récente en premier).
+    Historique des commandes de l'utilisateur, la plus récente en premier, par pages
+    (cart.order_history) : une ligne légère par commande, les articles sont sur le détail.
     Supporte un filtre par statut via le paramètre GET 'status'.
     """
-    from django.db.models import Case, When, IntegerField
-    
     # Récupérer le filtre de statut depuis les paramètres GET
     status_filter = request.GET.get('status', 'all')
-    
-    # Définir l'ordre de priorité des statuts (alignés avec B2B)
-    status_priority = Case(
-        When(status=Order.DRAFT, then=1),
-        When(status=Order.CONFIRMED, then=2),
-        When(status=Order.SHIPPED, then=3),
-        When(status=Order.DELIVERED, then=4),
-        When(status=Order.CANCELLED, then=5),
-        default=6,
-        output_field=IntegerField()
-    )
-    
-    # Base queryset - inclure toutes les commandes de l'utilisateur
-    orders = Order.objects.filter(user=request.user)
-    
-    # Debug: vérifier le nombre total de commandes et leurs statuts
-    total_orders = orders.count()
-    print(f"[my_orders] Utilisateur {request.user.id} - Total commandes: {total_orders}")
-    
-    # Vérifier les statuts des commandes
-    from django.db.models import Count
-    status_counts = orders.values('status').annotate(count=Count('id'))
-    print(f"[my_orders] Répartition par statut: {list(status_counts)}")
-    
-    # Annoter avec l'ordre de priorité des statuts
-    # Les commandes avec des statuts invalides auront default=6
-    orders = orders.annotate(status_order=status_priority)
-    
-    # Appliquer le filtre de statut si spécifié
-    if status_filter != 'all' and status_filter in dict(Order.STATUS_CHOICES):
-        orders = orders.filter(status=status_filter)
-        print(f"[my_orders] Filtre appliqué: {status_filter} - Commandes après filtre: {orders.count()}")
-    
-    # Trier selon le filtre: toutes par date décroissante, sinon par date
-    if status_filter == 'all':
-        orders = orders.order_by('-created_at')
-    else:
-        orders = orders.order_by('status_order', '-created_at')
-    
-    # Debug: afficher les commandes récupérées
-    orders_list = list(orders)
-    print(f"[my_orders] Commandes finales: {len(orders_list)}")
-    for order in orders_list[:5]:  # Limiter à 5 pour les logs
-        print(f"[my_orders] Commande {order.id}: statut={order.status}, created_at={order.created_at}, user={order.user_id}")
-    
-    # Utiliser tous les statuts disponibles (alignés avec B2B)
-    available_status_choices = Order.STATUS_CHOICES
-    
+    if status_filter != 'all' and status_filter not in dict(Order.STATUS_CHOICES):
+        status_filter = 'all'
+
+    orders = history_queryset(
+        request.user, None if status_filter == 'all' else status_filter
+    ).select_related('shipping_address', 'shipping_method')
+    try:
+        orders, next_cursor = order_history_page(orders, request.GET.get('cursor'))
+    except ValueError:
+        return redirect(f"{reverse('cart:my_orders')}?status={status_filter}")
+
     context = {
         'orders': orders,
+        'next_cursor': next_cursor,
         'status_filter': status_filter,
-        'status_choices': available_status_choices,
+        # Utiliser tous les statuts disponibles (alignés avec B2B)
+        'status_choices': Order.STATUS_CHOICES,
     }
     return render(request, 'cart/my_orders.html', context)
 
@@ -1555,10 +1509,9 @@ def stripe_webhook(request):
             debug_log(f"✅ Cart trouvé: {cart.id}")
             
             # Récupérer la méthode de livraison compatible avec les produits classiques
-            from .payment_config import get_common_shipping_methods_for_cart
+            from .payment_config import resolve_cart_shipping
             classic_cart_items = cart.cart_items.filter(product__is_salam=False)
-            common_methods = get_common_shipping_methods_for_cart(classic_cart_items)
-            shipping_method = common_methods[0] if common_methods else ShippingMethod.objects.first()
+            shipping_method = resolve_cart_shipping(classic_cart_items).default_method
             debug_log(f"📋 Shipping method: {shipping_method.id if shipping_method else None}")
             
             # Récupérer le type de produits depuis les métadonnées
@@ -1649,17 +1602,7 @@ def stripe_webhook(request):
             # Créer les éléments de la commande
             if product_type == 'salam':
                 # Ne traiter que les produits Salam
-                for item in cart.cart_items.filter(product__is_salam=True):
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
-                    if item.colors.exists():
-                        order_item.colors.set(item.colors.all())
-                    if item.sizes.exists():
-                        order_item.sizes.set(item.sizes.all())
+                OrderItem.create_from_cart_items(order, cart.cart_items.filter(product__is_salam=True))
                 
                 # Supprimer seulement les produits Salam du panier
                 cart.cart_items.filter(product__is_salam=True).delete()
@@ -1668,17 +1611,7 @@ def stripe_webhook(request):
                 messages.success(request, "✅ **Paiement Salam réussi** : Vos produits Salam ont été payés et votre commande est en cours de traitement.")
             elif product_type == 'classic':
                 # Ne traiter que les produits classiques
-                for item in cart.cart_items.filter(product__is_salam=False):
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
-                    if item.colors.exists():
-                        order_item.colors.set(item.colors.all())
-                    if item.sizes.exists():
-                        order_item.sizes.set(item.sizes.all())
+                OrderItem.create_from_cart_items(order, cart.cart_items.filter(product__is_salam=False))
                 
                 # Supprimer seulement les produits classiques du panier
                 cart.cart_items.filter(product__is_salam=False).delete()
@@ -1687,17 +1620,7 @@ def stripe_webhook(request):
                 messages.success(request, "✅ **Commande classique réussie** : Vos produits classiques ont été commandés. Vous pouvez maintenant commander vos produits Salam.")
             else:
                 # Traiter tous les produits
-                for item in cart.cart_items.all():
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
-                    if item.colors.exists():
-                        order_item.colors.set(item.colors.all())
-                    if item.sizes.exists():
-                        order_item.sizes.set(item.sizes.all())
+                OrderItem.create_from_cart_items(order, cart.cart_items.all())
 
             # Vider le panier seulement si tous les produits ont été traités
             if product_type == 'all':
@@ -1769,10 +1692,9 @@ def payment_success(request):
             product_type = session.metadata.get('product_type', 'all')
             
             # Récupérer la méthode de livraison compatible avec les produits Salam
-            from .payment_config import get_common_shipping_methods_for_cart
+            from .payment_config import resolve_cart_shipping
             salam_cart_items = cart.cart_items.filter(product__is_salam=True)
-            common_methods = get_common_shipping_methods_for_cart(salam_cart_items)
-            shipping_method = common_methods[0] if common_methods else ShippingMethod.objects.first()
+            shipping_method = resolve_cart_shipping(salam_cart_items).default_method
             
             # Calculer le total selon le type de produits
             if product_type == 'salam':
@@ -1840,17 +1762,7 @@ def payment_success(request):
             # Créer les éléments de la commande
             if product_type == 'salam':
                 # Ne traiter que les produits Salam
-                for item in cart.cart_items.filter(product__is_salam=True):
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
-                    if item.colors.exists():
-                        order_item.colors.set(item.colors.all())
-                    if item.sizes.exists():
-                        order_item.sizes.set(item.sizes.all())
+                OrderItem.create_from_cart_items(order, cart.cart_items.filter(product__is_salam=True))
                 
                 # Supprimer seulement les produits Salam du panier
                 cart.cart_items.filter(product__is_salam=True).delete()
@@ -1859,17 +1771,7 @@ def payment_success(request):
                 messages.success(request, "✅ **Paiement Salam réussi** : Vos produits Salam ont été payés et votre commande est en cours de traitement.")
             elif product_type == 'classic':
                 # Ne traiter que les produits classiques
-                for item in cart.cart_items.filter(product__is_salam=False):
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
-                    if item.colors.exists():
-                        order_item.colors.set(item.colors.all())
-                    if item.sizes.exists():
-                        order_item.sizes.set(item.sizes.all())
+                OrderItem.create_from_cart_items(order, cart.cart_items.filter(product__is_salam=False))
                 
                 # Supprimer seulement les produits classiques du panier
                 cart.cart_items.filter(product__is_salam=False).delete()
@@ -1878,17 +1780,7 @@ def payment_success(request):
                 messages.success(request, "✅ **Commande classique réussie** : Vos produits classiques ont été commandés. Vous pouvez maintenant commander vos produits Salam.")
             else:
                 # Traiter tous les produits
-                for item in cart.cart_items.all():
-                    order_item = OrderItem.objects.create(
-                        order=order,
-                        product=item.product,
-                        quantity=item.quantity,
-                        price=item.product.discount_price if hasattr(item.product, 'discount_price') and item.product.discount_price else item.product.price
-                    )
-                    if item.colors.exists():
-                        order_item.colors.set(item.colors.all())
-                    if item.sizes.exists():
-                        order_item.sizes.set(item.sizes.all())
+                OrderItem.create_from_cart_items(order, cart.cart_items.all())
 
             # Vider le panier seulement si tous les produits ont été traités
             if product_type == 'all':
@@ -2348,13 +2240,18 @@ def test_email_configuration(request):
 # VUES ORANGE MONEY
 # =============================================================================
 
-@login_required
-def orange_money_payment(request):
+@transaction.atomic
+def _prepare_orange_money_payment(request):
     """
-    Vue pour initier un paiement Orange Money
+    Partie synchrone de orange_money_payment (ORM, session, messages) :
+    contrôles du panier et création de la commande temporaire.
+    Retourne (response, None) pour interrompre, sinon (None, (order, order_data)).
     """
     logger = logging.getLogger(__name__)
     
+    if not request.user.is_authenticated:
+        return redirect_to_login(request.get_full_path()), None
+    
     # Vérifier la configuration directement
     from django.conf import settings
     config = settings.ORANGE_MONEY_CONFIG
@@ -2369,13 +2266,13 @@ def orange_money_payment(request):
         logger.error("Orange Money desactive")
         
         messages.error(request, "❌ Le paiement Orange Money n'est pas disponible actuellement.")
-        return redirect('cart:cart')
+        return redirect('cart:cart'), None
     
     try:
         cart = Cart.objects.get(user=request.user)
     except Cart.DoesNotExist:
         messages.warning(request, "🛒 Votre panier est vide.")
-        return redirect('cart:cart')
+        return redirect('cart:cart'), None
     
     # Récupérer les paramètres de la requête
     product_type = request.GET.get('type', 'all')
@@ -2391,21 +2288,21 @@ def orange_money_payment(request):
     
     if not cart_items.exists():
         messages.warning(request, "🛒 Aucun article dans votre panier pour ce type de paiement.")
-        return redirect('cart:cart')
+        return redirect('cart:cart'), None
     
     # Valider le panier
     is_valid, errors = CartService.validate_cart_for_checkout(cart, product_type)
     if not is_valid:
         for error in errors:
             messages.error(request, f"❌ {error}")
-        return redirect('cart:cart')
+        return redirect('cart:cart'), None
     
     # Vérifier la disponibilité du stock
     stock_available, stock_errors = CartService.check_stock_availability(cart, product_type)
     if not stock_available:
         for error in stock_errors:
             messages.error(request, f"❌ {error}")
-        return redirect('cart:cart')
+        return redirect('cart:cart'), None
     
     try:
         # Calculer le total
@@ -2416,7 +2313,7 @@ def orange_money_payment(request):
         if not shipping_address_id:
             # Rediriger vers la page de checkout pour saisir l'adresse
             checkout_url = reverse('cart:checkout') + f'?type={product_type}&payment={payment_type}&orange_money=true'
-            return redirect(checkout_url)
+            return redirect(checkout_url), None
         
         # Récupérer l'adresse de livraison
         try:
@@ -2424,7 +2321,7 @@ def orange_money_payment(request):
         except ShippingAddress.DoesNotExist:
             messages.error(request, "❌ Adresse de livraison introuvable.")
             checkout_url = reverse('cart:checkout') + f'?type={product_type}&payment={payment_type}&method=orange_money'
-            return redirect(checkout_url)
+            return redirect(checkout_url), None
         
         # Calculer les frais de livraison
         shipping_cost = 0  # Pour l'instant, pas de frais de livraison pour Orange Money
@@ -2475,13 +2372,7 @@ def orange_money_payment(request):
             )
         
         # Ajouter les items à la commande
-        for cart_item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.get_unit_price()
-            )
+        OrderItem.create_from_cart_items(order, cart_items, price=CartItem.get_unit_price, with_options=False)
         
         # Préparer les données pour Orange Money
         
@@ -2503,9 +2394,20 @@ def orange_money_payment(request):
             'reference': f'SagaKore-{order.order_number}'
         }
         
-        # Créer la session de paiement
-        success, response_data = orange_money_service.create_payment_session(order_data)
-        
+        return None, (order, order_data)
+            
+    except Exception as e:
+        logger.error(f"Orange Money Payment Exception: {str(e)}")
+        messages.error(request, f"❌ Une erreur est survenue lors de l'initialisation du paiement: {str(e)}")
+        return redirect('cart:checkout'), None
+
+
+@transaction.atomic
+def _complete_orange_money_payment(request, order, success, response_data):
+    """Partie synchrone de orange_money_payment après l'appel à Orange Money"""
+    logger = logging.getLogger(__name__)
+    
+    try:
         if success:
             # Sauvegarder le token de paiement
             pay_token = response_data.get('pay_token')
@@ -2536,17 +2438,40 @@ def orange_money_payment(request):
         return redirect('cart:checkout')
 
 
-@login_required
-def orange_money_return(request):
+@transaction.non_atomic_requests
+async def orange_money_payment(request):
     """
-    Vue de retour après paiement Orange Money (succès ou échec)
+    Vue pour initier un paiement Orange Money.
+    Vue asynchrone : l'appel à l'API Orange Money ne bloque pas le worker ASGI,
+    le travail ORM/session s'exécute via sync_to_async (ATOMIC_REQUESTS ne
+    s'applique pas aux vues async : chaque partie synchrone a sa transaction).
     """
     logger = logging.getLogger(__name__)
     
-    # Vérifier que l'utilisateur est connecté
+    response, payment = await sync_to_async(_prepare_orange_money_payment)(request)
+    if response is not None:
+        return response
+    order, order_data = payment
+    
+    # Créer la session de paiement
+    try:
+        success, response_data = await orange_money_service.acreate_payment_session(order_data)
+    except Exception as e:
+        logger.error(f"Orange Money Payment Exception: {str(e)}")
+        success, response_data = False, {'error': str(e)}
+    
+    return await sync_to_async(_complete_orange_money_payment)(request, order, success, response_data)
+
+
+@transaction.atomic
+def _prepare_orange_money_return(request):
+    """
+    Partie synchrone de orange_money_return : session de paiement et commande.
+    Retourne (response, None) pour interrompre, sinon (None, (order, pay_token)).
+    """
+    # Vérifier que l'utilisateur est connecté (login_required ne gère pas les vues async)
     if not request.user.is_authenticated:
-        messages.error(request, "❌ Vous devez être connecté pour accéder à cette page.")
-        return redirect('accounts:login')
+        return redirect_to_login(request.get_full_path()), None
     
     # Récupérer les données de la session
     order_id = request.session.get('orange_money_order_id')
@@ -2555,85 +2480,119 @@ def orange_money_return(request):
     # Vérifier la présence des données de session
     if not order_id or not pay_token:
         messages.error(request, "❌ Session de paiement invalide. Veuillez recommencer votre paiement.")
-        return redirect('cart:cart')
+        return redirect('cart:cart'), None
     
+    # Récupérer la commande avec gestion d'erreur
     try:
-        # Récupérer la commande avec gestion d'erreur
-        try:
-            order = Order.objects.get(id=order_id, user=request.user)
-        except Order.DoesNotExist:
-            messages.error(request, "❌ Commande introuvable. Veuillez contacter le support.")
-            return redirect('cart:cart')
+        order = Order.objects.get(id=order_id, user=request.user)
+    except Order.DoesNotExist:
+        messages.error(request, "❌ Commande introuvable. Veuillez contacter le support.")
+        return redirect('cart:cart'), None
+    
+    # Vérifier que la commande a un total valide
+    if not order.total or order.total <= 0:
+        messages.error(request, "❌ Commande invalide. Veuillez contacter le support.")
+        return redirect('cart:cart'), None
+    
+    return None, (order, pay_token)
+
+
+@transaction.atomic
+def _complete_orange_money_return(request, order, success, status_data):
+    """Partie synchrone de orange_money_return après la vérification du statut"""
+    logger = logging.getLogger(__name__)
+    
+    if success and status_data:
+        status = status_data.get('status', 'UNKNOWN')
+        handled_status = status_data.get('handled_status', False)
+        status_message = status_data.get('status_message', '')
         
-        # Vérifier que la commande a un total valide
-        if not order.total or order.total <= 0:
-            messages.error(request, "❌ Commande invalide. Veuillez contacter le support.")
-            return redirect('cart:cart')
+        if status == 'SUCCESS' and handled_status:
+            # Paiement réussi
+            try:
+                order.is_paid = True
+                order.paid_at = timezone.now()
+                order.status = Order.CONFIRMED
+                order.save()
+                
+                # Synchroniser vers B2B après paiement réussi
+                sync_order_to_b2b(order)
+                
+                # Vider le panier
+                Cart.objects.filter(user=request.user).delete()
+                
+                # Nettoyer la session
+                request.session.pop('orange_money_pay_token', None)
+                request.session.pop('orange_money_notif_token', None)
+                request.session.pop('orange_money_order_id', None)
+                
+                messages.success(request, "✅ Paiement Orange Money effectué avec succès !")
+                return redirect('cart:order_success', order_id=order.id)
+                
+            except Exception as save_error:
+                logger.error(f"Confirmation Error: {str(save_error)}")
+                messages.error(request, "❌ Erreur lors de la confirmation du paiement. Veuillez contacter le support.")
+                return redirect('cart:order_detail', order_id=order.id)
+        else:
+            # Paiement échoué, en attente ou expiré
+            
+            # Utiliser le message de statut géré
+            if status_message:
+                messages.warning(request, f"⚠️ {status_message}")
+            else:
+                messages.warning(request, f"⚠️ Statut du paiement: {status}")
+            
+            # Rediriger vers la page de détail de commande
+            return redirect('cart:order_detail', order_id=order.id)
+    else:
+        # Erreur lors de la vérification
+        error_msg = status_data.get('error', 'Erreur inconnue') if status_data else 'Aucune réponse d\'Orange Money'
+        messages.error(request, f"❌ Erreur lors de la vérification du paiement: {error_msg}")
+        return redirect('cart:order_detail', order_id=order.id)
+
+
+def _orange_money_return_error(request, message, order=None):
+    messages.error(request, message)
+    if order is not None:
+        return redirect('cart:order_detail', order_id=order.id)
+    return redirect('cart:cart')
+
+
+@transaction.non_atomic_requests
+async def orange_money_return(request):
+    """
+    Vue de retour après paiement Orange Money (succès ou échec).
+    Vue asynchrone : la vérification du statut auprès d'Orange Money ne bloque
+    pas le worker ASGI.
+    """
+    logger = logging.getLogger(__name__)
+    
+    try:
+        response, payment = await sync_to_async(_prepare_orange_money_return)(request)
+        if response is not None:
+            return response
+        order, pay_token = payment
         
         # Vérifier le statut de la transaction
         try:
-            success, status_data = orange_money_service.check_transaction_status(
+            success, status_data = await orange_money_service.acheck_transaction_status(
                 order.order_number,
                 orange_money_service.format_amount(float(order.total)),
                 pay_token
             )
         except Exception as api_error:
             logger.error(f"Orange Money API Error: {str(api_error)}")
-            messages.error(request, "❌ Erreur de communication avec Orange Money. Veuillez réessayer.")
-            return redirect('cart:order_detail', order_id=order.id)
+            return await sync_to_async(_orange_money_return_error)(
+                request, "❌ Erreur de communication avec Orange Money. Veuillez réessayer.", order
+            )
         
-        if success and status_data:
-            status = status_data.get('status', 'UNKNOWN')
-            handled_status = status_data.get('handled_status', False)
-            status_message = status_data.get('status_message', '')
-            
-            if status == 'SUCCESS' and handled_status:
-                # Paiement réussi
-                try:
-                    order.is_paid = True
-                    order.paid_at = timezone.now()
-                    order.status = Order.CONFIRMED
-                    order.save()
-                    
-                    # Synchroniser vers B2B après paiement réussi
-                    sync_order_to_b2b(order)
-                    
-                    # Vider le panier
-                    Cart.objects.filter(user=request.user).delete()
-                    
-                    # Nettoyer la session
-                    request.session.pop('orange_money_pay_token', None)
-                    request.session.pop('orange_money_notif_token', None)
-                    request.session.pop('orange_money_order_id', None)
-                    
-                    messages.success(request, "✅ Paiement Orange Money effectué avec succès !")
-                    return redirect('cart:order_success', order_id=order.id)
-                    
-                except Exception as save_error:
-                    logger.error(f"Confirmation Error: {str(save_error)}")
-                    messages.error(request, "❌ Erreur lors de la confirmation du paiement. Veuillez contacter le support.")
-                    return redirect('cart:order_detail', order_id=order.id)
-            else:
-                # Paiement échoué, en attente ou expiré
-                
-                # Utiliser le message de statut géré
-                if status_message:
-                    messages.warning(request, f"⚠️ {status_message}")
-                else:
-                    messages.warning(request, f"⚠️ Statut du paiement: {status}")
-                
-                # Rediriger vers la page de détail de commande
-                return redirect('cart:order_detail', order_id=order.id)
-        else:
-            # Erreur lors de la vérification
-            error_msg = status_data.get('error', 'Erreur inconnue') if status_data else 'Aucune réponse d\'Orange Money'
-            messages.error(request, f"❌ Erreur lors de la vérification du paiement: {error_msg}")
-            return redirect('cart:order_detail', order_id=order.id)
+        return await sync_to_async(_complete_orange_money_return)(request, order, success, status_data)
             
     except Exception as e:
         logger.error(f"Orange Money Return Exception: {str(e)}")
-        messages.error(request, "❌ Une erreur inattendue est survenue. Veuillez contacter le support.")
-        return redirect('cart:cart')
+        return await sync_to_async(_orange_money_return_error)(
+            request, "❌ Une erreur inattendue est survenue. Veuillez contacter le support."
+        )
 
 
 @login_required
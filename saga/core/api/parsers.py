@@ -0,0 +1,35 @@
+"""
+Lecture des corps JSON des requêtes DRF avec orjson.
+
+ORJSONParser renvoie les mêmes données que rest_framework.parsers.JSONParser ; les
+corps qu'orjson refuse (JSON invalide, entiers de plus de 64 bits...) sont relus par
+JSONParser, qui lève les mêmes ParseError qu'aujourd'hui.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:  # Dépendance optionnelle : lecture JSON standard
+    orjson = None
+
+UTF8_ENCODINGS = ('utf-8', 'utf8')
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser accéléré par orjson"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        try:
+            if encoding.lower() in UTF8_ENCODINGS:
+                return orjson.loads(body)
+            return orjson.loads(body.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError, LookupError):
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -0,0 +1,67 @@
+"""
+Rendu JSON des réponses DRF avec orjson.
+
+ORJSONRenderer produit les mêmes octets que rest_framework.renderers.JSONRenderer
+(JSON compact, UTF-8 non échappé, U+2028/U+2029 échappés) : les types qu'orjson ne
+connaît pas, ou qu'il formaterait autrement (Decimal, datetime/date/time, timedelta,
+traductions paresseuses, QuerySet...), passent par JSONEncoder.default de DRF.
+Seule différence : l'écriture des flottants hors de [1e-4, 1e16[ (0.00001 au lieu
+de 1e-05, 1e22 au lieu de 1e+22), même valeur une fois relue.
+Les cas hors de ce périmètre (indentation demandée, réglages UNICODE_JSON /
+COMPACT_JSON modifiés, entiers de plus de 64 bits) sont rendus par JSONRenderer.
+
+orjson est une dépendance optionnelle : sans lui, le rendu standard est utilisé.
+"""
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Dépendance optionnelle : rendu JSON standard
+    orjson = None
+
+# Types confiés à JSONEncoder.default (représentation identique à DRF)
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+    if orjson else 0
+)
+
+_drf_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """
+    Sérialise `data` en octets JSON compacts, identiques à JSONRenderer de DRF.
+    Utilisable hors des vues (flux NDJSON, blobs pré-sérialisés en cache).
+    """
+    if orjson is not None:
+        try:
+            return _escape_line_separators(orjson.dumps(data, default=_drf_encoder.default, option=ORJSON_OPTIONS))
+        except orjson.JSONEncodeError:
+            # Entier hors 64 bits, objet non géré... : encodeur standard (même résultat ou même erreur)
+            pass
+    return _escape_line_separators(
+        json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    )
+
+
+def _escape_line_separators(payload):
+    # Comme JSONRenderer : U+2028 et U+2029 sont valides en JSON mais pas dans du JavaScript
+    if b'\xe2\x80\xa8' in payload or b'\xe2\x80\xa9' in payload:
+        payload = payload.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return payload
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer accéléré par orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if orjson is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,52 @@
+"""
+Versions de cache (invalidation par changement de clé).
+
+Une version est un entier stocké dans le cache sans expiration. Les entrées mises en
+cache l'incluent dans leur clé : incrémenter la version les rend obsolètes sans
+suppression explicite. La version part de l'horodatage en nanosecondes, y compris
+lorsque la clé a été évincée (LocMem évince aussi les clés sans expiration) ou que le
+cache a été vidé : une version recréée est toujours supérieure aux précédentes et ne
+fait jamais ressurgir des entrées encore en cache sous une ancienne version.
+
+Une version n'est vue de tous les workers que si le cache est partagé entre processus
+(Redis, REDIS_URL) : avec un cache propre à chaque processus (LocMem, configuration par
+défaut), un incrément fait dans un worker ou une commande de gestion n'atteint pas les
+autres. Les caches indexés sur une version ne sont alors utilisés que si
+shared_cache_enabled() est vrai.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Caches propres à chaque processus : une invalidation n'y serait pas vue des autres workers
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_enabled():
+    """Vrai si le cache par défaut est partagé entre processus"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return backend not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def get_cache_version(key):
+    """Version courante stockée sous `key`, créée si absente"""
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(key, version, None)
+        # Un autre appel a pu créer la clé entre-temps : garder sa valeur
+        version = cache.get(key, version)
+    return version
+
+
+def bump_cache_version(key):
+    """Rend obsolètes toutes les entrées indexées sur la version `key`"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Clé absente : repartir de l'horodatage
+        cache.set(key, time.time_ns(), None)
@@ -0,0 +1,161 @@
+"""
+Connexions PostgreSQL : timeouts de requête par route et métriques de connexions.
+
+- Le timeout par défaut de la connexion (DB_STATEMENT_TIMEOUT_MS, options de
+  DATABASES) est long : synchronisations B2B, commandes de gestion.
+- Les requêtes web posent un timeout plus court (StatementTimeout) : court pour
+  GET/HEAD, intermédiaire pour les écritures (sous le timeout gunicorn).
+- get_connection_metrics() expose l'occupation des connexions du serveur
+  (pg_stat_activity / max_connections) et les timeouts déclenchés.
+"""
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE query_canceled (statement_timeout dépassé)
+QUERY_CANCELED = '57014'
+
+_timeouts_lock = threading.Lock()
+_statement_timeouts = {'count': 0}
+
+
+def get_request_statement_timeout(request):
+    """Timeout (ms) des requêtes SQL d'une requête HTTP, 0 pour aucun"""
+    if request.method in ('GET', 'HEAD'):
+        return getattr(settings, 'DB_STATEMENT_TIMEOUT_READ_MS', 0)
+    return getattr(settings, 'DB_STATEMENT_TIMEOUT_WRITE_MS', 0)
+
+
+class StatementTimeout:
+    """
+    Wrapper d'exécution (connection.execute_wrapper) limitant la durée des requêtes SQL :
+    - dans une transaction (ATOMIC_REQUESTS, transaction.atomic) : set_config(..., true)
+      avant la première requête de la transaction, annulé à sa fin ;
+    - en autocommit : set_config(..., false) pour la session, remis à la valeur de la
+      connexion par reset(). Désactivé derrière PgBouncer en mode transaction
+      (DB_PGBOUNCER), où un réglage de session fuirait vers d'autres clients.
+    """
+
+    def __init__(self, timeout_ms):
+        self.timeout_ms = int(timeout_ms)
+        # alias -> marqueur on_commit de la transaction déjà limitée (voir _is_transaction_limited)
+        self._transaction_markers = {}
+        # Connexions limitées au niveau session, à remettre à leur valeur par défaut
+        self._limited_sessions = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        connection = context['connection']
+        if connection.vendor == 'postgresql' and connection.alias not in self._limited_sessions:
+            if connection.in_atomic_block:
+                if not self._is_transaction_limited(connection):
+                    self._mark_transaction(connection)
+                    self._set_timeout(context['cursor'], is_local=True)
+            elif not getattr(settings, 'DB_PGBOUNCER', False):
+                self._limited_sessions[connection.alias] = connection
+                self._set_timeout(context['cursor'], is_local=False)
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            if getattr(exc.__cause__, 'pgcode', None) == QUERY_CANCELED:
+                record_statement_timeout(connection.alias, sql)
+            raise
+
+    def _is_transaction_limited(self, connection):
+        # Le marqueur quitte run_on_commit à la fin de la transaction (commit ou rollback)
+        # et au rollback du savepoint où il a été posé, qui annule aussi le set_config local.
+        # Un bloc atomic (même instance réutilisée par @transaction.atomic) ne l'identifie pas.
+        marker = self._transaction_markers.get(connection.alias)
+        return marker is not None and any(entry[1] is marker for entry in connection.run_on_commit)
+
+    def _mark_transaction(self, connection):
+        def marker():
+            pass
+        connection.on_commit(marker)
+        self._transaction_markers[connection.alias] = marker
+
+    def _set_timeout(self, cursor, is_local):
+        # Curseur DB-API brut : ne repasse pas par les wrappers ni par le log des requêtes
+        cursor.cursor.execute(
+            "SELECT set_config('statement_timeout', %s, %s)", [f'{self.timeout_ms}ms', is_local]
+        )
+
+    def reset(self):
+        """Remet le timeout de session des connexions limitées hors transaction"""
+        for connection in self._limited_sessions.values():
+            if connection.connection is None or connection.in_atomic_block:
+                continue
+            try:
+                with connection.connection.cursor() as cursor:
+                    cursor.execute("RESET statement_timeout")
+            except Exception:
+                logger.warning("Impossible de remettre statement_timeout sur %s", connection.alias, exc_info=True)
+        self._limited_sessions.clear()
+
+
+@contextmanager
+def statement_timeout(timeout_ms, aliases=None):
+    """Applique StatementTimeout aux connexions données (toutes par défaut)"""
+    if not timeout_ms:
+        yield
+        return
+    wrapper = StatementTimeout(timeout_ms)
+    try:
+        with ExitStack() as stack:
+            for alias in aliases or connections:
+                stack.enter_context(connections[alias].execute_wrapper(wrapper))
+            yield
+    finally:
+        wrapper.reset()
+
+
+def record_statement_timeout(alias, sql):
+    with _timeouts_lock:
+        _statement_timeouts['count'] += 1
+    logger.warning("statement_timeout dépassé sur %s: %s", alias, sql[:200])
+
+
+def get_connection_metrics(alias='default'):
+    """
+    Occupation des connexions du serveur PostgreSQL de l'alias : connexions par état
+    pour la base courante, max_connections, taux de saturation, et timeouts
+    déclenchés par ce processus.
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    metrics = {
+        'alias': alias,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+        'statement_timeouts': _statement_timeouts['count'],
+    }
+    if connection.vendor != 'postgresql':
+        return metrics
+
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW max_connections")
+        max_connections = int(cursor.fetchone()[0])
+        cursor.execute(
+            """
+            SELECT COALESCE(state, 'unknown'), COUNT(*)
+            FROM pg_stat_activity
+            WHERE datname = current_database() AND backend_type = 'client backend'
+            GROUP BY 1
+            """
+        )
+        by_state = dict(cursor.fetchall())
+
+    total = sum(by_state.values())
+    metrics.update({
+        'max_connections': max_connections,
+        'connections': total,
+        'active': by_state.get('active', 0),
+        'idle': by_state.get('idle', 0),
+        'idle_in_transaction': by_state.get('idle in transaction', 0),
+        'saturation': round(total / max_connections, 3) if max_connections else None,
+    })
+    return metrics
@@ -0,0 +1,133 @@
+"""
+Routage des lectures du catalogue et des rapports vers les réplicas PostgreSQL.
+
+- Seules les requêtes HTTP en lecture (GET/HEAD) utilisent les réplicas
+  (core.middleware.ReplicaRoutingMiddleware) ; commandes de gestion, threads de
+  synchronisation et requêtes POST restent sur le primaire.
+- Seuls les modèles de DATABASE_REPLICA_APPS sont lus sur un réplica.
+- Lecture de ses propres écritures : dès qu'une requête écrit, la suite de la
+  requête lit le primaire, et un cookie garde l'utilisateur sur le primaire
+  pendant DATABASE_REPLICA_STICKY_SECONDS.
+- Un réplica en retard de plus de DATABASE_REPLICA_MAX_LAG secondes (ou
+  injoignable) est écarté jusqu'à la vérification suivante.
+"""
+import contextvars
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_DB = 'default'
+STICKY_COOKIE_NAME = 'saga_db_primary'
+
+# Retard de réplication : nul si le réplica a rejoué tout le WAL reçu, sinon âge
+# de la dernière transaction rejouée. Nul aussi sur un serveur qui n'est pas en
+# recovery (alias local de substitution).
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+@dataclass
+class RoutingState:
+    """État de routage d'une requête HTTP (mutable : partagé avec sync_to_async)"""
+    use_replicas: bool = False
+    wrote: bool = False
+
+
+_routing_state = contextvars.ContextVar('db_routing_state', default=None)
+
+# alias -> (vérifié à, sain)
+_replica_health = {}
+
+
+def get_replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def start_request_routing(use_replicas):
+    """Ouvre l'état de routage d'une requête ; retourne (token, state)"""
+    state = RoutingState(use_replicas=use_replicas)
+    return _routing_state.set(state), state
+
+
+def end_request_routing(token):
+    _routing_state.reset(token)
+
+
+def get_replica_lag(alias):
+    """Retard du réplica en secondes ; None s'il est injoignable"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        logger.warning("Réplica %s injoignable, lectures envoyées au primaire", alias, exc_info=True)
+        return None
+
+
+def is_replica_healthy(alias):
+    """Vérifie le retard du réplica au plus une fois par DATABASE_REPLICA_CHECK_INTERVAL"""
+    now = time.monotonic()
+    checked_at, healthy = _replica_health.get(alias, (None, False))
+    if checked_at is not None and now - checked_at < getattr(settings, 'DATABASE_REPLICA_CHECK_INTERVAL', 5):
+        return healthy
+
+    lag = get_replica_lag(alias)
+    max_lag = getattr(settings, 'DATABASE_REPLICA_MAX_LAG', 5)
+    healthy = lag is not None and lag <= max_lag
+    if lag is not None and not healthy:
+        logger.warning("Réplica %s en retard de %.1fs (max %ss), lectures envoyées au primaire", alias, lag, max_lag)
+    _replica_health[alias] = (now, healthy)
+    return healthy
+
+
+def is_replica_app(model):
+    return model._meta.app_label in getattr(settings, 'DATABASE_REPLICA_APPS', ())
+
+
+def choose_replica():
+    """Un réplica sain au hasard, None si aucun"""
+    healthy = [alias for alias in get_replica_aliases() if is_replica_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+class ReplicaRouter:
+    """Routeur Django (DATABASE_ROUTERS) : lectures vers les réplicas, écritures vers le primaire"""
+
+    def db_for_read(self, model, **hints):
+        state = _routing_state.get()
+        if state is None or not state.use_replicas or state.wrote or not is_replica_app(model):
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        # Seules les écritures sur des modèles lus en réplica déclenchent la lecture de ses écritures
+        # (une sauvegarde de session ne doit pas éloigner le client des réplicas)
+        state = _routing_state.get()
+        if state is not None and is_replica_app(model):
+            state.wrote = True
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_DB, *get_replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replica_aliases():
+            return False
+        return None
@@ -0,0 +1,97 @@
+"""
+Cache HTTP des endpoints publics du catalogue (application mobile).
+
+- ETag fort dérivé de la version du catalogue (product.cache) et de la requête
+  (hôte, chemin, paramètres triés, Accept) ; Last-Modified tiré de la même version.
+- If-None-Match / If-Modified-Since reçoivent un 304 avant toute construction
+  de queryset ou sérialisation.
+- Cache-Control public adapté à un CDN (max-age court côté client, s-maxage plus
+  long côté CDN, stale-while-revalidate).
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, urlencode
+
+from product.cache import get_catalogue_version
+
+# Paramètres qui déclenchent une synchronisation B2B : jamais servis depuis le cache
+CATALOGUE_BYPASS_PARAMS = ('force', 'force_sync')
+CATALOGUE_VARY_HEADERS = ('Accept', 'Accept-Encoding')
+# Suffixes ajoutés à l'ETag par la compression (core.middleware.JSONCompressionMiddleware)
+COMPRESSED_ETAG_SUFFIXES = ('-gzip', '-br')
+
+
+def catalogue_etag(request, version):
+    """ETag fort d'une réponse du catalogue pour une version donnée"""
+    query = urlencode(sorted((key, sorted(values)) for key, values in request.GET.lists()), doseq=True)
+    parts = [str(version), request.get_host(), request.path, query, request.META.get('HTTP_ACCEPT', '')]
+    return '"%s"' % hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
+
+
+def compressed_etag(etag, suffix):
+    """ETag d'une représentation compressée (reste fort, distinct par encodage)"""
+    if etag.startswith('"') and etag.endswith('"'):
+        return etag[:-1] + suffix + '"'
+    return etag
+
+
+def _base_etag(etag):
+    etag = etag.removeprefix('W/')
+    for suffix in COMPRESSED_ETAG_SUFFIXES:
+        if etag.endswith(suffix + '"'):
+            return etag[:-len(suffix) - 1] + '"'
+    return etag
+
+
+def is_not_modified(request, etag, last_modified):
+    """Évalue If-None-Match (prioritaire) puis If-Modified-Since"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in {_base_etag(candidate) for candidate in etags}
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def patch_catalogue_cache_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=getattr(settings, 'CATALOGUE_CACHE_MAX_AGE', 60),
+        s_maxage=getattr(settings, 'CATALOGUE_CACHE_S_MAXAGE', 300),
+        stale_while_revalidate=getattr(settings, 'CATALOGUE_CACHE_STALE_WHILE_REVALIDATE', 60),
+    )
+    patch_vary_headers(response, CATALOGUE_VARY_HEADERS)
+    return response
+
+
+def catalogue_cache(view_func):
+    """
+    Décorateur de vue (fonction ou, via method_decorator, méthode de ViewSet)
+    ajoutant les requêtes conditionnelles et les en-têtes de cache du catalogue.
+    Seules les réponses 200 sont mises en cache. Les vues décorées peuvent se
+    contenter des claims du jeton JWT (accounts.authentication.trusts_token_claims).
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or any(param in request.GET for param in CATALOGUE_BYPASS_PARAMS):
+            return view_func(request, *args, **kwargs)
+
+        version = get_catalogue_version()
+        etag = catalogue_etag(request, version)
+        last_modified = version // 10 ** 9
+        if is_not_modified(request, etag, last_modified):
+            return patch_catalogue_cache_headers(HttpResponseNotModified(), etag, last_modified)
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        return patch_catalogue_cache_headers(response, etag, last_modified)
+    wrapper.trusts_token_claims = True
+    return wrapper
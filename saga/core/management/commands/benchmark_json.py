@@ -0,0 +1,138 @@
+"""
+Micro-benchmark du rendu JSON de l'API : JSONRenderer (DRF) contre ORJSONRenderer.
+
+Les charges reproduisent la forme des réponses mobiles les plus lourdes : liste de
+produits (specifications imbriquées, galeries, prix Decimal), arbre des catégories
+et détail d'une commande (lignes, historique de statuts, dates).
+"""
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.api.renderers import ORJSONRenderer
+
+
+def build_product_list(count):
+    now = timezone.now()
+    results = []
+    for index in range(count):
+        gallery = [f'https://cdn.example.com/media/products/gallery/produit-{index}-{n}.webp' for n in range(4)]
+        results.append({
+            'id': index,
+            'title': f'Riz parfumé brisé {index} kg',
+            'slug': f'riz-parfume-brise-{index}-kg',
+            'price': Decimal('12500.00') + index,
+            'discount_price': Decimal('11900.00') if index % 3 == 0 else None,
+            'stock': index % 40,
+            'is_available': True,
+            'category': {'id': index % 25, 'name': 'Céréales', 'slug': 'cereales'},
+            'image_url': gallery[0],
+            'gallery': gallery,
+            'specifications': {
+                'b2b_image_urls': gallery,
+                'tags': ['riz', 'céréales', 'promo'],
+                'weight_kg': 25,
+                'origin': 'Mali',
+                'promotion': {'active': index % 3 == 0, 'end_date': str(now.date())},
+            },
+            'created_at': now - timedelta(days=index),
+            'updated_at': now,
+        })
+    return {'count': count, 'next': None, 'previous': None, 'results': results}
+
+
+def build_category_tree(count):
+    categories = []
+    for index in range(count):
+        categories.append({
+            'id': index,
+            'external_id': 1000 + index,
+            'name': f'Rayon {index}',
+            'slug': f'rayon-{index}',
+            'parent_id': None,
+            'product_count': index * 3,
+            'children': [
+                {
+                    'id': count + index * 10 + n,
+                    'external_id': 10000 + index * 10 + n,
+                    'name': f'Sous-rayon {index}.{n}',
+                    'slug': f'sous-rayon-{index}-{n}',
+                    'parent_id': 1000 + index,
+                    'product_count': n,
+                    'children': [],
+                }
+                for n in range(8)
+            ],
+        })
+    return {'categories': categories}
+
+
+def build_order_detail(items):
+    now = timezone.now()
+    return {
+        'id': 4242,
+        'order_number': 'CMD-20261019-4242',
+        'status': 'shipped',
+        'payment_method': 'orange_money',
+        'is_paid': True,
+        'paid_at': now,
+        'created_at': now - timedelta(days=2),
+        'updated_at': now,
+        'tracking_number': 'TRK-889900',
+        'subtotal': 187500.0,
+        'shipping_cost': 2500.0,
+        'tax': 0.0,
+        'discount': 1250.5,
+        'total': 188749.5,
+        'items': [
+            {
+                'id': index,
+                'product': {'id': index, 'title': f'Produit {index}', 'image_url': f'https://cdn.example.com/{index}.webp'},
+                'quantity': 1 + index % 4,
+                'price': Decimal('12500.00'),
+                'total_price': Decimal('12500.00') * (1 + index % 4),
+                'colors': ['Noir'],
+                'sizes': ['M', 'L'],
+            }
+            for index in range(items)
+        ],
+        'status_history': [
+            {'status': status, 'comment': 'Mise à jour automatique', 'created_at': now - timedelta(hours=hours)}
+            for hours, status in enumerate(['pending', 'confirmed', 'processing', 'shipped'])
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare le rendu JSON standard de DRF et le rendu orjson sur les charges de l\'API mobile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=200, help='Produits dans la liste')
+        parser.add_argument('--categories', type=int, default=60, help='Catégories principales (8 enfants chacune)')
+        parser.add_argument('--order-items', type=int, default=20, help='Lignes de la commande')
+        parser.add_argument('--iterations', type=int, default=50, help='Rendus par mesure')
+
+    def handle(self, *args, **options):
+        payloads = [
+            ('Liste produits', build_product_list(options['products'])),
+            ('Arbre catégories', build_category_tree(options['categories'])),
+            ('Détail commande', build_order_detail(options['order_items'])),
+        ]
+        iterations = options['iterations']
+        stock, fast = JSONRenderer(), ORJSONRenderer()
+
+        for name, data in payloads:
+            expected = stock.render(data)
+            identical = fast.render(data) == expected
+            stock_ms = min(timeit.repeat(lambda: stock.render(data), number=iterations, repeat=3)) / iterations * 1000
+            fast_ms = min(timeit.repeat(lambda: fast.render(data), number=iterations, repeat=3)) / iterations * 1000
+            style = self.style.SUCCESS if identical else self.style.ERROR
+            self.stdout.write(
+                f"{name:<18} {len(expected) / 1024:>8.1f} Ko  "
+                f"JSONRenderer {stock_ms:>7.2f} ms  ORJSONRenderer {fast_ms:>7.2f} ms  "
+                f"x{stock_ms / fast_ms:>5.1f}  " + style('identique' if identical else 'DIFFÉRENT')
+            )
@@ -4,14 +4,31 @@ Middlewares personnalisés pour l'app core.
 - CookieConsentMiddleware : gestion du consentement cookies
 - AnalyticsMiddleware : tracking automatique
 - MaintenanceModeMiddleware : affiche une page de maintenance si MAINTENANCE_MODE=true
+- JSONCompressionMiddleware : compression gzip/brotli des réponses JSON
+- ReplicaRoutingMiddleware : lectures GET vers les réplicas, lecture de ses écritures
+- StatementTimeoutMiddleware : timeout des requêtes SQL selon la méthode HTTP
 """
 import os
+import re
 from django.shortcuts import render
 from django.conf import settings
 from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from .db_connections import get_request_statement_timeout, statement_timeout
+from .db_router import STICKY_COOKIE_NAME, end_request_routing, start_request_routing
+from .http_cache import compressed_etag
 from .models import CookieConsent, SiteConfiguration
 from .utils import track_page_view
 
+try:
+    import brotli
+except ImportError:  # Dépendance optionnelle : gzip seul
+    brotli = None
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+JSON_CONTENT_TYPES = ('application/json', 'application/x-ndjson')
+
 class CookieConsentMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -102,4 +119,89 @@ class MaintenanceModeMiddleware:
             return self.get_response(request)
         
         # Sinon, afficher la page de maintenance
-        return render(request, 'core/maintenance.html', status=503) 
\ No newline at end of file
+        return render(request, 'core/maintenance.html', status=503) 
+
+
+class JSONCompressionMiddleware(GZipMiddleware):
+    """
+    Compresse les réponses JSON et NDJSON (API mobile) : brotli si le client l'accepte et
+    que le module est installé, gzip sinon. Les pages HTML ne sont pas concernées
+    (jetons CSRF dans le corps : attaque BREACH). L'ETag reste fort, suffixé par
+    l'encodage (voir core.http_cache).
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').split(';')[0].strip() not in JSON_CONTENT_TYPES:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        etag = response.get('ETag')
+        if (
+            brotli is not None
+            and not response.streaming
+            and len(response.content) >= 200
+            and re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        ):
+            patch_vary_headers(response, ('Accept-Encoding',))
+            compressed_content = brotli.compress(response.content)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+            response.headers['Content-Encoding'] = 'br'
+            if etag:
+                response.headers['ETag'] = compressed_etag(etag, '-br')
+            return response
+
+        response = super().process_response(request, response)
+        if etag and response.get('Content-Encoding') == 'gzip':
+            response.headers['ETag'] = compressed_etag(etag, '-gzip')
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Autorise les lectures sur réplica (core.db_router) pour les requêtes GET/HEAD
+    d'un client qui n'a pas écrit récemment. Une requête qui écrit pose un cookie
+    qui maintient ce client sur le primaire pendant DATABASE_REPLICA_STICKY_SECONDS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        use_replicas = (
+            request.method in ('GET', 'HEAD')
+            and STICKY_COOKIE_NAME not in request.COOKIES
+        )
+        token, state = start_request_routing(use_replicas)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request_routing(token)
+
+        if state.wrote:
+            response.set_cookie(
+                STICKY_COOKIE_NAME,
+                '1',
+                max_age=getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10),
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
+
+
+class StatementTimeoutMiddleware:
+    """
+    Limite la durée des requêtes SQL des vues (core.db_connections) : une requête
+    catalogue trop lente échoue au lieu d'occuper le worker jusqu'au timeout gunicorn.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with statement_timeout(get_request_statement_timeout(request)):
+            return self.get_response(request)
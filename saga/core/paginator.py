@@ -0,0 +1,48 @@
+"""
+Pagination de l'administration pour les grandes tables.
+
+Sur une liste non filtrée, COUNT(*) parcourt toute la table à chaque affichage.
+EstimatedCountPaginator lit à la place l'estimation de PostgreSQL (pg_class.reltuples,
+tenue à jour par ANALYZE / autovacuum) dès qu'elle dépasse ADMIN_EXACT_COUNT_THRESHOLD ;
+les listes filtrées ou recherchées, et les petites tables, gardent un comptage exact.
+À utiliser avec show_full_result_count = False, qui supprime le second COUNT(*) du
+total affiché à côté des résultats filtrés.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ADMIN_EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimate_table_rows(model, using='default'):
+    """Nombre de lignes estimé de la table d'un modèle, None si inconnu ou hors PostgreSQL"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # -1 : table jamais analysée
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator dont le total d'une liste non filtrée est l'estimation du planificateur"""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and not query.distinct and not query.combinator:
+            estimate = estimate_table_rows(queryset.model, queryset.db)
+            threshold = getattr(settings, 'ADMIN_EXACT_COUNT_THRESHOLD', ADMIN_EXACT_COUNT_THRESHOLD)
+            if estimate is not None and estimate > threshold:
+                return estimate
+        return super().count
@@ -0,0 +1,97 @@
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+
+from cart.models import Order
+from core.api.parsers import ORJSONParser
+from core.api.renderers import ORJSONRenderer, dumps
+from product.models import Category, Product
+
+PAYLOAD = {
+    'price': Decimal('12500.50'),
+    'aware': datetime(2026, 10, 19, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    'naive': datetime(2026, 10, 19, 8, 30),
+    'date': date(2026, 10, 19),
+    'time': time(8, 30, 15, 250000),
+    'delay': timedelta(hours=1, seconds=30),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'label': gettext_lazy('Catégorie'),
+    'text': 'Thé à la menthe\u2028fin\u2029',
+    'tags': {'riz'},
+    'nested': {'gallery': ['a.webp', 'b.webp'], 'ratio': 0.1, 'count': 3, 'empty': None},
+    7: 'clé entière',
+}
+
+
+class ORJSONRendererCompatibilityTestCase(SimpleTestCase):
+    """Le rendu orjson doit produire les mêmes octets que JSONRenderer"""
+
+    def test_same_bytes_as_drf_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD))
+        self.assertEqual(dumps(PAYLOAD), JSONRenderer().render(PAYLOAD))
+
+    def test_unsupported_values_fall_back_to_drf_encoder(self):
+        data = {'big': 2 ** 70, 'items': [1, 2]}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        with self.assertRaises(TypeError):
+            ORJSONRenderer().render({'value': object()})
+
+    def test_indent_falls_back_to_drf_renderer(self):
+        context = {'indent': 4}
+        self.assertEqual(
+            ORJSONRenderer().render(PAYLOAD, 'application/json', context),
+            JSONRenderer().render(PAYLOAD, 'application/json', context),
+        )
+
+    def test_parser_matches_drf_parser(self):
+        body = '{"titre": "Thé", "prix": 12500.5, "ids": [1, 2], "grand": 1180591620717411303424}'.encode()
+        self.assertEqual(
+            ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body))
+        )
+        latin1 = '{"titre": "Thé"}'.encode('latin-1')
+        self.assertEqual(ORJSONParser().parse(BytesIO(latin1), parser_context={'encoding': 'latin-1'}), {'titre': 'Thé'})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"prix": NaN}'))
+
+
+class APIResponsesCompatibilityTestCase(TestCase):
+    """Diff des réponses de l'API mobile entre le rendu par défaut et JSONRenderer"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Céréales', slug='cereales')
+        for index in range(3):
+            Product.objects.create(
+                title=f'Riz parfumé {index}', price=Decimal('12500.50'), category=category,
+                specifications={'tags': ['riz', 'cereales'], 'b2b_image_urls': [f'https://cdn.example.com/{index}.jpg']},
+            )
+        self.user = get_user_model().objects.create_user(email='client@example.com', password='motdepasse-solide')
+        self.order = Order.objects.create(
+            user=self.user, subtotal=Decimal('25001.00'), shipping_cost=Decimal('1500.00'), total=Decimal('26501.00')
+        )
+
+    def assertSameResponses(self, url, **extra):
+        default = self.client.get(url, **extra)
+        with patch.object(APIView, 'renderer_classes', [JSONRenderer]):
+            stock = self.client.get(url, **extra)
+        self.assertEqual(default.status_code, 200)
+        self.assertEqual(default['Content-Type'], stock['Content-Type'])
+        self.assertEqual(default.content, stock.content)
+
+    def test_product_list_and_categories(self):
+        self.assertIs(APIView.renderer_classes[0], ORJSONRenderer)
+        self.assertSameResponses('/api/products/')
+        self.assertSameResponses('/api/categories/')
+
+    def test_order_detail(self):
+        self.client.force_login(self.user)
+        self.assertSameResponses(f'/api/cart/orders/{self.order.id}/')
@@ -63,33 +63,17 @@ class ServiceLoyaltyView(TemplateView):
         
         # Données de fidélité pour utilisateurs connectés
         if self.request.user.is_authenticated:
-            from cart.models import Order
+            from accounts.models import LoyaltyAccount
             
-            # Compter les commandes de l'utilisateur
-            total_orders = Order.objects.filter(
-                user=self.request.user,
-                status__in=['delivered', 'shipped', 'processing', 'confirmed']
-            ).count()
+            # Totaux maintenus par le grand livre de fidélité (lecture par clé primaire)
+            account = LoyaltyAccount.objects.filter(pk=self.request.user.pk).first()
+            if account is None:
+                account = LoyaltyAccount(user_id=self.request.user.pk)
             
-            # Calculer les points de fidélité (1 point par 1000 FCFA dépensés)
-            total_spent = Order.objects.filter(
-                user=self.request.user,
-                status='delivered'
-            ).aggregate(
-                total=models.Sum('total')
-            )['total'] or 0
-            
-            loyalty_points = int(total_spent / 1000)  # 1 point par 1000 FCFA
-            
-            # Déterminer le niveau de fidélité
-            if loyalty_points >= 100:
-                loyalty_level = "Diamant"
-            elif loyalty_points >= 50:
-                loyalty_level = "Or"
-            elif loyalty_points >= 20:
-                loyalty_level = "Argent"
-            else:
-                loyalty_level = "Bronze"
+            total_orders = account.total_orders
+            total_spent = account.total_spent
+            loyalty_points = account.loyalty_points
+            loyalty_level = account.loyalty_level
             
             context.update({
                 'total_orders': total_orders,
@@ -5,7 +5,9 @@ from accounts.admin import admin_site
 from .models import (
     ExternalProduct,
     ExternalCategory,
-    ApiKey
+    ApiKey,
+    SyncRun,
+    SyncRunItem
 )
 
 
@@ -44,6 +46,34 @@ class ExternalCategoryAdmin(admin.ModelAdmin):
     )
 
 
+class SyncRunItemInline(admin.TabularInline):
+    model = SyncRunItem
+    fields = ['external_id', 'outcome', 'api_key_id', 'message']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    show_change_link = False
+
+    def get_queryset(self, request):
+        # Seuls les éléments en erreur sont listés (un passage compte des milliers de produits)
+        return super().get_queryset(request).filter(outcome__in=SyncRunItem.ERROR_OUTCOMES)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class SyncRunAdmin(admin.ModelAdmin):
+    list_display = ['started_at', 'kind', 'status', 'duration_ms', 'phase_durations']
+    list_filter = ['kind', 'status']
+    readonly_fields = [
+        'kind', 'status', 'started_at', 'finished_at', 'duration_ms', 'phase_durations', 'summary', 'error'
+    ]
+    inlines = [SyncRunItemInline]
+
+    def has_add_permission(self, request):
+        return False
+
+
 class ApiKeyForm(forms.ModelForm):
     """Formulaire pour l'admin avec champ pour la clé API en clair"""
     api_key = forms.CharField(
@@ -124,3 +154,4 @@ class ApiKeyAdmin(admin.ModelAdmin):
 admin_site.register(ExternalProduct, ExternalProductAdmin)
 admin_site.register(ExternalCategory, ExternalCategoryAdmin)
 admin_site.register(ApiKey, ApiKeyAdmin)
+admin_site.register(SyncRun, SyncRunAdmin)
@@ -1,22 +1,27 @@
 """
 API REST pour l'intégration avec l'app de gestion de stock
 """
+import json
+from itertools import islice
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from core.api.renderers import dumps
+from core.http_cache import catalogue_cache
 from inventory.models import ExternalProduct, ExternalCategory, ApiKey
 from inventory.services import InventoryAPIClient, ProductSyncService
-from inventory.utils import (
-    get_synced_categories,
-    get_category_tree_from_b2b,
-    get_products_in_synced_category
-)
-from inventory.category_utils import build_category_hierarchy, get_b2b_categories_hierarchy
+from inventory.utils import get_products_in_synced_category
+from inventory.category_tree import category_tree_response
+from inventory.category_utils import build_category_hierarchy
 from product.models import Category, Product
 from cart.models import Order
 import logging
@@ -24,6 +29,146 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class SyncedProductsCursorPagination(CursorPagination):
+    """Pagination par curseur (stable pendant une synchronisation) des produits B2B"""
+    ordering = '-id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+# Relations lues par ProductListSerializer
+SYNCED_PRODUCTS_SELECT_RELATED = (
+    'category', 'supplier', 'phone', 'phone__color',
+    'clothing_product', 'fabric_product', 'cultural_product',
+)
+SYNCED_PRODUCTS_PREFETCH_RELATED = ('images', 'shipping_methods')
+
+
+def get_synced_products_queryset():
+    """Produits B2B synchronisés et disponibles (jointure sur ExternalProduct)"""
+    return Product.objects.filter(
+        external_product__sync_status='synced',
+        external_product__is_b2b=True,
+        is_available=True,
+    ).select_related(
+        *SYNCED_PRODUCTS_SELECT_RELATED
+    ).prefetch_related(
+        *SYNCED_PRODUCTS_PREFETCH_RELATED
+    ).order_by('-id')
+
+
+def _synced_products_not_found():
+    """Réponse 404 avec diagnostic, calculée uniquement quand aucun produit n'est servi"""
+    external_products = ExternalProduct.objects.filter(sync_status='synced', is_b2b=True)
+    external_count = external_products.count()
+    if external_count == 0:
+        # Aucun produit synchronisé - suggérer de synchroniser
+        return Response({
+            'error': 'Aucun produit synchronisé trouvé. Veuillez synchroniser les produits depuis B2B avec: python manage.py sync_products_from_inventory',
+            'count': 0,
+            'results': [],
+            'hint': 'Exécutez la commande: python manage.py sync_products_from_inventory'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'error': 'Aucun produit disponible trouvé pour les IDs synchronisés',
+        'count': 0,
+        'results': [],
+        'diagnostic': {
+            'synced_count': external_count,
+            'with_product_count': external_count,
+            'available_count': 0,
+            'unavailable_count': external_products.filter(product__is_available=False).count()
+        }
+    }, status=status.HTTP_404_NOT_FOUND)
+
+
+def _serialized_synced_products(products, request):
+    """Sérialise les produits par paquets lus avec un itérateur (mémoire constante)"""
+    from product.api.serializers import ProductListSerializer
+
+    chunk_size = getattr(settings, 'SYNCED_PRODUCTS_STREAM_CHUNK_SIZE', 200)
+    rows = products.iterator(chunk_size=chunk_size)
+    context = {'request': request}
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield ProductListSerializer(chunk, many=True, context=context).data
+
+
+def _stream_synced_products_json(products, count, request):
+    """Même document que l'ancienne réponse ({"count", "results"}), écrit au fil de l'eau"""
+    yield b'{"count":%d,"results":[' % count
+    separator = b''
+    for data in _serialized_synced_products(products, request):
+        if data:
+            yield separator + b','.join(dumps(item) for item in data)
+            separator = b','
+    yield b']}'
+
+
+def _stream_synced_products_ndjson(products, request):
+    """Un produit JSON par ligne (export complet)"""
+    for data in _serialized_synced_products(products, request):
+        yield b''.join(dumps(item) + b'\n' for item in data)
+
+
+def synced_products_response(request, view_name):
+    """
+    Produits B2B synchronisés, servis selon les paramètres :
+    - ?cursor=... ou ?page_size=N : pagination par curseur ({"next", "previous", "results"}) ;
+    - ?stream=ndjson : export NDJSON en streaming ;
+    - sinon : document complet {"count", "results"}, écrit en streaming.
+    """
+    try:
+        # Vérifier que l'API key est configurée
+        from inventory.models import ApiKey
+        api_key = ApiKey.get_active_key()
+        if not api_key:
+            return Response({
+                'error': 'Aucune clé API configurée. Veuillez configurer une clé API active dans /admin/inventory/apikey/',
+                'count': 0,
+                'results': []
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        products = get_synced_products_queryset()
+        params = request.query_params
+
+        if 'cursor' in params or 'page_size' in params:
+            from product.api.serializers import ProductListSerializer
+            paginator = SyncedProductsCursorPagination()
+            page = paginator.paginate_queryset(products, request)
+            if not page and 'cursor' not in params:
+                return _synced_products_not_found()
+            serializer = ProductListSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
+
+        if not products.exists():
+            return _synced_products_not_found()
+
+        if params.get('stream') == 'ndjson':
+            return StreamingHttpResponse(
+                _stream_synced_products_ndjson(products, request),
+                content_type='application/x-ndjson'
+            )
+        return StreamingHttpResponse(
+            _stream_synced_products_json(products, products.count(), request),
+            content_type='application/json'
+        )
+    except APIException:
+        # Curseur invalide, etc. : laisser DRF répondre (404/400)
+        raise
+    except Exception as e:
+        logger.error(f"[B2B API] Erreur dans {view_name}: {str(e)}", exc_info=True)
+        return Response({
+            'error': str(e),
+            'count': 0,
+            'results': []
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet pour les catégories synchronisées depuis B2B
@@ -33,11 +178,9 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     lookup_field = 'id'  # Utiliser l'ID au lieu du slug pour l'API
     
     @action(detail=False, methods=['get'], url_path='synced', url_name='synced')
+    @method_decorator(catalogue_cache)
     def synced(self, request):
         """Retourne les catégories synchronisées depuis B2B"""
-        from django.db.models import Prefetch
-        from django.core.exceptions import ValidationError
-        
         # Déclencher une synchronisation automatique non bloquante si nécessaire
         try:
             from inventory.tasks import trigger_categories_sync_async
@@ -47,72 +190,8 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
             logger.warning(f"[CategoryViewSet] ⚠️ Impossible de déclencher la sync auto catégories: {str(e)}")
         
         try:
-            categories = get_synced_categories()
-            
-            if not categories:
-                return Response({
-                    'count': 0,
-                    'results': []
-                })
-            
-            # Annoter les catégories avec le nombre de produits disponibles
-            category_ids = [cat.id for cat in categories]
-            
-            # Préparer le prefetch pour les enfants avec annotation
-            children_prefetch = Prefetch(
-                'children',
-                queryset=Category.objects.annotate(
-                    # Product.category a related_name='products'
-                    # IMPORTANT: ne pas utiliser "product_count" car Category a une property du même nom
-                    b2b_product_count=Count('products', filter=Q(products__is_available=True))
-                )
-            )
-            
-            categories_with_count = Category.objects.filter(
-                id__in=category_ids
-            ).annotate(
-                # Product.category a related_name='products'
-                # IMPORTANT: ne pas utiliser "product_count" car Category a une property du même nom
-                b2b_product_count=Count('products', filter=Q(products__is_available=True))
-            ).select_related('parent').prefetch_related(children_prefetch)
-            
-            from product.api.serializers import CategorySerializer
-            
-            # Sérialiser les catégories une par une pour identifier les problèmes
-            results = []
-            errors = []
-            for cat in categories_with_count:
-                try:
-                    # Vérifier que la catégorie a les champs requis
-                    if not cat.name:
-                        logger.warning(f"Catégorie {cat.id} n'a pas de nom, ignorée")
-                        continue
-                    
-                    # S'assurer que le slug existe ou est vide
-                    if not cat.slug:
-                        logger.debug(f"Catégorie {cat.id} n'a pas de slug, utilisation d'une valeur par défaut")
-                    
-                    cat_serializer = CategorySerializer(cat, context={'request': request})
-                    results.append(cat_serializer.data)
-                except ValidationError as ve:
-                    error_msg = f"ValidationError pour catégorie {cat.id} ({cat.name}): {str(ve)}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                except Exception as e:
-                    error_msg = f"Erreur lors de la sérialisation de la catégorie {cat.id} ({getattr(cat, 'name', 'sans nom')}): {str(e)}"
-                    logger.error(error_msg, exc_info=True)
-                    errors.append(error_msg)
-            
-            response_data = {
-                'count': len(results),
-                'results': results
-            }
-            
-            if errors:
-                response_data['warnings'] = errors
-            
-            return Response(response_data)
-            
+            # Octets JSON partagés par version du catalogue (inventory.category_tree)
+            return category_tree_response(request, 'synced')
         except Exception as e:
             error_msg = f"Erreur lors de la récupération des catégories synchronisées: {str(e)}"
             logger.error(error_msg, exc_info=True)
@@ -123,23 +202,20 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['get'])
+    @method_decorator(catalogue_cache)
     def tree(self, request):
         """Retourne l'arbre hiérarchique des catégories synchronisées"""
-        tree = get_category_tree_from_b2b()
-        
-        return Response({
-            'categories': tree
-        })
+        return category_tree_response(request, 'tree')
     
     @action(detail=False, methods=['get'], url_path='b2b-hierarchy', url_name='b2b-hierarchy')
+    @method_decorator(catalogue_cache)
     def b2b_hierarchy(self, request):
         """
         Retourne la hiérarchie des catégories B2B organisée par niveau.
         Les catégories de niveau 0 sont les principales, celles de niveau 1+ sont les sous-catégories.
         """
         try:
-            hierarchy = get_b2b_categories_hierarchy()
-            return Response(hierarchy)
+            return category_tree_response(request, 'b2b_hierarchy')
         except Exception as e:
             logger.error(f"Erreur lors de la récupération de la hiérarchie B2B: {str(e)}", exc_info=True)
             return Response({
@@ -206,6 +282,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = []  # Public read-only
     
     @action(detail=False, methods=['get'], url_path='synced', url_name='synced')
+    @method_decorator(catalogue_cache)
     def synced(self, request):
         """Retourne les produits synchronisés depuis B2B"""
         
@@ -223,82 +300,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         except Exception as e:
             logger.warning(f"Erreur lors de la synchronisation automatique: {str(e)}")
         
-        try:
-            # Vérifier que l'API key est configurée
-            from inventory.models import ApiKey
-            api_key = ApiKey.get_active_key()
-            if not api_key:
-                return Response({
-                    'error': 'Aucune clé API configurée. Veuillez configurer une clé API active dans /admin/inventory/apikey/',
-                    'count': 0,
-                    'results': []
-                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-            
-            # Récupérer uniquement les produits B2B synchronisés
-            external_products = ExternalProduct.objects.filter(
-                sync_status='synced',
-                is_b2b=True
-            ).select_related('product')
-            external_count = external_products.count()
-            
-            if external_count == 0:
-                # Aucun produit synchronisé - suggérer de synchroniser
-                return Response({
-                    'error': 'Aucun produit synchronisé trouvé. Veuillez synchroniser les produits depuis B2B avec: python manage.py sync_products_from_inventory',
-                    'count': 0,
-                    'results': [],
-                    'hint': 'Exécutez la commande: python manage.py sync_products_from_inventory'
-                }, status=status.HTTP_404_NOT_FOUND)
-            
-            # Extraire les IDs des produits (via la relation OneToOneField)
-            product_ids = [ep.product.id for ep in external_products if ep.product]
-            if not product_ids:
-                return Response({
-                    'error': 'Aucun produit valide trouvé',
-                    'count': 0,
-                    'results': []
-                }, status=status.HTTP_404_NOT_FOUND)
-            
-            # Filtrer uniquement les produits disponibles et trier par ID pour cohérence
-            products = Product.objects.filter(
-                id__in=product_ids,
-                is_available=True
-            ).select_related('category', 'supplier').order_by('-id')
-            products_count = products.count()
-            
-            # Produits non disponibles pour diagnostic
-            unavailable_products = Product.objects.filter(
-                id__in=product_ids,
-                is_available=False
-            ).count()
-            
-            if products_count == 0:
-                return Response({
-                    'error': 'Aucun produit disponible trouvé pour les IDs synchronisés',
-                    'count': 0,
-                    'results': [],
-                    'diagnostic': {
-                        'synced_count': external_count,
-                        'with_product_count': len(product_ids),
-                        'available_count': products_count,
-                        'unavailable_count': unavailable_products
-                    }
-                }, status=status.HTTP_404_NOT_FOUND)
-            
-            from product.api.serializers import ProductListSerializer
-            serializer = ProductListSerializer(products, many=True, context={'request': request})
-            
-            return Response({
-                'count': products.count(),
-                'results': serializer.data
-            })
-        except Exception as e:
-            logger.error(f"[B2B API] Erreur dans synced: {str(e)}", exc_info=True)
-            return Response({
-                'error': str(e),
-                'count': 0,
-                'results': []
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return synced_products_response(request, 'synced')
 
 
 @api_view(['GET'])
@@ -313,6 +315,7 @@ def sync_status_view(request):
 
 
 @api_view(['GET'])
+@catalogue_cache
 def synced_products_view(request):
     """Vue alternative pour récupérer les produits B2B synchronisés"""
     
@@ -326,148 +329,16 @@ def synced_products_view(request):
     except Exception as e:
         logger.warning(f"Erreur lors de la synchronisation automatique: {str(e)}")
     
-    try:
-        # Vérifier que l'API key est configurée
-        from inventory.models import ApiKey
-        api_key = ApiKey.get_active_key()
-        if not api_key:
-            return Response({
-                'error': 'Aucune clé API configurée. Veuillez configurer une clé API active dans /admin/inventory/apikey/',
-                'count': 0,
-                'results': []
-            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-        
-        # Récupérer uniquement les produits B2B synchronisés
-        external_products = ExternalProduct.objects.filter(
-            sync_status='synced',
-            is_b2b=True
-        ).select_related('product')
-        external_count = external_products.count()
-        
-        if external_count == 0:
-            return Response({
-                'error': 'Aucun produit synchronisé trouvé. Veuillez synchroniser les produits depuis B2B avec: python manage.py sync_products_from_inventory',
-                'count': 0,
-                'results': [],
-                'hint': 'Exécutez la commande: python manage.py sync_products_from_inventory'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        # Extraire les IDs des produits (via la relation OneToOneField)
-        product_ids = [ep.product.id for ep in external_products if ep.product]
-        if not product_ids:
-            return Response({
-                'error': 'Aucun produit valide trouvé',
-                'count': 0,
-                'results': []
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        # Filtrer uniquement les produits disponibles et trier par ID pour cohérence
-        products = Product.objects.filter(
-            id__in=product_ids,
-            is_available=True
-        ).select_related('category', 'supplier').order_by('-id')
-        products_count = products.count()
-        
-        # Produits non disponibles pour diagnostic
-        unavailable_products = Product.objects.filter(
-            id__in=product_ids,
-            is_available=False
-        ).count()
-        
-        if products_count == 0:
-            return Response({
-                'error': 'Aucun produit disponible trouvé pour les IDs synchronisés',
-                'count': 0,
-                'results': [],
-                'diagnostic': {
-                    'synced_count': external_count,
-                    'with_product_count': len(product_ids),
-                    'available_count': products_count,
-                    'unavailable_count': unavailable_products
-                }
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        from product.api.serializers import ProductListSerializer
-        serializer = ProductListSerializer(products, many=True, context={'request': request})
-        
-        return Response({
-            'count': products.count(),
-            'results': serializer.data
-        })
-    except Exception as e:
-        logger.error(f"[B2B API] Erreur dans synced_products_view: {str(e)}", exc_info=True)
-        return Response({
-            'error': str(e),
-            'count': 0,
-            'results': []
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return synced_products_response(request, 'synced_products_view')
 
 
 # Vue alternative pour l'endpoint synced des catégories (au cas où le router ne la génère pas correctement)
 @api_view(['GET'])
+@catalogue_cache
 def synced_categories_view(request):
     """Vue alternative pour récupérer les catégories B2B synchronisées"""
-    from django.db.models import Prefetch
-    from django.core.exceptions import ValidationError
-    
     try:
-        categories = get_synced_categories()
-        
-        if not categories:
-            return Response({
-                'count': 0,
-                'results': []
-            })
-        
-        # Annoter les catégories avec le nombre de produits disponibles
-        category_ids = [cat.id for cat in categories]
-        
-        # Préparer le prefetch pour les enfants avec annotation
-        children_prefetch = Prefetch(
-            'children',
-            queryset=Category.objects.annotate(
-                product_count=Count('product', filter=Q(product__is_available=True))
-            )
-        )
-        
-        categories_with_count = Category.objects.filter(
-            id__in=category_ids
-        ).annotate(
-            product_count=Count('product', filter=Q(product__is_available=True))
-        ).select_related('parent').prefetch_related(children_prefetch)
-        
-        from product.api.serializers import CategorySerializer
-        
-        # Sérialiser les catégories une par une pour identifier les problèmes
-        results = []
-        errors = []
-        for cat in categories_with_count:
-            try:
-                # Vérifier que la catégorie a les champs requis
-                if not cat.name:
-                    continue
-                
-                cat_serializer = CategorySerializer(cat, context={'request': request})
-                results.append(cat_serializer.data)
-            except ValidationError as ve:
-                error_msg = f"ValidationError pour catégorie {cat.id} ({cat.name}): {str(ve)}"
-                logger.error(error_msg)
-                errors.append(error_msg)
-            except Exception as e:
-                error_msg = f"Erreur lors de la sérialisation de la catégorie {cat.id} ({getattr(cat, 'name', 'sans nom')}): {str(e)}"
-                logger.error(error_msg, exc_info=True)
-                errors.append(error_msg)
-        
-        response_data = {
-            'count': len(results),
-            'results': results
-        }
-        
-        if errors:
-            response_data['warnings'] = errors
-        
-        return Response(response_data)
-        
+        return category_tree_response(request, 'synced')
     except Exception as e:
         error_msg = f"Erreur lors de la récupération des catégories synchronisées: {str(e)}"
         logger.error(f"[synced_categories_view] {error_msg}", exc_info=True)
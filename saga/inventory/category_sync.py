@@ -0,0 +1,275 @@
+"""
+Réconciliation en lot des catégories B2B.
+
+CategoryReconciler charge une seule fois les ExternalCategory, les Category et les
+slugs existants, calcule en mémoire créations, mises à jour, liens parent/enfant
+et slugs, puis écrit le tout par bulk_create / bulk_update dans une transaction.
+Chaque passage produit un rapport (durée, nombre de requêtes SQL).
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+
+from product.cache import bump_catalogue_version
+from product.models import Category
+from .models import ExternalCategory
+
+logger = logging.getLogger(__name__)
+
+HISTORY_CHANGE_REASON = 'Synchronisation B2B'
+BATCH_SIZE = 500
+# Champs de Category écrits par la synchronisation
+SYNCED_FIELDS = [
+    'name', 'slug', 'description', 'external_id', 'external_parent_id',
+    'rayon_type', 'level', 'order', 'is_main', 'image_url', 'parent',
+]
+
+
+def parse_category_parent_id(external_data: Dict[str, Any]) -> Optional[int]:
+    """parent_id peut être un entier ou un objet avec un id"""
+    parent_id = external_data.get('parent_id')
+    if not parent_id and 'parent' in external_data:
+        parent = external_data['parent']
+        if isinstance(parent, dict):
+            parent_id = parent.get('id')
+        elif isinstance(parent, int):
+            parent_id = parent
+        else:
+            parent_id = None
+    return parent_id
+
+
+def parse_category_payload(external_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Champs de Category (hors slug et parent) à partir des données B2B d'une catégorie"""
+    parent_id = parse_category_parent_id(external_data)
+
+    # Normaliser rayon_type et level (gérer les chaînes vides et None)
+    rayon_type = external_data.get('rayon_type') or None
+    level = external_data.get('level')
+    if level is None:
+        # Essayer de déduire le level depuis parent_id
+        level = 0 if not parent_id else None
+
+    raw_image_url = external_data.get('image_url') or external_data.get('image')
+    if isinstance(raw_image_url, dict):
+        raw_image_url = raw_image_url.get('url') or raw_image_url.get('image') or raw_image_url.get('image_url')
+    if raw_image_url and not isinstance(raw_image_url, str):
+        raw_image_url = None
+
+    return {
+        'name': external_data.get('name') or 'Catégorie sans nom',
+        'description': external_data.get('description', ''),
+        'external_id': external_data.get('id'),
+        'external_parent_id': parent_id,
+        'rayon_type': rayon_type,
+        'level': level,
+        'order': external_data.get('order') or 0,
+        'is_main': external_data.get('level', 0) == 0 if level is not None else (not parent_id),
+        'image_url': raw_image_url or None,
+    }
+
+
+class QueryCounter:
+    """Wrapper d'exécution (connection.execute_wrapper) comptant les requêtes SQL"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class CategoryReconciler:
+    """
+    Applique la liste complète des catégories B2B aux tables Category / ExternalCategory.
+
+    Les écritures en lot ne passent pas par Category.save() : la normalisation du nom
+    et la validation des nouvelles catégories principales y sont reproduites, l'historique
+    est écrit par simple_history (bulk_*_with_history) et le cache du catalogue est
+    invalidé une fois à la validation de la transaction.
+    """
+
+    def __init__(self, categories_data: List[Dict[str, Any]]):
+        self.categories_data = categories_data
+        self.stats = {
+            'total': 0,
+            'created': 0,
+            'updated': 0,
+            'deleted': 0,
+            'errors': 0,
+            'errors_list': [],
+        }
+        # slug -> propriétaire (pk d'une catégorie existante, ou id() d'une nouvelle)
+        self._slug_owners = {}
+
+    def run(self) -> Dict[str, Any]:
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter), transaction.atomic():
+            self._reconcile()
+        self.stats['report'] = {
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+            'queries': counter.count,
+        }
+        logger.info(
+            f"[SYNC CAT] Réconciliation: {len(self.categories_data)} catégories en "
+            f"{self.stats['report']['duration_ms']} ms, {counter.count} requêtes SQL"
+        )
+        return self.stats
+
+    def _error(self, external_id, message):
+        self.stats['errors'] += 1
+        self.stats['errors_list'].append({'category_id': external_id, 'error': message})
+        logger.error(f"Erreur lors de la synchronisation de la catégorie {external_id}: {message}")
+
+    def _allocate_slug(self, name, external_id, owner, current_slug=None):
+        """Slug unique calculé en mémoire (suffixe -<id externe> en cas de conflit)"""
+        base_slug = slugify(name) or f"categorie-{external_id}"
+        if current_slug and self._slug_owners.get(current_slug) == owner and (
+            current_slug == base_slug or current_slug.startswith(f"{base_slug}-{external_id}")
+        ):
+            return current_slug
+        slug = base_slug
+        counter = 1
+        while self._slug_owners.get(slug, owner) != owner:
+            slug = f"{base_slug}-{external_id}" if counter == 1 else f"{base_slug}-{external_id}-{counter}"
+            counter += 1
+        # L'ancien slug reste réservé jusqu'au passage suivant : pas d'échange de slugs
+        # entre lignes d'un même UPDATE (contrainte d'unicité vérifiée ligne à ligne)
+        self._slug_owners[slug] = owner
+        return slug
+
+    def _reconcile(self):
+        payloads = {}
+        for external_data in self.categories_data:
+            external_id = external_data.get('id')
+            if not external_id:
+                self._error(external_id, "L'ID externe de la catégorie est requis")
+                continue
+            payloads[int(external_id)] = parse_category_payload(external_data)
+
+        external_categories = {
+            external_category.external_id: external_category
+            for external_category in ExternalCategory.objects.select_related('category')
+        }
+        self._slug_owners = {
+            slug: pk for pk, slug in Category.objects.exclude(slug__isnull=True).values_list('pk', 'slug')
+        }
+
+        categories_by_external_id = {
+            external_id: external_category.category
+            for external_id, external_category in external_categories.items()
+        }
+        to_create = []
+        to_update = []
+        for external_id, fields in payloads.items():
+            fields['name'] = fields['name'].strip().title()
+            external_category = external_categories.get(external_id)
+            if external_category:
+                category = external_category.category
+                before = [getattr(category, field) for field in SYNCED_FIELDS if field != 'parent']
+                for field, value in fields.items():
+                    setattr(category, field, value)
+                category.slug = self._allocate_slug(category.name, external_id, category.pk, category.slug)
+                after = [getattr(category, field) for field in SYNCED_FIELDS if field != 'parent']
+                if before != after:
+                    to_update.append(category)
+                self.stats['total'] += 1
+                self.stats['updated'] += 1
+            else:
+                if fields['is_main']:
+                    # Même règle que Category.save() pour les nouvelles catégories principales
+                    self._error(external_id, "Une catégorie principale doit avoir un modèle lié")
+                    continue
+                category = Category(**fields)
+                category.slug = self._allocate_slug(category.name, external_id, id(category))
+                to_create.append(category)
+                categories_by_external_id[external_id] = category
+                self.stats['total'] += 1
+                self.stats['created'] += 1
+
+        if to_create:
+            # Parent déjà en base : posé dès la création (pas de seconde écriture)
+            for category in to_create:
+                parent = categories_by_external_id.get(category.external_parent_id)
+                if parent is not None and parent.pk:
+                    category.parent_id = parent.pk
+            bulk_create_with_history(
+                to_create, Category, batch_size=BATCH_SIZE, default_change_reason=HISTORY_CHANGE_REASON
+            )
+
+        # Liens parent/enfant : toutes les catégories (existantes et créées) ont désormais un pk
+        to_update_ids = {id(category) for category in to_update}
+        for external_id, fields in payloads.items():
+            category = categories_by_external_id.get(external_id)
+            if category is None:
+                continue
+            parent = categories_by_external_id.get(fields['external_parent_id'])
+            parent_pk = parent.pk if parent is not None else None
+            if category.parent_id != parent_pk:
+                category.parent_id = parent_pk
+                if id(category) not in to_update_ids:
+                    to_update.append(category)
+                    to_update_ids.add(id(category))
+        if to_update:
+            bulk_update_with_history(
+                to_update, Category, SYNCED_FIELDS,
+                batch_size=BATCH_SIZE, default_change_reason=HISTORY_CHANGE_REASON,
+            )
+
+        self._reconcile_external_categories(payloads, external_categories, categories_by_external_id)
+
+        if to_create or to_update or self.stats['deleted']:
+            transaction.on_commit(bump_catalogue_version)
+
+    def _reconcile_external_categories(self, payloads, external_categories, categories_by_external_id):
+        now = timezone.now()
+        new_external = []
+        synced_external = []
+        for external_id, fields in payloads.items():
+            external_category = external_categories.get(external_id)
+            if external_category is None:
+                category = categories_by_external_id.get(external_id)
+                if category is None:
+                    continue
+                new_external.append(ExternalCategory(
+                    category=category,
+                    external_id=external_id,
+                    external_parent_id=fields['external_parent_id'],
+                    last_synced_at=now,
+                ))
+            else:
+                external_category.external_parent_id = fields['external_parent_id']
+                external_category.last_synced_at = now
+                synced_external.append(external_category)
+        ExternalCategory.objects.bulk_create(new_external, batch_size=BATCH_SIZE)
+        ExternalCategory.objects.bulk_update(
+            synced_external, ['external_parent_id', 'last_synced_at'], batch_size=BATCH_SIZE
+        )
+
+        # Catégories supprimées côté B2B : garder la catégorie locale, retirer la référence B2B
+        stale = [
+            external_category for external_id, external_category in external_categories.items()
+            if external_id not in payloads
+        ]
+        if stale:
+            logger.warning(
+                f"[SYNC CAT] {len(stale)} catégories supprimées côté B2B détectées. "
+                f"Exemples: {[(item.external_id, item.category.name) for item in stale[:10]]}"
+            )
+            stale_categories = [item.category for item in stale]
+            for category in stale_categories:
+                category.external_id = None
+                category.external_parent_id = None
+            bulk_update_with_history(
+                stale_categories, Category, ['external_id', 'external_parent_id'],
+                batch_size=BATCH_SIZE, default_change_reason=HISTORY_CHANGE_REASON,
+            )
+            ExternalCategory.objects.filter(pk__in=[item.pk for item in stale]).delete()
+            self.stats['deleted'] = len(stale)
@@ -0,0 +1,222 @@
+"""
+Arbre canonique des catégories B2B, sérialisé une fois par version du catalogue.
+
+build_category_nodes() lit les correspondances ExternalCategory, les catégories
+synchronisées avec leurs enfants directs et le nombre de produits disponibles par
+catégorie en trois requêtes, puis indexe les nœuds en un seul passage (par id, par
+parent local, par parent B2B) : la construction est linéaire en nombre de catégories.
+
+Chaque représentation servie par les endpoints (arbre, hiérarchie B2B, liste
+synchronisée au format de CategorySerializer) est dérivée de ces nœuds, encodée en
+JSON et stockée en octets dans le cache sous la version du catalogue
+(product.cache, partagée par tous les processus) : les vues renvoient ces octets
+tels quels, sans ORM ni serializer DRF, jusqu'à la prochaine modification du
+catalogue, quel que soit le processus qui l'a faite. Les octets contiennent des
+URLs d'images signées : leur durée de vie reste bien en deçà de celle des signatures.
+"""
+import hashlib
+import logging
+from collections import defaultdict
+from urllib.parse import urljoin
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.http import HttpResponse
+
+from core.api.renderers import dumps
+from product.cache import get_catalogue_version
+from product.models import Category, Product
+from saga.storage_backends import ProductImageStorage
+from saga.utils.media_urls import get_storage, resolve_many
+from .models import ExternalCategory
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_TREE_CACHE_PREFIX = 'category_tree'
+CATEGORY_TREE_CACHE_TIMEOUT = 60 * 15  # Inférieur à la validité des URLs signées (querystring_expire)
+CATEGORY_FIELDS = (
+    'id', 'name', 'slug', 'parent_id', 'image', 'image_url', 'description', 'color',
+    'is_main', 'order', 'category_type', 'rayon_type', 'level',
+)
+TREE_SHAPES = ('tree', 'b2b_hierarchy', 'synced')
+# Représentations dont les URLs d'images dépendent de l'hôte de la requête
+ABSOLUTE_URL_SHAPES = ('synced',)
+
+
+def build_category_nodes():
+    """
+    Nœuds canoniques des catégories synchronisées et de leurs enfants directs.
+
+    Returns:
+        dict: {'nodes': [nœud, ...] (ordre du modèle : order, name),
+               'synced_ids': [ids des catégories synchronisées]}
+    """
+    external = {
+        category_id: (external_id, external_parent_id)
+        for external_id, external_parent_id, category_id in ExternalCategory.objects.values_list(
+            'external_id', 'external_parent_id', 'category_id'
+        )
+    }
+    synced_ids = ExternalCategory.objects.values('category_id')
+    rows = list(
+        Category.objects.filter(Q(id__in=synced_ids) | Q(parent_id__in=synced_ids)).values(*CATEGORY_FIELDS)
+    )
+    counts = dict(
+        Product.objects.filter(is_available=True, category_id__in=[row['id'] for row in rows])
+        .order_by()
+        .values('category_id')
+        .annotate(count=Count('id'))
+        .values_list('category_id', 'count')
+    )
+    image_urls = resolve_many(get_storage(ProductImageStorage), [row['image'] for row in rows if row['image']])
+
+    nodes = []
+    for row in rows:
+        external_id, external_parent_id = external.get(row['id'], (None, None))
+        row.update({
+            'image': image_urls.get(row['image']) if row['image'] else None,
+            'product_count': counts.get(row['id'], 0),
+            'external_id': external_id,
+            'external_parent_id': external_parent_id,
+        })
+        nodes.append(row)
+    return {'nodes': nodes, 'synced_ids': list(external)}
+
+
+def _serializer_node(node, base_url, children):
+    """Nœud au format de product.api.serializers.CategorySerializer"""
+    image = urljoin(base_url, node['image']) if node['image'] else None
+    return {
+        'id': node['id'],
+        'name': node['name'] or '',
+        'slug': node['slug'] or '',
+        'parent': node['parent_id'],
+        'children': children,
+        'image': image,
+        'image_url': node['image_url'] or image,
+        'description': node['description'] or '',
+        'color': node['color'] or 'blue',
+        'is_main': node['is_main'],
+        'order': node['order'],
+        'category_type': node['category_type'] or 'MODEL',
+        'product_count': node['product_count'],
+        'rayon_type': node['rayon_type'],
+        'level': node['level'],
+    }
+
+
+def render_category_tree(data, shape, base_url=''):
+    """Représentation `shape` (TREE_SHAPES) de l'arbre, à partir des nœuds canoniques"""
+    synced_ids = set(data['synced_ids'])
+    synced = [node for node in data['nodes'] if node['id'] in synced_ids]
+
+    if shape == 'synced':
+        children_by_parent = defaultdict(list)
+        for node in data['nodes']:
+            if node['parent_id'] is not None:
+                children_by_parent[node['parent_id']].append(node)
+        results = [
+            _serializer_node(node, base_url, [
+                _serializer_node(child, base_url, []) for child in children_by_parent[node['id']]
+            ])
+            for node in synced if node['name']
+        ]
+        return {'count': len(results), 'results': results}
+
+    children_by_external_parent = defaultdict(list)
+    for node in synced:
+        if node['external_parent_id']:
+            children_by_external_parent[node['external_parent_id']].append(node)
+    roots = [node for node in synced if not node['external_parent_id']]
+
+    if shape == 'b2b_hierarchy':
+        def hierarchy_node(node, level):
+            return {
+                'id': node['id'],
+                'external_id': node['external_id'],
+                'name': node['name'],
+                'slug': node['slug'],
+                'description': node['description'],
+                'image_url': node['image'],
+                'level': level,
+                'order': node['order'],
+                'product_count': node['product_count'],
+            }
+
+        main_categories = []
+        for root in roots:
+            main = hierarchy_node(root, 0)
+            main['children'] = [
+                hierarchy_node(child, 1) for child in children_by_external_parent[root['external_id']]
+            ]
+            main_categories.append(main)
+        return {
+            'main_categories': main_categories,
+            'total_main': len(main_categories),
+            'total_sub': sum(len(main['children']) for main in main_categories),
+        }
+
+    if shape == 'tree':
+        def tree_node(node, seen):
+            # Garde-fou contre un cycle dans les parents B2B
+            seen = seen | {node['external_id']}
+            return {
+                'id': node['id'],
+                'external_id': node['external_id'],
+                'name': node['name'],
+                'slug': node['slug'],
+                'parent_id': node['external_parent_id'],
+                'product_count': node['product_count'],
+                'children': [
+                    tree_node(child, seen)
+                    for child in children_by_external_parent[node['external_id']]
+                    if child['external_id'] not in seen
+                ],
+            }
+
+        return {'categories': [tree_node(root, frozenset()) for root in roots]}
+
+    raise ValueError(f"Représentation d'arbre inconnue: {shape}")
+
+
+def _cache_key(version, name):
+    return f'{CATEGORY_TREE_CACHE_PREFIX}:v{version}:{name}'
+
+
+def _get_nodes(version):
+    key = _cache_key(version, 'nodes')
+    data = cache.get(key)
+    if data is None:
+        data = build_category_nodes()
+        cache.set(key, data, CATEGORY_TREE_CACHE_TIMEOUT)
+    return data
+
+
+def get_category_tree(shape):
+    """Représentation `shape` de l'arbre (structures Python, pour les vues HTML)"""
+    return render_category_tree(_get_nodes(get_catalogue_version()), shape)
+
+
+def get_category_tree_bytes(shape, base_url=''):
+    """
+    Octets JSON de la représentation `shape` pour la version courante du catalogue.
+
+    base_url sert à rendre absolues les URLs d'images relatives (format CategorySerializer).
+    """
+    # Version lue avant la construction : un arbre construit pendant une modification
+    # est rangé sous l'ancienne version et n'est jamais servi pour la nouvelle
+    version = get_catalogue_version()
+    key = _cache_key(version, f"{shape}:{hashlib.md5(base_url.encode()).hexdigest()[:12]}")
+    payload = cache.get(key)
+    if payload is None:
+        data = render_category_tree(_get_nodes(version), shape, base_url)
+        payload = dumps(data)
+        cache.set(key, payload, CATEGORY_TREE_CACHE_TIMEOUT)
+        logger.debug(f"[CATEGORY TREE] {shape} v{version}: {len(payload)} octets")
+    return payload
+
+
+def category_tree_response(request, shape):
+    """Réponse JSON servie directement depuis les octets en cache"""
+    base_url = request.build_absolute_uri('/') if shape in ABSOLUTE_URL_SHAPES else ''
+    return HttpResponse(get_category_tree_bytes(shape, base_url), content_type='application/json')
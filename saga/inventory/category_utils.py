@@ -75,67 +75,10 @@ def get_b2b_categories_hierarchy() -> Dict:
     
     Returns:
         Dictionnaire avec la hiérarchie des catégories B2B
+        (arbre partagé par version du catalogue, voir inventory.category_tree)
     """
-    # Récupérer toutes les catégories externes avec leurs catégories associées
-    external_categories = ExternalCategory.objects.select_related(
-        'category'
-    ).prefetch_related(
-        'category__children',
-        'category__children__external_category'
-    ).all()
-    
-    # Construire la structure hiérarchique
-    main_categories = []
-    categories_by_external_id = {}
-    
-    # Mapper les catégories externes
-    for ext_cat in external_categories:
-        categories_by_external_id[ext_cat.external_id] = {
-            'external_id': ext_cat.external_id,
-            'external_parent_id': ext_cat.external_parent_id,
-            'category': ext_cat.category,
-            'last_synced_at': ext_cat.last_synced_at
-        }
-    
-    # Organiser en hiérarchie
-    for ext_cat in external_categories:
-        if ext_cat.external_parent_id is None:
-            # Catégorie principale
-            children = []
-            # Trouver les sous-catégories
-            for child_ext_id, child_data in categories_by_external_id.items():
-                if child_data['external_parent_id'] == ext_cat.external_id:
-                    children.append({
-                        'id': child_data['category'].id,
-                        'external_id': child_data['external_id'],
-                        'name': child_data['category'].name,
-                        'slug': child_data['category'].slug,
-                        'description': child_data['category'].description,
-                        'image_url': child_data['category'].image.url if child_data['category'].image else None,
-                        'level': 1,
-                        'order': child_data['category'].order,
-                    })
-            
-            main_categories.append({
-                'id': ext_cat.category.id,
-                'external_id': ext_cat.external_id,
-                'name': ext_cat.category.name,
-                'slug': ext_cat.category.slug,
-                'description': ext_cat.category.description,
-                'image_url': ext_cat.category.image.url if ext_cat.category.image else None,
-                'level': 0,
-                'order': ext_cat.category.order,
-                'children': sorted(children, key=lambda x: x.get('order', 0))
-            })
-    
-    # Trier les catégories principales par ordre
-    main_categories.sort(key=lambda x: x.get('order', 0))
-    
-    return {
-        'main_categories': main_categories,
-        'total_main': len(main_categories),
-        'total_sub': sum(len(cat['children']) for cat in main_categories)
-    }
+    from inventory.category_tree import get_category_tree
+    return get_category_tree('b2b_hierarchy')
 
 
 def sync_b2b_categories_to_local(categories_data: List[Dict]) -> Dict:
@@ -7,6 +7,7 @@ from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
 from product.models import Category
 from .models import ExternalCategory
+from .category_tree import category_tree_response
 from .utils import (
     get_synced_categories,
     get_category_by_external_id,
@@ -79,22 +80,7 @@ def category_tree_json(request):
     """
     API JSON pour récupérer l'arbre des catégories synchronisées
     """
-    category_tree = get_category_tree_from_b2b()
-    
-    # Convertir en format JSON
-    def serialize_category(cat):
-        return {
-            'id': cat['id'],
-            'external_id': cat['external_id'],
-            'name': cat['name'],
-            'slug': cat['slug'],
-            'parent_id': cat['parent_id'],
-            'children': [serialize_category(child) for child in cat['children']]
-        }
-    
-    tree_json = [serialize_category(cat) for cat in category_tree]
-    
-    return JsonResponse({'categories': tree_json})
+    return category_tree_response(request, 'tree')
 
 
 def category_products_json(request, category_id):
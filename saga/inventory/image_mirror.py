@@ -0,0 +1,227 @@
+"""
+Miroir des images des produits B2B.
+
+Les images B2B sont servies par le Minio du fournisseur en taille originale. Après
+chaque synchronisation des produits, les images nouvelles ou modifiées sont
+téléchargées en parallèle, réduites en dérivés (B2B_IMAGE_MIRROR_VARIANTS) WebP
+(JPEG si Pillow n'a pas le support WebP) et stockées dans ProductImageStorage sous
+des clés dérivées du contenu : b2b/<sha256[:2]>/<sha256>/<variante>.<ext>.
+
+Les clés sont enregistrées dans Product.image_urls['b2b_mirror'], par URL d'origine.
+Product.get_b2b_image_urls(variant) sert les dérivés et retombe sur l'URL d'origine
+pour les images pas encore traitées : une URL modifiée par le fournisseur n'a plus
+d'entrée miroir et est de nouveau servie en direct jusqu'au passage suivant.
+
+Le miroir tourne hors des workers web (commande mirror_b2b_images, planifiée ou
+lancée par le worker) : B2B_IMAGE_MIRROR_ENABLED, qui l'enchaîne à la synchronisation
+automatique, est désactivé par défaut car celle-ci s'exécute dans un thread d'un
+worker gunicorn. Les JPEG sont décodés directement à l'échelle réduite (draft) ;
+les autres formats sont refusés au-delà de MAX_SOURCE_PIXELS.
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, features
+
+from product.cache import bump_catalogue_version, bump_product_version
+from product.models import B2B_MIRROR_KEY, Product
+from saga.storage_backends import CONTENT_ADDRESSED_PREFIX, ProductImageStorage
+from saga.utils.media_urls import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Une image en échec n'est retentée qu'après ce délai
+FAILURE_CACHE_PREFIX = 'b2b_image_mirror_failed'
+FAILURE_RETRY_SECONDS = 60 * 60
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+# Pixels décodés au plus pour une source non JPEG (une image RGBA de cette taille occupe ~100 Mo)
+MAX_SOURCE_PIXELS = 25 * 1000 * 1000
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Produits écrits par requête lors de l'enregistrement des miroirs
+MIRROR_UPDATE_BATCH_SIZE = 500
+
+
+def _failure_key(url):
+    return f"{FAILURE_CACHE_PREFIX}:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+def get_mirror_format():
+    """(format Pillow, extension, type MIME) des dérivés"""
+    if features.check('webp'):
+        return 'WEBP', 'webp', 'image/webp'
+    return 'JPEG', 'jpg', 'image/jpeg'
+
+
+def fetch_image(url, timeout):
+    """Télécharge une image B2B (taille bornée par MAX_SOURCE_BYTES)"""
+    with requests.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_SOURCE_BYTES:
+                raise ValueError(f"Image de plus de {MAX_SOURCE_BYTES} octets")
+            chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def open_source_image(data):
+    """
+    Ouvre une image source sans la décoder en taille originale au-delà du nécessaire :
+    un JPEG est décodé à l'échelle (1/2, 1/4, 1/8) la plus petite couvrant le plus
+    grand dérivé ; une autre source trop grande est refusée.
+    """
+    source = Image.open(BytesIO(data))
+    largest = max(max(options['width'], options['height']) for options in settings.B2B_IMAGE_MIRROR_VARIANTS.values())
+    if source.format == 'JPEG':
+        # Boîte carrée : l'orientation EXIF peut encore permuter largeur et hauteur
+        source.draft('RGB', (largest, largest))
+    elif source.width * source.height > MAX_SOURCE_PIXELS:
+        source.close()
+        raise ValueError(f"Image de {source.width}x{source.height} pixels, au-delà de {MAX_SOURCE_PIXELS}")
+    return source
+
+
+def build_variants(data):
+    """Dérivés redimensionnés d'une image : {variante: octets}"""
+    image_format = get_mirror_format()[0]
+    variants = {}
+    with open_source_image(data) as source:
+        image = ImageOps.exif_transpose(source)
+        if image_format == 'JPEG':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA'):
+            has_alpha = 'A' in image.mode or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        for name, options in settings.B2B_IMAGE_MIRROR_VARIANTS.items():
+            derivative = image.copy()
+            # thumbnail() conserve le ratio et n'agrandit jamais une petite image
+            derivative.thumbnail((options['width'], options['height']), Image.Resampling.LANCZOS)
+            output = BytesIO()
+            derivative.save(
+                output,
+                format=image_format,
+                quality=options.get('quality', settings.IMAGE_QUALITY),
+                optimize=True,
+            )
+            variants[name] = output.getvalue()
+    return variants
+
+
+def mirror_image(url, timeout):
+    """Télécharge une image et stocke ses dérivés ; retourne {variante: clé de stockage}"""
+    data = fetch_image(url, timeout)
+    digest = hashlib.sha256(data).hexdigest()
+    _, extension, content_type = get_mirror_format()
+    storage = get_storage(ProductImageStorage)
+    keys = {}
+    for name, content in build_variants(data).items():
+        key = f"{CONTENT_ADDRESSED_PREFIX}{digest[:2]}/{digest}/{name}.{extension}"
+        file = ContentFile(content)
+        file.content_type = content_type
+        keys[name] = storage.save(key, file)
+    return keys
+
+
+def _mirror_or_none(url, timeout):
+    try:
+        return url, mirror_image(url, timeout)
+    except Exception as e:
+        logger.warning(f"[MIRROR IMAGES] Échec pour {url}: {e}")
+        return url, None
+
+
+def get_pending_images(products):
+    """URLs d'origine sans dérivé miroir, hors échecs récents"""
+    pending = {}
+    for product in products:
+        mirror = product.get_b2b_mirror()
+        for url in product.get_b2b_source_urls():
+            if url not in mirror:
+                pending[_failure_key(url)] = url
+    if pending:
+        for failure_key in cache.get_many(list(pending)):
+            del pending[failure_key]
+    return list(pending.values())
+
+
+def _merged_mirror(product, mirrored):
+    """
+    Nouvelle entrée miroir du produit avec les dérivés `mirrored`, None si inchangée.
+    Les entrées des URLs qui ne sont plus celles du produit sont retirées.
+    """
+    mirror = product.get_b2b_mirror()
+    updated = {url: mirror.get(url) or mirrored.get(url) for url in product.get_b2b_source_urls()}
+    updated = {url: keys for url, keys in updated.items() if keys}
+    return None if updated == mirror else updated
+
+
+def mirror_b2b_images(products=None, max_workers=None, timeout=None):
+    """
+    Miroir des images B2B des produits donnés (par défaut : produits B2B disponibles).
+
+    Returns:
+        dict: statistiques (images à traiter, miroirs créés, échecs, produits mis à jour)
+    """
+    if products is None:
+        products = Product.objects.filter(external_product__is_b2b=True, is_available=True)
+    products = list(products)
+    max_workers = max_workers or getattr(settings, 'B2B_IMAGE_MIRROR_WORKERS', 8)
+    timeout = timeout or getattr(settings, 'B2B_IMAGE_MIRROR_TIMEOUT', 15)
+
+    pending = get_pending_images(products)
+    stats = {'pending': len(pending), 'mirrored': 0, 'failed': 0, 'products_updated': 0}
+
+    # Téléchargements et redimensionnements en parallèle ; aucune requête SQL dans les threads
+    mirrored = {}
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for url, keys in executor.map(lambda url: _mirror_or_none(url, timeout), pending):
+                if keys:
+                    mirrored[url] = keys
+                else:
+                    cache.set(_failure_key(url), True, FAILURE_RETRY_SECONDS)
+    stats['mirrored'] = len(mirrored)
+    stats['failed'] = len(pending) - len(mirrored)
+
+    # Les téléchargements peuvent durer plusieurs minutes : image_urls est relu, verrouillé,
+    # juste avant la fusion pour ne pas écraser une synchronisation ou une édition admin
+    candidates = [product.pk for product in products if _merged_mirror(product, mirrored) is not None]
+    changed = []
+    for start in range(0, len(candidates), MIRROR_UPDATE_BATCH_SIZE):
+        with transaction.atomic():
+            batch = []
+            fresh = Product.objects.select_for_update().only('id', 'specifications', 'image_urls')
+            for product in fresh.filter(pk__in=candidates[start:start + MIRROR_UPDATE_BATCH_SIZE]):
+                updated = _merged_mirror(product, mirrored)
+                if updated is None:
+                    continue
+                if not isinstance(product.image_urls, dict):
+                    product.image_urls = {}
+                product.image_urls[B2B_MIRROR_KEY] = updated
+                batch.append(product)
+            # Une écriture par lot au lieu d'un save() par produit (historique, signaux de cache) :
+            # les dérivés ne sont pas une modification à historiser, le cache est invalidé une fois
+            Product.objects.bulk_update(batch, ['image_urls'])
+        changed.extend(batch)
+
+    if changed:
+        for product in changed:
+            bump_product_version(product.pk)
+        bump_catalogue_version()
+    stats['products_updated'] = len(changed)
+
+    logger.info(
+        f"[MIRROR IMAGES] {stats['mirrored']}/{stats['pending']} images en miroir, "
+        f"{stats['failed']} échecs, {stats['products_updated']} produits mis à jour"
+    )
+    return stats
@@ -0,0 +1,26 @@
+"""
+Commande de management pour mettre en miroir les images des produits B2B
+"""
+from django.core.management.base import BaseCommand
+from inventory.image_mirror import mirror_b2b_images
+
+
+class Command(BaseCommand):
+    help = 'Télécharge les images B2B et stocke leurs dérivés (miniatures, pages détail)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Nombre de téléchargements en parallèle (défaut: B2B_IMAGE_MIRROR_WORKERS)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Miroir des images des produits B2B...')
+        stats = mirror_b2b_images(max_workers=options.get('workers'))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Miroir terminé: {stats["mirrored"]}/{stats["pending"]} images, '
+                f'{stats["failed"]} échecs, {stats["products_updated"]} produits mis à jour'
+            )
+        )
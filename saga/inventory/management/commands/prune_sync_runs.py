@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from inventory.sync_journal import SYNC_RUN_RETENTION_DAYS, prune_sync_runs
+
+
+class Command(BaseCommand):
+    help = "Purge les journaux de synchronisation B2B (SyncRun / SyncRunItem) par ancienneté"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'SYNC_RUN_RETENTION_DAYS', SYNC_RUN_RETENTION_DAYS),
+            help='Supprime les passages plus anciens que ce nombre de jours (0 = désactivé)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Affiche le nombre de passages concernés sans rien supprimer'
+        )
+
+    def handle(self, *args, **options):
+        count = prune_sync_runs(days=options['days'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"[DRY RUN] {count} passage(s) de synchronisation seraient supprimés.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {count} passage(s) de synchronisation supprimés."))
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_externalproduct_api_key_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('products', 'Produits')], max_length=20, verbose_name='Type')),
+                ('status', models.CharField(choices=[('running', 'En cours'), ('success', 'Terminée'), ('failed', 'Échouée')], default='running', max_length=20, verbose_name='Statut')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Début')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Durée (ms)')),
+                ('phase_durations', models.JSONField(blank=True, default=dict, verbose_name='Durées par phase (ms)')),
+                ('summary', models.JSONField(blank=True, default=dict, verbose_name='Synthèse')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Erreur')),
+            ],
+            options={
+                'verbose_name': 'Synchronisation B2B',
+                'verbose_name_plural': 'Synchronisations B2B',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncRunItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.IntegerField(blank=True, null=True, verbose_name='ID externe (B2B)')),
+                ('outcome', models.CharField(choices=[('created', 'Créé'), ('updated', 'Mis à jour'), ('duplicate', 'Doublon (déjà traité)'), ('category_missing', 'Catégorie manquante'), ('validation_error', 'Erreur de validation'), ('other_error', 'Autre erreur'), ('api_error', 'Erreur API')], max_length=30, verbose_name='Résultat')),
+                ('api_key_id', models.IntegerField(blank=True, null=True, verbose_name='ID clé API')),
+                ('message', models.TextField(blank=True, default='', verbose_name='Message')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='inventory.syncrun', verbose_name='Synchronisation')),
+            ],
+            options={
+                'verbose_name': 'Élément synchronisé',
+                'verbose_name_plural': 'Éléments synchronisés',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='syncrun',
+            index=models.Index(fields=['kind', '-started_at'], name='inventory_s_kind_3bb48b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='syncrunitem',
+            index=models.Index(fields=['run', 'outcome'], name='inventory_s_run_id_88d709_idx'),
+        ),
+    ]
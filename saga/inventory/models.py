@@ -322,3 +322,83 @@ class ExternalCategory(models.Model):
 
     def __str__(self):
         return f"{self.category.name} (ID B2B: {self.external_id})"
+
+
+class SyncRun(models.Model):
+    """
+    Journal d'une synchronisation B2B : durées (totale et par phase) et compteurs.
+
+    Le détail par produit est dans SyncRunItem ; les compteurs de synthèse sont
+    calculés en SQL à la fin du passage (inventory.sync_journal.SyncJournal).
+    """
+    KIND_CHOICES = [
+        ('products', 'Produits'),
+    ]
+    STATUS_CHOICES = [
+        ('running', 'En cours'),
+        ('success', 'Terminée'),
+        ('failed', 'Échouée'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Type')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running', verbose_name='Statut')
+    started_at = models.DateTimeField(default=timezone.now, verbose_name='Début')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Fin')
+    duration_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name='Durée (ms)')
+    # {'fetch': ms, 'transform': ms, 'write': ms, 'images': ms}
+    phase_durations = models.JSONField(default=dict, blank=True, verbose_name='Durées par phase (ms)')
+    # {'outcomes': {code: nombre}, 'synced': n, 'available': n}
+    summary = models.JSONField(default=dict, blank=True, verbose_name='Synthèse')
+    error = models.TextField(null=True, blank=True, verbose_name='Erreur')
+
+    class Meta:
+        verbose_name = 'Synchronisation B2B'
+        verbose_name_plural = 'Synchronisations B2B'
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['kind', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.started_at:%d/%m/%Y %H:%M} ({self.get_status_display()})"
+
+    def count(self, *outcomes):
+        """Nombre d'éléments ayant l'un des codes de résultat donnés"""
+        counts = self.summary.get('outcomes', {})
+        return sum(counts.get(outcome, 0) for outcome in outcomes)
+
+    def add_phase(self, name, duration_ms):
+        """Ajoute une phase exécutée après la clôture du passage (ex. miroir des images)"""
+        self.phase_durations[name] = self.phase_durations.get(name, 0) + round(duration_ms)
+        self.duration_ms = (self.duration_ms or 0) + round(duration_ms)
+        self.save(update_fields=['phase_durations', 'duration_ms'])
+
+
+class SyncRunItem(models.Model):
+    """Résultat de la synchronisation d'un élément (produit) au cours d'un SyncRun"""
+    OUTCOME_CHOICES = [
+        ('created', 'Créé'),
+        ('updated', 'Mis à jour'),
+        ('duplicate', 'Doublon (déjà traité)'),
+        ('category_missing', 'Catégorie manquante'),
+        ('validation_error', 'Erreur de validation'),
+        ('other_error', 'Autre erreur'),
+        ('api_error', 'Erreur API'),
+    ]
+    ERROR_OUTCOMES = ('category_missing', 'validation_error', 'other_error', 'api_error')
+
+    run = models.ForeignKey(SyncRun, on_delete=models.CASCADE, related_name='items', verbose_name='Synchronisation')
+    external_id = models.IntegerField(null=True, blank=True, verbose_name='ID externe (B2B)')
+    outcome = models.CharField(max_length=30, choices=OUTCOME_CHOICES, verbose_name='Résultat')
+    api_key_id = models.IntegerField(null=True, blank=True, verbose_name='ID clé API')
+    message = models.TextField(blank=True, default='', verbose_name='Message')
+
+    class Meta:
+        verbose_name = 'Élément synchronisé'
+        verbose_name_plural = 'Éléments synchronisés'
+        indexes = [
+            models.Index(fields=['run', 'outcome']),
+        ]
+
+    def __str__(self):
+        return f"{self.external_id} - {self.get_outcome_display()}"
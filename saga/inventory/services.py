@@ -3,6 +3,7 @@ Services de synchronisation avec l'app de gestion de stock
 """
 import requests
 import logging
+from contextlib import nullcontext
 from typing import Dict, List, Optional, Any
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -20,11 +21,19 @@ from .models import (
     ExternalCategory
 )
 from product.models import Product, Category, ImageProduct
+from product.history import product_history_sync_mode
+from .category_sync import CategoryReconciler, parse_category_payload
+from .sync_journal import SyncJournal
 from cart.models import Order, OrderItem
 
 logger = logging.getLogger(__name__)
 
 
+def sync_verbose() -> bool:
+    """Journal détaillé (requêtes, payloads, images brutes par produit) : settings.B2B_SYNC_VERBOSE_LOGGING"""
+    return getattr(settings, 'B2B_SYNC_VERBOSE_LOGGING', False)
+
+
 class InventoryAPIError(Exception):
     """Exception personnalisée pour les erreurs API"""
     pass
@@ -119,8 +128,10 @@ class InventoryAPIClient:
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
         headers = self._get_headers()
         
+        verbose = sync_verbose()
         # Log de la requête (sans le token complet)
-        logger.info(f"Requête {method} vers {url}")
+        if verbose:
+            logger.info(f"Requête {method} vers {url}")
         logger.debug(f"Headers envoyés: {list(headers.keys())}")
         if self.token:
             masked_token = f"{self.token[:6]}...{self.token[-4:]}" if len(self.token) > 10 else "***"
@@ -134,7 +145,7 @@ class InventoryAPIClient:
             logger.error("AUCUN TOKEN CONFIGURE - La requête va échouer")
         
         # Log du payload pour les requêtes POST/PUT avec JSON
-        if method in ['POST', 'PUT'] and 'json' in kwargs:
+        if verbose and method in ['POST', 'PUT'] and 'json' in kwargs:
             import json
             payload = kwargs.get('json', {})
             logger.info(f"Payload {method} vers {url}: {json.dumps(payload, indent=2, ensure_ascii=False)}")
@@ -150,7 +161,7 @@ class InventoryAPIClient:
             
             # Log de la réponse
             logger.debug(f"Réponse {response.status_code} de {url}")
-            if method in ['POST', 'PUT']:
+            if verbose and method in ['POST', 'PUT']:
                 try:
                     response_data = response.json()
                 except ValueError:
@@ -394,15 +405,25 @@ class ProductSyncService:
     
     def __init__(self):
         self.api_client = InventoryAPIClient()
+        # Journal du passage en cours (SyncJournal), posé par sync_all_products
+        self.journal = None
+    
+    def _phase(self, name):
+        """Mesure une phase dans le journal du passage en cours (sans effet hors synchronisation)"""
+        return self.journal.phase(name) if self.journal else nullcontext()
     
     # NOTE: Méthode de téléchargement d'images supprimée
     # On ne stocke plus les images B2B localement, on conserve uniquement les URLs
     # Les URLs sont stockées dans specifications['b2b_image_urls'] et exposées via l'API
     
+    @product_history_sync_mode('Synchronisation B2B')
     def sync_all_products(self, site_id: Optional[int] = None) -> Dict[str, Any]:
         """
         Synchronise tous les produits depuis l'app de gestion
         
+        Le déroulé (durées par phase, résultat par produit) est enregistré dans un
+        SyncRun (inventory.sync_journal) dont l'id est retourné dans stats['run_id'].
+        
         Args:
             site_id: ID du site (optionnel)
             
@@ -419,15 +440,56 @@ class ProductSyncService:
             'skipped_reasons': {}
         }
         
-        logger.info("=" * 80)
         logger.info("[SYNC B2B] 🚀 Démarrage synchronisation produits B2B")
-        logger.info("=" * 80)
         
         keys = ApiKey.get_active_keys()
         if not keys:
             logger.error("[SYNC B2B] Aucune clé API disponible pour la synchronisation")
             return stats
 
+        self.journal = SyncJournal('products')
+        error = None
+        try:
+            all_b2b_product_ids = self._sync_products_pages(keys, site_id, stats)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            run = self.journal.finish(error)
+            self.journal = None
+            stats['run_id'] = run.pk
+        
+        # Résumé final : compteurs calculés en SQL par le journal
+        synced_count = run.summary.get('synced', 0)
+        available_count = run.summary.get('available', 0)
+        logger.info(
+            f"[SYNC B2B] 📊 Résumé: {len(all_b2b_product_ids)} produits B2B dans l'API, "
+            f"{stats['total']} traités ({stats['created']} créés, {stats['updated']} mis à jour), "
+            f"{stats['errors']} erreurs, {stats['skipped']} ignorés, "
+            f"{synced_count} synchronisés dont {available_count} disponibles (journal #{run.pk})"
+        )
+        if stats['skipped_reasons']:
+            logger.info(f"[SYNC B2B] Raisons des produits ignorés: {stats['skipped_reasons']}")
+        
+        gap = len(all_b2b_product_ids) - synced_count
+        if gap > 0:
+            logger.warning(f"⚠️  {gap} produits B2B ne sont pas synchronisés")
+        
+        gap_available = synced_count - available_count
+        if gap_available > 0:
+            logger.warning(f"⚠️  {gap_available} produits synchronisés ne sont pas disponibles (is_available=False)")
+        
+        return stats
+    
+    def _sync_products_pages(self, keys: List[Dict[str, Any]], site_id: Optional[int], stats: Dict[str, Any]) -> set:
+        """
+        Parcourt les pages de produits de chaque clé API et synchronise chaque produit.
+        
+        Returns:
+            Ensemble des IDs externes des produits B2B reçus
+        """
+        journal = self.journal
+        verbose = sync_verbose()
         processed_external_ids = set()
         all_b2b_product_ids = set()
 
@@ -446,7 +508,8 @@ class ProductSyncService:
 
             while has_next:
                 try:
-                    response = api_client.get_products_list(site_id=site_id, page=page)
+                    with journal.phase('fetch'):
+                        response = api_client.get_products_list(site_id=site_id, page=page)
 
                     # Gérer différents formats de réponse
                     if isinstance(response, dict):
@@ -456,9 +519,11 @@ class ProductSyncService:
                         products = response if isinstance(response, list) else []
                         has_next = False
 
-                    logger.info(f"[SYNC B2B] 📄 Page {page}: {len(products)} produits récupérés")
+                    if verbose:
+                        logger.info(f"[SYNC B2B] 📄 Page {page}: {len(products)} produits récupérés")
 
                     for product_data in products:
+                        detail_error = ''
                         try:
                             # Récupérer les détails complets du produit pour avoir toutes les informations
                             external_id = product_data.get('id')
@@ -468,59 +533,48 @@ class ProductSyncService:
                                     stats['skipped_reasons']['duplicate_external_id'] = (
                                         stats['skipped_reasons'].get('duplicate_external_id', 0) + 1
                                     )
-                                    logger.debug(
-                                        f"[SYNC B2B] 🔁 Produit déjà traité (id={external_id}), clé={key_label}"
-                                    )
+                                    journal.record(external_id, 'duplicate', api_key_id=key_info.get('id'))
                                     continue
 
                                 processed_external_ids.add(external_id)
                                 all_b2b_product_ids.add(external_id)
                                 try:
                                     # Récupérer les détails complets depuis l'API
-                                    detailed_product_data = api_client.get_product_detail(external_id)
-
-                                    # Log des images avant fusion pour debug
-                                    list_images = product_data.get('images') or product_data.get('image_urls') or product_data.get('gallery') or product_data.get('image_url') or product_data.get('image')
-                                    detail_images = detailed_product_data.get('images') or detailed_product_data.get('image_urls') or detailed_product_data.get('gallery') or detailed_product_data.get('image_url') or detailed_product_data.get('image')
-
-                                    logger.debug(f"[SYNC IMAGES] 📋 Avant fusion - Produit {external_id}:")
-                                    logger.debug(f"  - Images LISTE: {list_images}")
-                                    logger.debug(f"  - Images DÉTAIL: {detail_images}")
+                                    with journal.phase('fetch'):
+                                        detailed_product_data = api_client.get_product_detail(external_id)
 
-                                    # Fusionner les données de la liste avec les détails complets
-                                    # Les détails complets ont priorité
-                                    product_data = {**product_data, **detailed_product_data}
+                                    with journal.phase('transform'):
+                                        list_images = product_data.get('images') or product_data.get('image_urls') or product_data.get('gallery') or product_data.get('image_url') or product_data.get('image')
+                                        detail_images = detailed_product_data.get('images') or detailed_product_data.get('image_urls') or detailed_product_data.get('gallery') or detailed_product_data.get('image_url') or detailed_product_data.get('image')
 
-                                    # Log après fusion
-                                    merged_images = product_data.get('images') or product_data.get('image_urls') or product_data.get('gallery') or product_data.get('image_url') or product_data.get('image')
-                                    logger.debug(f"  - Images APRÈS FUSION: {merged_images}")
+                                        # Fusionner les données de la liste avec les détails complets
+                                        # Les détails complets ont priorité
+                                        product_data = {**product_data, **detailed_product_data}
 
-                                    # Si le détail n'a pas d'images mais que la liste en a, les restaurer
-                                    if not detail_images and list_images:
-                                        if isinstance(list_images, list):
-                                            product_data['images'] = list_images
-                                        else:
-                                            product_data['image_url'] = list_images
-                                        logger.debug(f"[SYNC IMAGES] 🔄 Images de la liste restaurées (détail sans images) pour produit {external_id}")
+                                        # Si le détail n'a pas d'images mais que la liste en a, les restaurer
+                                        if not detail_images and list_images:
+                                            if isinstance(list_images, list):
+                                                product_data['images'] = list_images
+                                            else:
+                                                product_data['image_url'] = list_images
                                 except InventoryAPIError as e:
-                                    logger.warning(
-                                        f"Impossible de récupérer les détails du produit {external_id}: {str(e)}. "
-                                        f"Utilisation des données de base. clé={key_label}"
-                                    )
                                     # Continuer avec les données de base si les détails ne sont pas disponibles
+                                    detail_error = f"Détail indisponible, données de liste utilisées: {str(e)}"
+                                    if verbose:
+                                        logger.warning(f"[SYNC B2B] Produit {external_id}: {detail_error} (clé={key_label})")
 
-                            result = self.create_or_update_product(
-                                product_data,
-                                api_key_id=key_info.get('id'),
-                                api_key_name=key_info.get('name')
-                            )
+                            with journal.phase('transform'):
+                                result = self.create_or_update_product(
+                                    product_data,
+                                    api_key_id=key_info.get('id'),
+                                    api_key_name=key_info.get('name')
+                                )
                             stats['total'] += 1
-                            if result['created']:
-                                stats['created'] += 1
-                                logger.info(f"[SYNC B2B] ✅ Produit {external_id} créé: {product_data.get('name', 'N/A')}")
-                            else:
-                                stats['updated'] += 1
-                                logger.debug(f"[SYNC B2B] 🔄 Produit {external_id} mis à jour: {product_data.get('name', 'N/A')}")
+                            outcome = 'created' if result['created'] else 'updated'
+                            stats[outcome] += 1
+                            journal.record(external_id, outcome, detail_error, api_key_id=key_info.get('id'))
+                            if verbose:
+                                logger.info(f"[SYNC B2B] Produit {external_id} {outcome}: {product_data.get('name', 'N/A')}")
                         except Exception as e:
                             external_id = product_data.get('id', 'N/A')
                             error_msg = str(e)
@@ -544,6 +598,7 @@ class ProductSyncService:
                                 stats['skipped_reasons'][reason] = 0
                             stats['skipped_reasons'][reason] += 1
                             stats['skipped'] += 1
+                            journal.record(external_id, reason, error_msg, api_key_id=key_info.get('id'))
 
                             logger.error(f"[SYNC B2B] ❌ Erreur produit {external_id}: {error_msg} (clé={key_label})")
 
@@ -553,60 +608,11 @@ class ProductSyncService:
                     logger.error(f"[SYNC B2B] ❌ Erreur API page {page} (clé={key_label}): {str(e)}")
                     has_next = False
                     stats['errors'] += 1
-        
-        # Résumé final de la synchronisation
-        logger.info("=" * 80)
-        logger.info("[SYNC B2B] 📊 RÉSUMÉ SYNCHRONISATION")
-        logger.info("=" * 80)
-        logger.info(f"Total produits B2B dans l'API: {len(all_b2b_product_ids)}")
-        logger.info(f"Produits traités: {stats['total']}")
-        logger.info(f"  - Créés: {stats['created']}")
-        logger.info(f"  - Mis à jour: {stats['updated']}")
-        logger.info(f"  - Erreurs: {stats['errors']}")
-        logger.info(f"  - Ignorés: {stats['skipped']}")
-        
-        if stats['skipped_reasons']:
-            logger.info("Raisons des produits ignorés:")
-            for reason, count in stats['skipped_reasons'].items():
-                logger.info(f"  - {reason}: {count}")
-        
-        # Vérifier combien de produits synchronisés sont disponibles
-        from .models import ExternalProduct
-        synced_count = ExternalProduct.objects.filter(
-            external_id__in=all_b2b_product_ids,
-            sync_status='synced',
-            is_b2b=True
-        ).count()
-        
-        from product.models import Product
-        synced_with_product = ExternalProduct.objects.filter(
-            external_id__in=all_b2b_product_ids,
-            sync_status='synced',
-            is_b2b=True,
-            product__isnull=False
-        )
-        product_ids = [ep.product.id for ep in synced_with_product if ep.product]
-        available_count = Product.objects.filter(
-            id__in=product_ids,
-            is_available=True
-        ).count()
-        
-        logger.info(f"Produits synchronisés (sync_status='synced' + is_b2b=True): {synced_count}")
-        logger.info(f"Produits avec relation Product: {len(product_ids)}")
-        logger.info(f"Produits disponibles (is_available=True): {available_count}")
-        
-        gap = len(all_b2b_product_ids) - synced_count
-        if gap > 0:
-            logger.warning(f"⚠️  {gap} produits B2B ne sont pas synchronisés")
-        
-        gap_available = len(product_ids) - available_count
-        if gap_available > 0:
-            logger.warning(f"⚠️  {gap_available} produits synchronisés ne sont pas disponibles (is_available=False)")
-        
-        logger.info("=" * 80)
-        
-        return stats
+                    journal.record(None, 'api_error', f"Page {page}: {str(e)}", api_key_id=key_info.get('id'))
+
+        return all_b2b_product_ids
     
+    @product_history_sync_mode('Synchronisation B2B')
     def sync_product(self, external_id: int) -> Dict[str, Any]:
         """
         Synchronise un produit spécifique depuis l'app de gestion
@@ -677,79 +683,13 @@ class ProductSyncService:
                     categories_data.append(category_data)
 
             logger.info(f"[SYNC CAT] Catégories uniques retenues: {len(categories_data)}")
-            external_ids = {
-                int(cat_id) for cat_id in (
-                    category_data.get('id') for category_data in categories_data
-                ) if cat_id is not None
-            }
-            
-            # Créer un mapping des catégories par ID externe pour gérer la hiérarchie
-            categories_by_id = {}
-            
-            # Première passe : créer/mettre à jour toutes les catégories
-            for category_data in categories_data:
-                try:
-                    external_id = category_data.get('id')
-                    logger.debug(f"[SYNC CAT] Traitement catégorie externe id={external_id}")
-                    result = self.create_or_update_category(category_data)
-                    stats['total'] += 1
-                    if result['created']:
-                        stats['created'] += 1
-                    else:
-                        stats['updated'] += 1
-                    
-                    if external_id:
-                        categories_by_id[external_id] = result['category']
-                except Exception as e:
-                    stats['errors'] += 1
-                    stats['errors_list'].append({
-                        'category_id': category_data.get('id'),
-                        'error': str(e)
-                    })
-                    logger.error(f"Erreur lors de la synchronisation de la catégorie {category_data.get('id')}: {str(e)}")
-            
-            # Deuxième passe : établir les relations parent/enfant (pour les cas où l'ordre de création n'est pas hiérarchique)
-            for category_data in categories_data:
-                external_id = category_data.get('id')
-                # Gérer parent_id qui peut être un entier ou un objet avec un id (comme dans create_or_update_category)
-                parent_id = category_data.get('parent_id')
-                if not parent_id and 'parent' in category_data:
-                    if isinstance(category_data['parent'], dict):
-                        parent_id = category_data['parent'].get('id')
-                    elif isinstance(category_data['parent'], int):
-                        parent_id = category_data['parent']
-                    elif category_data['parent'] is None:
-                        parent_id = None
-                
-                if external_id and parent_id and external_id in categories_by_id and parent_id in categories_by_id:
-                    category = categories_by_id[external_id]
-                    parent_category = categories_by_id[parent_id]
-                    # Mettre à jour seulement si le parent a changé
-                    if category.parent != parent_category:
-                        category.parent = parent_category
-                        category.save(update_fields=['parent'])
-                        logger.debug(f"Relation parent/enfant mise à jour: {category.name} -> {parent_category.name}")
 
-            # Nettoyer les catégories supprimées côté B2B (supprimer le mapping externe)
-            stale_qs = ExternalCategory.objects.exclude(external_id__in=external_ids)
-            stale_count = stale_qs.count()
-            if stale_count:
-                stale_preview = list(
-                    stale_qs.select_related('category')
-                    .values_list('external_id', 'category__name')[:10]
-                )
-                logger.warning(
-                    f"[SYNC CAT] {stale_count} catégories supprimées côté B2B détectées. "
-                    f"Exemples: {stale_preview}"
-                )
-                for stale in stale_qs.select_related('category'):
-                    # Garder la catégorie locale mais retirer la référence B2B
-                    category = stale.category
-                    category.external_id = None
-                    category.external_parent_id = None
-                    category.save(update_fields=['external_id', 'external_parent_id'])
-                stale_qs.delete()
-                stats['deleted'] = stale_count
+            # Créations, mises à jour, liens parent/enfant et nettoyage en lot, en une transaction
+            reconciled = CategoryReconciler(categories_data).run()
+            for key in ('total', 'created', 'updated', 'deleted', 'errors'):
+                stats[key] += reconciled[key]
+            stats['errors_list'].extend(reconciled['errors_list'])
+            stats['report'] = reconciled['report']
         except InventoryAPIError as e:
             logger.error(f"Erreur API lors de la synchronisation des catégories: {str(e)}")
             stats['errors'] += 1
@@ -809,7 +749,7 @@ class ProductSyncService:
             ).first()
             if external_category:
                 category = external_category.category
-                logger.info(f"Catégorie trouvée via ExternalCategory: {category.name} (ID externe: {external_category_id})")
+                logger.debug(f"Catégorie trouvée via ExternalCategory: {category.name} (ID externe: {external_category_id})")
         
         # Si pas de catégorie trouvée mais qu'on a les données de la catégorie, créer la catégorie
         if not category and category_data:
@@ -835,7 +775,7 @@ class ProductSyncService:
                 logger.error(f"Erreur lors de la récupération de la catégorie depuis l'API: {str(e)}")
         
         # Si toujours pas de catégorie, permettre la synchronisation sans catégorie
-        if not category:
+        if not category and sync_verbose():
             logger.warning(
                 f"Produit B2B (ID externe: {external_id}) sans catégorie. "
                 f"Category ID externe: {external_category_id}. "
@@ -1129,15 +1069,14 @@ class ProductSyncService:
         # Gérer les images - peut être une URL unique ou une liste d'URLs
         image_urls = []
         
-        # Log détaillé des images reçues depuis l'API B2B (pour debug)
-        logger.debug(f"[SYNC IMAGES] Produit ID externe {external_id} - Images reçues depuis API B2B:")
-        logger.info(f"  - 'images': {external_data.get('images')}")
-        logger.info(f"  - 'image_urls': {external_data.get('image_urls')}")
-        logger.info(f"  - 'gallery': {external_data.get('gallery')}")
-        logger.info(f"  - 'image_url': {external_data.get('image_url')}")
-        logger.info(f"  - 'image': {external_data.get('image')}")
-        logger.info(f"  - 'main_image': {external_data.get('main_image')}")
-        logger.info(f"  - 'photo': {external_data.get('photo')}")
+        # Champs d'images bruts reçus depuis l'API B2B (diagnostic, B2B_SYNC_VERBOSE_LOGGING)
+        if sync_verbose():
+            logger.info(
+                f"[SYNC IMAGES] Produit ID externe {external_id} - images reçues: " + ", ".join(
+                    f"{field}={external_data.get(field)!r}"
+                    for field in ('images', 'image_urls', 'gallery', 'image_url', 'image', 'main_image', 'photo')
+                )
+            )
         
         # Vérifier si c'est une liste d'images
         if 'images' in external_data and isinstance(external_data['images'], list):
@@ -1184,7 +1123,7 @@ class ProductSyncService:
             specifications['b2b_image_urls'] = image_urls
             if len(image_urls) == 1:
                 specifications['b2b_image_url'] = image_urls[0]  # Pour compatibilité
-        else:
+        elif sync_verbose():
             logger.warning(f"[SYNC IMAGES] ⚠️ Aucune image trouvée pour le produit ID externe {external_id}")
         
         # IMPORTANT: Sauvegarder les b2b_image_urls avant la fusion des specifications
@@ -1239,53 +1178,54 @@ class ProductSyncService:
             if category_name:
                 product_data['specifications']['b2b_category_name'] = category_name
         
-        if external_product:
-            # Mettre à jour le produit existant
-            product = external_product.product
-            for key, value in product_data.items():
-                setattr(product, key, value)
+        with self._phase('write'):
+            if external_product:
+                # Mettre à jour le produit existant
+                product = external_product.product
+                for key, value in product_data.items():
+                    setattr(product, key, value)
             
-            # Générer le slug si nécessaire
-            if not product.slug:
-                product.slug = product.generate_unique_slug()
+                # Générer le slug si nécessaire
+                if not product.slug:
+                    product.slug = product.generate_unique_slug()
             
-            product.save()
-            created = False
-        else:
-            # Créer un nouveau produit
-            product = Product(**product_data)
-            if not product.slug:
-                product.slug = product.generate_unique_slug()
-            product.save()
-            created = True
+                product.save()
+                created = False
+            else:
+                # Créer un nouveau produit
+                product = Product(**product_data)
+                if not product.slug:
+                    product.slug = product.generate_unique_slug()
+                product.save()
+                created = True
             
-            # Créer l'ExternalProduct
-            external_product = ExternalProduct.objects.create(
-                product=product,
-                external_id=external_id,
-                external_sku=external_data.get('sku', ''),
-                external_category_id=external_category_id,
-                api_key_id=api_key_id,
-                api_key_name=api_key_name,
-                is_b2b=True,
-                sync_status='synced',
-                last_synced_at=timezone.now()
-            )
+                # Créer l'ExternalProduct
+                external_product = ExternalProduct.objects.create(
+                    product=product,
+                    external_id=external_id,
+                    external_sku=external_data.get('sku', ''),
+                    external_category_id=external_category_id,
+                    api_key_id=api_key_id,
+                    api_key_name=api_key_name,
+                    is_b2b=True,
+                    sync_status='synced',
+                    last_synced_at=timezone.now()
+                )
         
-        # Mettre à jour ExternalProduct
-        external_product.sync_status = 'synced'
-        external_product.last_synced_at = timezone.now()
-        external_product.sync_error = None
-        # IMPORTANT: ces produits proviennent de la synchro B2B → marquer is_b2b=True
-        external_product.is_b2b = True
-        if api_key_id is not None:
-            external_product.api_key_id = api_key_id
-        if api_key_name:
-            external_product.api_key_name = api_key_name
-        external_product.save()
+            # Mettre à jour ExternalProduct
+            external_product.sync_status = 'synced'
+            external_product.last_synced_at = timezone.now()
+            external_product.sync_error = None
+            # IMPORTANT: ces produits proviennent de la synchro B2B → marquer is_b2b=True
+            external_product.is_b2b = True
+            if api_key_id is not None:
+                external_product.api_key_id = api_key_id
+            if api_key_name:
+                external_product.api_key_name = api_key_name
+            external_product.save()
         
         # Logger le statut is_available pour diagnostic
-        if not is_available_value:
+        if not is_available_value and sync_verbose():
             logger.warning(
                 f"[SYNC B2B] ⚠️  Produit {external_id} synchronisé mais is_available=False "
                 f"(ne sera pas visible dans l'API /api/inventory/products/synced/)"
@@ -1323,46 +1263,8 @@ class ProductSyncService:
         ).first()
         
         # Préparer les données de la catégorie
-        # Gérer parent_id qui peut être un entier ou un objet avec un id
-        parent_id = external_data.get('parent_id')
-        if not parent_id and 'parent' in external_data:
-            if isinstance(external_data['parent'], dict):
-                parent_id = external_data['parent'].get('id')
-            elif isinstance(external_data['parent'], int):
-                parent_id = external_data['parent']
-            elif external_data['parent'] is None:
-                parent_id = None
-        
-        # Normaliser rayon_type et level (gérer les chaînes vides et None)
-        rayon_type = external_data.get('rayon_type')
-        if rayon_type == '' or rayon_type is None:
-            rayon_type = None
-        
-        level = external_data.get('level')
-        if level is None:
-            # Essayer de déduire le level depuis parent_id
-            level = 0 if not parent_id else None
-        
-        # Récupérer is_rayon si présent dans les données B2B
-        is_rayon = external_data.get('is_rayon', False)
-        
-        raw_image_url = external_data.get('image_url') or external_data.get('image')
-        if isinstance(raw_image_url, dict):
-            raw_image_url = raw_image_url.get('url') or raw_image_url.get('image') or raw_image_url.get('image_url')
-        if raw_image_url and not isinstance(raw_image_url, str):
-            raw_image_url = None
-
-        category_data = {
-            'name': external_data.get('name', 'Catégorie sans nom'),
-            'description': external_data.get('description', ''),
-            'external_id': external_id,
-            'external_parent_id': parent_id,
-            'rayon_type': rayon_type,
-            'level': level,
-            'order': external_data.get('order', 0),
-            'is_main': external_data.get('level', 0) == 0 if level is not None else (not parent_id),
-            'image_url': raw_image_url or None,
-        }
+        category_data = parse_category_payload(external_data)
+        parent_id = category_data['external_parent_id']
         
         # Gérer le slug - générer un slug unique
         # Si la catégorie existe déjà, conserver son slug existant pour éviter les conflits
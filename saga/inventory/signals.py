@@ -9,8 +9,9 @@ from django.db import transaction
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from cart.models import Order
+from product.cache import bump_catalogue_version
 from product.models import Product
-from inventory.models import ApiKey, ExternalProduct
+from inventory.models import ApiKey, ExternalCategory, ExternalProduct
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,8 @@ def _cleanup_products_for_api_key(api_key_id: int, reason: str):
     product_ids = list(qs.values_list('product_id', flat=True))
     Product.objects.filter(id__in=product_ids).update(is_available=False)
     qs.update(sync_status='pending', sync_error=reason)
+    # update() ne déclenche pas les signaux des modèles
+    bump_catalogue_version()
     logger.warning(
         f"[ApiKey Cleanup] {count} produits désactivés (api_key_id={api_key_id}) - {reason}"
     )
@@ -72,3 +75,12 @@ def apikey_cleanup_on_disable(sender, instance, created, **kwargs):
 def apikey_cleanup_on_delete(sender, instance, **kwargs):
     reason = "Clé API supprimée"
     transaction.on_commit(lambda: _cleanup_products_for_api_key(instance.id, reason))
+
+
+@receiver(post_save, sender=ExternalProduct)
+@receiver(post_delete, sender=ExternalProduct)
+@receiver(post_save, sender=ExternalCategory)
+@receiver(post_delete, sender=ExternalCategory)
+def bump_catalogue_on_sync_change(sender, instance, **kwargs):
+    """Le statut de synchronisation B2B détermine le contenu du catalogue mobile"""
+    transaction.on_commit(bump_catalogue_version)
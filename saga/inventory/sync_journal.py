@@ -0,0 +1,140 @@
+"""
+Journal structuré des synchronisations B2B (SyncRun / SyncRunItem).
+
+SyncJournal remplace les lignes de log INFO par produit : chaque élément traité
+reçoit un code de résultat, accumulé en mémoire et écrit par bulk_create par lots ;
+les durées sont mesurées par phase (fetch, transform, write, images) et les
+compteurs de synthèse sont calculés en SQL à la clôture du passage.
+
+Les passages plus anciens que SYNC_RUN_RETENTION_DAYS sont purgés avec leurs
+éléments à chaque clôture (et par la commande prune_sync_runs).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ExternalProduct, SyncRun, SyncRunItem
+
+logger = logging.getLogger(__name__)
+
+ITEMS_BATCH_SIZE = 500
+SYNC_RUN_RETENTION_DAYS = 30
+# Passages supprimés par requête lors de la purge
+PRUNE_BATCH_SIZE = 50
+
+
+class SyncJournal:
+    """
+    Journal d'un passage de synchronisation.
+
+    Les phases peuvent s'imbriquer : le temps passé dans une phase interne n'est
+    compté que pour elle (ex. « write » à l'intérieur de « transform »).
+    """
+
+    def __init__(self, kind):
+        self.run = SyncRun.objects.create(kind=kind)
+        self._started = time.perf_counter()
+        self._pending = []
+        self._phases = {}
+        # [nom, temps passé dans les phases internes] de chaque phase ouverte
+        self._stack = []
+
+    @contextmanager
+    def phase(self, name):
+        frame = [name, 0.0]
+        self._stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stack.pop()
+            self._phases[name] = self._phases.get(name, 0.0) + elapsed - frame[1]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def record(self, external_id, outcome, message='', api_key_id=None):
+        """Enregistre le résultat d'un élément (écrit par lots)"""
+        self._pending.append(SyncRunItem(
+            run=self.run,
+            external_id=external_id if isinstance(external_id, int) else None,
+            outcome=outcome,
+            message=message or '',
+            api_key_id=api_key_id,
+        ))
+        if len(self._pending) >= ITEMS_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            SyncRunItem.objects.bulk_create(self._pending, batch_size=ITEMS_BATCH_SIZE)
+            self._pending = []
+
+    def summarize(self):
+        """Compteurs de synthèse calculés en SQL sur les éléments du passage"""
+        outcomes = dict(
+            self.run.items.order_by().values('outcome').annotate(count=Count('id')).values_list('outcome', 'count')
+        )
+        summary = {'outcomes': outcomes}
+        if self.run.kind == 'products':
+            summary.update(ExternalProduct.objects.filter(
+                external_id__in=self.run.items.exclude(external_id=None).values('external_id'),
+                sync_status='synced',
+                is_b2b=True,
+            ).aggregate(
+                synced=Count('id'),
+                available=Count('id', filter=Q(product__is_available=True)),
+            ))
+        return summary
+
+    def finish(self, error=None):
+        """Clôture le passage : écrit les derniers éléments, la synthèse et les durées"""
+        self.flush()
+        self.run.status = 'failed' if error else 'success'
+        self.run.error = str(error) if error else None
+        self.run.finished_at = timezone.now()
+        self.run.duration_ms = round((time.perf_counter() - self._started) * 1000)
+        self.run.phase_durations = {name: round(seconds * 1000) for name, seconds in self._phases.items()}
+        self.run.summary = self.summarize()
+        self.run.save()
+        try:
+            prune_sync_runs()
+        except Exception:
+            # La purge ne doit pas faire échouer la clôture du passage
+            logger.warning("[SYNC JOURNAL] Purge des anciens passages impossible", exc_info=True)
+        logger.info(
+            f"[SYNC JOURNAL] {self.run.get_kind_display()} #{self.run.pk} ({self.run.status}) en "
+            f"{self.run.duration_ms} ms, phases={self.run.phase_durations}, synthèse={self.run.summary}"
+        )
+        return self.run
+
+
+def prune_sync_runs(days=None, batch_size=PRUNE_BATCH_SIZE, dry_run=False):
+    """
+    Supprime les passages commencés il y a plus de `days` jours (SYNC_RUN_RETENTION_DAYS
+    par défaut, 0 = désactivé) et leurs éléments, par lots.
+
+    Returns:
+        int: nombre de passages supprimés (ou à supprimer en dry_run)
+    """
+    days = getattr(settings, 'SYNC_RUN_RETENTION_DAYS', SYNC_RUN_RETENTION_DAYS) if days is None else days
+    if not days:
+        return 0
+    expired = SyncRun.objects.filter(started_at__lt=timezone.now() - timedelta(days=days))
+    if dry_run:
+        return expired.count()
+
+    deleted = 0
+    while True:
+        run_ids = list(expired.order_by('started_at').values_list('id', flat=True)[:batch_size])
+        if not run_ids:
+            break
+        # Éléments d'abord, en une requête (pas de chargement par la cascade de l'ORM)
+        SyncRunItem.objects.filter(run_id__in=run_ids).delete()
+        deleted += SyncRun.objects.filter(id__in=run_ids).delete()[0]
+    return deleted
@@ -3,12 +3,14 @@ Tâches de synchronisation automatique des produits B2B
 """
 import logging
 import threading
+import time
 from datetime import timedelta
 from django.utils import timezone
 from django.core.cache import cache
 from django.conf import settings
 from .services import ProductSyncService, InventoryAPIError
-from .models import ApiKey
+from .image_mirror import mirror_b2b_images
+from .models import ApiKey, SyncRun
 
 logger = logging.getLogger(__name__)
 
@@ -126,6 +128,18 @@ def sync_products_auto(force: bool = False, _lock_acquired: bool = False):
         
         if stats.get('skipped_reasons'):
             logger.info(f"[SYNC AUTO] Raisons des produits ignorés: {stats['skipped_reasons']}")
+
+        if getattr(settings, 'B2B_IMAGE_MIRROR_ENABLED', False):
+            try:
+                started = time.perf_counter()
+                stats['images'] = mirror_b2b_images()
+                if stats.get('run_id'):
+                    SyncRun.objects.get(pk=stats['run_id']).add_phase(
+                        'images', (time.perf_counter() - started) * 1000
+                    )
+            except Exception as e:
+                # Le miroir est une optimisation : les URLs d'origine restent servies
+                logger.error(f"[SYNC AUTO] Erreur lors du miroir des images B2B: {str(e)}", exc_info=True)
         
         return {
             'success': True,
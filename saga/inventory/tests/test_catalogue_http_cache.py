@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import ExternalCategory
+from product.cache import bump_catalogue_version
+from product.models import Category
+
+SYNCED_CATEGORIES_URL = '/api/inventory/categories/synced/'
+
+
+class CatalogueHttpCacheTestCase(TestCase):
+    """Tests des requêtes conditionnelles et de la compression du catalogue mobile"""
+
+    def setUp(self):
+        cache.clear()
+        for index in range(5):
+            category = Category.objects.create(name=f'Rayon {index}', slug=f'rayon-{index}')
+            ExternalCategory.objects.create(category=category, external_id=100 + index)
+
+    def test_if_none_match_returns_304_without_catalogue_queries(self):
+        response = self.client.get(SYNCED_CATEGORIES_URL)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=300', response['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(SYNCED_CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse([q['sql'] for q in queries if 'product_category' in q['sql']])
+
+        # Une autre requête (paramètres) a son propre ETag
+        other = self.client.get(SYNCED_CATEGORIES_URL, {'page': 2})
+        self.assertNotEqual(other['ETag'], etag)
+
+    def test_catalogue_change_invalidates_etag(self):
+        etag = self.client.get(SYNCED_CATEGORIES_URL)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.filter(slug='rayon-0').first().save()
+
+        response = self.client.get(SYNCED_CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_gzip_keeps_strong_etag_usable_for_revalidation(self):
+        response = self.client.get(SYNCED_CATEGORIES_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].endswith('-gzip"'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.client.get(
+            SYNCED_CATEGORIES_URL, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(CATALOGUE_VERSION_MEMO_SECONDS=60)
+    def test_bump_from_another_process_invalidates_etag(self):
+        etag = self.client.get(SYNCED_CATEGORIES_URL)['ETag']
+
+        # Autre processus (process_tasks, commande, autre worker) : son propre cache local
+        # et sa propre mémoire de version ; seule la table CatalogueVersion est partagée
+        other_cache = LocMemCache('autre-processus', {})
+        with mock.patch('product.cache.cache', other_cache), mock.patch('product.cache._catalogue_version_memo', {}):
+            bump_catalogue_version()
+
+        # Dans la fenêtre de mémorisation, ce processus garde la version lue
+        response = self.client.get(SYNCED_CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with override_settings(CATALOGUE_VERSION_MEMO_SECONDS=0):
+            response = self.client.get(SYNCED_CATEGORIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
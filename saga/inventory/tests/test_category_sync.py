@@ -0,0 +1,64 @@
+from django.test import TestCase
+
+from inventory.category_sync import CategoryReconciler
+from inventory.models import ExternalCategory
+from product.models import Category
+
+
+def category_payload(external_id, name, parent_id=None, level=1):
+    return {'id': external_id, 'name': name, 'parent_id': parent_id, 'level': level, 'order': external_id}
+
+
+class CategoryReconcilerTestCase(TestCase):
+    """Tests de la réconciliation en lot des catégories B2B"""
+
+    def setUp(self):
+        # Catégorie racine déjà synchronisée (les nouvelles racines exigent un modèle lié)
+        self.root = Category.objects.create(name='Alimentation', slug='alimentation', external_id=1, level=0)
+        ExternalCategory.objects.create(category=self.root, external_id=1)
+        # Catégorie locale dont le slug entre en conflit avec une catégorie B2B
+        Category.objects.create(name='Riz', slug='riz')
+
+    def _payloads(self, count=3):
+        payloads = [category_payload(1, 'alimentation', level=0), category_payload(10, 'riz', parent_id=1)]
+        payloads += [category_payload(100 + i, f'sous catégorie {i}', parent_id=10, level=2) for i in range(count)]
+        return payloads
+
+    def test_creates_children_with_parents_and_unique_slugs(self):
+        stats = CategoryReconciler(self._payloads()).run()
+
+        self.assertEqual((stats['created'], stats['updated'], stats['errors']), (4, 1, 0))
+        rice = Category.objects.get(external_id=10)
+        self.assertEqual(rice.slug, 'riz-10')
+        self.assertEqual(rice.name, 'Riz')
+        self.assertEqual(rice.parent, self.root)
+        self.assertEqual(Category.objects.filter(parent=rice).count(), 3)
+        self.assertEqual(ExternalCategory.objects.count(), 5)
+        self.assertEqual(rice.history.count(), 1)
+
+    def test_query_count_does_not_grow_with_categories(self):
+        small = CategoryReconciler(self._payloads(count=3)).run()['report']['queries']
+        Category.objects.exclude(pk=self.root.pk).exclude(slug='riz').delete()
+
+        large = CategoryReconciler(self._payloads(count=60)).run()['report']['queries']
+
+        self.assertEqual(small, large)
+
+    def test_second_run_is_stable_and_cleans_stale_mappings(self):
+        CategoryReconciler(self._payloads()).run()
+        slugs = dict(Category.objects.values_list('external_id', 'slug'))
+
+        payloads = [payload for payload in self._payloads() if payload['id'] != 102]
+        stats = CategoryReconciler(payloads).run()
+
+        self.assertEqual((stats['created'], stats['deleted']), (0, 1))
+        self.assertEqual(dict(Category.objects.exclude(external_id=None).values_list('external_id', 'slug')),
+                         {key: value for key, value in slugs.items() if key not in (None, 102)})
+        self.assertFalse(ExternalCategory.objects.filter(external_id=102).exists())
+        self.assertTrue(Category.objects.filter(slug=slugs[102], external_id=None).exists())
+
+    def test_new_main_category_without_model_is_rejected(self):
+        stats = CategoryReconciler([category_payload(2, 'Hygiène', level=0)]).run()
+
+        self.assertEqual(stats['errors'], 1)
+        self.assertFalse(Category.objects.filter(external_id=2).exists())
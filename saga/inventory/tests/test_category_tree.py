@@ -0,0 +1,105 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from inventory.category_tree import build_category_nodes
+from inventory.models import ExternalCategory
+from product.cache import bump_catalogue_version
+from product.models import Category, Product
+
+SYNCED_CATEGORIES_URL = '/api/inventory/categories/synced/'
+TREE_URL = '/api/inventory/categories/tree/'
+B2B_HIERARCHY_URL = '/api/inventory/categories/b2b-hierarchy/'
+
+
+@patch('inventory.middleware.trigger_categories_sync_async', return_value=False)
+@patch('inventory.middleware.trigger_products_sync_async', return_value=False)
+@patch('inventory.tasks.trigger_categories_sync_async', return_value=False)
+class CategoryTreeTestCase(TestCase):
+    """Tests de l'arbre des catégories partagé par les endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.root = self._synced_category('Alimentation', 1, order=1)
+        self.rice = self._synced_category('Riz', 10, parent=self.root, external_parent_id=1)
+        self.basmati = self._synced_category('Basmati', 100, parent=self.rice, external_parent_id=10)
+        self.hygiene = self._synced_category('Hygiène', 2, order=2)
+        for index in range(3):
+            Product.objects.create(
+                title=f'Riz {index}', price=Decimal('1000'), category=self.rice, is_available=index != 2
+            )
+
+    def _synced_category(self, name, external_id, parent=None, external_parent_id=None, order=0):
+        category = Category.objects.create(
+            name=name, slug=f'cat-{external_id}', parent=parent, order=order, external_id=external_id
+        )
+        ExternalCategory.objects.create(
+            category=category, external_id=external_id, external_parent_id=external_parent_id
+        )
+        return category
+
+    def test_endpoints_share_canonical_tree(self, *mocks):
+        tree = self.client.get(TREE_URL).json()['categories']
+        self.assertEqual([node['name'] for node in tree], ['Alimentation', 'Hygiène'])
+        rice = tree[0]['children'][0]
+        self.assertEqual((rice['id'], rice['product_count'], rice['parent_id']), (self.rice.id, 2, 1))
+        self.assertEqual(rice['children'][0]['external_id'], 100)
+
+        hierarchy = self.client.get(B2B_HIERARCHY_URL).json()
+        self.assertEqual((hierarchy['total_main'], hierarchy['total_sub']), (2, 1))
+        self.assertEqual(hierarchy['main_categories'][0]['children'][0]['level'], 1)
+
+        synced = self.client.get(SYNCED_CATEGORIES_URL).json()
+        self.assertEqual(synced['count'], 4)
+        by_id = {category['id']: category for category in synced['results']}
+        self.assertEqual(by_id[self.rice.id]['product_count'], 2)
+        self.assertEqual(by_id[self.rice.id]['parent'], self.root.id)
+        self.assertEqual([child['id'] for child in by_id[self.root.id]['children']], [self.rice.id])
+
+    def test_cached_bytes_served_without_orm(self, *mocks):
+        first = self.client.get(SYNCED_CATEGORIES_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(SYNCED_CATEGORIES_URL)
+            tree = self.client.get(TREE_URL)
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(tree.status_code, 200)
+        self.assertFalse([query['sql'] for query in queries if 'product_category' in query['sql']])
+
+    def test_catalogue_change_rebuilds_tree(self, *mocks):
+        self.client.get(TREE_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(title='Riz 3', price=Decimal('1000'), category=self.rice)
+
+        tree = self.client.get(TREE_URL).json()['categories']
+        self.assertEqual(tree[0]['children'][0]['product_count'], 3)
+
+    def test_category_sync_in_another_process_rebuilds_tree(self, *mocks):
+        self.client.get(TREE_URL)
+
+        # Synchronisation dans un autre processus : cache et mémoire de version propres
+        Category.objects.filter(pk=self.hygiene.pk).update(name='Hygiène et beauté')
+        with patch('product.cache.cache', LocMemCache('autre-processus', {})), \
+                patch('product.cache._catalogue_version_memo', {}):
+            bump_catalogue_version()
+
+        with override_settings(CATALOGUE_VERSION_MEMO_SECONDS=0):
+            tree = self.client.get(TREE_URL).json()['categories']
+        self.assertEqual(tree[1]['name'], 'Hygiène et beauté')
+
+    def test_build_query_count_independent_of_size(self, *mocks):
+        for index in range(30):
+            self._synced_category(f'Sous-catégorie {index}', 1000 + index, parent=self.rice, external_parent_id=10)
+
+        with self.assertNumQueries(3):
+            data = build_category_nodes()
+
+        self.assertEqual(len(data['nodes']), 34)
@@ -0,0 +1,79 @@
+from unittest.mock import patch
+
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core import db_connections
+from core.db_connections import statement_timeout
+
+DB_METRICS_URL = '/health/db/'
+
+
+class StatementTimeoutTestCase(TestCase):
+    """Tests des timeouts SQL par requête et des métriques de connexions"""
+
+    def _current_timeout(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW statement_timeout")
+            return cursor.fetchone()[0]
+
+    def test_timeout_cancels_slow_query_and_is_counted(self):
+        before = db_connections._statement_timeouts['count']
+
+        with self.assertRaises(OperationalError), transaction.atomic():
+            with statement_timeout(50), connection.cursor() as cursor:
+                cursor.execute("SELECT pg_sleep(1)")
+
+        self.assertEqual(db_connections._statement_timeouts['count'], before + 1)
+
+    def test_timeout_is_scoped_to_the_transaction(self):
+        default_timeout = self._current_timeout()
+
+        with self.assertRaises(ZeroDivisionError), transaction.atomic():
+            with statement_timeout(1500):
+                self.assertEqual(self._current_timeout(), '1500ms')
+            raise ZeroDivisionError
+
+        self.assertEqual(self._current_timeout(), default_timeout)
+
+    @override_settings(DB_STATEMENT_TIMEOUT_READ_MS=1234, DB_STATEMENT_TIMEOUT_WRITE_MS=5678)
+    def test_middleware_picks_timeout_from_http_method(self):
+        with patch('core.middleware.statement_timeout', wraps=statement_timeout) as wrapped:
+            self.client.get('/health/')
+            wrapped.assert_called_with(1234)
+            self.client.post('/health/')
+            wrapped.assert_called_with(5678)
+
+    @override_settings(DB_METRICS_TOKEN='jeton-test')
+    def test_metrics_endpoint_requires_token(self):
+        self.assertEqual(self.client.get(DB_METRICS_URL).status_code, 404)
+
+        response = self.client.get(DB_METRICS_URL, HTTP_X_METRICS_TOKEN='jeton-test')
+
+        self.assertEqual(response.status_code, 200)
+        metrics = response.json()['databases'][0]
+        self.assertEqual(metrics['alias'], 'default')
+        self.assertGreaterEqual(metrics['connections'], 1)
+        self.assertGreater(metrics['max_connections'], 0)
+        self.assertTrue(metrics['conn_health_checks'])
+
+
+@override_settings(DB_PGBOUNCER=True)
+class StatementTimeoutTransactionTestCase(TransactionTestCase):
+    """Timeout local reposé à chaque transaction, même par un bloc atomic réutilisé"""
+
+    def test_decorated_function_limited_on_every_call(self):
+        @transaction.atomic
+        def current_timeout():
+            with connection.cursor() as cursor:
+                cursor.execute("SHOW statement_timeout")
+                return cursor.fetchone()[0]
+
+        with statement_timeout(1500):
+            # Même instance Atomic pour les deux appels, deux transactions distinctes
+            self.assertEqual(current_timeout(), '1500ms')
+            self.assertEqual(current_timeout(), '1500ms')
+            with self.assertRaises(ZeroDivisionError), transaction.atomic():
+                connection.cursor().execute("SELECT 1")
+                raise ZeroDivisionError
+            self.assertEqual(current_timeout(), '1500ms')
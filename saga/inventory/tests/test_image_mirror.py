@@ -0,0 +1,129 @@
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+
+import requests
+from django.core.cache import cache
+from django.test import TestCase
+from PIL import Image
+
+from inventory import image_mirror
+from product.models import B2B_MIRROR_KEY, Product
+from saga.storage_backends import ProductImageStorage
+from saga.utils import media_urls
+
+FIRST_URL = 'https://s3.bolibanastock.com/bolibana-stock/products/riz-1.jpg'
+SECOND_URL = 'https://s3.bolibanastock.com/bolibana-stock/products/riz-2.jpg'
+
+
+def make_jpeg(size=(2000, 1500)):
+    output = BytesIO()
+    Image.new('RGB', size, (200, 120, 40)).save(output, format='JPEG')
+    return output.getvalue()
+
+
+def fake_fetch(url, timeout):
+    if url == SECOND_URL:
+        raise requests.exceptions.Timeout("Minio injoignable")
+    return make_jpeg()
+
+
+@patch.object(ProductImageStorage, '_save', side_effect=lambda name, content: name)
+@patch('inventory.image_mirror.fetch_image', side_effect=fake_fetch)
+class B2BImageMirrorTestCase(TestCase):
+    """Tests du miroir des images B2B (téléchargement simulé, stockage sans réseau)"""
+
+    def setUp(self):
+        cache.clear()
+        media_urls._local_memo.clear()
+        self.product = Product.objects.create(
+            title='Riz brisé', price=Decimal('1000'),
+            specifications={'b2b_image_url': FIRST_URL, 'b2b_image_urls': [FIRST_URL, SECOND_URL]},
+        )
+
+    def test_mirror_records_content_addressed_variants(self, mock_fetch, mock_save):
+        stats = image_mirror.mirror_b2b_images([self.product])
+
+        self.assertEqual(stats, {'pending': 2, 'mirrored': 1, 'failed': 1, 'products_updated': 1})
+        self.product.refresh_from_db()
+        variants = self.product.image_urls[B2B_MIRROR_KEY][FIRST_URL]
+        self.assertEqual(set(variants), {'thumb', 'medium'})
+        self.assertRegex(variants['thumb'], r'^b2b/[0-9a-f]{2}/[0-9a-f]{64}/thumb\.(webp|jpg)$')
+
+        thumb = Image.open(BytesIO(mock_save.call_args_list[0].args[1].read()))
+        self.assertLessEqual(max(thumb.size), 400)
+
+    def test_urls_fall_back_to_originals_until_mirrored(self, mock_fetch, mock_save):
+        self.assertEqual(self.product.get_display_image_url(), FIRST_URL)
+
+        image_mirror.mirror_b2b_images([self.product])
+        self.product.refresh_from_db()
+
+        thumbs = self.product.get_b2b_image_urls('thumb')
+        self.assertIn('/media/products/b2b/', thumbs[0])
+        self.assertTrue(thumbs[0].endswith(('thumb.webp', 'thumb.jpg')))
+        self.assertEqual(thumbs[1], SECOND_URL)
+        self.assertEqual(self.product.get_display_image_url(), thumbs[0])
+        self.assertTrue(self.product.get_detail_image_url().endswith(('medium.webp', 'medium.jpg')))
+
+    def test_failed_image_not_retried_immediately(self, mock_fetch, mock_save):
+        image_mirror.mirror_b2b_images([self.product])
+        self.product.refresh_from_db()
+        mock_fetch.reset_mock()
+
+        stats = image_mirror.mirror_b2b_images([self.product])
+
+        mock_fetch.assert_not_called()
+        self.assertEqual(stats['pending'], 0)
+
+    def test_changed_source_url_drops_stale_variants(self, mock_fetch, mock_save):
+        image_mirror.mirror_b2b_images([self.product])
+        self.product.refresh_from_db()
+        new_url = 'https://s3.bolibanastock.com/bolibana-stock/products/riz-3.jpg'
+        self.product.specifications = {'b2b_image_urls': [new_url]}
+        self.product.save()
+
+        self.assertEqual(self.product.get_display_image_url(), new_url)
+        image_mirror.mirror_b2b_images([self.product])
+        self.product.refresh_from_db()
+
+        self.assertEqual(list(self.product.image_urls[B2B_MIRROR_KEY]), [new_url])
+
+    def test_products_written_in_one_batch_with_one_catalogue_bump(self, mock_fetch, mock_save):
+        other = Product.objects.create(
+            title='Riz parfumé', price=Decimal('1200'), specifications={'b2b_image_urls': [FIRST_URL]},
+        )
+        history_count = Product.history.count()
+
+        with patch.object(Product, 'save') as mock_product_save, \
+                patch('inventory.image_mirror.bump_catalogue_version') as mock_bump:
+            stats = image_mirror.mirror_b2b_images([self.product, other])
+
+        self.assertEqual(stats['products_updated'], 2)
+        mock_product_save.assert_not_called()
+        mock_bump.assert_called_once()
+        self.assertEqual(Product.history.count(), history_count)
+        other.refresh_from_db()
+        self.assertIn(FIRST_URL, other.image_urls[B2B_MIRROR_KEY])
+
+    def test_edit_during_downloads_is_kept(self, mock_fetch, mock_save):
+        stale = Product.objects.get(pk=self.product.pk)
+        # Édition admin concurrente, après le chargement des produits par le miroir
+        Product.objects.filter(pk=self.product.pk).update(image_urls={'main': 'products/riz-admin.jpg'})
+
+        image_mirror.mirror_b2b_images([stale])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image_urls['main'], 'products/riz-admin.jpg')
+        self.assertIn(FIRST_URL, self.product.image_urls[B2B_MIRROR_KEY])
+
+    def test_large_jpeg_decoded_at_reduced_scale(self, mock_fetch, mock_save):
+        with image_mirror.open_source_image(make_jpeg((4800, 3600))) as source:
+            source.load()
+            # Plus grand dérivé 1200 px : décodage au 1/2 (le 1/4 serait trop petit), pas en 4800x3600
+            self.assertEqual(source.size, (2400, 1800))
+
+        png = BytesIO()
+        Image.new('L', (6000, 5000)).save(png, format='PNG')
+        with self.assertRaises(ValueError):
+            image_mirror.open_source_image(png.getvalue())
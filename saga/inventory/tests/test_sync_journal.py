@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from inventory.models import SyncRun, SyncRunItem
+from inventory.services import InventoryAPIError, ProductSyncService
+from inventory.sync_journal import SyncJournal, prune_sync_runs
+
+API_KEYS = [{'id': 1, 'name': 'Clé test', 'key': 'cle-test'}]
+
+
+def product_payload(external_id, **extra):
+    return {'id': external_id, 'name': f'Produit {external_id}', 'price': 1000, 'quantity': 5, **extra}
+
+
+def fake_detail(external_id):
+    if external_id == 3:
+        raise InventoryAPIError("Timeout")
+    return product_payload(external_id)
+
+
+@patch('inventory.models.ApiKey.get_active_key', return_value='cle-test')
+@patch('inventory.models.ApiKey.get_active_keys', return_value=API_KEYS)
+@patch('inventory.services.InventoryAPIClient.get_product_detail', side_effect=fake_detail)
+@patch('inventory.services.InventoryAPIClient.get_products_list')
+class SyncJournalTestCase(TestCase):
+    """Tests du journal des synchronisations produits B2B"""
+
+    def test_run_records_outcomes_phases_and_sql_summary(self, mock_list, mock_detail, *mocks):
+        mock_list.return_value = {
+            'results': [product_payload(1), product_payload(2), product_payload(1), product_payload(3)],
+            'next': None,
+        }
+
+        stats = ProductSyncService().sync_all_products()
+
+        run = SyncRun.objects.get(pk=stats['run_id'])
+        self.assertEqual(run.status, 'success')
+        self.assertEqual(run.summary['outcomes'], {'created': 3, 'duplicate': 1})
+        self.assertEqual(run.summary['synced'], 3)
+        self.assertEqual(set(run.phase_durations), {'fetch', 'transform', 'write'})
+        self.assertIsNotNone(run.duration_ms)
+        # Détail indisponible : produit synchronisé depuis les données de liste, motif conservé
+        self.assertIn('Timeout', run.items.get(external_id=3).message)
+
+        stats = ProductSyncService().sync_all_products()
+        run = SyncRun.objects.get(pk=stats['run_id'])
+        self.assertEqual(run.summary['outcomes'], {'updated': 3, 'duplicate': 1})
+
+    def test_api_error_recorded_in_journal(self, mock_list, mock_detail, *mocks):
+        mock_list.side_effect = InventoryAPIError("Erreur HTTP 500")
+
+        stats = ProductSyncService().sync_all_products()
+
+        run = SyncRun.objects.get(pk=stats['run_id'])
+        self.assertEqual(run.count('api_error'), 1)
+        self.assertEqual(run.summary['synced'], 0)
+
+    def test_no_info_logging_per_product_by_default(self, mock_list, mock_detail, *mocks):
+        mock_list.return_value = {'results': [product_payload(index) for index in range(1, 6)], 'next': None}
+
+        with self.assertLogs('inventory.services', level='INFO') as logs:
+            ProductSyncService().sync_all_products()
+
+        # Aucune ligne par produit ni par requête HTTP, seulement le démarrage et la synthèse
+        self.assertFalse([line for line in logs.output if 'ID externe' in line or 'Requête' in line])
+        self.assertIn('Résumé', logs.output[-1])
+
+
+class SyncJournalPhaseTestCase(TestCase):
+
+    @patch('inventory.sync_journal.time.perf_counter', side_effect=[0.0, 1.0, 2.0, 5.0, 6.0, 10.0])
+    def test_nested_phase_time_counted_once(self, mock_clock):
+        journal = SyncJournal('products')
+        with journal.phase('transform'):
+            with journal.phase('write'):
+                pass
+        run = journal.finish()
+
+        # transform de 1 s à 6 s dont write de 2 s à 5 s ; passage complet de 0 à 10 s
+        self.assertEqual(run.phase_durations, {'transform': 2000, 'write': 3000})
+        self.assertEqual(run.duration_ms, 10000)
+
+
+@override_settings(SYNC_RUN_RETENTION_DAYS=30)
+class SyncRunRetentionTestCase(TestCase):
+
+    def old_run(self, days):
+        journal = SyncJournal('products')
+        journal.record(1, 'created')
+        run = journal.finish()
+        SyncRun.objects.filter(pk=run.pk).update(started_at=timezone.now() - timedelta(days=days))
+        return run
+
+    def test_finish_prunes_expired_runs_and_items(self):
+        kept = self.old_run(5)
+        expired = self.old_run(45)
+        self.assertEqual(prune_sync_runs(dry_run=True), 1)
+
+        journal = SyncJournal('products')
+        journal.record(2, 'created')
+        current = journal.finish()
+
+        self.assertEqual(set(SyncRun.objects.values_list('pk', flat=True)), {kept.pk, current.pk})
+        self.assertFalse(SyncRunItem.objects.filter(run_id=expired.pk).exists())
+        self.assertEqual(SyncRunItem.objects.count(), 2)
+
+    def test_prune_command_respects_days(self):
+        self.old_run(10)
+        with override_settings(SYNC_RUN_RETENTION_DAYS=0):
+            # Rétention désactivée : la clôture ne purge rien
+            self.old_run(45)
+        self.assertEqual(SyncRun.objects.count(), 2)
+        call_command('prune_sync_runs', days=7, stdout=StringIO())
+        self.assertEqual(SyncRun.objects.count(), 0)
@@ -0,0 +1,70 @@
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from inventory.models import ExternalProduct
+from product.models import Product
+
+SYNCED_PRODUCTS_URL = '/api/inventory/products/synced/'
+
+
+@patch('inventory.middleware.trigger_categories_sync_async', return_value=False)
+@patch('inventory.middleware.trigger_products_sync_async', return_value=False)
+@patch('inventory.tasks.trigger_products_sync_async', return_value=False)
+@patch('inventory.models.ApiKey.get_active_key', return_value='cle-test')
+class SyncedProductsViewTestCase(TestCase):
+    """Tests de l'endpoint des produits B2B synchronisés"""
+
+    def setUp(self):
+        cache.clear()
+        self.products = []
+        for index in range(5):
+            product = Product.objects.create(
+                title=f'Produit B2B {index}', price=Decimal('1000'), is_available=index != 4
+            )
+            ExternalProduct.objects.create(
+                product=product, external_id=500 + index, external_sku=f'B2B-{index}',
+                is_b2b=True, sync_status='synced'
+            )
+            self.products.append(product)
+        # Disponible mais pas synchronisé : jamais servi
+        pending = Product.objects.create(title='En attente', price=Decimal('1000'), is_available=True)
+        ExternalProduct.objects.create(product=pending, external_id=600, external_sku='B2B-P', is_b2b=True)
+        self.expected_ids = [product.id for product in reversed(self.products[:4])]
+
+    def test_default_response_is_streamed_full_document(self, *mocks):
+        response = self.client.get(SYNCED_PRODUCTS_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['count'], 4)
+        self.assertEqual([item['id'] for item in data['results']], self.expected_ids)
+
+    def test_ndjson_stream_writes_one_product_per_line(self, *mocks):
+        with self.settings(SYNCED_PRODUCTS_STREAM_CHUNK_SIZE=3):
+            response = self.client.get(SYNCED_PRODUCTS_URL, {'stream': 'ndjson'})
+            lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['id'] for line in lines], self.expected_ids)
+
+    def test_cursor_pagination(self, *mocks):
+        response = self.client.get(SYNCED_PRODUCTS_URL, {'page_size': 3})
+        self.assertEqual([item['id'] for item in response.data['results']], self.expected_ids[:3])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['id'] for item in response.data['results']], self.expected_ids[3:])
+        self.assertIsNone(response.data['next'])
+
+    def test_no_available_product_returns_diagnostic(self, *mocks):
+        Product.objects.update(is_available=False)
+
+        response = self.client.get(SYNCED_PRODUCTS_URL)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data['diagnostic']['synced_count'], 5)
+        self.assertEqual(response.data['diagnostic']['unavailable_count'], 5)
@@ -82,37 +82,10 @@ def get_category_tree_from_b2b() -> List[dict]:
     
     Returns:
         Liste de dictionnaires représentant l'arbre des catégories
+        (arbre partagé par version du catalogue, voir inventory.category_tree)
     """
-    external_categories = ExternalCategory.objects.all().select_related('category')
-    
-    # Créer un mapping par external_id
-    categories_by_id = {}
-    root_categories = []
-    
-    for ext_cat in external_categories:
-        cat_data = {
-            'id': ext_cat.category.id,
-            'external_id': ext_cat.external_id,
-            'name': ext_cat.category.name,
-            'slug': ext_cat.category.slug,
-            'parent_id': ext_cat.external_parent_id,
-            'category': ext_cat.category,
-            'children': []
-        }
-        categories_by_id[ext_cat.external_id] = cat_data
-        
-        # Si pas de parent, c'est une catégorie racine
-        if not ext_cat.external_parent_id:
-            root_categories.append(cat_data)
-    
-    # Construire l'arbre
-    for ext_cat in external_categories:
-        if ext_cat.external_parent_id and ext_cat.external_parent_id in categories_by_id:
-            parent = categories_by_id[ext_cat.external_parent_id]
-            child = categories_by_id[ext_cat.external_id]
-            parent['children'].append(child)
-    
-    return root_categories
+    from inventory.category_tree import get_category_tree
+    return get_category_tree('tree')['categories']
 
 
 def is_category_synced_from_b2b(category: Category) -> bool:
@@ -7,7 +7,7 @@ from django.contrib import messages
 from django.http import JsonResponse
 import logging
 
-from .models import ExternalProduct, ExternalCategory
+from .models import ExternalProduct, ExternalCategory, SyncRun, SyncRunItem
 from .services import ProductSyncService
 from .tasks import sync_products_auto, sync_categories_auto
 
@@ -87,9 +87,21 @@ def sync_status(request):
     # Derniers produits synchronisés
     recent_products = ExternalProduct.objects.select_related('product').order_by('-last_synced_at')[:10]
     
+    # Journal des dernières synchronisations (durées par phase, résultats par produit)
+    recent_runs = list(SyncRun.objects.all()[:10])
+    for run in recent_runs:
+        run.error_count = run.count(*SyncRunItem.ERROR_OUTCOMES)
+    last_run = recent_runs[0] if recent_runs else None
+    last_run_errors = (
+        last_run.items.filter(outcome__in=SyncRunItem.ERROR_OUTCOMES)[:50] if last_run else []
+    )
+    
     return render(request, 'inventory/sync_status.html', {
         'stats': stats,
         'recent_products': recent_products,
+        'recent_runs': recent_runs,
+        'last_run': last_run,
+        'last_run_errors': last_run_errors,
     })
 
 
@@ -104,6 +116,19 @@ def api_sync_status(request):
         'synced_products': ExternalProduct.objects.filter(sync_status='synced').count(),
         'pending_products': ExternalProduct.objects.filter(sync_status='pending').count(),
         'error_products': ExternalProduct.objects.filter(sync_status='error').count(),
+        'last_run': None,
     }
     
+    last_run = SyncRun.objects.first()
+    if last_run:
+        stats['last_run'] = {
+            'id': last_run.pk,
+            'status': last_run.status,
+            'started_at': last_run.started_at.isoformat(),
+            'finished_at': last_run.finished_at.isoformat() if last_run.finished_at else None,
+            'duration_ms': last_run.duration_ms,
+            'phase_durations': last_run.phase_durations,
+            'summary': last_run.summary,
+        }
+    
     return JsonResponse(stats)
@@ -1,10 +1,17 @@
 import logging
 import requests
+from asgiref.sync import sync_to_async
+
+from saga.utils.async_http import async_http_client
 from .models import PushToken, Notification
 
 logger = logging.getLogger('saga.notifications')
 
 EXPO_PUSH_URL = 'https://exp.host/--/api/v2/push/send'
+EXPO_PUSH_HEADERS = {
+    'Accept': 'application/json',
+    'Content-Type': 'application/json',
+}
 
 
 def send_push_notification(user, title, body, data=None):
@@ -12,6 +19,36 @@ def send_push_notification(user, title, body, data=None):
     Envoie une notification push à tous les appareils actifs d'un utilisateur
     via l'API Expo Push et stocke la notification en base. Ne lève jamais d'exception.
     """
+    tokens, messages = _prepare_push_messages(user, title, body, data)
+    if not tokens:
+        return
+
+    try:
+        response = requests.post(EXPO_PUSH_URL, json=messages, headers=EXPO_PUSH_HEADERS, timeout=10)
+        _handle_push_tickets(user, title, tokens, response.json())
+    except Exception as e:
+        logger.error("Erreur envoi notification push à %s: %s", user.email, str(e))
+
+
+async def asend_push_notification(user, title, body, data=None):
+    """
+    Version asynchrone de send_push_notification (vues ASGI) : l'appel à Expo
+    passe par un client HTTP asynchrone, l'accès à la base par sync_to_async.
+    """
+    tokens, messages = await sync_to_async(_prepare_push_messages)(user, title, body, data)
+    if not tokens:
+        return
+
+    try:
+        async with async_http_client(timeout=10) as client:
+            response = await client.post(EXPO_PUSH_URL, json=messages, headers=EXPO_PUSH_HEADERS)
+        await sync_to_async(_handle_push_tickets)(user, title, tokens, response.json())
+    except Exception as e:
+        logger.error("Erreur envoi notification push à %s: %s", user.email, str(e))
+
+
+def _prepare_push_messages(user, title, body, data):
+    """Stocke la notification et construit les messages Expo : (tokens, messages)"""
     # Toujours stocker la notification en base (même si push désactivé)
     try:
         Notification.objects.create(user=user, title=title, body=body, data=data or {})
@@ -19,13 +56,11 @@ def send_push_notification(user, title, body, data=None):
         logger.warning("Impossible de stocker la notification pour %s", user.email, exc_info=True)
 
     if not getattr(user, 'notifications_enabled', True):
-        return
+        return [], []
 
     tokens = list(
         PushToken.objects.filter(user=user, is_active=True).values_list('token', flat=True)
     )
-    if not tokens:
-        return
 
     messages = []
     for token in tokens:
@@ -38,31 +73,20 @@ def send_push_notification(user, title, body, data=None):
         if data:
             message['data'] = data
         messages.append(message)
+    return tokens, messages
 
-    try:
-        response = requests.post(
-            EXPO_PUSH_URL,
-            json=messages,
-            headers={
-                'Accept': 'application/json',
-                'Content-Type': 'application/json',
-            },
-            timeout=10,
-        )
-        result = response.json()
-
-        # Désactiver les tokens invalides
-        if 'data' in result:
-            for i, ticket in enumerate(result['data']):
-                if ticket.get('status') == 'error':
-                    error_type = ticket.get('details', {}).get('error')
-                    if error_type == 'DeviceNotRegistered':
-                        PushToken.objects.filter(token=tokens[i]).update(is_active=False)
-                        logger.info("Token push désactivé (DeviceNotRegistered): %s", tokens[i][:20])
-
-        logger.info(
-            "Notification push envoyée à %s (%d appareil(s)): %s",
-            user.email, len(tokens), title,
-        )
-    except Exception as e:
-        logger.error("Erreur envoi notification push à %s: %s", user.email, str(e))
+
+def _handle_push_tickets(user, title, tokens, result):
+    """Désactive les tokens invalides signalés par les tickets Expo"""
+    if 'data' in result:
+        for i, ticket in enumerate(result['data']):
+            if ticket.get('status') == 'error':
+                error_type = ticket.get('details', {}).get('error')
+                if error_type == 'DeviceNotRegistered':
+                    PushToken.objects.filter(token=tokens[i]).update(is_active=False)
+                    logger.info("Token push désactivé (DeviceNotRegistered): %s", tokens[i][:20])
+
+    logger.info(
+        "Notification push envoyée à %s (%d appareil(s)): %s",
+        user.email, len(tokens), title,
+    )
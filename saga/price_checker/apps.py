@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class PriceCheckerConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'price_checker'
+    verbose_name = 'Comparateur de prix'
+
+    def ready(self):
+        """Importe les signaux lorsque l'app est prête"""
+        import price_checker.signals  # noqa
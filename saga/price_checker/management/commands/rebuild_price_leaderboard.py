@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from price_checker.models import ProductPriceCount
+
+
+class Command(BaseCommand):
+    help = "Recalcule le classement des produits ayant le plus de prix actifs"
+
+    def handle(self, *args, **options):
+        total = ProductPriceCount.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Classement recalculé : {total} compteur(s) enregistré(s).")
+        )
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.10 on 2026-10-19 15:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def populate_price_counts(apps, schema_editor):
+    """Initialise le classement à partir des prix actifs existants"""
+    PriceEntry = apps.get_model('price_checker', 'PriceEntry')
+    ProductPriceCount = apps.get_model('price_checker', 'ProductPriceCount')
+    active_entries = PriceEntry.objects.filter(is_active=True)
+    counters = [
+        ProductPriceCount(product_id=row['product_id'], city_id=row['city_id'], active_price_count=row['total'])
+        for row in active_entries.values('product_id', 'city_id').annotate(total=Count('id')).order_by()
+    ]
+    counters.extend(
+        ProductPriceCount(product_id=row['product_id'], city_id=None, active_price_count=row['total'])
+        for row in active_entries.values('product_id').annotate(total=Count('id')).order_by()
+    )
+    ProductPriceCount.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0033_historicalcategory_image_url'),
+        ('price_checker', '0004_priceentry_proof_image_priceentry_supplier_address_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPriceCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('active_price_count', models.PositiveIntegerField(default=0, verbose_name='Nombre de prix actifs')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='product_price_counts', to='price_checker.city')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_counts', to='product.product')),
+            ],
+            options={
+                'verbose_name': 'Compteur de prix par produit',
+                'verbose_name_plural': 'Compteurs de prix par produit',
+                'indexes': [models.Index(fields=['city', '-active_price_count'], name='price_count_leaderboard_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productpricecount',
+            constraint=models.UniqueConstraint(fields=('product', 'city'), name='unique_product_price_count_city'),
+        ),
+        migrations.AddConstraint(
+            model_name='productpricecount',
+            constraint=models.UniqueConstraint(condition=models.Q(('city__isnull', True)), fields=('product',), name='unique_product_price_count_all'),
+        ),
+        migrations.RunPython(populate_price_counts, migrations.RunPython.noop),
+    ]
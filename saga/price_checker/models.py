@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Q, Avg, Max, Min, Count
+from django.db.models import Q, F, Avg, Max, Min, Count
+from django.db.models.functions import Greatest
 from django.utils.text import slugify
 from django.conf import settings
 from product.models import Product
@@ -240,6 +241,70 @@ class PriceDeactivation(models.Model):
     def __str__(self):
         return f"Désactivation de {self.price_entry} par {self.admin_user}"
 
+class ProductPriceCount(models.Model):
+    """
+    Classement précalculé des produits par nombre de prix actifs.
+
+    Une ligne par (produit, ville) et une ligne agrégée par produit (ville vide),
+    maintenues incrémentalement par les signaux de PriceEntry.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_counts')
+    city = models.ForeignKey(City, on_delete=models.CASCADE, null=True, blank=True, related_name='product_price_counts')
+    active_price_count = models.PositiveIntegerField(default=0, verbose_name='Nombre de prix actifs')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Compteur de prix par produit'
+        verbose_name_plural = 'Compteurs de prix par produit'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'city'], name='unique_product_price_count_city'),
+            models.UniqueConstraint(fields=['product'], condition=Q(city__isnull=True), name='unique_product_price_count_all'),
+        ]
+        indexes = [
+            models.Index(fields=['city', '-active_price_count'], name='price_count_leaderboard_idx'),
+        ]
+
+    def __str__(self):
+        city_name = self.city.name if self.city_id else 'Toutes villes'
+        return f"{self.product_id} - {self.active_price_count} prix ({city_name})"
+
+    @classmethod
+    def adjust(cls, product_id, city_id, delta):
+        """Ajoute delta au compteur global du produit et à celui de la ville"""
+        if not delta:
+            return
+        for scope_city_id in (None, city_id):
+            counters = cls.objects.filter(product_id=product_id, city_id=scope_city_id)
+            updated = counters.update(
+                active_price_count=Greatest(F('active_price_count') + delta, 0),
+                updated_at=timezone.now()
+            )
+            if not updated and delta > 0:
+                counter, created = cls.objects.get_or_create(
+                    product_id=product_id,
+                    city_id=scope_city_id,
+                    defaults={'active_price_count': delta}
+                )
+                if not created:
+                    counters.update(active_price_count=F('active_price_count') + delta)
+
+    @classmethod
+    def rebuild(cls):
+        """Recalcule entièrement le classement à partir des prix actifs"""
+        active_entries = PriceEntry.objects.filter(is_active=True)
+        counters = [
+            cls(product_id=row['product_id'], city_id=row['city_id'], active_price_count=row['total'])
+            for row in active_entries.values('product_id', 'city_id').annotate(total=Count('id')).order_by()
+        ]
+        counters.extend(
+            cls(product_id=row['product_id'], city_id=None, active_price_count=row['total'])
+            for row in active_entries.values('product_id').annotate(total=Count('id')).order_by()
+        )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(counters, batch_size=1000)
+        return len(counters)
+
 class ProductStatus(models.Model):
     STATUS_CHOICES = [
         ('DRAFT', 'Brouillon'),
@@ -308,35 +373,26 @@ class PriceValidation(models.Model):
 
 
 # Fonction utilitaire pour récupérer les produits avec le plus de prix collectés
-def get_products_with_most_prices(limit=6):
+def get_products_with_most_prices(limit=6, city=None):
     """
-    Récupère les produits ayant le plus de prix collectés
+    Récupère les produits ayant le plus de prix collectés (optionnellement pour une ville)
+
+    Lecture unique sur le classement précalculé ProductPriceCount ;
+    le nombre de prix est exposé via l'attribut price_count de chaque produit.
     """
-    from product.models import Product as ProductModel
-    
-    # Récupérer les produits avec le plus de prix actifs
-    products_with_prices = ProductModel.objects.filter(
-        is_available=True,
-        price_entries__is_active=True
-    ).annotate(
-        price_count=Count('price_entries', filter=Q(price_entries__is_active=True))
-    ).filter(
-        price_count__gt=0
-    ).order_by(
-        '-price_count', '-created_at'
+    counters = ProductPriceCount.objects.filter(
+        city=city,
+        active_price_count__gt=0,
+        product__is_available=True
     ).select_related(
-        'phone',
-        'phone__color',
-        'supplier',
-        'category',
-        'fabric_product',
-        'clothing_product',
-        'cultural_product'
-    ).prefetch_related(
-        'clothing_product__size',
-        'clothing_product__color',
-        'fabric_product__color',
-        'images'
+        'product',
+        'product__category'
+    ).order_by(
+        '-active_price_count', '-product__created_at'
     )[:limit]
-    
-    return products_with_prices 
\ No newline at end of file
+
+    products = []
+    for counter in counters:
+        counter.product.price_count = counter.active_price_count
+        products.append(counter.product)
+    return products
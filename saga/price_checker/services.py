@@ -0,0 +1,119 @@
+"""
+Services du comparateur de prix.
+
+Le moteur de comparaison charge une page de produits puis tous leurs prix
+actifs en une seule requête supplémentaire, et met en cache le résultat
+par (terme de recherche, page). Le cache est invalidé par incrément d'une
+version globale dès qu'un prix est approuvé, modifié ou désactivé. Ce cache
+n'est utilisé qu'avec un cache partagé entre processus (Redis) : avec LocMem,
+l'incrément fait par un autre worker ou une commande ne serait pas vu.
+"""
+import hashlib
+import logging
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+
+from core.cache_versions import bump_cache_version, get_cache_version, shared_cache_enabled
+
+from product.models import Product as ProductModel
+from .models import PriceEntry
+
+logger = logging.getLogger(__name__)
+
+PRICE_COMPARISON_PAGE_SIZE = 10
+PRICE_COMPARISON_CACHE_TIMEOUT = 60 * 15  # 15 minutes
+_PRICE_COMPARISON_VERSION_KEY = 'price_comparison:version'
+
+
+def get_price_comparison_version():
+    """Retourne la version courante des résultats de comparaison en cache"""
+    return get_cache_version(_PRICE_COMPARISON_VERSION_KEY)
+
+
+def invalidate_price_comparison():
+    """Invalide tous les résultats de comparaison en cache"""
+    bump_cache_version(_PRICE_COMPARISON_VERSION_KEY)
+
+
+class PriceComparisonEngine:
+    """
+    Moteur de comparaison de prix.
+
+    Une recherche coûte au plus trois requêtes (comptage, page de produits,
+    prix actifs de la page) et zéro lorsqu'elle est servie depuis le cache.
+    """
+
+    def __init__(self, page_size=PRICE_COMPARISON_PAGE_SIZE, timeout=PRICE_COMPARISON_CACHE_TIMEOUT):
+        self.page_size = page_size
+        self.timeout = timeout
+
+    def _cache_key(self, term, page):
+        digest = hashlib.md5(term.lower().encode('utf-8')).hexdigest()
+        return f"price_comparison:{get_price_comparison_version()}:{digest}:{page}"
+
+    def get_products_queryset(self, term=''):
+        from suppliers.views import create_search_query
+
+        products = ProductModel.objects.select_related('category').order_by('title', 'id')
+        if term:
+            products = products.filter(create_search_query(term))
+        return products
+
+    def search(self, term='', page=1):
+        """
+        Retourne un dictionnaire {'results', 'number', 'count'} pour la page demandée.
+
+        Chaque résultat contient le produit et ses prix actifs groupés par ville,
+        triés par prix croissant.
+        """
+        term = (term or '').strip()
+        try:
+            page = max(int(page), 1)
+        except (TypeError, ValueError):
+            page = 1
+
+        # Sans cache partagé, une invalidation faite par un autre processus ne serait pas vue
+        use_cache = shared_cache_enabled()
+        if use_cache:
+            cache_key = self._cache_key(term, page)
+            data = cache.get(cache_key)
+            if data is not None:
+                return data
+
+        paginator = Paginator(self.get_products_queryset(term), self.page_size)
+        page_obj = paginator.get_page(page)
+        products = list(page_obj.object_list)
+
+        entries = PriceEntry.objects.filter(
+            product_id__in=[product.id for product in products],
+            is_active=True
+        ).select_related('city').order_by('price', '-created_at')
+
+        prices_by_product = {}
+        for price_entry in entries:
+            prices_by_city = prices_by_product.setdefault(price_entry.product_id, {})
+            prices_by_city.setdefault(price_entry.city, []).append({
+                'price': price_entry.price,
+                'supplier_name': price_entry.supplier_name,
+                'supplier_phone': price_entry.supplier_phone,
+                'supplier_address': price_entry.supplier_address,
+                'updated_at': price_entry.created_at,
+                'is_active': price_entry.is_active,
+                'proof_image': price_entry.proof_image.url if price_entry.proof_image else None
+            })
+
+        data = {
+            'results': [
+                {'product': product, 'prices_by_city': prices_by_product.get(product.id, {})}
+                for product in products
+            ],
+            'number': page_obj.number,
+            'count': paginator.count,
+        }
+        if use_cache:
+            cache.set(cache_key, data, self.timeout)
+        return data
+
+
+price_comparison_engine = PriceComparisonEngine()
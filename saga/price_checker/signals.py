@@ -0,0 +1,49 @@
+"""
+Signaux du comparateur de prix : invalidation des résultats en cache
+et maintenance incrémentale du classement des produits les plus cotés
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import PriceEntry, ProductPriceCount
+from .services import invalidate_price_comparison
+
+
+@receiver(post_save, sender=PriceEntry)
+@receiver(post_delete, sender=PriceEntry)
+def invalidate_price_comparison_on_change(sender, instance, **kwargs):
+    """
+    Une approbation (création), une modification ou une désactivation de prix
+    rend obsolètes les résultats de comparaison en cache.
+    """
+    transaction.on_commit(invalidate_price_comparison)
+
+
+@receiver(pre_save, sender=PriceEntry)
+def price_entry_store_previous_state(sender, instance, **kwargs):
+    if not instance.pk:
+        instance._previous_state = None
+        return
+    instance._previous_state = PriceEntry.objects.filter(pk=instance.pk).values(
+        'is_active', 'product_id', 'city_id'
+    ).first()
+
+
+@receiver(post_save, sender=PriceEntry)
+def update_price_leaderboard_on_save(sender, instance, created, **kwargs):
+    """Répercute l'activation / désactivation d'un prix sur le classement"""
+    previous = getattr(instance, '_previous_state', None)
+    if previous and previous['is_active']:
+        if (instance.is_active and previous['product_id'] == instance.product_id
+                and previous['city_id'] == instance.city_id):
+            return
+        ProductPriceCount.adjust(previous['product_id'], previous['city_id'], -1)
+    if instance.is_active:
+        ProductPriceCount.adjust(instance.product_id, instance.city_id, 1)
+
+
+@receiver(post_delete, sender=PriceEntry)
+def update_price_leaderboard_on_delete(sender, instance, **kwargs):
+    if instance.is_active:
+        ProductPriceCount.adjust(instance.product_id, instance.city_id, -1)
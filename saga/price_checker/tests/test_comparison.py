@@ -0,0 +1,165 @@
+import tempfile
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from price_checker.models import City, PriceEntry, PriceSubmission
+from price_checker.services import (
+    _PRICE_COMPARISON_VERSION_KEY, PriceComparisonEngine, get_price_comparison_version, invalidate_price_comparison,
+)
+from product.models import Product, Category
+
+User = get_user_model()
+
+# Cache partagé entre processus (comme Redis en production) : seul cas où les résultats sont mis en cache
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='saga-test-cache-'),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class PriceComparisonEngineTestCase(TestCase):
+    """Tests du moteur de comparaison de prix"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='prix@example.com', password='testpass123')
+        self.category = Category.objects.create(name='Téléphones', slug='telephones')
+        self.bamako = City.objects.create(name='Bamako')
+        self.kayes = City.objects.create(name='Kayes')
+        self.products = [
+            Product.objects.create(
+                title=f'Tecno Spark {i}',
+                slug=f'tecno-spark-{i}',
+                price=Decimal('50000'),
+                category=self.category,
+            )
+            for i in range(12)
+        ]
+        for product in self.products:
+            for price, city in ((Decimal('52000'), self.kayes), (Decimal('48000'), self.bamako), (Decimal('51000'), self.bamako)):
+                PriceEntry.objects.create(product=product, city=city, price=price, user=self.user)
+        self.engine = PriceComparisonEngine()
+
+    def test_search_uses_constant_number_of_queries(self):
+        """Comptage + page de produits + prix actifs, quel que soit le nombre de produits"""
+        with self.assertNumQueries(3):
+            data = self.engine.search('tecno', 1)
+        self.assertEqual(data['count'], 12)
+        self.assertEqual(len(data['results']), 10)
+
+    def test_prices_grouped_by_city_and_sorted(self):
+        data = self.engine.search('tecno', 1)
+        prices_by_city = data['results'][0]['prices_by_city']
+        self.assertEqual(
+            [entry['price'] for entry in prices_by_city[self.bamako]],
+            [Decimal('48000'), Decimal('51000')]
+        )
+        self.assertEqual(len(prices_by_city[self.kayes]), 1)
+
+    def test_identical_search_is_served_from_cache(self):
+        self.engine.search('tecno', 2)
+        with self.assertNumQueries(0):
+            data = self.engine.search('tecno', 2)
+        self.assertEqual(len(data['results']), 2)
+
+    def test_cache_invalidated_on_deactivation(self):
+        product = self.products[0]
+        self.engine.search('tecno', 1)
+        entry = PriceEntry.objects.filter(product=product, city=self.kayes).get()
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.deactivate(self.user)
+        data = self.engine.search('tecno', 1)
+        self.assertNotIn(self.kayes, data['results'][0]['prices_by_city'])
+
+    def test_cache_invalidated_on_approval(self):
+        product = self.products[0]
+        self.engine.search('tecno', 1)
+        submission = PriceSubmission.objects.create(
+            product=product, city=self.kayes, price=Decimal('45000'), user=self.user
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            submission.approve(self.user)
+        data = self.engine.search('tecno', 1)
+        kayes_prices = [entry['price'] for entry in data['results'][0]['prices_by_city'][self.kayes]]
+        self.assertEqual(kayes_prices[0], Decimal('45000'))
+
+    def test_process_local_cache_is_bypassed(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.engine.search('tecno', 1)
+            # Une invalidation faite par un autre processus ne serait pas vue : pas de cache
+            with self.assertNumQueries(3):
+                self.engine.search('tecno', 1)
+
+    def test_evicted_version_does_not_revive_old_results(self):
+        first = get_price_comparison_version()
+        invalidate_price_comparison()
+        second = get_price_comparison_version()
+        self.assertGreater(second, first)
+        # Clé évincée (cull LocMem) : la nouvelle version dépasse toutes les précédentes
+        cache.delete(_PRICE_COMPARISON_VERSION_KEY)
+        self.assertGreater(get_price_comparison_version(), second)
+        cache.delete(_PRICE_COMPARISON_VERSION_KEY)
+        invalidate_price_comparison()
+        self.assertGreater(get_price_comparison_version(), second)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class PriceComparisonBenchmarkTestCase(TestCase):
+    """Benchmark du chemin de recherche HTMX avec plusieurs milliers de prix"""
+
+    PRODUCTS = 500
+    ENTRIES_PER_PRODUCT = 8
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='bench@example.com', password='testpass123')
+        cities = [City.objects.create(name=f'Ville {i}') for i in range(4)]
+        products = Product.objects.bulk_create([
+            Product(title=f'Produit benchmark {i:04d}', slug=f'produit-benchmark-{i:04d}', price=Decimal('1000'))
+            for i in range(self.PRODUCTS)
+        ])
+        PriceEntry.objects.bulk_create([
+            PriceEntry(
+                product=product,
+                city=cities[j % len(cities)],
+                price=Decimal(1000 + j * 10),
+                user=self.user
+            )
+            for product in products
+            for j in range(self.ENTRIES_PER_PRODUCT)
+        ])
+
+    def test_htmx_search_benchmark(self):
+        url = reverse('price_checker:check_price')
+        params = {'product_name': 'benchmark', 'page': 3}
+
+        # Les context processors et middlewares ajoutent leurs propres requêtes :
+        # on compare donc le chemin à froid et le chemin servi depuis le cache.
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as cold_queries:
+            response = self.client.get(url, params, HTTP_HX_REQUEST='true')
+        cold = time.perf_counter() - start
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_products'], self.PRODUCTS)
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as warm_queries:
+            self.client.get(url, params, HTTP_HX_REQUEST='true')
+        warm = time.perf_counter() - start
+        self.assertLess(len(warm_queries), len(cold_queries))
+
+        print(
+            f"\n[benchmark] recherche HTMX ({self.PRODUCTS * self.ENTRIES_PER_PRODUCT} prix) : "
+            f"à froid {cold * 1000:.1f} ms ({len(cold_queries)} requêtes), "
+            f"depuis le cache {warm * 1000:.1f} ms ({len(warm_queries)} requêtes)"
+        )
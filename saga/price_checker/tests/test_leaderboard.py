@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from price_checker.models import City, PriceEntry, ProductPriceCount, get_products_with_most_prices
+from product.models import Product
+
+User = get_user_model()
+
+
+class PriceLeaderboardTestCase(TestCase):
+    """Tests du classement précalculé des produits les plus cotés"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='classement@example.com', password='testpass123')
+        self.bamako = City.objects.create(name='Bamako')
+        self.sikasso = City.objects.create(name='Sikasso')
+        self.riz = Product.objects.create(title='Riz 25kg', slug='riz-25kg', price=Decimal('15000'))
+        self.huile = Product.objects.create(title='Huile 5L', slug='huile-5l', price=Decimal('6000'))
+
+    def _add_price(self, product, city, price='1000'):
+        return PriceEntry.objects.create(product=product, city=city, price=Decimal(price), user=self.user)
+
+    def test_counters_follow_activation(self):
+        entry = self._add_price(self.riz, self.bamako)
+        self._add_price(self.riz, self.sikasso)
+        self._add_price(self.huile, self.bamako)
+
+        self.assertEqual(ProductPriceCount.objects.get(product=self.riz, city=None).active_price_count, 2)
+        self.assertEqual(ProductPriceCount.objects.get(product=self.riz, city=self.bamako).active_price_count, 1)
+
+        entry.deactivate(self.user)
+        self.assertEqual(ProductPriceCount.objects.get(product=self.riz, city=None).active_price_count, 1)
+        self.assertEqual(ProductPriceCount.objects.get(product=self.riz, city=self.bamako).active_price_count, 0)
+
+        entry.delete()
+        self.assertEqual(ProductPriceCount.objects.get(product=self.riz, city=None).active_price_count, 1)
+
+    def test_leaderboard_single_query(self):
+        self._add_price(self.riz, self.bamako)
+        self._add_price(self.riz, self.bamako)
+        self._add_price(self.huile, self.sikasso)
+
+        with self.assertNumQueries(1):
+            products = get_products_with_most_prices(limit=6)
+            self.assertEqual([product.id for product in products], [self.riz.id, self.huile.id])
+            self.assertEqual(products[0].price_count, 2)
+
+        by_city = get_products_with_most_prices(limit=6, city=self.sikasso)
+        self.assertEqual([product.id for product in by_city], [self.huile.id])
+
+    def test_rebuild_matches_incremental_counters(self):
+        self._add_price(self.riz, self.bamako)
+        self._add_price(self.huile, self.bamako).deactivate(self.user)
+        expected = set(
+            ProductPriceCount.objects.filter(active_price_count__gt=0)
+            .values_list('product_id', 'city_id', 'active_price_count')
+        )
+
+        ProductPriceCount.rebuild()
+
+        self.assertEqual(
+            set(ProductPriceCount.objects.values_list('product_id', 'city_id', 'active_price_count')),
+            expected
+        )
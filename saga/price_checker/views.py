@@ -9,7 +9,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.urls import reverse_lazy, reverse
 from django.http import HttpResponseRedirect, JsonResponse
-from django.db.models import Q, Prefetch, Count, Avg, Max, Min
+from django.db.models import Q, Count, Avg, Max, Min
 from django.core.paginator import Paginator
 from django.http import Http404
 from django.views.decorators.http import require_GET
@@ -24,6 +24,7 @@ from .models import (
 )
 from product.models import Product as ProductModel
 from .forms import PriceSubmissionForm, CityForm
+from .services import price_comparison_engine
 # Import des fonctions de recherche depuis suppliers
 from suppliers.views import normalize_search_term, create_search_query
 from core.facebook_conversions import facebook_conversions
@@ -36,63 +37,20 @@ def check_price(request):
         page = request.GET.get('page', 1)
         
         try:
-            # Récupérer tous les produits (pas seulement ceux disponibles sur le site)
-            products = ProductModel.objects.all().select_related(
-                'category',
-                'supplier'
-            ).prefetch_related(
-                Prefetch('price_entries', 
-                        queryset=PriceEntry.objects.filter(
-                            is_active=True
-                        ).select_related('city')
-                        .order_by('-created_at'))
-            ).order_by('title')
+            # Une page de produits + leurs prix actifs, servie depuis le cache si possible
+            data = price_comparison_engine.search(product_name, page)
+            results = data['results']
             
-            # Si un terme de recherche est fourni, filtrer les résultats
-            if product_name:
-                query = create_search_query(product_name)
-                products = products.filter(query)
-            
-            # Pagination
-            paginator = Paginator(products, 10)  # Augmenter à 10 produits par page
-            try:
-                products_page = paginator.page(page)
-            except Http404:
-                products_page = paginator.page(1)
-            
-            results = []
-            for product in products_page:
-                # Récupérer tous les prix individuels pour ce produit, triés par prix croissant
-                price_entries = product.price_entries.all().order_by('price')
-                
-                # Grouper les prix par ville avec les détails de chaque entrée
-                prices_by_city = {}
-                for price_entry in price_entries:
-                    city = price_entry.city
-                    if city not in prices_by_city:
-                        prices_by_city[city] = []
-                    
-                    prices_by_city[city].append({
-                        'price': price_entry.price,
-                        'supplier_name': price_entry.supplier_name,
-                        'supplier_phone': price_entry.supplier_phone,
-                        'supplier_address': price_entry.supplier_address,
-                            'updated_at': price_entry.created_at,
-                        'is_active': price_entry.is_active,
-                        'proof_image': price_entry.proof_image.url if price_entry.proof_image else None
-                    })
-                
-                results.append({
-                    'product': product,
-                    'prices_by_city': prices_by_city
-                })
+            # La pagination est reconstruite à partir du total mis en cache
+            paginator = Paginator(range(data['count']), price_comparison_engine.page_size)
+            products_page = paginator.get_page(data['number'])
             
             return render(request, 'price_checker/partials/price_results.html', {
                 'results': results,
                 'page_obj': products_page,
                 'paginator': paginator,
                 'is_paginated': paginator.num_pages > 1,
-                'total_products': products.count(),
+                'total_products': data['count'],
                 'debug_results_count': len(results)  # Debug pour voir le nombre de résultats
             })
                 
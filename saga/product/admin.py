@@ -1,61 +1,60 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
 from django.urls import reverse
-from django.db.models import Count, Q, Avg
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Count, OuterRef, Q, Avg, Subquery
+from django.db.models.functions import Coalesce
 from price_checker.models import PriceEntry
 from price_checker.admin import PriceEntryInline
 from accounts.admin import admin_site
 from django.utils.text import slugify
 from django import forms
+from core.paginator import EstimatedCountPaginator
 
 # Register your models here.
 from .models import Product, Category, ImageProduct, Review, Size, Color, Clothing, CulturalItem, ShippingMethod, Phone, Fabric
+from .search import search_products
 from django.contrib import admin
 from django.contrib.contenttypes.admin import GenericStackedInline
 
-def get_hierarchical_category_choices():
+def category_paths(categories):
     """
-    Retourne les choix de catégories formatés de manière hiérarchique.
+    Chemins (racine → catégorie) d'une liste de catégories : la fermeture de leurs
+    ancêtres est lue niveau par niveau, une requête par profondeur quelle que soit
+    la taille de la liste. Retourne {id: [(id, nom), ...]}.
     """
-    choices = [('', '---------')]  # Option vide par défaut
-    
-    # Récupérer toutes les catégories avec leurs relations
-    categories = Category.objects.select_related('parent', 'parent__parent').order_by('parent__name', 'name')
-    
-    # Organiser en hiérarchie
-    main_categories = []
-    subcategories_by_parent = {}
-    
-    for cat in categories:
-        if cat.parent is None:
-            main_categories.append(cat)
-        else:
-            parent_id = cat.parent.id
-            if parent_id not in subcategories_by_parent:
-                subcategories_by_parent[parent_id] = []
-            subcategories_by_parent[parent_id].append(cat)
-    
-    # Construire les choix hiérarchiques
-    for main_cat in sorted(main_categories, key=lambda x: x.name):
-        # Catégorie principale
-        choices.append((main_cat.id, main_cat.name))
-        
-        # Sous-catégories (avec indentation)
-        if main_cat.id in subcategories_by_parent:
-            for sub_cat in sorted(subcategories_by_parent[main_cat.id], key=lambda x: x.name):
-                choices.append((sub_cat.id, f"  └─ {sub_cat.name}"))
-                
-                # Sous-sous-catégories (niveau 3)
-                if sub_cat.id in subcategories_by_parent:
-                    for sub_sub_cat in sorted(subcategories_by_parent[sub_cat.id], key=lambda x: x.name):
-                        choices.append((sub_sub_cat.id, f"    └─ {sub_sub_cat.name}"))
-    
-    return choices
+    known = {category.pk: (category.name, category.parent_id) for category in categories}
+    missing = {parent_id for _, parent_id in known.values() if parent_id and parent_id not in known}
+    while missing:
+        for pk, name, parent_id in Category.objects.filter(pk__in=missing).values_list('pk', 'name', 'parent_id'):
+            known[pk] = (name, parent_id)
+        # Parent introuvable : chemin tronqué plutôt qu'une boucle sans fin
+        missing = {parent_id for _, parent_id in known.values() if parent_id and parent_id not in known} - missing
+
+    paths = {}
+    for category in categories:
+        path, current = [], category.pk
+        while current in known and len(path) <= len(known):
+            name, parent_id = known[current]
+            path.insert(0, (current, name))
+            current = parent_id
+        paths[category.pk] = path
+    return paths
+
+
+class CategoryChangeList(ChangeList):
+    """Changelist des catégories : chemins de la page calculés en une passe"""
+
+    def get_results(self, request):
+        super().get_results(request)
+        paths = category_paths(self.result_list)
+        for category in self.result_list:
+            category.admin_path = paths[category.pk]
 
 
 class CategoryAdminForm(forms.ModelForm):
-    """Formulaire personnalisé pour Category avec widget hiérarchique"""
+    """Formulaire de Category : parent choisi par autocomplétion, sans boucle possible"""
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Exclure la catégorie actuelle de la liste des parents pour éviter les boucles
@@ -67,8 +66,7 @@ class CategoryAdminForm(forms.ModelForm):
             ).exclude(
                 parent__parent__id=self.instance.id
             )
-        self.fields['parent'].choices = get_hierarchical_category_choices()
-    
+
     class Meta:
         model = Category
         fields = '__all__'
@@ -96,22 +94,34 @@ class CategoryLevelFilter(admin.SimpleListFilter):
 class CategoryAdmin(admin.ModelAdmin):
     form = CategoryAdminForm
     list_display = ('name', 'parent_name', 'get_full_path', 'image_preview', 'subcategories_count', 'subsubcategories_count', 'category_type', 'color')
-    list_filter = (CategoryLevelFilter, 'parent',)
+    # Pas de filtre sur 'parent' (toute la table en choix) : lien « sous-catégories » par ligne
+    list_filter = (CategoryLevelFilter,)
+    list_select_related = ('parent',)
     search_fields = ('name',)
+    autocomplete_fields = ('parent',)
     ordering = ('parent__name', 'name')
-    
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     def get_queryset(self, request):
+        # Sous-requêtes corrélées : deux Count() sur les mêmes jointures se multiplieraient
+        children = Category.objects.filter(parent=OuterRef('pk')).order_by().values('parent')
+        grandchildren = Category.objects.filter(parent__parent=OuterRef('pk')).order_by().values('parent__parent')
         return super().get_queryset(request).annotate(
-            subcategories_count=Count('children'),
-            subsubcategories_count=Count('children__children')
+            subcategories_count=Coalesce(Subquery(children.annotate(count=Count('pk')).values('count')), 0),
+            subsubcategories_count=Coalesce(Subquery(grandchildren.annotate(count=Count('pk')).values('count')), 0),
         )
-    
+
+    def get_changelist(self, request, **kwargs):
+        return CategoryChangeList
+
     def parent_name(self, obj):
         if obj.parent:
             url = reverse('admin:product_category_change', args=[obj.parent.id])
-            return mark_safe(f'<a href="{url}">{obj.parent.name}</a>')
+            return format_html('<a href="{}">{}</a>', url, obj.parent.name)
         return '-'
     parent_name.short_description = 'Catégorie parente'
+    parent_name.admin_order_field = 'parent__name'
     
     def image_preview(self, obj):
         if obj.image:
@@ -120,22 +130,23 @@ class CategoryAdmin(admin.ModelAdmin):
     image_preview.short_description = 'Image'
     
     def get_full_path(self, obj):
-        path = []
-        current = obj
-        while current:
-            url = reverse('admin:product_category_change', args=[current.id])
-            path.insert(0, f'<a href="{url}">{current.name}</a>')
-            current = current.parent
-        return mark_safe(' > '.join(path))
+        if obj.pk is None:
+            return '-'
+        path = getattr(obj, 'admin_path', None) or category_paths([obj])[obj.pk]
+        return format_html_join(
+            mark_safe(' &gt; '), '<a href="{}">{}</a>',
+            ((reverse('admin:product_category_change', args=[pk]), name) for pk, name in path),
+        )
     get_full_path.short_description = 'Chemin complet'
     
     def subcategories_count(self, obj):
         count = obj.subcategories_count
         if count > 0:
             url = reverse('admin:product_category_changelist') + f'?parent__id__exact={obj.id}'
-            return mark_safe(f'<a href="{url}">{count} sous-catégories</a>')
+            return format_html('<a href="{}">{} sous-catégories</a>', url, count)
         return '-'
     subcategories_count.short_description = 'Sous-catégories'
+    subcategories_count.admin_order_field = 'subcategories_count'
     
     def subsubcategories_count(self, obj):
         count = obj.subsubcategories_count
@@ -143,6 +154,7 @@ class CategoryAdmin(admin.ModelAdmin):
             return f'{count} sous-sous-catégories'
         return '-'
     subsubcategories_count.short_description = 'Sous-sous-catégories'
+    subsubcategories_count.admin_order_field = 'subsubcategories_count'
 
     fieldsets = (
         ('Informations de base', {
@@ -158,7 +170,19 @@ class CategoryAdmin(admin.ModelAdmin):
 class PhoneAdmin(admin.ModelAdmin):
     list_display = ('get_name', 'brand', 'model', 'storage', 'ram', 'color', 'get_price', 'get_stock', 'get_sku')
     list_filter = ('brand', 'storage', 'ram', 'color')
-    search_fields = ('product__title', 'brand', 'model', 'product__sku', 'resolution')
+    list_select_related = ('product', 'color')
+    # Champs du téléphone ; titre et SKU du produit passent par l'index plein texte
+    search_fields = ('brand', 'model', 'resolution')
+    autocomplete_fields = ('product',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        phones, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if not search_term.strip():
+            return phones, may_have_duplicates
+        products = search_products(Product.objects.all(), search_term)
+        return phones | queryset.filter(product__in=products.values('pk')), may_have_duplicates
 
     def get_name(self, obj):
         return obj.product.title if hasattr(obj, 'product') else '-'
@@ -215,22 +239,16 @@ class CulturalItemAdmin(admin.ModelAdmin):
         verbose_name = 'Livre et Culture'
         verbose_name_plural = 'Livres et Culture'
 
-class ProductAdminForm(forms.ModelForm):
-    """Formulaire personnalisé pour Product avec widget hiérarchique pour category"""
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields['category'].choices = get_hierarchical_category_choices()
-    
-    class Meta:
-        model = Product
-        fields = '__all__'
-
-
 class ProductAdmin(admin.ModelAdmin):
-    form = ProductAdminForm
-    list_display = ('title', 'category', 'brand', 'price', 'get_stock_display', 'sku', 'is_available', 'is_salam', 'created_at', 'discount_price', 'condition')
-    list_filter = ('is_available', 'is_salam', 'category', 'brand', 'created_at', 'condition')
-    search_fields = ('title', 'sku', 'brand', 'description')
+    list_display = ('title', 'category_link', 'brand', 'price', 'get_stock_display', 'sku', 'is_available', 'is_salam', 'created_at', 'discount_price', 'condition')
+    # 'category' et 'brand' lisaient toute la table des catégories / un DISTINCT sur les produits
+    # à chaque affichage : filtre catégorie par le lien de la colonne, marque par la recherche
+    list_filter = ('is_available', 'is_salam', 'created_at', 'condition')
+    # Recherche routée vers l'index plein texte (product.search), description exclue
+    search_fields = ('title', 'sku', 'brand')
+    autocomplete_fields = ('category', 'supplier')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('created_at', 'updated_at')
     
     fieldsets = (
@@ -256,10 +274,21 @@ class ProductAdmin(admin.ModelAdmin):
         }),
     )
 
+    def category_link(self, obj):
+        if obj.category_id:
+            url = reverse('admin:product_product_changelist') + f'?category__id__exact={obj.category_id}'
+            return format_html('<a href="{}">{}</a>', url, obj.category.name)
+        return '-'
+    category_link.short_description = 'Catégorie'
+    category_link.admin_order_field = 'category__name'
+
     def get_stock_display(self, obj):
         return obj.get_stock_display()
     get_stock_display.short_description = 'Stock'
 
+    def get_search_results(self, request, queryset, search_term):
+        return search_products(queryset, search_term), False
+
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('category', 'supplier')
 
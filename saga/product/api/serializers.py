@@ -1,3 +1,4 @@
+from django.db import models
 from rest_framework import serializers
 from product.models import Product, Category, ImageProduct, Phone, Favorite, Review
 import logging
@@ -115,6 +116,16 @@ class ProductImageSerializer(serializers.ModelSerializer):
 
 
 
+class ProductPageListSerializer(serializers.ListSerializer):
+    """Résout les URLs d'images de toute la page en un appel avant de sérialiser chaque produit"""
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        products = list(iterable)
+        Product.resolve_image_urls(products)
+        return super().to_representation(products)
+
+
 class ProductListSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     feature_image = serializers.SerializerMethodField()
@@ -136,6 +147,7 @@ class ProductListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
+        list_serializer_class = ProductPageListSerializer
         fields = [
             'id', 'title', 'slug', 'price', 'discount_price',
             'category', 'brand', 'feature_image',
@@ -177,12 +189,10 @@ class ProductListSerializer(serializers.ModelSerializer):
     def get_images(self, obj):
         """Compat B2B: images[] (liste d'URLs)"""
         try:
-            fix = Product._fix_b2b_image_url
-            # Priorité B2B: si la synchro a stocké les URLs externes, on les renvoie directement
-            if obj.specifications and isinstance(obj.specifications, dict):
-                b2b_urls = obj.specifications.get('b2b_image_urls') or []
-                if isinstance(b2b_urls, list) and len(b2b_urls) > 0:
-                    return [fix(u) for u in b2b_urls if isinstance(u, str) and u]
+            # Priorité B2B: miniatures miroir, ou URLs externes tant que le miroir n'est pas fait
+            b2b_urls = obj.get_b2b_image_urls('thumb')
+            if b2b_urls:
+                return b2b_urls
 
             urls = []
             if hasattr(obj, 'get_all_image_urls'):
@@ -388,25 +398,17 @@ class ProductDetailSerializer(serializers.ModelSerializer):
 
     def get_image_url(self, obj):
         try:
-            fix = Product._fix_b2b_image_url
-            if obj.specifications and isinstance(obj.specifications, dict):
-                b2b_urls = obj.specifications.get('b2b_image_urls') or []
-                if isinstance(b2b_urls, list) and len(b2b_urls) > 0 and isinstance(b2b_urls[0], str):
-                    return fix(b2b_urls[0])
-            url = obj.get_display_image_url() if hasattr(obj, 'get_display_image_url') else None
+            url = obj.get_detail_image_url()
             return self._abs(url) if url else None
         except Exception:
             return None
 
     def get_image_urls(self, obj):
         try:
-            fix = Product._fix_b2b_image_url
-            if obj.specifications and isinstance(obj.specifications, dict):
-                b2b_urls = obj.specifications.get('b2b_image_urls') or []
-                if isinstance(b2b_urls, list) and len(b2b_urls) > 0:
-                    first = fix(b2b_urls[0]) if isinstance(b2b_urls[0], str) else None
-                    gallery = [fix(u) for u in b2b_urls if isinstance(u, str) and u]
-                    return {'main': first, 'gallery': gallery}
+            # Variantes 'medium' (pages détail), URLs externes tant que le miroir n'est pas fait
+            b2b_urls = obj.get_b2b_image_urls('medium')
+            if b2b_urls:
+                return {'main': b2b_urls[0], 'gallery': b2b_urls}
 
             if hasattr(obj, 'get_all_image_urls'):
                 all_urls = obj.get_all_image_urls() or {}
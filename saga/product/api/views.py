@@ -3,11 +3,14 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, F
+from django.utils.decorators import method_decorator
+from core.http_cache import catalogue_cache
 from .serializers import (
     ProductListSerializer, ProductDetailSerializer,
     CategorySerializer, PhoneSerializer, FavoriteSerializer, ReviewSerializer
 )
 from product.models import Product, Category, Favorite, Review
+from product.recommendations import get_recommended_product_ids, recommendable_products_filter
 from inventory.models import ExternalCategory
 from inventory.utils import get_synced_categories
 
@@ -57,6 +60,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    @method_decorator(catalogue_cache)
     def list(self, request, *args, **kwargs):
         """Override list pour s'assurer que get_queryset() est appelé et appliquer le filtre"""
         import logging
@@ -207,6 +211,7 @@ class ProductViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    @method_decorator(catalogue_cache)
     def list(self, request, *args, **kwargs):
         """
         Déclenche une synchronisation B2B non bloquante avant de lister.
@@ -250,8 +255,8 @@ class ProductViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path=r'(?P<product_id>\d+)/similar_products', url_name='similar_products')
     def similar_products(self, request, product_id=None):
         """
-        Retourne les produits similaires basés sur la catégorie du produit.
-        Exclut le produit actuel.
+        Retourne les produits similaires précalculés (table des recommandations),
+        ou à défaut les produits de la même catégorie. Exclut le produit actuel.
         Utilise l'ID du produit directement car le ViewSet utilise lookup_field='slug'.
         """
         try:
@@ -259,15 +264,23 @@ class ProductViewSet(viewsets.ModelViewSet):
         except Product.DoesNotExist:
             return Response({'detail': 'Produit non trouvé'}, status=404)
         
-        # Récupérer les produits de la même catégorie, en excluant le produit actuel
         # Inclure les produits disponibles ET les produits B2B synchronisés
-        similar_products = Product.objects.filter(
-            category=product.category
-        ).filter(
-            Q(is_available=True) | Q(external_product__sync_status='synced')
-        ).exclude(
-            id=product.id
-        ).select_related('category', 'supplier', 'external_product').prefetch_related('images').distinct()[:10]  # Limiter à 10 produits
+        products = Product.objects.filter(
+            recommendable_products_filter()
+        ).select_related('category', 'supplier', 'external_product').prefetch_related('images').distinct()
+
+        recommended_ids = get_recommended_product_ids(product.id)
+        if recommended_ids is not None:
+            # Voisins précalculés (build_product_recommendations), dans l'ordre du score
+            products_by_id = {p.id: p for p in products.filter(pk__in=recommended_ids)}
+            similar_products = [products_by_id[pk] for pk in recommended_ids if pk in products_by_id][:10]
+        else:
+            # Nouveau produit : produits de la même catégorie, en excluant le produit actuel
+            similar_products = products.filter(
+                category=product.category
+            ).exclude(
+                id=product.id
+            )[:10]  # Limiter à 10 produits
         
         serializer = ProductListSerializer(similar_products, many=True, context={'request': request})
         return Response(serializer.data)
@@ -0,0 +1,88 @@
+"""
+Version de cache par produit.
+
+Chaque produit porte une version, incrémentée dès que le produit, ses avis,
+ses images, sa fiche spécialisée (téléphone, vêtement, tissu, article culturel)
+ou son stock changent. Les fragments mis en cache pour un produit sont indexés
+sur cette version : une modification les rend obsolètes sans suppression explicite.
+Ces fragments ne sont mis en cache qu'avec un cache partagé entre processus (Redis) :
+avec LocMem, la version incrémentée par un autre worker, process_tasks ou une commande
+(synchronisation, miroir d'images, recommandations) ne serait pas vue et la page
+resterait périmée jusqu'à PRODUCT_DETAIL_CACHE_TIMEOUT.
+
+Le catalogue porte en plus une version globale (horodatage en nanosecondes de la
+dernière modification), qui sert d'ETag / Last-Modified aux endpoints mobiles. Elle
+est stockée en base (product.CatalogueVersion) et non dans le cache, propre à chaque
+processus : une synchronisation lancée dans un worker, par process_tasks ou une
+commande de gestion invalide les réponses de tous les workers.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache_versions import bump_cache_version, get_cache_version, shared_cache_enabled
+
+PRODUCT_DETAIL_CACHE_TIMEOUT = 60 * 60  # 1 heure
+CATALOGUE_VERSION_MEMO_SECONDS = 1
+
+# Dernière version du catalogue lue par ce processus : {'version', 'read_at'}
+_catalogue_version_memo = {}
+
+
+def _product_version_key(product_id):
+    return f'product:version:{product_id}'
+
+
+def get_product_version(product_id):
+    """Retourne la version courante d'un produit"""
+    return get_cache_version(_product_version_key(product_id))
+
+
+def bump_product_version(product_id):
+    """Rend obsolètes tous les fragments en cache d'un produit"""
+    bump_cache_version(_product_version_key(product_id))
+
+
+def get_product_fragment(product_id, name, build, timeout=PRODUCT_DETAIL_CACHE_TIMEOUT):
+    """
+    Retourne le fragment `name` du produit, calculé par `build()` en cas d'absence.
+    Le fragment doit être sérialisable (types simples, listes d'identifiants...).
+    Sans cache partagé, le fragment est recalculé à chaque appel.
+    """
+    if not shared_cache_enabled():
+        return build()
+    key = f'product:{product_id}:v{get_product_version(product_id)}:{name}'
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = build()
+        cache.set(key, fragment, timeout)
+    return fragment
+
+
+def get_catalogue_version():
+    """
+    Version du catalogue : horodatage (ns) de la dernière modification connue.
+    Lue dans la table partagée (CatalogueVersion), mémorisée quelques instants
+    dans le processus (CATALOGUE_VERSION_MEMO_SECONDS).
+    """
+    from .models import CatalogueVersion
+
+    now = time.monotonic()
+    memo = _catalogue_version_memo
+    ttl = getattr(settings, 'CATALOGUE_VERSION_MEMO_SECONDS', CATALOGUE_VERSION_MEMO_SECONDS)
+    if memo.get('version') is None or now - memo['read_at'] >= ttl:
+        memo.update(version=CatalogueVersion.current(), read_at=now)
+    return memo['version']
+
+
+def bump_catalogue_version():
+    """
+    Signale une modification du catalogue (synchronisation B2B, admin...), à appeler
+    une fois la modification validée (transaction.on_commit) : tous les processus la
+    voient au plus tard après CATALOGUE_VERSION_MEMO_SECONDS.
+    """
+    from .models import CatalogueVersion
+
+    CatalogueVersion.bump()
+    _catalogue_version_memo.clear()
@@ -0,0 +1,288 @@
+"""
+Politique d'historisation (simple_history) des produits.
+
+- Une sauvegarde qui ne modifie aucun champ suivi ne crée pas de ligne d'historique.
+- En mode synchronisation (`product_history_sync_mode`), les modifications ne sont
+  pas historisées à chaque save() : une seule ligne par produit, résumant les champs
+  modifiés pendant le contexte, est écrite en lot (bulk_history_create) à la sortie.
+  Les rappels confiés à `run_after_sync` (version du catalogue...) n'y sont exécutés
+  qu'une fois, à la sortie du contexte, au lieu d'une fois par produit.
+"""
+import copy
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Min, Window
+from django.db.models.fields.files import FieldFile
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+try:
+    import orjson
+except ImportError:  # Dépendance optionnelle : copie profonde des champs JSON
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Champs ignorés pour décider si une sauvegarde mérite une ligne d'historique
+HISTORY_IGNORED_FIELDS = {'updated_at'}
+# Taille maximale de history_change_reason (simple_history)
+CHANGE_REASON_MAX_LENGTH = 100
+# Produits traités par tranche lors de la purge de l'historique
+PRUNE_PRODUCT_RANGE = 1000
+
+_sync_batch = ContextVar('product_history_sync_batch', default=None)
+
+
+@lru_cache(maxsize=None)
+def _tracked_attnames(model):
+    return tuple(
+        field.attname for field in model._meta.concrete_fields
+        if field.name not in HISTORY_IGNORED_FIELDS
+    )
+
+
+def _json_fingerprint(value):
+    """
+    Empreinte d'une valeur JSON mutable (specifications, image_urls...) : ses octets
+    orjson, bien moins coûteux qu'une copie profonde à chaque sauvegarde.
+    """
+    if orjson is None:
+        return copy.deepcopy(value)
+    try:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # Valeur non sérialisable (ajoutée en mémoire) : toujours considérée comme modifiée
+        return object()
+
+
+def _comparable(value):
+    # Empreinte des JSON mutables, nom du fichier pour les FieldFile
+    if isinstance(value, (dict, list)):
+        return _json_fingerprint(value)
+    if isinstance(value, FieldFile):
+        return value.name
+    return value
+
+
+def take_history_snapshot(instance):
+    """Mémorise les valeurs suivies de l'instance après sauvegarde (champs différés exclus)"""
+    instance._history_snapshot = {
+        attname: _comparable(instance.__dict__[attname])
+        for attname in _tracked_attnames(type(instance))
+        if attname in instance.__dict__
+    }
+
+
+def _restrict(attnames, update_fields):
+    if update_fields is None:
+        return list(attnames)
+    update_fields = set(update_fields)
+    return [
+        attname for attname in attnames
+        if attname in update_fields or attname.removesuffix('_id') in update_fields
+    ]
+
+
+def _stored_values(instance, attnames):
+    """Valeurs en base des champs `attnames` de l'instance (None si la ligne n'existe plus)"""
+    return (
+        type(instance)._base_manager.using(instance._state.db)
+        .filter(pk=instance.pk)
+        .values(*attnames)
+        .first()
+    )
+
+
+def get_changed_fields(instance, update_fields=None):
+    """
+    Champs suivis modifiés depuis la dernière sauvegarde de l'instance, ou depuis
+    l'état en base pour une instance chargée et pas encore sauvegardée (une requête :
+    aucun instantané n'est pris à la lecture, la plupart des instances ne sont jamais
+    sauvegardées). Retourne None si l'état d'origine est inconnu.
+    """
+    snapshot = getattr(instance, '_history_snapshot', None)
+    if snapshot is not None:
+        return {
+            attname for attname in _restrict(snapshot.keys(), update_fields)
+            if _comparable(instance.__dict__.get(attname)) != snapshot[attname]
+        }
+
+    if instance._state.adding or instance.pk is None:
+        return None
+    attnames = _restrict(
+        [attname for attname in _tracked_attnames(type(instance)) if attname in instance.__dict__],
+        update_fields,
+    )
+    if not attnames:
+        return set()
+    stored = _stored_values(instance, attnames)
+    if stored is None:
+        return None
+    changed = set()
+    for attname in attnames:
+        value = instance.__dict__.get(attname)
+        if isinstance(value, FieldFile):
+            value = value.name
+        # Égalité profonde pour les JSON, indépendante de l'ordre des clés (jsonb)
+        if value != stored[attname]:
+            changed.add(attname)
+    return changed
+
+
+class HistorySyncBatch:
+    """Modifications de produits accumulées pendant un contexte de synchronisation"""
+
+    def __init__(self, reason):
+        self.reason = reason
+        self.pending = {}
+        # Rappels à exécuter une seule fois à la sortie du contexte (dict : ordre et unicité)
+        self.after_sync = {}
+
+    def add(self, instance, changed_fields):
+        _, fields = self.pending.get(instance.pk, (None, set()))
+        self.pending[instance.pk] = (instance, fields | changed_fields)
+
+    def flush(self):
+        if not self.pending:
+            return 0
+        entries = list(self.pending.values())
+        self.pending = {}
+        model = type(entries[0][0])
+        for instance, fields in entries:
+            summary = f"{self.reason}: {', '.join(sorted(fields))}"
+            instance._change_reason = summary[:CHANGE_REASON_MAX_LENGTH]
+        instances = [instance for instance, _ in entries]
+        try:
+            model.history.bulk_history_create(
+                instances,
+                batch_size=getattr(settings, 'PRODUCT_HISTORY_BATCH_SIZE', 500),
+                update=True,
+            )
+        finally:
+            for instance in instances:
+                del instance._change_reason
+        return len(instances)
+
+
+@contextmanager
+def product_history_sync_mode(reason='Synchronisation'):
+    """
+    Active le mode synchronisation pour le contexte courant.
+    Utilisable comme gestionnaire de contexte ou comme décorateur ; un contexte
+    imbriqué rejoint le lot du contexte englobant.
+    """
+    if _sync_batch.get() is not None:
+        yield _sync_batch.get()
+        return
+
+    batch = HistorySyncBatch(reason)
+    token = _sync_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _sync_batch.reset(token)
+        count = batch.flush()
+        if count:
+            logger.info("[product_history] %s ligne(s) d'historique écrites en lot (%s)", count, reason)
+        for callback in batch.after_sync:
+            transaction.on_commit(callback)
+
+
+def run_after_sync(callback):
+    """
+    En mode synchronisation, reporte `callback` à la sortie du contexte (une seule
+    fois, après validation). Retourne False hors synchronisation : à l'appelant de
+    l'exécuter lui-même.
+    """
+    batch = _sync_batch.get()
+    if batch is None:
+        return False
+    batch.after_sync[callback] = None
+    return True
+
+
+@contextmanager
+def history_policy(instance, update_fields=None):
+    """
+    Encadre Product.save() : désactive l'historisation unitaire quand rien n'a
+    changé ou quand le mode synchronisation est actif, puis met à jour l'instantané.
+    """
+    batch = _sync_batch.get()
+    changed_fields = None
+    skip_set_here = False
+    if not instance._state.adding and not hasattr(instance, 'skip_history_when_saving'):
+        changed_fields = get_changed_fields(instance, update_fields)
+        if changed_fields == set() or (batch is not None and changed_fields is not None):
+            # simple_history n'historise pas une mise à jour portant cet attribut
+            instance.skip_history_when_saving = True
+            skip_set_here = True
+    try:
+        yield
+    finally:
+        if skip_set_here:
+            del instance.skip_history_when_saving
+    if batch is not None and changed_fields:
+        batch.add(instance, changed_fields)
+    take_history_snapshot(instance)
+
+
+def prune_product_history(days=None, keep=None, batch_size=None, dry_run=False):
+    """
+    Purge l'historique des produits.
+
+    Une ligne est supprimée si elle est plus ancienne que `days` jours ou si elle
+    dépasse les `keep` lignes les plus récentes de son produit. La ligne la plus
+    récente d'un produit n'est jamais supprimée. Une valeur à 0 désactive la règle.
+
+    Returns:
+        int: nombre de lignes supprimées (ou à supprimer en dry_run)
+    """
+    from .models import Product
+
+    days = getattr(settings, 'PRODUCT_HISTORY_RETENTION_DAYS', 180) if days is None else days
+    keep = getattr(settings, 'PRODUCT_HISTORY_KEEP_PER_PRODUCT', 20) if keep is None else keep
+    batch_size = batch_size or getattr(settings, 'PRODUCT_HISTORY_BATCH_SIZE', 500)
+
+    HistoricalProduct = Product.history.model
+    if not days and not keep:
+        return 0
+    bounds = HistoricalProduct.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+    if bounds['min_id'] is None:
+        return 0
+
+    # Par tranches d'identifiants de produit : le rang (fenêtre) n'est calculé qu'une
+    # fois par tranche, sur ses seules lignes, et les lignes expirées sont matérialisées
+    # avant d'être supprimées par lots
+    total = 0
+    for start in range(bounds['min_id'], bounds['max_id'] + 1, PRUNE_PRODUCT_RANGE):
+        expired_ids = _expired_history_ids(HistoricalProduct, start, start + PRUNE_PRODUCT_RANGE, days, keep)
+        if dry_run:
+            total += len(expired_ids)
+            continue
+        for offset in range(0, len(expired_ids), batch_size):
+            ids = expired_ids[offset:offset + batch_size]
+            total += HistoricalProduct.objects.filter(history_id__in=ids).delete()[0]
+    return total
+
+
+def _expired_history_ids(HistoricalProduct, start, stop, days, keep):
+    """history_id des lignes expirées des produits d'identifiant [start, stop)"""
+    ranked = HistoricalProduct.objects.filter(id__gte=start, id__lt=stop).annotate(
+        position=Window(RowNumber(), partition_by=[F('id')], order_by=F('history_date').desc())
+    ).values('history_id', 'history_date', 'position')
+
+    cutoff = timezone.now() - timedelta(days=days) if days else None
+    # Le rang est calculé sur tout l'historique du produit avant d'appliquer la règle d'âge
+    return [
+        row['history_id'] for row in ranked.iterator()
+        if row['position'] > 1 and (
+            (cutoff is not None and row['history_date'] < cutoff)
+            or (keep and row['position'] > keep)
+        )
+    ]
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from product.recommendations import build_product_recommendations
+
+
+class Command(BaseCommand):
+    help = "Recalcule la table des produits similaires (à planifier en cron, ex. chaque nuit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=getattr(settings, 'PRODUCT_RECOMMENDATIONS_TOP_K', 12),
+            help='Nombre de voisins conservés par produit'
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=getattr(settings, 'PRODUCT_RECOMMENDATIONS_BLOCK_SIZE', 500),
+            help='Nombre de produits scorés par bloc'
+        )
+
+    def handle(self, *args, **options):
+        report = build_product_recommendations(
+            top_k_size=options['top_k'],
+            block_size=options['block_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report['recommendations']} recommandation(s) pour {report['products']} produit(s) "
+            f"en {report['blocks']} bloc(s), {report['duration']:.2f}s."
+        ))
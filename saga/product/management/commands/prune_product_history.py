@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from product.history import prune_product_history
+
+
+class Command(BaseCommand):
+    help = "Purge l'historique des produits par ancienneté et par nombre de lignes (à planifier en cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'PRODUCT_HISTORY_RETENTION_DAYS', 180),
+            help='Supprime les lignes plus anciennes que ce nombre de jours (0 = désactivé)'
+        )
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=getattr(settings, 'PRODUCT_HISTORY_KEEP_PER_PRODUCT', 20),
+            help='Nombre maximum de lignes conservées par produit (0 = désactivé)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Affiche le nombre de lignes concernées sans rien supprimer'
+        )
+
+    def handle(self, *args, **options):
+        count = prune_product_history(
+            days=options['days'],
+            keep=options['keep'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(f"[DRY RUN] {count} ligne(s) d'historique seraient supprimées.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {count} ligne(s) d'historique supprimées."))
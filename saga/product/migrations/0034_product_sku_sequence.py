@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_sku_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Product = apps.get_model('product', 'Product')
+    table = schema_editor.quote_name(Product._meta.db_table)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("CREATE SEQUENCE IF NOT EXISTS product_sku_seq START 1")
+        # Reprendre après le plus grand numéro SKU-NNNN existant
+        cursor.execute(
+            f"SELECT COALESCE(MAX(CAST(substring(sku from '^SKU-([0-9]+)$') AS bigint)), 0) FROM {table}"
+        )
+        last_number = cursor.fetchone()[0]
+        cursor.execute("SELECT setval('product_sku_seq', %s, %s)", [max(last_number, 1), last_number > 0])
+
+
+def drop_sku_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP SEQUENCE IF EXISTS product_sku_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0033_historicalcategory_image_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_sku_sequence, drop_sku_sequence),
+    ]
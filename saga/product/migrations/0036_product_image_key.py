@@ -0,0 +1,89 @@
+# Generated by Django 4.2.10 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def normalize_path(value):
+    """Chemin relatif à ProductImageStorage.location (cf. Product._normalize_product_storage_path)"""
+    path = str(value).lstrip('/').replace('media/products/media/products/', 'media/products/')
+    if path.startswith('media/products/'):
+        path = path[len('media/products/'):]
+    return path
+
+
+def rewrite_image_urls(apps, schema_editor):
+    """
+    image_urls pointait vers des chemins recalculés (get_available_name) qui pouvaient
+    différer des objets réellement envoyés : on y reporte les clés des champs image.
+    Les entrées sans champ image correspondant sont conservées (normalisées).
+    Toutes les clés connues alimentent le registre ProductImageKey.
+    """
+    Category = apps.get_model('product', 'Category')
+    Product = apps.get_model('product', 'Product')
+    ImageProduct = apps.get_model('product', 'ImageProduct')
+    ProductImageKey = apps.get_model('product', 'ProductImageKey')
+
+    keys = set(Category.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True))
+
+    gallery_by_product = {}
+    for product_id, name in (
+        ImageProduct.objects.exclude(image='').exclude(image__isnull=True)
+        .order_by('product_id', 'ordre', 'created_at').values_list('product_id', 'image')
+    ):
+        gallery_by_product.setdefault(product_id, {})[normalize_path(name)] = None
+
+    to_update = []
+    for product in Product.objects.only('id', 'image', 'image_urls').iterator(chunk_size=BATCH_SIZE):
+        image_urls = dict(product.image_urls) if isinstance(product.image_urls, dict) else {}
+        new_urls = dict(image_urls)
+        if product.image:
+            new_urls['main'] = normalize_path(product.image.name)
+        elif new_urls.get('main'):
+            new_urls['main'] = normalize_path(new_urls['main'])
+        if product.id in gallery_by_product:
+            new_urls['gallery'] = list(gallery_by_product[product.id])
+        elif isinstance(new_urls.get('gallery'), list):
+            new_urls['gallery'] = [normalize_path(path) for path in new_urls['gallery'] if path]
+
+        if new_urls.get('main'):
+            keys.add(new_urls['main'])
+        keys.update(new_urls.get('gallery') or [])
+        if new_urls != image_urls:
+            product.image_urls = new_urls
+            to_update.append(product)
+        if len(to_update) >= BATCH_SIZE:
+            Product.objects.bulk_update(to_update, ['image_urls'])
+            to_update = []
+    if to_update:
+        Product.objects.bulk_update(to_update, ['image_urls'])
+
+    ProductImageKey.objects.bulk_create(
+        [ProductImageKey(key=key[:255]) for key in keys if key],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0035_product_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductImageKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': "Clé d'image produit",
+                'verbose_name_plural': "Clés d'images produits",
+            },
+        ),
+        migrations.RunPython(rewrite_image_urls, migrations.RunPython.noop),
+    ]
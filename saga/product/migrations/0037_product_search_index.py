@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0036_product_image_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('title', 'sku', 'brand', config='simple'), name='product_search_vector_idx'),
+        ),
+    ]
@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connection, models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
 from django.utils.text import slugify
-from django.db.models.signals import pre_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.urls import reverse
 from suppliers.models import Supplier
@@ -11,24 +14,39 @@ from saga.utils.image_optimizer import ImageOptimizer
 from saga.utils.path_utils import get_product_image_path
 from saga.utils.security import validate_image_file
 from django.utils import timezone
-from django.core.exceptions import ValidationError
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from .utils import generate_unique_slug
+from .history import history_policy, run_after_sync
+from .cache import bump_catalogue_version, bump_product_version
+from .search import PRODUCT_SEARCH_INDEX, product_search_vector
 from decimal import Decimal
 from simple_history.models import HistoricalRecords
 import logging
 import os
+import re
+import time
+import uuid
 import boto3
 from storages.backends.s3boto3 import S3Boto3Storage
 from saga.storage_backends import ProductImageStorage
+from saga.utils.media_urls import get_storage, resolve_many
 from PIL import Image
 from io import BytesIO
 from django.db.models import Avg, Count
 
 logger = logging.getLogger(__name__)
 
+# Anciennes URLs AWS des images B2B (réécrites vers Minio par Product._fix_b2b_image_url)
+B2B_AWS_IMAGE_URL_RE = re.compile(r'https?://bolibana-stock\.s3\.[^/]+\.amazonaws\.com/(.+)')
+# Clé de Product.image_urls contenant les dérivés miroir des images B2B (inventory.image_mirror)
+B2B_MIRROR_KEY = 'b2b_mirror'
+
+# Séquence PostgreSQL fournissant les numéros des SKU génériques (migration 0034)
+PRODUCT_SKU_SEQUENCE = 'product_sku_seq'
+
 
 class ShippingMethod(models.Model):
     name = models.CharField(max_length=255)
@@ -201,7 +219,7 @@ class Category(models.Model):
         # Supprimer l'image du stockage après la suppression de l'instance
         if image_to_delete:
             try:
-                storage = ProductImageStorage()
+                storage = get_storage(ProductImageStorage)
                 storage.delete(image_to_delete.name)
             except Exception as e:
                 logger.error(f"Erreur lors de la suppression de l'image de la catégorie: {str(e)}")
@@ -230,7 +248,7 @@ class Category(models.Model):
             try:
                 old_instance = Category.objects.get(pk=self.pk)
                 if old_instance.image and old_instance.image != self.image:
-                    storage = ProductImageStorage()
+                    storage = get_storage(ProductImageStorage)
                     storage.delete(old_instance.image.name)
             except Category.DoesNotExist:
                 pass
@@ -470,23 +488,52 @@ class Product(models.Model):
             return url
         # Réécrire les anciennes URLs AWS vers le bon domaine Minio
         if 'bolibana-stock.s3.' in url and 'amazonaws.com' in url:
-            import re
-            match = re.match(r'https?://bolibana-stock\.s3\.[^/]+\.amazonaws\.com/(.+)', url)
+            match = B2B_AWS_IMAGE_URL_RE.match(url)
             if match:
-                path = match.group(1)
-                url = f'https://s3.bolibanastock.com/bolibana-stock/{path}'
+                url = f'https://s3.bolibanastock.com/bolibana-stock/{match.group(1)}'
         return url
 
+    def get_b2b_source_urls(self):
+        """URLs d'origine (corrigées) des images B2B, image principale en premier"""
+        if not self.specifications or not isinstance(self.specifications, dict):
+            return []
+        urls = []
+        main_url = self.specifications.get('b2b_image_url')
+        if main_url and isinstance(main_url, str):
+            urls.append(main_url)
+        b2b_urls = self.specifications.get('b2b_image_urls')
+        if isinstance(b2b_urls, list):
+            urls.extend(url for url in b2b_urls if url and isinstance(url, str))
+        return list(dict.fromkeys(self._fix_b2b_image_url(url) for url in urls))
+
+    def get_b2b_mirror(self):
+        """Dérivés miroir des images B2B : {url d'origine: {variante: clé de stockage}}"""
+        mirror = self.image_urls.get(B2B_MIRROR_KEY) if isinstance(self.image_urls, dict) else None
+        return mirror if isinstance(mirror, dict) else {}
+
+    def get_b2b_image_urls(self, variant=None):
+        """
+        URLs des images B2B. Avec variant ('thumb' pour les cartes, 'medium' pour les pages
+        détail) : dérivé miroir de chaque image s'il existe, sinon l'URL d'origine
+        (repli tant que inventory.image_mirror n'a pas traité l'image).
+        """
+        sources = self.get_b2b_source_urls()
+        mirror = self.get_b2b_mirror() if variant else {}
+        if not mirror:
+            return sources
+        storage = get_storage(ProductImageStorage)
+        urls = []
+        for source in sources:
+            key = (mirror.get(source) or {}).get(variant)
+            urls.append(storage.url(key) if key else source)
+        return urls
+
     def get_display_image_url(self):
         """Retourne l'URL de l'image à afficher (compatible avec les templates)"""
-        # Priorité 1 : URLs B2B dans les spécifications (source principale)
-        if self.specifications and isinstance(self.specifications, dict):
-            b2b_url = self.specifications.get('b2b_image_url')
-            if b2b_url and isinstance(b2b_url, str):
-                return self._fix_b2b_image_url(b2b_url)
-            b2b_urls = self.specifications.get('b2b_image_urls')
-            if isinstance(b2b_urls, list) and b2b_urls:
-                return self._fix_b2b_image_url(b2b_urls[0])
+        # Priorité 1 : URLs B2B dans les spécifications (source principale), miniature si miroir
+        b2b_urls = self.get_b2b_image_urls('thumb')
+        if b2b_urls:
+            return b2b_urls[0]
 
         # Priorité 2 : image locale (S3/stockage)
         main_url = self.get_main_image_url()
@@ -514,6 +561,10 @@ class Product(models.Model):
         verbose_name = 'Produit'
         verbose_name_plural = 'Produits'
         ordering = ['-is_available', '-created_at']
+        indexes = [
+            # Recherche plein texte (product.search)
+            GinIndex(product_search_vector(), name=PRODUCT_SEARCH_INDEX),
+        ]
 
     def __str__(self):
         return self.title
@@ -613,6 +664,13 @@ class Product(models.Model):
         
         # Pour les autres types de produits, on utilise un format générique
         prefix = 'SKU'
+        if connection.vendor == 'postgresql':
+            # Numéro tiré d'une séquence : une seule requête, sans balayage des SKU existants
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT nextval(%s)", [PRODUCT_SKU_SEQUENCE])
+                new_number = cursor.fetchone()[0]
+            return f"{prefix}-{str(new_number).zfill(4)}"
+
         last_product = Product.objects.filter(
             sku__startswith=prefix
         ).order_by('-sku').first()
@@ -651,14 +709,40 @@ class Product(models.Model):
         else:
             slug_candidate = base_slug
         
-        # Vérifier si le slug existe déjà et ajouter un suffixe numérique
-        if Product.objects.filter(slug=slug_candidate).exists():
-            counter = 1
-            while Product.objects.filter(slug=f"{slug_candidate}-{counter}").exists():
-                counter += 1
-            return f"{slug_candidate}-{counter}"
-        
-        return slug_candidate
+        # Récupérer en une requête le slug candidat et ses variantes suffixées
+        taken = set(
+            Product.objects.filter(
+                Q(slug=slug_candidate) | Q(
+                    slug__startswith=f"{slug_candidate}-",
+                    slug__regex=rf"^{re.escape(slug_candidate)}-[0-9]+$",
+                )
+            ).values_list('slug', flat=True)
+        )
+        if slug_candidate not in taken:
+            return slug_candidate
+
+        # Premier suffixe numérique libre
+        counter = 1
+        while f"{slug_candidate}-{counter}" in taken:
+            counter += 1
+        return f"{slug_candidate}-{counter}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Nom de l'image tel que chargé, pour détecter un changement sans relire la ligne
+        if 'image' in field_names:
+            instance._loaded_image_name = values[field_names.index('image')] or ''
+        return instance
+
+    def _get_previous_image_name(self):
+        """Nom de l'image principale en base (None pour un nouveau produit)"""
+        if not self.pk:
+            return None
+        if hasattr(self, '_loaded_image_name'):
+            return self._loaded_image_name
+        # Instance construite hors from_db (ou champ différé) : relire le seul nom d'image
+        return Product.objects.filter(pk=self.pk).values_list('image', flat=True).first() or ''
 
     def save(self, *args, **kwargs):
         # Générer un slug unique si pas de slug ou si c'est un nouveau produit
@@ -669,15 +753,13 @@ class Product(models.Model):
         if not self.sku or self.sku == 'SKU-0000':
             self.sku = self.generate_sku()
         
-        # Gestion de l'image principale
-        if self.image and self.pk:
-            try:
-                old_instance = Product.objects.get(pk=self.pk)
-                if old_instance.image and old_instance.image != self.image:
-                    storage = ProductImageStorage()
-                    storage.delete(old_instance.image.name)
-            except Product.DoesNotExist:
-                pass
+        # Gestion de l'image principale : aucun accès au stockage si elle n'a pas changé
+        previous_image_name = self._get_previous_image_name()
+        image_changed = (self.image.name or '') != (previous_image_name or '')
+
+        if self.image and image_changed and previous_image_name:
+            storage = get_storage(ProductImageStorage)
+            storage.delete(previous_image_name)
 
         # Mettre à jour image_urls si une image principale est définie
         # IMPORTANT:
@@ -685,15 +767,17 @@ class Product(models.Model):
         # - Les chemins stockés dans image_urls doivent être RELATIFS à ce "location"
         #   (ex: "main/2026/01/11/imprimante.jpg"), sinon on obtient des URLs du style
         #   ".../media/products/media/products/main/..."
-        if self.image:
+        if self.image and (image_changed or not (self.image_urls or {}).get('main')):
             if not self.image_urls:
                 self.image_urls = {}
-            storage = ProductImageStorage()
-            path = get_product_main_image_upload_path(self, self.image.name)  # ex: "main/YYYY/MM/DD/slug.jpg"
-            final_path = storage.get_available_name(path)
-            self.image_urls['main'] = self._normalize_product_storage_path(final_path)
+            if not self.image._committed:
+                # Envoi anticipé (fait sinon par FileField.pre_save) : image_urls reçoit la clé réelle
+                self.image.save(self.image.name, self.image.file, save=False)
+            self.image_urls['main'] = self._normalize_product_storage_path(self.image.name)
         
-        super().save(*args, **kwargs)
+        with history_policy(self, kwargs.get('update_fields')):
+            super().save(*args, **kwargs)
+        self._loaded_image_name = self.image.name or ''
 
     def _normalize_product_storage_path(self, value):
         """
@@ -718,19 +802,26 @@ class Product(models.Model):
             return self.specifications.get('highlights', [])
         return []
 
+    def get_detail_image_url(self):
+        """URL de l'image principale des pages détail (variante 'medium' des images B2B)"""
+        b2b_urls = self.get_b2b_image_urls('medium')
+        if b2b_urls:
+            return b2b_urls[0]
+        return self.get_display_image_url()
+
     def get_main_image_url(self):
         """Retourne l'URL complète de l'image principale"""
         if self.image:
             return self.image.url
         if self.image_urls and 'main' in self.image_urls:
-            storage = ProductImageStorage()
+            storage = get_storage(ProductImageStorage)
             return storage.url(self._normalize_product_storage_path(self.image_urls['main']))
         return None
 
     def get_gallery_urls(self):
         """Retourne la liste des URLs complètes de la galerie"""
         if self.image_urls and 'gallery' in self.image_urls:
-            storage = ProductImageStorage()
+            storage = get_storage(ProductImageStorage)
             return [storage.url(self._normalize_product_storage_path(url)) for url in self.image_urls['gallery']]
         return None
 
@@ -743,6 +834,26 @@ class Product(models.Model):
             urls['gallery'] = gallery_urls
         return urls
 
+    @classmethod
+    def resolve_image_urls(cls, products):
+        """
+        Résout en un appel les URLs d'images (principale et galerie) d'une page de produits :
+        un seul aller-retour vers le cache partagé, les appels suivants à
+        get_main_image_url / get_gallery_urls sont servis par la mémoire du processus.
+        """
+        names = []
+        for product in products:
+            if product.image:
+                names.append(product.image.name)
+            image_urls = product.image_urls if isinstance(product.image_urls, dict) else {}
+            if image_urls.get('main'):
+                names.append(product._normalize_product_storage_path(image_urls['main']))
+            names.extend(product._normalize_product_storage_path(path) for path in image_urls.get('gallery') or [])
+            for variants in product.get_b2b_mirror().values():
+                if isinstance(variants, dict):
+                    names.extend(variants.values())
+        return resolve_many(get_storage(ProductImageStorage), names)
+
     def update_image_urls(self):
         """Met à jour le champ image_urls avec les chemins des images"""
         if not self.image_urls:
@@ -750,28 +861,22 @@ class Product(models.Model):
         
         # Mettre à jour le chemin de l'image principale
         if self.image:
-            storage = ProductImageStorage()
-            path = get_product_main_image_upload_path(self, self.image.name)
-            final_path = storage.get_available_name(path)
             # Stocker un chemin RELATIF à "media/products"
-            self.image_urls['main'] = self._normalize_product_storage_path(final_path)
+            self.image_urls['main'] = self._normalize_product_storage_path(self.image.name)
         else:
             # Supprimer l'URL de l'image principale si elle n'existe plus
             self.image_urls.pop('main', None)
         
         # Mettre à jour les chemins de la galerie
-        gallery_urls = set()  # Utiliser un set pour éviter les doublons
+        gallery_urls = {}  # Clés dans l'ordre de la galerie, sans doublons
         for image in self.images.all().order_by('ordre'):
             if image.image:
-                storage = ProductImageStorage()
-                path = get_product_gallery_image_upload_path(self, image.image.name)
-                final_path = storage.get_available_name(path)
                 # Stocker un chemin RELATIF à "media/products"
-                gallery_urls.add(self._normalize_product_storage_path(final_path))
+                gallery_urls[self._normalize_product_storage_path(image.image.name)] = None
         
         # Mettre à jour ou supprimer la galerie
         if gallery_urls:
-            self.image_urls['gallery'] = list(gallery_urls)  # Convertir le set en liste
+            self.image_urls['gallery'] = list(gallery_urls)
         else:
             self.image_urls.pop('gallery', None)
         
@@ -782,7 +887,7 @@ class Product(models.Model):
         if not relative_path:
             return None
         try:
-            storage = ProductImageStorage()
+            storage = get_storage(ProductImageStorage)
             # Le chemin contient déjà media/products/, donc on l'utilise directement
             return storage.url(relative_path)
         except Exception as e:
@@ -800,7 +905,7 @@ class Product(models.Model):
         # Supprimer l'image du stockage après la suppression de l'instance
         if image_to_delete:
             try:
-                storage = ProductImageStorage()
+                storage = get_storage(ProductImageStorage)
                 storage.delete(image_to_delete.name)
             except Exception as e:
                 logger.error(f"Erreur lors de la suppression de l'image principale: {str(e)}")
@@ -822,13 +927,13 @@ def handle_product_deletion(sender, instance, **kwargs):
     try:
         # Supprimer l'image principale si elle existe
         if instance.image:
-            storage = ProductImageStorage()
+            storage = get_storage(ProductImageStorage)
             storage.delete(instance.image.name)
         
         # Supprimer les images de la galerie
         for image in instance.images.all():
             if image.image:
-                storage = ProductImageStorage()
+                storage = get_storage(ProductImageStorage)
                 storage.delete(image.image.name)
         
         # Réinitialiser image_urls
@@ -950,7 +1055,7 @@ class ImageProduct(models.Model):
             try:
                 old_instance = ImageProduct.objects.get(pk=self.pk)
                 if old_instance.image and old_instance.image != self.image:
-                    storage = ProductImageStorage()
+                    storage = get_storage(ProductImageStorage)
                     storage.delete(old_instance.image.name)
             except ImageProduct.DoesNotExist:
                 pass
@@ -968,7 +1073,7 @@ class ImageProduct(models.Model):
         # Supprimer l'image du stockage
         if self.image:
             try:
-                storage = ProductImageStorage()
+                storage = get_storage(ProductImageStorage)
                 storage.delete(self.image.name)
             except Exception as e:
                 logger.error(f"Erreur lors de la suppression de l'image de la galerie: {str(e)}")
@@ -995,6 +1100,41 @@ def update_product_image_urls_on_delete(sender, instance, **kwargs):
         instance.product.update_image_urls()
 
 
+class ProductImageKey(models.Model):
+    """
+    Registre des clés d'objets de ProductImageStorage : garantit l'unicité des noms
+    de fichiers côté base, sans requête HEAD vers S3 (ProductImageStorage.get_available_name)
+    """
+    key = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Tentatives avant abandon (les chemins produits contiennent déjà un jeton aléatoire)
+    MAX_ATTEMPTS = 5
+
+    class Meta:
+        verbose_name = "Clé d'image produit"
+        verbose_name_plural = "Clés d'images produits"
+
+    def __str__(self):
+        return self.key
+
+    @classmethod
+    def reserve(cls, name, max_length=None):
+        """Réserve un nom libre dérivé de name (suffixe aléatoire en cas de collision)"""
+        base, ext = os.path.splitext(name)
+        suffix = ''
+        for _ in range(cls.MAX_ATTEMPTS):
+            stem = base[:max(max_length - len(suffix) - len(ext), 0)] if max_length else base
+            candidate = f"{stem}{suffix}{ext}"
+            try:
+                with transaction.atomic():
+                    cls.objects.create(key=candidate)
+                return candidate
+            except IntegrityError:
+                suffix = f"-{uuid.uuid4().hex[:8]}"
+        raise SuspiciousFileOperation(f"Aucun nom disponible pour {name}")
+
+
 class Review(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
     user = models.ForeignKey('accounts.Shopper', on_delete=models.CASCADE)
@@ -1210,3 +1350,93 @@ class Favorite(models.Model):
         return f"{self.user.username} - {self.product.title}"
 
 
+class ProductRecommendation(models.Model):
+    """Produits similaires précalculés (commande build_product_recommendations)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_product_recommendation_rank'),
+        ]
+        verbose_name = 'Recommandation produit'
+        verbose_name_plural = 'Recommandations produits'
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_id} (#{self.rank})"
+
+
+class CatalogueVersion(models.Model):
+    """
+    Version globale du catalogue (ligne unique), partagée par tous les processus :
+    workers web, process_tasks, commandes de gestion (voir product.cache).
+    Toujours lue et écrite sur le primaire, sans passer par le routeur : lire la
+    version ne doit pas éloigner la requête des réplicas (core.db_router).
+    """
+    SINGLETON_ID = 1
+
+    version = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Version du catalogue'
+        verbose_name_plural = 'Version du catalogue'
+
+    def __str__(self):
+        return str(self.version)
+
+    @classmethod
+    def _manager(cls):
+        return cls.objects.using(DEFAULT_DB_ALIAS)
+
+    @classmethod
+    def current(cls):
+        """Version courante, ligne créée (horodatage en ns) si absente"""
+        version = cls._manager().filter(pk=cls.SINGLETON_ID).values_list('version', flat=True).first()
+        if version is None:
+            row, _ = cls._manager().get_or_create(pk=cls.SINGLETON_ID, defaults={'version': time.time_ns()})
+            version = row.version
+        return version
+
+    @classmethod
+    def bump(cls):
+        """Incrémente la version : horodatage courant, toujours strictement croissante"""
+        now = time.time_ns()
+        updated = cls._manager().filter(pk=cls.SINGLETON_ID).update(
+            version=Greatest(F('version') + 1, Value(now, output_field=models.BigIntegerField())),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            cls._manager().get_or_create(pk=cls.SINGLETON_ID, defaults={'version': now})
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=ImageProduct)
+@receiver(post_delete, sender=ImageProduct)
+@receiver(post_save, sender=Phone)
+@receiver(post_save, sender=Clothing)
+@receiver(post_save, sender=Fabric)
+@receiver(post_save, sender=CulturalItem)
+def bump_product_cache_version(sender, instance, **kwargs):
+    """Invalide les fragments en cache de la page produit (avis, images, stock, fiche...)"""
+    product_id = instance.pk if sender is Product else instance.product_id
+    if product_id:
+        transaction.on_commit(lambda: bump_product_version(product_id))
+    # Une synchronisation B2B ne met à jour la ligne CatalogueVersion qu'une fois, à la fin
+    if not run_after_sync(bump_catalogue_version):
+        transaction.on_commit(bump_catalogue_version)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_catalogue_cache_version(sender, instance, **kwargs):
+    """Invalide les réponses conditionnelles (ETag) du catalogue mobile"""
+    if not run_after_sync(bump_catalogue_version):
+        transaction.on_commit(bump_catalogue_version)
@@ -0,0 +1,252 @@
+"""
+Produits similaires précalculés.
+
+La commande `build_product_recommendations` score toutes les paires de produits
+par blocs vectorisés (NumPy) à partir de trois signaux :
+- proximité de catégorie (même catégorie, parent/enfant ou sœurs, même famille) ;
+- caractéristiques des téléphones (marque, modèle, stockage, RAM) ;
+- achats conjoints (OrderItem des commandes confirmées, expédiées ou livrées).
+
+Les K meilleurs voisins de chaque produit sont stockés dans ProductRecommendation.
+Les vues web et mobile les lisent en une requête indexée ; un produit absent de
+la table (nouveau produit) retombe sur le calcul par catégorie.
+"""
+import logging
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .cache import bump_product_version
+from .models import Product, ProductRecommendation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 12
+DEFAULT_BLOCK_SIZE = 500
+
+# Poids des signaux dans le score final
+CATEGORY_WEIGHT = 1.0
+PHONE_WEIGHT = 0.6
+COPURCHASE_WEIGHT = 0.8
+
+# Proximité de catégorie
+CATEGORY_SAME = 1.0
+CATEGORY_NEAR = 0.5  # parent/enfant ou catégories sœurs
+CATEGORY_FAMILY = 0.25  # même catégorie racine
+
+# Caractéristiques téléphone (somme des poids = 1)
+PHONE_ATTRIBUTE_WEIGHTS = {
+    'phone__brand': 0.4,
+    'phone__model': 0.3,
+    'phone__storage': 0.15,
+    'phone__ram': 0.15,
+}
+# Valeurs par défaut du modèle Phone, non significatives
+UNKNOWN_VALUES = (None, '', 'Inconnu')
+
+# Commandes prises en compte pour les achats conjoints
+COPURCHASE_ORDER_STATUSES = ('confirmed', 'shipped', 'delivered')
+
+# Départage des scores égaux : les produits les plus récents d'abord
+RECENCY_EPSILON = 1e-3
+
+
+def recommendable_products_filter():
+    """Produits pouvant être recommandés : disponibles ou B2B synchronisés"""
+    return Q(is_available=True) | Q(external_product__sync_status='synced')
+
+
+def _encode(values):
+    """Codes entiers des valeurs (-1 pour une valeur absente ou non significative)"""
+    codes = np.full(len(values), -1, dtype=np.int64)
+    index = {}
+    for position, value in enumerate(values):
+        if value in UNKNOWN_VALUES:
+            continue
+        codes[position] = index.setdefault(value, len(index))
+    return codes
+
+
+def _matches(codes, rows):
+    """Matrice booléenne (bloc x catalogue) des valeurs connues identiques"""
+    block = codes[rows][:, None]
+    return (block == codes[None, :]) & (block != -1)
+
+
+class CatalogueMatrix:
+    """Attributs du catalogue encodés en tableaux NumPy, une position par produit"""
+
+    def __init__(self):
+        fields = ['id', 'category_id', 'category__parent_id', 'category__parent__parent_id']
+        fields += list(PHONE_ATTRIBUTE_WEIGHTS)
+        rows = list(Product.objects.order_by('id').values_list(*fields))
+        columns = list(zip(*rows)) if rows else [()] * len(fields)
+
+        self.ids = np.array(columns[0], dtype=np.int64)
+        self.size = len(self.ids)
+        # Identifiants bruts : comparables d'une colonne de catégorie à l'autre
+        self.category, self.parent, grand_parent = (
+            np.array([-1 if value is None else value for value in column], dtype=np.int64)
+            for column in columns[1:4]
+        )
+        self.root = np.where(
+            grand_parent != -1, grand_parent, np.where(self.parent != -1, self.parent, self.category)
+        )
+        self.phone_attributes = [
+            (weight, _encode(column))
+            for weight, column in zip(PHONE_ATTRIBUTE_WEIGHTS.values(), columns[4:])
+        ]
+        recommendable = set(
+            Product.objects.filter(recommendable_products_filter()).values_list('id', flat=True)
+        )
+        self.recommendable = np.isin(self.ids, list(recommendable))
+        # Ids croissants : rang de création approximatif
+        self.recency = np.arange(self.size, dtype=np.float64) / max(self.size, 1) * RECENCY_EPSILON
+
+    def positions(self, product_ids):
+        return np.searchsorted(self.ids, product_ids)
+
+
+class CoPurchaseMatrix:
+    """Nombre de commandes contenant chaque paire de produits, normalisé dans [0, 1]"""
+
+    def __init__(self, catalogue):
+        from cart.models import OrderItem
+
+        pairs = OrderItem.objects.filter(
+            order__status__in=COPURCHASE_ORDER_STATUSES,
+            product__isnull=False,
+            order__items__product__isnull=False,
+        ).values_list(
+            'product_id', 'order__items__product_id'
+        ).annotate(
+            orders=Count('order_id', distinct=True)
+        ).order_by()
+        pairs = np.array(list(pairs), dtype=np.int64).reshape(-1, 3)
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+
+        self.source = np.empty(0, dtype=np.int64)
+        if not len(pairs):
+            return
+        order = np.argsort(catalogue.positions(pairs[:, 0]), kind='stable')
+        pairs = pairs[order]
+        self.source = catalogue.positions(pairs[:, 0])
+        self.target = catalogue.positions(pairs[:, 1])
+        counts = np.log1p(pairs[:, 2].astype(np.float64))
+        self.score = counts / counts.max()
+
+    def block(self, start, stop, width):
+        scores = np.zeros((stop - start, width))
+        if len(self.source):
+            lo, hi = np.searchsorted(self.source, [start, stop])
+            scores[self.source[lo:hi] - start, self.target[lo:hi]] = self.score[lo:hi]
+        return scores
+
+
+def score_block(catalogue, copurchases, start, stop):
+    """Scores (bloc x catalogue) des produits [start, stop) contre tout le catalogue"""
+    rows = np.arange(start, stop)
+
+    same = _matches(catalogue.category, rows)
+    near = (
+        (catalogue.parent[rows][:, None] == catalogue.category[None, :])
+        | (catalogue.category[rows][:, None] == catalogue.parent[None, :])
+        | _matches(catalogue.parent, rows)
+    ) & (catalogue.category[rows][:, None] != -1)
+    family = _matches(catalogue.root, rows)
+    closeness = np.select([same, near, family], [CATEGORY_SAME, CATEGORY_NEAR, CATEGORY_FAMILY], 0.0)
+
+    phone = np.zeros_like(closeness)
+    for weight, codes in catalogue.phone_attributes:
+        phone += weight * _matches(codes, rows)
+
+    scores = (
+        CATEGORY_WEIGHT * closeness
+        + PHONE_WEIGHT * phone
+        + COPURCHASE_WEIGHT * copurchases.block(start, stop, catalogue.size)
+    )
+    # Aucun signal : pas de recommandation (le départage ne crée pas de voisin)
+    scores = np.where(scores > 0, scores + catalogue.recency[None, :], 0.0)
+    scores[:, ~catalogue.recommendable] = 0.0
+    scores[np.arange(stop - start), rows] = 0.0
+    return scores
+
+
+def top_k(scores, k):
+    """Positions et scores des k meilleurs voisins de chaque ligne, par score décroissant"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0))
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+
+def build_product_recommendations(top_k_size=None, block_size=None):
+    """
+    Recalcule la table ProductRecommendation.
+
+    Chaque bloc de produits est remplacé dans sa propre transaction ; la version de
+    cache des produits recalculés est incrémentée pour rafraîchir les pages produit.
+
+    Returns:
+        dict: rapport {'products', 'recommendations', 'blocks', 'duration'}
+    """
+    top_k_size = top_k_size or getattr(settings, 'PRODUCT_RECOMMENDATIONS_TOP_K', DEFAULT_TOP_K)
+    block_size = block_size or getattr(settings, 'PRODUCT_RECOMMENDATIONS_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)
+    started = time.monotonic()
+
+    catalogue = CatalogueMatrix()
+    copurchases = CoPurchaseMatrix(catalogue)
+    report = {'products': catalogue.size, 'recommendations': 0, 'blocks': 0, 'duration': 0.0}
+
+    for start in range(0, catalogue.size, block_size):
+        stop = min(start + block_size, catalogue.size)
+        neighbours, scores = top_k(score_block(catalogue, copurchases, start, stop), top_k_size)
+
+        product_ids = catalogue.ids[start:stop].tolist()
+        recommendations = []
+        for row, product_id in enumerate(product_ids):
+            kept = neighbours[row][scores[row] > 0]
+            recommendations.extend(
+                ProductRecommendation(
+                    product_id=product_id,
+                    recommended_id=int(catalogue.ids[position]),
+                    rank=rank,
+                    score=float(scores[row][rank]),
+                )
+                for rank, position in enumerate(kept)
+            )
+
+        with transaction.atomic():
+            ProductRecommendation.objects.filter(product_id__in=product_ids).delete()
+            ProductRecommendation.objects.bulk_create(recommendations)
+        for product_id in product_ids:
+            bump_product_version(product_id)
+
+        report['recommendations'] += len(recommendations)
+        report['blocks'] += 1
+
+    report['duration'] = time.monotonic() - started
+    logger.info(
+        "[recommendations] products=%s recommendations=%s blocks=%s duration=%.2fs",
+        report['products'], report['recommendations'], report['blocks'], report['duration'],
+    )
+    return report
+
+
+def get_recommended_product_ids(product_id, limit=None):
+    """
+    Identifiants des produits recommandés, par rang (une requête indexée).
+    Retourne None si le produit n'a pas encore été calculé.
+    """
+    recommended = ProductRecommendation.objects.filter(
+        product_id=product_id
+    ).order_by('rank').values_list('recommended_id', flat=True)
+    if limit:
+        recommended = recommended[:limit]
+    return list(recommended) or None
@@ -0,0 +1,39 @@
+"""
+Recherche plein texte indexée des produits (PostgreSQL).
+
+Un index GIN porte sur le vecteur (titre, SKU, marque) en configuration 'simple' :
+pas de racinisation ni de mots vides, adaptée aux noms de produits et aux références.
+Les requêtes reprennent exactement la même expression, ce qui permet au planificateur
+d'utiliser l'index au lieu d'un parcours en icontains ; chaque mot saisi est cherché
+en préfixe ("ipho 13" trouve "iPhone 13 Pro").
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+
+PRODUCT_SEARCH_CONFIG = 'simple'
+PRODUCT_SEARCH_FIELDS = ('title', 'sku', 'brand')
+PRODUCT_SEARCH_INDEX = 'product_search_vector_idx'
+
+
+def product_search_vector():
+    """Expression indexée (identique à celle de l'index GIN)"""
+    return SearchVector(*PRODUCT_SEARCH_FIELDS, config=PRODUCT_SEARCH_CONFIG)
+
+
+def product_search_query(term):
+    """Requête tsquery (tous les mots, en préfixe) d'une saisie libre, None si aucun mot"""
+    words = re.findall(r'\w+', term or '')
+    if not words:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{word}:*' for word in words), config=PRODUCT_SEARCH_CONFIG, search_type='raw'
+    )
+
+
+def search_products(queryset, term):
+    """Filtre un queryset de produits sur la saisie `term` via l'index plein texte"""
+    query = product_search_query(term)
+    if query is None:
+        return queryset
+    return queryset.annotate(search_vector=product_search_vector()).filter(search_vector=query)
@@ -0,0 +1,82 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.admin import admin_site
+from core.paginator import EstimatedCountPaginator
+from product.admin import category_paths
+from product.models import Category, Phone, Product
+from product.search import search_products
+
+User = get_user_model()
+
+
+class AdminChangelistTestCase(TestCase):
+    """Listes d'administration Product / Category / Phone sur de grandes tables"""
+
+    def setUp(self):
+        self.root = Category.objects.create(name='Electronique')
+        self.child = Category.objects.create(name='Telephones', parent=self.root)
+        self.leaf = Category.objects.create(name='Smartphones', parent=self.child)
+        self.other = Category.objects.create(name='Mode')
+        self.iphone = Product.objects.create(
+            title='iPhone 13 Pro', sku='APL-13P', brand='Apple', price=Decimal('500000'), stock=3, category=self.leaf,
+        )
+        self.galaxy = Product.objects.create(
+            title='Galaxy S22', sku='SMG-S22', brand='Samsung', price=Decimal('400000'), stock=2, category=self.leaf,
+            description='Concurrent direct iPhone',
+        )
+        self.admin_user = User.objects.create_superuser(email='admin-listes@example.com', password='testpass123')
+        self.factory = RequestFactory()
+
+    def changelist(self, model, **params):
+        request = self.factory.get('/', params)
+        request.user = self.admin_user
+        response = admin_site._registry[model].changelist_view(request)
+        response.render()
+        return response
+
+    def test_category_counts_and_paths(self):
+        with CaptureQueriesContext(connection) as queries:
+            paths = category_paths([self.leaf, self.child, self.other])
+        # Une requête par niveau d'ancêtres manquant (ici la racine), pas une par catégorie
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([name for _, name in paths[self.leaf.pk]], ['Electronique', 'Telephones', 'Smartphones'])
+        self.assertEqual([name for _, name in paths[self.other.pk]], ['Mode'])
+
+        response = self.changelist(Category)
+        self.assertEqual(response.status_code, 200)
+        results = {category.pk: category for category in response.context_data['cl'].result_list}
+        root = results[self.root.pk]
+        self.assertEqual((root.subcategories_count, root.subsubcategories_count), (1, 1))
+        self.assertEqual(results[self.child.pk].subcategories_count, 1)
+        self.assertEqual([name for _, name in results[self.leaf.pk].admin_path], ['Electronique', 'Telephones', 'Smartphones'])
+        self.assertContains(response, 'Telephones</a> &gt; <a')
+
+    def test_product_search_uses_full_text_prefixes(self):
+        found = search_products(Product.objects.all(), 'ipho 13')
+        self.assertEqual(list(found), [self.iphone])
+        # La description n'est plus parcourue
+        self.assertEqual(list(search_products(Product.objects.all(), 'concurrent')), [])
+        self.assertEqual(search_products(Product.objects.all(), ' ,; ').count(), 2)
+
+        response = self.changelist(Product, q='smg')
+        self.assertEqual(list(response.context_data['cl'].result_list), [self.galaxy])
+
+        Phone.objects.create(product=self.iphone, brand='Apple', model='A2638')
+        response = self.changelist(Phone, q='iphone')
+        self.assertEqual(response.context_data['cl'].result_list.count(), 1)
+
+    @override_settings(ADMIN_EXACT_COUNT_THRESHOLD=1)
+    def test_paginator_estimates_unfiltered_lists_only(self):
+        with mock.patch('core.paginator.estimate_table_rows', return_value=250000):
+            self.assertEqual(EstimatedCountPaginator(Product.objects.order_by('pk'), 20).count, 250000)
+            filtered = Product.objects.filter(brand='Apple').order_by('pk')
+            self.assertEqual(EstimatedCountPaginator(filtered, 20).count, 1)
+
+        with mock.patch('core.paginator.estimate_table_rows', return_value=None):
+            self.assertEqual(EstimatedCountPaginator(Product.objects.order_by('pk'), 20).count, 2)
@@ -0,0 +1,71 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core import db_router
+from core.db_router import STICKY_COOKIE_NAME
+from product.models import Product
+
+PRODUCTS_URL = '/api/products/'
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTestCase(TestCase):
+    """
+    Tests du routage des lectures vers les réplicas. L'alias de substitution est un
+    miroir de default sur une autre connexion : il ne voit pas la transaction du test,
+    seules les requêtes émises sur chaque alias sont vérifiées.
+    """
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        db_router._replica_health.clear()
+        self.product = Product.objects.create(title='Riz parfumé', price=Decimal('1000'), is_available=True)
+
+    def _product_queries(self, alias, method='get', url=PRODUCTS_URL, **kwargs):
+        with CaptureQueriesContext(connections[alias]) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, [q['sql'] for q in queries if 'product_product' in q['sql']]
+
+    def test_catalogue_get_reads_replica(self):
+        response, replica_queries = self._product_queries('replica')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replica_queries)
+        self.assertNotIn(STICKY_COOKIE_NAME, response.cookies)
+
+    def test_sticky_cookie_keeps_client_on_primary(self):
+        self.client.cookies[STICKY_COOKIE_NAME] = '1'
+
+        response, replica_queries = self._product_queries('replica')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(replica_queries)
+
+    def test_write_sets_sticky_cookie(self):
+        state_token, state = db_router.start_request_routing(use_replicas=True)
+        try:
+            Product.objects.filter(pk=self.product.pk).update(stock=3)
+            self.assertTrue(state.wrote)
+            self.assertIsNone(db_router.ReplicaRouter().db_for_read(Product))
+        finally:
+            db_router.end_request_routing(state_token)
+
+    @patch('core.db_router.get_replica_lag', return_value=30.0)
+    def test_lagging_replica_falls_back_to_primary(self, mock_lag):
+        response, replica_queries = self._product_queries('replica')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(replica_queries)
+        # Vérification du retard mise en cache : un seul contrôle pour deux requêtes
+        self.client.get(PRODUCTS_URL, {'page': 1})
+        mock_lag.assert_called_once_with('replica')
+
+    def test_outside_http_requests_reads_primary(self):
+        self.assertIsNone(db_router.ReplicaRouter().db_for_read(Product))
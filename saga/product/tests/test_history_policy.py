@@ -0,0 +1,98 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from product.history import get_changed_fields, product_history_sync_mode, prune_product_history
+from product.models import CatalogueVersion, Product
+
+
+class ProductHistoryPolicyTestCase(TestCase):
+    """Tests de la politique d'historisation des produits"""
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            title='Lait en poudre', price=Decimal('2500'), specifications={'poids': '400g'}
+        )
+
+    def test_noop_save_skips_history(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.save()
+        self.assertEqual(product.history.count(), 1)
+
+        product.specifications['poids'] = '900g'
+        product.save()
+        self.assertEqual(product.history.count(), 2)
+        self.assertEqual(product.history.first().history_type, '~')
+
+    def test_nested_json_edit_detected_from_cheap_snapshot(self):
+        Product.objects.filter(pk=self.product.pk).update(specifications={'tailles': {'S': 1}})
+        product = Product.objects.get(pk=self.product.pk)
+        # Aucun instantané à la lecture : l'état d'origine est relu en base à la sauvegarde
+        self.assertFalse(hasattr(product, '_history_snapshot'))
+
+        product.specifications['tailles']['S'] = 2
+        with self.assertNumQueries(1):
+            self.assertEqual(get_changed_fields(product), {'specifications'})
+        product.save()
+        self.assertEqual(product.history.count(), 2)
+        # Après sauvegarde, instantané en octets : aucune structure partagée avec les valeurs
+        self.assertIsInstance(product._history_snapshot['specifications'], bytes)
+
+        product.specifications['prix'] = Decimal('1')  # non sérialisable en JSON
+        self.assertIn('specifications', get_changed_fields(product))
+
+    def test_sync_mode_writes_one_summary_row_per_product(self):
+        other = Product.objects.create(title='Sucre', price=Decimal('800'))
+        with product_history_sync_mode('Sync test'):
+            for price in ('2600', '2700'):
+                product = Product.objects.get(pk=self.product.pk)
+                product.price = Decimal(price)
+                product.save()
+            product.stock = 3
+            product.save()
+            unchanged = Product.objects.get(pk=other.pk)
+            unchanged.save()
+            self.assertEqual(self.product.history.count(), 1)
+
+        rows = list(self.product.history.all())
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0].price, Decimal('2700'))
+        self.assertEqual(rows[0].stock, 3)
+        self.assertEqual(rows[0].history_change_reason, 'Sync test: price, stock')
+        self.assertEqual(other.history.count(), 1)
+
+    def test_sync_mode_bumps_catalogue_version_once(self):
+        version = CatalogueVersion.current()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with product_history_sync_mode('Sync test'):
+                for stock in range(1, 4):
+                    self.product.stock = stock
+                    self.product.save()
+                Product.objects.create(title='Sucre', price=Decimal('800'))
+                # Pas d'ETag changeant à chaque ligne pendant la synchronisation
+                self.assertEqual(CatalogueVersion.current(), version)
+        bumps = [callback for callback in callbacks if getattr(callback, '__name__', '') == 'bump_catalogue_version']
+        self.assertEqual(len(bumps), 1)
+        self.assertGreater(CatalogueVersion.current(), version)
+
+    def test_prune_by_age_and_count(self):
+        for stock in range(1, 6):
+            self.product.stock = stock
+            self.product.save()
+        HistoricalProduct = Product.history.model
+        oldest = self.product.history.order_by('history_date').first()
+        HistoricalProduct.objects.filter(pk=oldest.pk).update(
+            history_date=timezone.now() - timedelta(days=400)
+        )
+
+        self.assertEqual(prune_product_history(days=365, keep=0, dry_run=True), 1)
+        with self.assertNumQueries(2):
+            # Bornes puis une lecture par tranche de produits, quel que soit le nombre de lots
+            prune_product_history(days=365, keep=3, batch_size=1, dry_run=True)
+        self.assertEqual(prune_product_history(days=365, keep=3), 3)
+        self.assertEqual(
+            list(self.product.history.values_list('stock', flat=True)),
+            [5, 4, 3],
+        )
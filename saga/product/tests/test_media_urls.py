@@ -0,0 +1,86 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from product.models import Product
+from saga.storage_backends import ProductImageStorage
+from saga.utils import media_urls
+
+
+class SignedProductImageStorage(ProductImageStorage):
+    """Stockage sans domaine personnalisé : url() signe chaque URL"""
+    custom_domain = None
+
+
+class MediaURLResolverTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        media_urls._local_memo.clear()
+        self.storage = SignedProductImageStorage()
+
+    def _build_url(self, name, **kwargs):
+        return f'https://bucket.s3.amazonaws.com/media/products/{name}?X-Amz-Signature=sig'
+
+    def test_signed_url_built_once(self):
+        with patch.object(SignedProductImageStorage, 'build_url', side_effect=self._build_url) as mock_build:
+            first = self.storage.url('main/riz.jpg')
+            media_urls._local_memo.clear()
+            second = self.storage.url('main/riz.jpg')
+
+        self.assertEqual(first, second)
+        mock_build.assert_called_once()
+
+    def test_local_memo_bounded_by_shared_entry_lifetime(self):
+        name = 'main/riz.jpg'
+        # Entrée partagée écrite par un autre processus, à 5 s de son expiration
+        cache.set(media_urls._cache_key(self.storage, name), ('https://ancienne-url?sig', time.time() + 5), 5)
+
+        with patch.object(SignedProductImageStorage, 'build_url', side_effect=self._build_url) as mock_build:
+            self.assertEqual(media_urls.resolve(self.storage, name), 'https://ancienne-url?sig')
+            _, expires_at = media_urls._local_memo[(media_urls._storage_key(self.storage), name)]
+            self.assertLessEqual(expires_at - time.monotonic(), 5)
+
+            # Entrée partagée expirée : URL reconstruite, jamais resservie depuis la mémoire locale
+            with patch('saga.utils.media_urls.time.monotonic', return_value=time.monotonic() + 6), \
+                    patch('saga.utils.media_urls.time.time', return_value=time.time() + 6):
+                urls = media_urls.resolve_many(self.storage, [name])
+        self.assertEqual(urls[name], self._build_url(name))
+        mock_build.assert_called_once()
+
+    def test_explicit_expire_bypasses_memo(self):
+        with patch.object(SignedProductImageStorage, 'build_url', side_effect=self._build_url) as mock_build:
+            self.storage.url('main/riz.jpg')
+            self.storage.url('main/riz.jpg', expire=60)
+
+        self.assertEqual(mock_build.call_count, 2)
+
+    def test_resolve_many_single_cache_round_trip(self):
+        names = ['main/riz.jpg', 'gallery/riz-1.jpg', 'main/riz.jpg']
+        with patch.object(SignedProductImageStorage, 'build_url', side_effect=self._build_url) as mock_build, \
+                patch.object(media_urls.cache, 'get_many', wraps=media_urls.cache.get_many) as mock_get_many:
+            urls = media_urls.resolve_many(self.storage, names)
+
+        self.assertEqual(set(urls), {'main/riz.jpg', 'gallery/riz-1.jpg'})
+        self.assertEqual(mock_build.call_count, 2)
+        mock_get_many.assert_called_once()
+
+    @override_settings(MEDIA_PUBLIC_URLS=True, MEDIA_CDN_DOMAIN='cdn.example.com')
+    def test_public_mode_serves_unsigned_cdn_url(self):
+        url = self.storage.url('main/riz parfumé.jpg')
+
+        self.assertEqual(url, 'https://cdn.example.com/media/products/main/riz%20parfum%C3%A9.jpg')
+
+    def test_resolve_image_urls_warms_product_page(self):
+        products = [
+            Product(title='Riz', image_urls={'main': 'main/riz.jpg', 'gallery': ['gallery/riz-1.jpg']}),
+            Product(title='Mil', image_urls={'main': 'media/products/main/mil.jpg'}),
+        ]
+        with patch('product.models.get_storage', return_value=self.storage), \
+                patch.object(SignedProductImageStorage, 'build_url', side_effect=self._build_url):
+            urls = Product.resolve_image_urls(products)
+
+        self.assertEqual(set(urls), {'main/riz.jpg', 'gallery/riz-1.jpg', 'main/mil.jpg'})
+        self.assertEqual(media_urls.resolve(self.storage, 'main/mil.jpg'), urls['main/mil.jpg'])
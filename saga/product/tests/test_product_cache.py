@@ -0,0 +1,87 @@
+import tempfile
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from product.cache import get_product_fragment, get_product_version
+from product.models import Category, Product, Review
+
+User = get_user_model()
+
+# Cache partagé entre processus (comme Redis en production) : seul cas où les fragments sont mis en cache
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='saga-test-cache-'),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class ProductDetailCacheTestCase(TestCase):
+    """Tests du cache des fragments de la page produit"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Épicerie', slug='epicerie')
+        self.product = Product.objects.create(
+            title='Huile de palme', price=Decimal('1500'), category=self.category, is_available=True
+        )
+        self.similar = Product.objects.create(
+            title='Huile d\'arachide', price=Decimal('1800'), category=self.category, is_available=True
+        )
+        self.user = User.objects.create_user(email='avis@example.com', password='testpass123')
+
+    def _get_detail(self):
+        url = reverse('suppliers:product_detail', args=[self.product.slug])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_second_view_reuses_cached_fragments(self):
+        first, first_count = self._get_detail()
+        second, second_count = self._get_detail()
+
+        self.assertLess(second_count, first_count)
+        self.assertEqual(list(second.context['similar_products']), [self.similar])
+        self.assertEqual(second.context['breadcrumbs'], first.context['breadcrumbs'])
+
+    def test_review_bumps_product_version(self):
+        self._get_detail()
+        version = get_product_version(self.product.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(product=self.product, user=self.user, rating=4, comment='Bonne huile')
+
+        self.assertGreater(get_product_version(self.product.pk), version)
+        response, _ = self._get_detail()
+        self.assertEqual(response.context['average_rating'], 4.0)
+
+    def test_product_save_invalidates_fragments(self):
+        builds = []
+        build = lambda: builds.append(1) or {'stock': self.product.stock}
+
+        get_product_fragment(self.product.pk, 'test', build)
+        get_product_fragment(self.product.pk, 'test', build)
+        self.assertEqual(len(builds), 1)
+
+        self.product.stock = 12
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        self.assertEqual(get_product_fragment(self.product.pk, 'test', build), {'stock': 12})
+        self.assertEqual(len(builds), 2)
+
+    def test_process_local_cache_rebuilds_fragments(self):
+        builds = []
+        build = lambda: builds.append(1) or {'stock': self.product.stock}
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            get_product_fragment(self.product.pk, 'test', build)
+            get_product_fragment(self.product.pk, 'test', build)
+        # Un incrément de version fait par un autre processus ne serait pas vu : pas de cache
+        self.assertEqual(len(builds), 2)
@@ -0,0 +1,57 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from product.models import ImageProduct, Product, ProductImageKey
+from saga.storage_backends import ProductImageStorage
+
+
+def fake_s3_save(name, content):
+    """_save de substitution : l'objet n'est pas envoyé, le nom retenu est renvoyé"""
+    return name
+
+
+@patch.object(ProductImageStorage, 'exists', side_effect=AssertionError("requête HEAD S3 inattendue"))
+@patch.object(ProductImageStorage, '_save', side_effect=fake_s3_save)
+class ProductImageKeyTestCase(TestCase):
+    """Noms d'images uniques garantis par le registre ProductImageKey, sans requête S3"""
+
+    def test_reserve_collision_gets_random_suffix(self, mock_save, mock_exists):
+        self.assertEqual(ProductImageKey.reserve('main/2026/01/11/riz.jpg'), 'main/2026/01/11/riz.jpg')
+
+        second = ProductImageKey.reserve('main/2026/01/11/riz.jpg')
+
+        self.assertRegex(second, r'^main/2026/01/11/riz-[0-9a-f]{8}\.jpg$')
+        self.assertEqual(ProductImageKey.objects.count(), 2)
+
+    def test_reserve_respects_max_length(self, mock_save, mock_exists):
+        name = ProductImageKey.reserve('gallery/' + 'a' * 80 + '.jpg', max_length=40)
+
+        self.assertEqual(len(name), 40)
+        self.assertTrue(name.endswith('.jpg'))
+
+    def test_upload_stores_real_key_in_image_urls(self, mock_save, mock_exists):
+        product = Product.objects.create(
+            title='Riz parfumé', price=Decimal('1000'),
+            image=SimpleUploadedFile('photo.jpg', b'jpeg', content_type='image/jpeg'),
+        )
+
+        self.assertRegex(product.image.name, r'^main/\d{4}/\d{2}/\d{2}/riz-parfume-[0-9a-f]{12}\.jpg$')
+        self.assertEqual(product.image_urls['main'], product.image.name)
+        self.assertTrue(ProductImageKey.objects.filter(key=product.image.name).exists())
+        mock_save.assert_called_once()
+
+    def test_gallery_keeps_order_without_storage_round_trip(self, mock_save, mock_exists):
+        product = Product.objects.create(title='Mil', price=Decimal('800'))
+        for ordre in (2, 1):
+            ImageProduct.objects.create(
+                product=product, ordre=ordre,
+                image=SimpleUploadedFile(f'vue-{ordre}.jpg', b'jpeg', content_type='image/jpeg'),
+            )
+
+        product.refresh_from_db()
+        expected = [image.image.name for image in product.images.order_by('ordre')]
+        self.assertEqual(product.image_urls['gallery'], expected)
+        mock_exists.assert_not_called()
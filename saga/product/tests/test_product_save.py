@@ -0,0 +1,70 @@
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from product.models import Product
+from saga.storage_backends import ProductImageStorage
+
+
+class ProductSavePathTestCase(TestCase):
+    """Tests du chemin d'écriture de Product.save()"""
+
+    def test_slug_allocation_is_a_single_query(self):
+        first = Product.objects.create(title='Sac de riz', price=Decimal('1000'))
+        second = Product.objects.create(title='Sac de riz', price=Decimal('1000'))
+        Product.objects.create(title='Sac de riz-1-a', price=Decimal('1000'))
+
+        self.assertEqual(first.slug, 'sac-de-riz')
+        self.assertEqual(second.slug, 'sac-de-riz-1')
+        with self.assertNumQueries(1):
+            self.assertEqual(Product(title='Sac de riz').generate_unique_slug(), 'sac-de-riz-2')
+
+    def test_sku_comes_from_sequence(self):
+        first = Product.objects.create(title='Huile', price=Decimal('1000'))
+        second = Product.objects.create(title='Sucre', price=Decimal('1000'))
+
+        first_number = int(first.sku.split('-')[-1])
+        self.assertEqual(second.sku, f"SKU-{str(first_number + 1).zfill(4)}")
+        with self.assertNumQueries(1):
+            Product(title='Sel').generate_sku()
+
+    @patch.object(ProductImageStorage, 'delete')
+    @patch.object(ProductImageStorage, 'get_available_name', side_effect=lambda name, *args, **kwargs: name)
+    def test_unchanged_image_skips_storage(self, get_available_name, delete):
+        product = Product.objects.create(title='Savon', price=Decimal('500'), image='main/savon.jpg')
+        self.assertEqual(product.image_urls['main'], 'main/savon.jpg')
+
+        product = Product.objects.get(pk=product.pk)
+        product.price = Decimal('600')
+        product.save()
+        delete.assert_not_called()
+
+        product.image = 'main/savon-v2.jpg'
+        product.save()
+        delete.assert_called_once_with('main/savon.jpg')
+        self.assertEqual(product.image_urls['main'], 'main/savon-v2.jpg')
+        # Noms déjà stockés : aucune réservation de nom
+        get_available_name.assert_not_called()
+
+    @patch.object(ProductImageStorage, 'delete')
+    @patch.object(ProductImageStorage, 'get_available_name', side_effect=lambda name, *args, **kwargs: name)
+    def test_sync_sized_batch_benchmark(self, get_available_name, delete):
+        batch_size = 300
+        started = time.perf_counter()
+        for i in range(batch_size):
+            Product.objects.create(title=f'Article {i}', price=Decimal('1000'), image=f'main/article-{i}.jpg')
+        create_rate = batch_size / (time.perf_counter() - started)
+
+        products = list(Product.objects.all())
+        get_available_name.reset_mock()
+        started = time.perf_counter()
+        for product in products:
+            product.stock = 5
+            product.save()
+        update_rate = batch_size / (time.perf_counter() - started)
+
+        print(f"\n[benchmark] Product.save(): {create_rate:.0f} créations/s, {update_rate:.0f} mises à jour/s")
+        get_available_name.assert_not_called()
+        delete.assert_not_called()
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from cart.models import Order, OrderItem
+from product.models import Category, Phone, Product, ProductRecommendation
+from product.recommendations import build_product_recommendations, get_recommended_product_ids
+
+
+class ProductRecommendationsTestCase(TestCase):
+    """Tests de la table des produits similaires précalculés"""
+
+    def setUp(self):
+        cache.clear()
+        root = Category.objects.create(name='Électronique', slug='electronique')
+        phones = Category.objects.create(name='Téléphones', slug='telephones', parent=root)
+        tablets = Category.objects.create(name='Tablettes', slug='tablettes', parent=root)
+        kitchen = Category.objects.create(name='Cuisine', slug='cuisine')
+
+        self.phone = self._product('Galaxy S21', phones, brand='Samsung', model='S21')
+        self.twin = self._product('Galaxy S21 reconditionné', phones, brand='Samsung', model='S21')
+        self.other_phone = self._product('Spark 10', phones, brand='Tecno', model='Spark')
+        self.tablet = self._product('Tab A8', tablets)
+        self.kettle = self._product('Bouilloire', kitchen)
+        self.unavailable = self._product('Galaxy S20', phones, brand='Samsung', model='S21', is_available=False)
+
+        order = Order.objects.create(
+            status=Order.DELIVERED, subtotal=Decimal('0'), shipping_cost=Decimal('0'), total=Decimal('0')
+        )
+        for product in (self.phone, self.kettle):
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+
+    def _product(self, title, category, brand=None, model=None, is_available=True):
+        product = Product.objects.create(
+            title=title, price=Decimal('1000'), category=category, is_available=is_available
+        )
+        if brand:
+            Phone.objects.create(product=product, brand=brand, model=model)
+        return product
+
+    def test_build_ranks_neighbours_from_all_signals(self):
+        report = build_product_recommendations(top_k_size=4, block_size=2)
+
+        self.assertEqual(report['products'], 6)
+        self.assertEqual(report['blocks'], 3)
+        self.assertEqual(
+            get_recommended_product_ids(self.phone.id),
+            [self.twin.id, self.other_phone.id, self.kettle.id, self.tablet.id],
+        )
+        # Produit indisponible jamais recommandé, et pas de voisin sans signal commun
+        self.assertFalse(ProductRecommendation.objects.filter(recommended=self.unavailable).exists())
+        # Catégories sœurs à égalité : les plus récents d'abord
+        self.assertEqual(
+            get_recommended_product_ids(self.tablet.id),
+            [self.other_phone.id, self.twin.id, self.phone.id],
+        )
+
+    def test_rebuild_replaces_previous_rows(self):
+        build_product_recommendations(top_k_size=2)
+        build_product_recommendations(top_k_size=1)
+        self.assertEqual(ProductRecommendation.objects.filter(product=self.phone).count(), 1)
+
+    def test_api_reads_table_and_falls_back_for_new_products(self):
+        build_product_recommendations()
+        client = APIClient()
+
+        response = client.get(f'/api/products/{self.phone.id}/similar_products/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['id'], self.twin.id)
+
+        newcomer = self._product('Galaxy A54', self.phone.category, brand='Samsung', model='A54')
+        self.assertIsNone(get_recommended_product_ids(newcomer.id))
+        response = client.get(f'/api/products/{newcomer.id}/similar_products/')
+        self.assertEqual(
+            {item['id'] for item in response.data},
+            {self.phone.id, self.twin.id, self.other_phone.id},
+        )
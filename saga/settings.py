@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import django
@@ -85,18 +86,32 @@ else:
     print(f"DB_PORT : {os.getenv('DB_PORT')}")
 print("================================================\n")
 
+# Connexions persistantes vérifiées avant réutilisation (CONN_HEALTH_CHECKS). Pas de pool
+# intégré sous Django 4.2 : derrière PgBouncer en mode transaction, DB_PGBOUNCER=true.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '600'))
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', 'False').lower() == 'true'
+# Timeouts SQL (core.db_connections) : défaut de la connexion (synchronisations, commandes),
+# requêtes web GET/HEAD, autres requêtes web (sous le timeout gunicorn)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '300000'))
+DB_STATEMENT_TIMEOUT_READ_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_READ_MS', '5000'))
+DB_STATEMENT_TIMEOUT_WRITE_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_WRITE_MS', '20000'))
+# Jeton de l'endpoint /health/db/ (métriques de connexions), désactivé si vide
+DB_METRICS_TOKEN = os.getenv('DB_METRICS_TOKEN', '')
+DB_CONNECTION_OPTIONS = f'-c timezone=UTC -c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'
+
 if DATABASE_URL and not DEBUG:
     # Configuration via DATABASE_URL (Heroku ou autre PaaS)
     DATABASES = {
         'default': dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600,
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=True,
             ssl_require=True
         )
     }
     DATABASES['default']['TIME_ZONE'] = 'UTC'
     DATABASES['default'].setdefault('OPTIONS', {})
-    DATABASES['default']['OPTIONS']['options'] = '-c timezone=UTC'
+    DATABASES['default']['OPTIONS']['options'] = DB_CONNECTION_OPTIONS
 else:
     # Configuration par variables individuelles (Elestio / dev local)
     # Sur Elestio : DB locale sur le VPS, pas besoin de SSL
@@ -112,14 +127,43 @@ else:
             'OPTIONS': {
                 'sslmode': DB_SSLMODE,
                 'connect_timeout': 10,
-                'options': '-c timezone=UTC',
+                'options': DB_CONNECTION_OPTIONS,
             },
-            'CONN_MAX_AGE': 600,
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
             'ATOMIC_REQUESTS': True,
             'TIME_ZONE': 'UTC',
         }
     }
 
+if DB_PGBOUNCER:
+    # Les curseurs serveur (QuerySet.iterator) ne survivent pas au changement de connexion serveur
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Réplicas en lecture (core.db_router) : URLs séparées par des virgules
+DATABASE_REPLICAS = []
+for _index, _replica_url in enumerate(
+    [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()], start=1
+):
+    _replica = dj_database_url.parse(_replica_url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    _replica['TIME_ZONE'] = 'UTC'
+    _replica['DISABLE_SERVER_SIDE_CURSORS'] = DB_PGBOUNCER
+    _replica.setdefault('OPTIONS', {})['options'] = DB_CONNECTION_OPTIONS
+    _replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica_{_index}'] = _replica
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+if not DATABASE_REPLICAS and sys.argv[1:2] == ['test']:
+    # Alias de substitution pour les tests (miroir de default), activé via override_settings(DATABASE_REPLICAS=['replica'])
+    DATABASES['replica'] = {**DATABASES['default'], 'ATOMIC_REQUESTS': False, 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Applications dont les lectures GET peuvent aller sur un réplica (catalogue, comparateur, historique de commandes)
+DATABASE_REPLICA_APPS = ['product', 'suppliers', 'inventory', 'price_checker', 'cart']
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', '10'))
+DATABASE_REPLICA_MAX_LAG = float(os.getenv('DATABASE_REPLICA_MAX_LAG', '5'))
+DATABASE_REPLICA_CHECK_INTERVAL = 5
+
 # Vérification de la connexion à la base de données
 try:
     from django.db import connections
@@ -148,6 +192,11 @@ AWS_S3_OBJECT_PARAMETERS = {
 AWS_DEFAULT_ACL = None
 AWS_QUERYSTRING_AUTH = True
 
+# URLs des médias (saga.utils.media_urls) : les médias produits et hero (public_media)
+# peuvent être servis sans signature, sur un CDN si MEDIA_CDN_DOMAIN est défini
+MEDIA_PUBLIC_URLS = os.getenv('MEDIA_PUBLIC_URLS', 'False').lower() == 'true'
+MEDIA_CDN_DOMAIN = os.getenv('MEDIA_CDN_DOMAIN', '')
+
 # Storage backends
 DEFAULT_FILE_STORAGE = 'saga.storage_backends.MediaStorage'
 STATICFILES_STORAGE = 'saga.storage_backends.StaticStorage'
@@ -258,6 +307,28 @@ PAYMENT_SESSION_SAMESITE = 'Strict'
 STRIPE_WEBHOOK_TIMEOUT = 30  # Timeout en secondes
 STRIPE_WEBHOOK_MAX_RETRIES = 3
 
+# ==================================================
+# HISTORIQUE DES PRODUITS (simple_history)
+# ==================================================
+PRODUCT_HISTORY_RETENTION_DAYS = 180  # Lignes plus anciennes purgées par prune_product_history
+PRODUCT_HISTORY_KEEP_PER_PRODUCT = 20  # Lignes les plus récentes toujours conservées par produit
+PRODUCT_HISTORY_BATCH_SIZE = 500  # Taille des lots d'écriture / de purge
+
+# ==================================================
+# RECOMMANDATIONS PRODUITS (build_product_recommendations)
+# ==================================================
+PRODUCT_RECOMMENDATIONS_TOP_K = 12  # Voisins conservés par produit
+PRODUCT_RECOMMENDATIONS_BLOCK_SIZE = 500  # Produits scorés par bloc (mémoire ~ bloc x catalogue)
+
+# ==================================================
+# CACHE HTTP DU CATALOGUE (API mobile, voir core.http_cache)
+# ==================================================
+CATALOGUE_CACHE_MAX_AGE = 60  # Secondes de fraîcheur côté client
+CATALOGUE_CACHE_S_MAXAGE = 300  # Secondes de fraîcheur côté CDN
+CATALOGUE_CACHE_STALE_WHILE_REVALIDATE = 60
+CATALOGUE_VERSION_MEMO_SECONDS = 1  # Version du catalogue (table partagée) relue au plus toutes les N secondes par processus
+SYNCED_PRODUCTS_STREAM_CHUNK_SIZE = 200  # Produits lus/sérialisés par paquet (export en streaming)
+
 # ==================================================
 # CONFIGURATION DE SÉCURITÉ DU PANIER
 # ==================================================
@@ -267,6 +338,13 @@ CART_MAX_ITEMS = 100  # Nombre maximum d'articles dans le panier
 CART_RATE_LIMIT = 100  # Actions par minute sur le panier
 CART_SESSION_TIMEOUT = 7200  # 2 heures en secondes
 
+# Purge des paniers abandonnés (commande reap_carts, 0 = règle désactivée)
+CART_ANONYMOUS_TTL_HOURS = 24  # Paniers anonymes vides
+CART_ANONYMOUS_WITH_ITEMS_TTL_HOURS = 24 * 7  # Paniers anonymes avec articles
+CART_AUTHENTICATED_TTL_DAYS = 90  # Paniers utilisateurs vides
+CART_AUTHENTICATED_WITH_ITEMS_TTL_DAYS = 0  # Paniers utilisateurs avec articles : conservés
+CART_REAPER_BATCH_SIZE = 1000  # Paniers examinés par transaction
+
 # Protection contre les attaques
 CART_CSRF_PROTECTION = True
 CART_OWNERSHIP_VERIFICATION = True
@@ -348,12 +426,27 @@ IMAGE_FORMATS = {
 }
 
 # Configuration du cache pour les images
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Avec REDIS_URL, cache partagé par tous les workers et process_tasks (django-redis) ;
+# sans, cache propre à chaque processus : le principal JWT, les fragments de la page produit
+# et les comparaisons de prix ne sont alors pas mis en cache (core.cache_versions.shared_cache_enabled)
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
     }
-}
 
 # ==================================================
 # CONFIGURATION DE L'EMAIL
@@ -416,6 +509,23 @@ if not B2B_API_KEY:
 INVENTORY_API_TIMEOUT = int(os.getenv('INVENTORY_API_TIMEOUT', '30'))  # Timeout en secondes
 INVENTORY_API_MAX_RETRIES = int(os.getenv('INVENTORY_API_MAX_RETRIES', '3'))
 INVENTORY_SYNC_FREQUENCY = int(os.getenv('INVENTORY_SYNC_FREQUENCY', '60'))  # Fréquence par défaut en minutes
+# Journal détaillé de la synchronisation (requêtes, payloads, images brutes par produit) en INFO
+# Désactivé par défaut : le déroulé d'une synchronisation est enregistré dans SyncRun / SyncRunItem
+B2B_SYNC_VERBOSE_LOGGING = os.getenv('B2B_SYNC_VERBOSE_LOGGING', 'False').lower() == 'true'
+# Passages SyncRun (et leurs éléments) conservés ce nombre de jours, purgés à chaque clôture (0 = désactivé)
+SYNC_RUN_RETENTION_DAYS = int(os.getenv('SYNC_RUN_RETENTION_DAYS', '30'))
+
+# Miroir des images B2B (inventory.image_mirror) : dérivés WebP/JPEG servis depuis notre stockage
+# À lancer par la commande mirror_b2b_images (cron, worker). B2B_IMAGE_MIRROR_ENABLED l'enchaîne à la
+# synchronisation automatique, exécutée dans un thread d'un worker web : à réserver aux déploiements
+# où cette synchronisation tourne hors de gunicorn
+B2B_IMAGE_MIRROR_ENABLED = os.getenv('B2B_IMAGE_MIRROR_ENABLED', 'False').lower() == 'true'
+B2B_IMAGE_MIRROR_WORKERS = int(os.getenv('B2B_IMAGE_MIRROR_WORKERS', '8'))
+B2B_IMAGE_MIRROR_TIMEOUT = int(os.getenv('B2B_IMAGE_MIRROR_TIMEOUT', '15'))  # Timeout en secondes
+B2B_IMAGE_MIRROR_VARIANTS = {
+    'thumb': {'width': 400, 'height': 400, 'quality': 75},  # Cartes produits
+    'medium': {'width': 1200, 'height': 1200, 'quality': 82},  # Pages détail
+}
 
 # Clé de chiffrement pour les clés API stockées en base de données
 # Générer avec: python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
@@ -458,13 +568,23 @@ if INVENTORY_ENCRYPTION_KEY:
 # ==================================================
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',  # Shopper résolu depuis le cache partagé (REDIS_URL)
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'EXCEPTION_HANDLER': 'core.exception_handler.cart_exception_handler',
+    # JSON via orjson (même sortie que JSONRenderer / JSONParser, voir core.api.renderers)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -493,6 +613,11 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Principal JWT en cache (accounts.authentication, cache partagé uniquement) : durée de vie en secondes
+JWT_PRINCIPAL_CACHE_TIMEOUT = int(os.getenv('JWT_PRINCIPAL_CACHE_TIMEOUT', '60'))
+# Endpoints du catalogue en lecture : utilisateur construit depuis les claims du jeton, sans lecture en base
+JWT_TRUST_CATALOGUE_CLAIMS = os.getenv('JWT_TRUST_CATALOGUE_CLAIMS', 'False').lower() == 'true'
+
 # ==================================================
 # LOGGING DE LA CONFIGURATION
 # ==================================================
@@ -637,7 +762,7 @@ INSTALLED_APPS = [
     'tinify',
     'rembg',
     'onnxruntime',
-    'price_checker',
+    'price_checker.apps.PriceCheckerConfig',
     'inventory.apps.InventoryConfig',  # App de gestion de stock
     # Applications pour la 2FA
     'django_otp',
@@ -655,6 +780,9 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = ('tailwind',)
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.JSONCompressionMiddleware',  # gzip/brotli des réponses JSON (API mobile)
+    'core.middleware.ReplicaRoutingMiddleware',  # Lectures GET vers les réplicas (core.db_router)
+    'core.middleware.StatementTimeoutMiddleware',  # Timeout SQL par méthode HTTP (core.db_connections)
     'saga.middleware.SecurityMiddleware',  # Middleware de sécurité personnalisé
     'django.contrib.sessions.middleware.SessionMiddleware',
     'saga.middleware.TimezoneMiddleware',
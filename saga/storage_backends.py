@@ -1,7 +1,29 @@
 from storages.backends.s3boto3 import S3Boto3Storage
 from django.conf import settings
 
-class MediaStorage(S3Boto3Storage):
+# Préfixe des clés de ProductImageStorage dérivées d'une empreinte du contenu
+CONTENT_ADDRESSED_PREFIX = 'b2b/'
+
+
+class MemoizedURLMixin:
+    """
+    url() passe par saga.utils.media_urls : URLs signées mémoïsées jusqu'à peu avant
+    leur expiration, URLs publiques/CDN pour les stockages public_media.
+    """
+    # Médias non sensibles pouvant être servis sans signature (MEDIA_PUBLIC_URLS)
+    public_media = False
+
+    def build_url(self, name, parameters=None, expire=None, http_method=None):
+        """URL calculée par S3Boto3Storage, sans mémoïsation"""
+        return super().url(name, parameters=parameters, expire=expire, http_method=http_method)
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or expire is not None or http_method is not None:
+            return self.build_url(name, parameters=parameters, expire=expire, http_method=http_method)
+        from saga.utils.media_urls import resolve
+        return resolve(self, name)
+
+class MediaStorage(MemoizedURLMixin, S3Boto3Storage):
     location = 'media'
     file_overwrite = False
     default_acl = None
@@ -29,8 +51,9 @@ class StaticStorage(S3Boto3Storage):
     auto_create_bucket = True
     auto_create_acl = True
 
-class ProductImageStorage(S3Boto3Storage):
+class ProductImageStorage(MemoizedURLMixin, S3Boto3Storage):
     """Stockage spécifique pour les images de produits"""
+    public_media = True
     location = 'media/products'  # Base location pour tous les médias produits
     file_overwrite = False
     default_acl = None
@@ -45,19 +68,19 @@ class ProductImageStorage(S3Boto3Storage):
     auto_create_acl = True
 
     def get_available_name(self, name, max_length=None):
-        """Surcharge pour gérer les noms de fichiers uniques"""
-        if self.exists(name):
-            name_parts = name.rsplit('.', 1)
-            base_name = name_parts[0]
-            extension = name_parts[1] if len(name_parts) > 1 else ''
-            counter = 1
-            while self.exists(f"{base_name}_{counter}.{extension}"):
-                counter += 1
-            return f"{base_name}_{counter}.{extension}"
-        return name
+        """
+        Nom unique sans requête S3 : les chemins produits portent un jeton aléatoire
+        (path_utils) et l'unicité est garantie par le registre ProductImageKey
+        """
+        if name.startswith(CONTENT_ADDRESSED_PREFIX):
+            # Clé dérivée du contenu (inventory.image_mirror) : réécrire le même objet est sans effet
+            return name
+        from product.models import ProductImageKey
+        return ProductImageKey.reserve(name, max_length=max_length)
 
-class HeroImageStorage(S3Boto3Storage):
+class HeroImageStorage(MemoizedURLMixin, S3Boto3Storage):
     """Stockage spécifique pour les images du hero"""
+    public_media = True
     location = 'media/hero'  # Dossier spécifique pour les images du hero
     file_overwrite = True  # On autorise l'écrasement pour le hero
     default_acl = None  # On utilise les paramètres de bucket par défaut
@@ -16,6 +16,8 @@ from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.cache import cache
+from product.cache import get_product_fragment
+from product.recommendations import get_recommended_product_ids
 from django.template.loader import render_to_string
 import json
 import logging
@@ -30,13 +32,8 @@ logger = logging.getLogger(__name__)
 
 
 def get_b2b_image_urls(product):
-    """Retourne la liste des URLs d'images B2B nettoyée."""
-    if not product.specifications or not isinstance(product.specifications, dict):
-        return []
-    urls = product.specifications.get('b2b_image_urls')
-    if not isinstance(urls, list):
-        return []
-    return [url for url in urls if url]
+    """Retourne la liste des URLs d'images B2B des pages détail (variantes miroir 'medium')."""
+    return product.get_b2b_image_urls('medium')
 
 
 def log_product_images(product, view_name="PRODUCT DETAIL"):
@@ -86,6 +83,116 @@ def log_product_images(product, view_name="PRODUCT DETAIL"):
         b2b_image_urls = product.specifications.get('b2b_image_urls')
         logger.info(f"[{view_name}] b2b_image_urls dans specifications: {b2b_image_urls}")
 
+class CachedProductDetailMixin:
+    """
+    Fragments de page produit mis en cache par version du produit
+    (product.cache) : agrégats des avis, fil d'Ariane, URLs d'images B2B et
+    identifiants des produits similaires (table des recommandations, ou calcul
+    par catégorie pour un produit pas encore recommandé). Les éléments propres
+    à l'utilisateur (favori, panier, jeton CSRF) restent rendus à chaque requête.
+    """
+    detail_cache_kind = 'product'
+    detail_log_label = 'PRODUCT DETAIL'
+    similar_products_limit = 8
+    similar_only_available = False
+    similar_select_related = ('category',)
+    similar_prefetch_related = ('images',)
+
+    def get_similar_products_queryset(self, product):
+        """QuerySet ordonné (non tronqué) des produits similaires"""
+        raise NotImplementedError
+
+    def get_similar_conditions(self, product, characteristic_conditions=Q()):
+        """
+        Conditions de similarité par priorité : même catégorie, sous-catégories
+        puis sous-sous-catégories, chacune d'abord combinée aux caractéristiques.
+        """
+        if not product.category:
+            # Si pas de catégorie, utiliser uniquement les caractéristiques
+            return characteristic_conditions if characteristic_conditions else Q(pk__in=[])
+
+        direct_children = list(product.category.children.all())
+        grand_children_ids = list(
+            Category.objects.filter(parent__in=direct_children).values_list('id', flat=True)
+        )
+        priorities = [
+            Q(category=product.category),
+            Q(category__in=direct_children),
+            Q(category__id__in=grand_children_ids),
+        ]
+        similar_conditions = Q()
+        for priority in priorities:
+            if characteristic_conditions:
+                similar_conditions |= priority & characteristic_conditions
+            similar_conditions |= priority
+        return similar_conditions
+
+    def get_breadcrumbs(self, product):
+        """Génère les fil d'Ariane pour la navigation"""
+        breadcrumbs = [
+            {'name': 'Accueil', 'url': reverse('suppliers:supplier_index')}
+        ]
+        
+        # Ajouter toutes les catégories parentes
+        current = product.category
+        parent_categories = []
+        while current:
+            parent_categories.insert(0, {
+                'name': current.name,
+                'url': reverse('suppliers:category_detail', args=[current.slug])
+            })
+            current = current.parent
+        
+        breadcrumbs.extend(parent_categories)
+        
+        # Ajouter le produit actuel
+        breadcrumbs.append({
+            'name': product.title,
+            'url': None
+        })
+        
+        return breadcrumbs
+
+    def build_detail_fragments(self, product):
+        # Diagnostic des images uniquement lors du recalcul, plus à chaque affichage
+        log_product_images(product, self.detail_log_label)
+        reviews = product.reviews.aggregate(review_count=Count('id'), average_rating=Avg('rating'))
+        similar_ids = get_recommended_product_ids(product.id)
+        if similar_ids is None:
+            # Produit pas encore dans la table des recommandations (nouveau produit)
+            similar_ids = list(
+                self.get_similar_products_queryset(product).values_list('id', flat=True)[:self.similar_products_limit]
+            )
+        return {
+            'review_count': reviews['review_count'],
+            'average_rating': reviews['average_rating'],
+            'similar_ids': similar_ids,
+            'breadcrumbs': self.get_breadcrumbs(product),
+            'b2b_image_urls': get_b2b_image_urls(product),
+        }
+
+    def get_detail_fragments(self, product):
+        return get_product_fragment(
+            product.id,
+            f'detail:{self.detail_cache_kind}',
+            lambda: self.build_detail_fragments(product)
+        )
+
+    def get_similar_products(self, similar_ids):
+        """Recharge les produits similaires en cache dans l'ordre mémorisé"""
+        if not similar_ids:
+            return []
+        products = Product.objects.filter(pk__in=similar_ids)
+        if self.similar_only_available:
+            products = products.filter(is_available=True)
+        products = products.select_related(*self.similar_select_related).prefetch_related(
+            *self.similar_prefetch_related
+        )
+        products_by_id = {product.id: product for product in products}
+        similar_products = [products_by_id[pk] for pk in similar_ids if pk in products_by_id]
+        return similar_products[:self.similar_products_limit]
+
+
 def normalize_search_term(term):
     """
     Normalise un terme de recherche pour ignorer les accents et la casse.
@@ -526,6 +633,7 @@ class BrandDetailView(TemplateView):
             paginator = Paginator(products, 12)
             page_number = self.request.GET.get('page')
             page_obj = paginator.get_page(page_number)
+            Product.resolve_image_urls(page_obj)
             
             context['products'] = page_obj
             context['brand'] = brand
@@ -757,6 +865,7 @@ class CategoryDetailView(TemplateView):
         paginator = Paginator(products, 12)
         page_number = self.request.GET.get('page')
         page_obj = paginator.get_page(page_number)
+        Product.resolve_image_urls(page_obj)
         
         context['products'] = page_obj
         context['is_paginated'] = page_obj.has_other_pages()
@@ -832,11 +941,14 @@ class SupplierDetailView(DetailView):
         return context
 
 
-class PhoneDetailView(DetailView):
+class PhoneDetailView(CachedProductDetailMixin, DetailView):
     model = Phone
     template_name = 'suppliers/phone_detail.html'
     context_object_name = 'phone'
     slug_url_kwarg = 'slug'
+    detail_cache_kind = 'phone'
+    detail_log_label = 'PHONE DETAIL'
+    similar_select_related = ('phone', 'phone__color', 'category')
 
     def get_object(self, queryset=None):
         slug = self.kwargs.get('slug')
@@ -851,53 +963,8 @@ class PhoneDetailView(DetailView):
             product__slug=slug
         )
 
-    def get_breadcrumbs(self, product):
-        """Génère les fil d'Ariane pour la navigation"""
-        breadcrumbs = [
-            {'name': 'Accueil', 'url': reverse('suppliers:supplier_index')}
-        ]
-        
-        # Ajouter toutes les catégories parentes
-        current = product.category
-        parent_categories = []
-        while current:
-            parent_categories.insert(0, {
-                'name': current.name,
-                'url': reverse('suppliers:category_detail', args=[current.slug])
-            })
-            current = current.parent
-        
-        breadcrumbs.extend(parent_categories)
-        
-        # Ajouter le produit actuel
-        breadcrumbs.append({
-            'name': product.title,
-            'url': None
-        })
-        
-        return breadcrumbs
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        phone = self.get_object()
-        product = phone.product
-        
-        # Ajouter les images avec logs de diagnostic
-        log_product_images(product, "PHONE DETAIL")
-        context['images'] = product.images.all()
-        context['b2b_image_urls'] = get_b2b_image_urls(product)
-        
-        # Ajouter les avis avec optimisation
-        reviews = product.reviews.select_related('user').all()
-        context['reviews'] = reviews
-        if reviews:
-            context['average_rating'] = sum(review.rating for review in reviews) / len(reviews)
-            context['review_count'] = len(reviews)
-        
-        # Ajouter les produits similaires avec optimisation et priorité
-        # Construire les conditions de base
-        similar_conditions = Q(phone__isnull=False)
-        
+    def get_similar_products_queryset(self, product):
+        phone = product.phone
         # Ajouter les conditions de caractéristiques seulement si les champs ne sont pas None ou vides
         characteristic_conditions = Q()
         if phone.brand:
@@ -908,74 +975,31 @@ class PhoneDetailView(DetailView):
             characteristic_conditions |= Q(phone__storage=phone.storage)
         if phone.ram:
             characteristic_conditions |= Q(phone__ram=phone.ram)
-        
-        # Construire la requête avec priorité
-        # Priorité 1: Même catégorie exacte + caractéristiques similaires (si catégorie existe)
-        if product.category:
-            # Récupérer toutes les catégories liées (catégorie actuelle + sous-catégories)
-            category_ids = [product.category.id]
-            
-            # Ajouter les sous-catégories directes
-            direct_children = product.category.children.all()
-            category_ids.extend(direct_children.values_list('id', flat=True))
-            
-            # Ajouter les sous-sous-catégories
-            for child in direct_children:
-                grand_children = child.children.all()
-                category_ids.extend(grand_children.values_list('id', flat=True))
-            
-            priority_1 = Q(category=product.category)
-            if characteristic_conditions:
-                priority_1 &= characteristic_conditions
-            
-            # Priorité 2: Même catégorie exacte
-            priority_2 = Q(category=product.category)
-            
-            # Priorité 3: Sous-catégories + caractéristiques similaires
-            priority_3 = Q(category__in=direct_children)
-            if characteristic_conditions:
-                priority_3 &= characteristic_conditions
-            
-            # Priorité 4: Sous-catégories
-            priority_4 = Q(category__in=direct_children)
-            
-            # Priorité 5: Sous-sous-catégories + caractéristiques similaires
-            grand_children_ids = []
-            for child in direct_children:
-                grand_children_ids.extend(child.children.values_list('id', flat=True))
-            priority_5 = Q(category__id__in=grand_children_ids)
-            if characteristic_conditions:
-                priority_5 &= characteristic_conditions
-            
-            # Priorité 6: Sous-sous-catégories
-            priority_6 = Q(category__id__in=grand_children_ids)
-            
-            # Combiner toutes les priorités
-            similar_conditions = (
-                priority_1 | priority_2 | priority_3 | priority_4 | priority_5 | priority_6
-            )
-        else:
-            # Si pas de catégorie, utiliser uniquement les caractéristiques
-            if characteristic_conditions:
-                similar_conditions = characteristic_conditions
-            else:
-                similar_conditions = Q(pk__in=[])  # Condition qui ne retourne rien
-        
-        similar_products = Product.objects.filter(
-            similar_conditions,
+
+        return Product.objects.filter(
+            self.get_similar_conditions(product, characteristic_conditions)
         ).exclude(
             id=product.id
-        ).select_related(
-            'phone',
-            'phone__color',
-            'category'
-        ).prefetch_related(
-            'images'
         ).order_by(
             '-is_available',
             'category__id',  # Même catégorie en premier
             '-created_at'    # Puis par date de création
-        )[:8]  # Augmenter le nombre pour avoir plus de choix
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        phone = self.object
+        product = phone.product
+        fragments = self.get_detail_fragments(product)
+
+        context['images'] = product.images.all()
+        context['b2b_image_urls'] = fragments['b2b_image_urls']
+        
+        # Ajouter les avis (agrégats en cache)
+        context['reviews'] = product.reviews.select_related('user')
+        if fragments['review_count']:
+            context['average_rating'] = fragments['average_rating']
+            context['review_count'] = fragments['review_count']
         
         # Ajouter les catégories principales pour la navigation
         main_categories = Category.objects.filter(
@@ -989,10 +1013,10 @@ class PhoneDetailView(DetailView):
         ).order_by('order', 'name')
         
         context.update({
-            'similar_products': similar_products,
+            'similar_products': self.get_similar_products(fragments['similar_ids']),
             'product': product,
             'category_slug': product.category.slug if product.category else None,
-            'breadcrumbs': self.get_breadcrumbs(product),
+            'breadcrumbs': fragments['breadcrumbs'],
             'main_categories': main_categories
         })
         
@@ -1008,11 +1032,15 @@ class PhoneDetailView(DetailView):
         return context
 
 
-class ClothingDetailView(DetailView):
+class ClothingDetailView(CachedProductDetailMixin, DetailView):
     model = Product
     template_name = 'suppliers/clothing_detail.html'
     context_object_name = 'product'
     slug_url_kwarg = 'slug'
+    detail_cache_kind = 'clothing'
+    detail_log_label = 'CLOTHING DETAIL'
+    similar_select_related = ('clothing_product', 'category')
+    similar_prefetch_related = ('images', 'clothing_product__size', 'clothing_product__color')
 
     def get_object(self, queryset=None):
         slug = self.kwargs.get('slug')
@@ -1031,53 +1059,8 @@ class ClothingDetailView(DetailView):
             raise Http404("Ce produit n'est pas un vêtement")
         return product
 
-    def get_breadcrumbs(self, product):
-        """Génère les fil d'Ariane pour la navigation"""
-        breadcrumbs = [
-            {'name': 'Accueil', 'url': reverse('suppliers:supplier_index')}
-        ]
-        
-        # Ajouter toutes les catégories parentes
-        current = product.category
-        parent_categories = []
-        while current:
-            parent_categories.insert(0, {
-                'name': current.name,
-                'url': reverse('suppliers:category_detail', args=[current.slug])
-            })
-            current = current.parent
-        
-        breadcrumbs.extend(parent_categories)
-        
-        # Ajouter le produit actuel
-        breadcrumbs.append({
-            'name': product.title,
-            'url': None
-        })
-        
-        return breadcrumbs
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        product = self.get_object()
+    def get_similar_products_queryset(self, product):
         clothing = product.clothing_product
-
-        # Ajouter les images avec logs de diagnostic
-        log_product_images(product, "CLOTHING DETAIL")
-        context['images'] = product.images.all()
-        context['b2b_image_urls'] = get_b2b_image_urls(product)
-
-        # Ajouter les avis
-        reviews = product.reviews.all()
-        context['reviews'] = reviews
-        if reviews:
-            context['average_rating'] = sum(review.rating for review in reviews) / len(reviews)
-            context['review_count'] = len(reviews)
-        
-        # Ajouter les produits similaires avec optimisation et priorité
-        # Construire les conditions de base
-        similar_conditions = Q(clothing_product__isnull=False)
-        
         # Ajouter les conditions de caractéristiques seulement si les champs ne sont pas None ou vides
         characteristic_conditions = Q()
         if clothing.material:
@@ -1086,75 +1069,31 @@ class ClothingDetailView(DetailView):
             characteristic_conditions |= Q(clothing_product__style=clothing.style)
         if clothing.gender:
             characteristic_conditions |= Q(clothing_product__gender=clothing.gender)
-        
-        # Construire la requête avec priorité
-        # Priorité 1: Même catégorie exacte + caractéristiques similaires (si catégorie existe)
-        if product.category:
-            # Récupérer toutes les catégories liées (catégorie actuelle + sous-catégories)
-            category_ids = [product.category.id]
-            
-            # Ajouter les sous-catégories directes
-            direct_children = product.category.children.all()
-            category_ids.extend(direct_children.values_list('id', flat=True))
-            
-            # Ajouter les sous-sous-catégories
-            for child in direct_children:
-                grand_children = child.children.all()
-                category_ids.extend(grand_children.values_list('id', flat=True))
-            
-            priority_1 = Q(category=product.category)
-            if characteristic_conditions:
-                priority_1 &= characteristic_conditions
-            
-            # Priorité 2: Même catégorie exacte
-            priority_2 = Q(category=product.category)
-            
-            # Priorité 3: Sous-catégories + caractéristiques similaires
-            priority_3 = Q(category__in=direct_children)
-            if characteristic_conditions:
-                priority_3 &= characteristic_conditions
-            
-            # Priorité 4: Sous-catégories
-            priority_4 = Q(category__in=direct_children)
-            
-            # Priorité 5: Sous-sous-catégories + caractéristiques similaires
-            grand_children_ids = []
-            for child in direct_children:
-                grand_children_ids.extend(child.children.values_list('id', flat=True))
-            priority_5 = Q(category__id__in=grand_children_ids)
-            if characteristic_conditions:
-                priority_5 &= characteristic_conditions
-            
-            # Priorité 6: Sous-sous-catégories
-            priority_6 = Q(category__id__in=grand_children_ids)
-            
-            # Combiner toutes les priorités
-            similar_conditions = (
-                priority_1 | priority_2 | priority_3 | priority_4 | priority_5 | priority_6
-            )
-        else:
-            # Si pas de catégorie, utiliser uniquement les caractéristiques
-            if characteristic_conditions:
-                similar_conditions = characteristic_conditions
-            else:
-                similar_conditions = Q(pk__in=[])  # Condition qui ne retourne rien
-        
-        similar_products = Product.objects.filter(
-            similar_conditions,
+
+        return Product.objects.filter(
+            self.get_similar_conditions(product, characteristic_conditions)
         ).exclude(
             id=product.id
-        ).select_related(
-            'clothing_product',
-            'category'
-        ).prefetch_related(
-            'images',
-            'clothing_product__size',
-            'clothing_product__color'
         ).order_by(
             '-is_available',
             'category__id',  # Même catégorie en premier
             '-created_at'    # Puis par date de création
-        )[:8]  # Augmenter le nombre pour avoir plus de choix
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        product = self.object
+        clothing = product.clothing_product
+        fragments = self.get_detail_fragments(product)
+
+        context['images'] = product.images.all()
+        context['b2b_image_urls'] = fragments['b2b_image_urls']
+
+        # Ajouter les avis (agrégats en cache)
+        context['reviews'] = product.reviews.select_related('user')
+        if fragments['review_count']:
+            context['average_rating'] = fragments['average_rating']
+            context['review_count'] = fragments['review_count']
         
         # Ajouter les catégories principales pour la navigation
         main_categories = Category.objects.filter(
@@ -1168,9 +1107,9 @@ class ClothingDetailView(DetailView):
         ).order_by('order', 'name')
         
         context.update({
-            'similar_products': similar_products,
+            'similar_products': self.get_similar_products(fragments['similar_ids']),
             'category_slug': product.category.slug if product.category else None,
-            'breadcrumbs': self.get_breadcrumbs(product),
+            'breadcrumbs': fragments['breadcrumbs'],
             'main_categories': main_categories,
             'clothing': clothing  # Ajouter l'objet clothing au contexte
         })
@@ -1187,11 +1126,15 @@ class ClothingDetailView(DetailView):
         return context
 
 
-class CulturalItemDetailView(DetailView):
+class CulturalItemDetailView(CachedProductDetailMixin, DetailView):
     model = Product
     template_name = 'suppliers/cultural_item_detail.html'
     context_object_name = 'product'
     slug_url_kwarg = 'slug'
+    detail_cache_kind = 'cultural'
+    detail_log_label = 'CULTURAL ITEM DETAIL'
+    similar_only_available = True  # Uniquement les produits disponibles
+    similar_select_related = ('cultural_product', 'category')
 
     def get_object(self, queryset=None):
         slug = self.kwargs.get('slug')
@@ -1206,27 +1149,8 @@ class CulturalItemDetailView(DetailView):
             raise Http404("Ce produit n'est pas un article culturel")
         return product
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        product = self.get_object()
+    def get_similar_products_queryset(self, product):
         cultural_item = product.cultural_product
-
-        # Ajouter les images avec logs de diagnostic
-        log_product_images(product, "CULTURAL ITEM DETAIL")
-        context['images'] = product.images.all()
-        context['b2b_image_urls'] = get_b2b_image_urls(product)
-
-        # Ajouter les avis
-        reviews = product.reviews.all()
-        context['reviews'] = reviews
-        if reviews:
-            context['average_rating'] = sum(review.rating for review in reviews) / len(reviews)
-            context['review_count'] = len(reviews)
-        
-        # Ajouter les produits similaires avec conditions robustes et priorité
-        # Construire les conditions de base
-        similar_conditions = Q(cultural_product__isnull=False)
-        
         # Ajouter les conditions de caractéristiques seulement si les champs ne sont pas None ou vides
         characteristic_conditions = Q()
         if cultural_item.author:
@@ -1237,76 +1161,34 @@ class CulturalItemDetailView(DetailView):
             first_word = product.title.split()[0]
             if len(first_word) > 2:  # Éviter les mots trop courts
                 characteristic_conditions |= Q(title__icontains=first_word)
-        
-        # Construire la requête avec priorité
-        # Priorité 1: Même catégorie exacte + caractéristiques similaires (si catégorie existe)
-        if product.category:
-            # Récupérer toutes les catégories liées (catégorie actuelle + sous-catégories)
-            category_ids = [product.category.id]
-            
-            # Ajouter les sous-catégories directes
-            direct_children = product.category.children.all()
-            category_ids.extend(direct_children.values_list('id', flat=True))
-            
-            # Ajouter les sous-sous-catégories
-            for child in direct_children:
-                grand_children = child.children.all()
-                category_ids.extend(grand_children.values_list('id', flat=True))
-            
-            priority_1 = Q(category=product.category)
-            if characteristic_conditions:
-                priority_1 &= characteristic_conditions
-            
-            # Priorité 2: Même catégorie exacte
-            priority_2 = Q(category=product.category)
-            
-            # Priorité 3: Sous-catégories + caractéristiques similaires
-            priority_3 = Q(category__in=direct_children)
-            if characteristic_conditions:
-                priority_3 &= characteristic_conditions
-            
-            # Priorité 4: Sous-catégories
-            priority_4 = Q(category__in=direct_children)
-            
-            # Priorité 5: Sous-sous-catégories + caractéristiques similaires
-            grand_children_ids = []
-            for child in direct_children:
-                grand_children_ids.extend(child.children.values_list('id', flat=True))
-            priority_5 = Q(category__id__in=grand_children_ids)
-            if characteristic_conditions:
-                priority_5 &= characteristic_conditions
-            
-            # Priorité 6: Sous-sous-catégories
-            priority_6 = Q(category__id__in=grand_children_ids)
-            
-            # Combiner toutes les priorités
-            similar_conditions = (
-                priority_1 | priority_2 | priority_3 | priority_4 | priority_5 | priority_6
-            )
-        else:
-            # Si pas de catégorie, utiliser uniquement les caractéristiques
-            if characteristic_conditions:
-                similar_conditions = characteristic_conditions
-            else:
-                similar_conditions = Q(pk__in=[])  # Condition qui ne retourne rien
-        
-        similar_products = Product.objects.filter(
-            similar_conditions,
+
+        return Product.objects.filter(
+            self.get_similar_conditions(product, characteristic_conditions),
             is_available=True,  # Uniquement les produits disponibles
         ).exclude(
             id=product.id
-        ).select_related(
-            'cultural_product',
-            'category'
-        ).prefetch_related(
-            'images'
         ).order_by(
             '-is_available',
             'category__id',  # Même catégorie en premier
             '-created_at'    # Puis par date de création
-        )[:8]  # Augmenter le nombre pour avoir plus de choix
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        product = self.object
+        cultural_item = product.cultural_product
+        fragments = self.get_detail_fragments(product)
+
+        context['images'] = product.images.all()
+        context['b2b_image_urls'] = fragments['b2b_image_urls']
+
+        # Ajouter les avis (agrégats en cache)
+        context['reviews'] = product.reviews.select_related('user')
+        if fragments['review_count']:
+            context['average_rating'] = fragments['average_rating']
+            context['review_count'] = fragments['review_count']
         
-        context['similar_products'] = similar_products
+        context['similar_products'] = self.get_similar_products(fragments['similar_ids'])
         context['cultural_item'] = cultural_item
         context['category_slug'] = product.category.slug if product.category else None  # Ajouter le slug de la catégorie
         
@@ -1322,114 +1204,58 @@ class CulturalItemDetailView(DetailView):
         return context
 
 
-class FabricDetailView(DetailView):
+class FabricDetailView(CachedProductDetailMixin, DetailView):
     model = Product
     template_name = 'suppliers/fabric_detail.html'
     context_object_name = 'product'
     slug_url_kwarg = 'slug'
+    detail_cache_kind = 'fabric'
+    detail_log_label = 'FABRIC DETAIL'
+    similar_select_related = ('fabric_product', 'category')
 
     def get_object(self, queryset=None):
         slug = self.kwargs.get('slug')
-        product = get_object_or_404(Product.objects.select_related('fabric_product'), slug=slug)
+        product = get_object_or_404(
+            Product.objects.select_related('fabric_product', 'category'),
+            slug=slug
+        )
         if not hasattr(product, 'fabric_product'):
             raise Http404("Ce produit n'est pas un tissu")
         return product
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        product = self.get_object()
-        
-        # Récupérer les produits similaires avec conditions robustes et priorité
-        # Construire les conditions de base
-        similar_conditions = Q(fabric_product__isnull=False)
-        
+    def get_similar_products_queryset(self, product):
+        fabric = product.fabric_product
         # Ajouter les conditions de caractéristiques seulement si les champs ne sont pas None ou vides
         characteristic_conditions = Q()
-        if product.fabric_product.fabric_type:
-            characteristic_conditions |= Q(fabric_product__fabric_type=product.fabric_product.fabric_type)
-        if product.fabric_product.quality:
-            characteristic_conditions |= Q(fabric_product__quality=product.fabric_product.quality)
-        
-        # Construire la requête avec priorité
-        # Priorité 1: Même catégorie exacte + caractéristiques similaires (si catégorie existe)
-        if product.category:
-            # Récupérer toutes les catégories liées (catégorie actuelle + sous-catégories)
-            category_ids = [product.category.id]
-            
-            # Ajouter les sous-catégories directes
-            direct_children = product.category.children.all()
-            category_ids.extend(direct_children.values_list('id', flat=True))
-            
-            # Ajouter les sous-sous-catégories
-            for child in direct_children:
-                grand_children = child.children.all()
-                category_ids.extend(grand_children.values_list('id', flat=True))
-            
-            priority_1 = Q(category=product.category)
-            if characteristic_conditions:
-                priority_1 &= characteristic_conditions
-            
-            # Priorité 2: Même catégorie exacte
-            priority_2 = Q(category=product.category)
-            
-            # Priorité 3: Sous-catégories + caractéristiques similaires
-            priority_3 = Q(category__in=direct_children)
-            if characteristic_conditions:
-                priority_3 &= characteristic_conditions
-            
-            # Priorité 4: Sous-catégories
-            priority_4 = Q(category__in=direct_children)
-            
-            # Priorité 5: Sous-sous-catégories + caractéristiques similaires
-            grand_children_ids = []
-            for child in direct_children:
-                grand_children_ids.extend(child.children.values_list('id', flat=True))
-            priority_5 = Q(category__id__in=grand_children_ids)
-            if characteristic_conditions:
-                priority_5 &= characteristic_conditions
-            
-            # Priorité 6: Sous-sous-catégories
-            priority_6 = Q(category__id__in=grand_children_ids)
-            
-            # Combiner toutes les priorités
-            similar_conditions = (
-                priority_1 | priority_2 | priority_3 | priority_4 | priority_5 | priority_6
-            )
-        else:
-            # Si pas de catégorie, utiliser uniquement les caractéristiques
-            if characteristic_conditions:
-                similar_conditions = characteristic_conditions
-            else:
-                similar_conditions = Q(pk__in=[])  # Condition qui ne retourne rien
-        
-        similar_products = Product.objects.filter(
-            similar_conditions
+        if fabric.fabric_type:
+            characteristic_conditions |= Q(fabric_product__fabric_type=fabric.fabric_type)
+        if fabric.quality:
+            characteristic_conditions |= Q(fabric_product__quality=fabric.quality)
+
+        return Product.objects.filter(
+            self.get_similar_conditions(product, characteristic_conditions)
         ).exclude(
             id=product.id
-        ).select_related(
-            'fabric_product',
-            'category'
-        ).prefetch_related(
-            'images'
         ).order_by(
             '-is_available',
             'category__id',  # Même catégorie en premier
             '-created_at'    # Puis par date de création
-        )[:8]  # Augmenter le nombre pour avoir plus de choix
-        
-        # Ajouter les avis et la note moyenne
-        reviews = product.reviews.all()
-        if reviews:
-            context['average_rating'] = sum(review.rating for review in reviews) / len(reviews)
-            context['review_count'] = len(reviews)
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        product = self.object
+        fragments = self.get_detail_fragments(product)
         
-        # Ajouter les images avec logs de diagnostic
-        log_product_images(product, "FABRIC DETAIL")
+        # Ajouter les avis et la note moyenne (agrégats en cache)
+        if fragments['review_count']:
+            context['average_rating'] = fragments['average_rating']
+            context['review_count'] = fragments['review_count']
         
-        context['similar_products'] = similar_products
-        context['reviews'] = reviews
+        context['similar_products'] = self.get_similar_products(fragments['similar_ids'])
+        context['reviews'] = product.reviews.select_related('user')
         context['images'] = product.images.all()
-        context['b2b_image_urls'] = get_b2b_image_urls(product)
+        context['b2b_image_urls'] = fragments['b2b_image_urls']
         context['category_slug'] = product.category.slug if product.category else None  # Ajouter le slug de la catégorie
 
         # Tracking de la vue de produit
@@ -1494,12 +1320,30 @@ class CategoryListView(ListView):
         return context
 
 
-class ProductDetailView(DetailView):
+class ProductDetailView(CachedProductDetailMixin, DetailView):
     """Vue pour afficher les détails d'un produit générique"""
     model = Product
     template_name = 'suppliers/product_detail.html'
     context_object_name = 'product'
     slug_url_kwarg = 'slug'
+    detail_cache_kind = 'product'
+    detail_log_label = 'PRODUCT DETAIL'
+    similar_only_available = True
+    similar_select_related = (
+        'category',
+        'supplier',
+        'phone',
+        'phone__color',
+        'fabric_product',
+        'clothing_product',
+        'cultural_product'
+    )
+    similar_prefetch_related = (
+        'clothing_product__size',
+        'clothing_product__color',
+        'fabric_product__color',
+        'images'
+    )
 
     def get_queryset(self):
         return Product.objects.filter(
@@ -1507,97 +1351,31 @@ class ProductDetailView(DetailView):
         ).select_related(
             'category',
             'supplier'
-        ).prefetch_related(
-            'reviews',
-            'images'
+        )
+
+    def get_similar_products_queryset(self, product):
+        # Pas de catégorie : pas de produits similaires basés sur la catégorie
+        return Product.objects.filter(
+            self.get_similar_conditions(product),
+            is_available=True,
+        ).exclude(id=product.id).order_by(
+            # Ordre par priorité : même catégorie d'abord, puis sous-catégories
+            'category__id',  # Même catégorie en premier
+            '-created_at'    # Puis par date de création
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        product = self.get_object()
-        
-        # Récupérer les avis et la note moyenne
-        reviews = product.reviews.all()
-        average_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
-        average_rating = round(average_rating, 1)
-        
-        # Récupérer les produits similaires avec cache et priorité
-        cache_key = f'similar_products_{product.id}'
-        similar_products = cache.get(cache_key)
-        
-        if similar_products is None:
-            # Vérifier si le produit a une catégorie
-            if product.category:
-                # Récupérer toutes les catégories liées (catégorie actuelle + sous-catégories)
-                category_ids = [product.category.id]
-                
-                # Ajouter les sous-catégories directes
-                direct_children = product.category.children.all()
-                category_ids.extend(direct_children.values_list('id', flat=True))
-                
-                # Ajouter les sous-sous-catégories
-                for child in direct_children:
-                    grand_children = child.children.all()
-                    category_ids.extend(grand_children.values_list('id', flat=True))
-                
-                # Construire la requête avec priorité
-                # Priorité 1: Même catégorie exacte
-                priority_1 = Q(category=product.category)
-                
-                # Priorité 2: Sous-catégories
-                priority_2 = Q(category__in=direct_children)
-                
-                # Priorité 3: Sous-sous-catégories
-                grand_children_ids = []
-                for child in direct_children:
-                    grand_children_ids.extend(child.children.values_list('id', flat=True))
-                priority_3 = Q(category__id__in=grand_children_ids)
-                
-                # Combiner toutes les priorités
-                similar_conditions = priority_1 | priority_2 | priority_3
-            else:
-                # Si pas de catégorie, utiliser une condition vide (pas de produits similaires basés sur catégorie)
-                similar_conditions = Q(pk__in=[])  # Condition qui ne retourne rien
-            
-            similar_products = Product.objects.filter(
-                similar_conditions,
-                is_available=True,
-            ).exclude(id=product.id).select_related(
-                'category',
-                'supplier',
-                'phone',
-                'phone__color',
-                'fabric_product',
-                'clothing_product',
-                'cultural_product'
-            ).prefetch_related(
-                'clothing_product__size',
-                'clothing_product__color',
-                'fabric_product__color',
-                'images'
-            ).order_by(
-                # Ordre par priorité : même catégorie d'abord, puis sous-catégories
-                'category__id',  # Même catégorie en premier
-                '-created_at'    # Puis par date de création
-            )[:8]  # Augmenter le nombre pour avoir plus de choix
-            
-            # Mettre en cache pour 1 heure
-            cache.set(cache_key, similar_products, 3600)
-        
-        # Récupérer les images avec logs de diagnostic
-        images = product.images.all().order_by('ordre')
-        b2b_image_urls = get_b2b_image_urls(product)
-        
-        # Logs de diagnostic pour les images
-        log_product_images(product, "PRODUCT DETAIL")
+        product = self.object
+        fragments = self.get_detail_fragments(product)
         
         context.update({
-            'reviews': reviews,
-            'average_rating': average_rating,
-            'similar_products': similar_products,
-            'breadcrumbs': self.get_breadcrumbs(product),
-            'images': images,
-            'b2b_image_urls': b2b_image_urls,
+            'reviews': product.reviews.select_related('user'),
+            'average_rating': round(fragments['average_rating'] or 0, 1),
+            'similar_products': self.get_similar_products(fragments['similar_ids']),
+            'breadcrumbs': fragments['breadcrumbs'],
+            'images': product.images.all().order_by('ordre'),
+            'b2b_image_urls': fragments['b2b_image_urls'],
             'category_slug': product.category.slug if product.category else None,
         })
         
@@ -1630,32 +1408,6 @@ class ProductDetailView(DetailView):
             )
         
         return context
-    
-    def get_breadcrumbs(self, product):
-        """Génère les fil d'Ariane pour la navigation"""
-        breadcrumbs = [
-            {'name': 'Accueil', 'url': reverse('suppliers:supplier_index')}
-        ]
-        
-        # Ajouter toutes les catégories parentes
-        current = product.category
-        parent_categories = []
-        while current:
-            parent_categories.insert(0, {
-                'name': current.name,
-                'url': reverse('suppliers:category_detail', args=[current.slug])
-            })
-            current = current.parent
-        
-        breadcrumbs.extend(parent_categories)
-        
-        # Ajouter le produit actuel
-        breadcrumbs.append({
-            'name': product.title,
-            'url': None
-        })
-        
-        return breadcrumbs
 
 
 @login_required
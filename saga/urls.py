@@ -4,10 +4,12 @@ URL configuration for saga project.
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 from accounts.api.views import LogoutView
 from accounts.admin import admin_site
+from core.db_connections import get_connection_metrics
 
 
 def health_check(request):
@@ -15,12 +17,22 @@ def health_check(request):
     return JsonResponse({"status": "ok"})
 
 
+def db_metrics(request):
+    """Occupation des connexions PostgreSQL pour la supervision (en-tête X-Metrics-Token)."""
+    token = settings.DB_METRICS_TOKEN
+    if not token or not constant_time_compare(request.headers.get('X-Metrics-Token', ''), token):
+        return JsonResponse({"detail": "Not found"}, status=404)
+    aliases = ['default', *settings.DATABASE_REPLICAS]
+    return JsonResponse({"databases": [get_connection_metrics(alias) for alias in aliases]})
+
+
 # Chemin d'accès admin sécurisé (toujours avec trailing slash)
 ADMIN_URL = settings.ADMIN_URL.rstrip('/') + '/'
 
 urlpatterns = [
     # Healthcheck (doit être avant tout middleware d'authentification)
     path('health/', health_check, name='health_check'),
+    path('health/db/', db_metrics, name='db_metrics'),
 
     # URL d'administration personnalisée avec 2FA
     path(ADMIN_URL, admin_site.urls),
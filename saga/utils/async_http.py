@@ -0,0 +1,28 @@
+"""
+Client HTTP asynchrone pour les vues async (mode de service ASGI).
+
+httpx n'est importé qu'à la première utilisation : le déploiement WSGI et les
+commandes de gestion fonctionnent sans lui.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULT_TIMEOUT = 10
+
+
+def async_http_client(timeout=DEFAULT_TIMEOUT, **kwargs):
+    """
+    Retourne un httpx.AsyncClient à utiliser en gestionnaire de contexte :
+
+        async with async_http_client(timeout=30) as client:
+            response = await client.post(url, json=payload)
+
+    Les réponses httpx exposent status_code, text et json() comme requests,
+    ce qui permet de partager le code de traitement des réponses.
+    """
+    try:
+        import httpx
+    except ImportError as exc:
+        raise ImproperlyConfigured(
+            "httpx est requis pour les appels HTTP asynchrones (pip install httpx)"
+        ) from exc
+    return httpx.AsyncClient(timeout=timeout, **kwargs)
@@ -0,0 +1,152 @@
+"""
+Résolution mémoïsée des URLs de médias (storages S3 de saga.storage_backends).
+
+- Une instance de stockage par classe et par processus (get_storage) au lieu
+  d'une instance par appel.
+- Les URLs signées (querystring_auth sans custom_domain, ou signature CloudFront)
+  sont gardées dans le cache partagé avec leur date d'expiration, et en mémoire du
+  processus pour la durée de vie restante de l'entrée partagée (jamais au-delà de
+  la signature) ; les URLs non signées sont construites directement.
+- Mode public/CDN (MEDIA_PUBLIC_URLS) : les stockages marqués public_media (médias
+  produits non sensibles) renvoient des URLs non signées, sur MEDIA_CDN_DOMAIN si défini.
+- resolve_many résout une page entière en un seul aller-retour vers le cache.
+"""
+import hashlib
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import filepath_to_uri
+
+MEDIA_URL_CACHE_PREFIX = 'media_url'
+# Marge avant expiration de la signature : une URL servie reste valable au moins ce temps
+MEDIA_URL_EXPIRY_MARGIN = 300
+LOCAL_MEMO_MAX_SIZE = 10000
+
+# (clé de stockage, nom) -> (url, expire_à en secondes monotones)
+_local_memo = {}
+
+
+@lru_cache(maxsize=None)
+def get_storage(storage_class):
+    """Instance partagée (par processus) d'une classe de stockage"""
+    return storage_class()
+
+
+def _storage_key(storage):
+    storage_class = type(storage)
+    return f'{storage_class.__module__}.{storage_class.__qualname__}'
+
+
+def _cache_key(storage, name):
+    digest = hashlib.md5(f'{_storage_key(storage)}:{name}'.encode()).hexdigest()
+    return f'{MEDIA_URL_CACHE_PREFIX}:{digest}'
+
+
+def is_public(storage):
+    return getattr(settings, 'MEDIA_PUBLIC_URLS', False) and getattr(storage, 'public_media', False)
+
+
+def needs_signing(storage):
+    """Vrai si url() calcule une signature (presigned S3 ou CloudFront)"""
+    if not getattr(storage, 'querystring_auth', False):
+        return False
+    return not getattr(storage, 'custom_domain', None) or bool(getattr(storage, 'cloudfront_signer', None))
+
+
+def public_url(storage, name):
+    """URL non signée d'un objet, sur le CDN si MEDIA_CDN_DOMAIN est défini"""
+    domain = getattr(settings, 'MEDIA_CDN_DOMAIN', '') or storage.custom_domain
+    key = '/'.join(part.strip('/') for part in (storage.location, name) if part)
+    return f'{storage.url_protocol}//{domain}/{filepath_to_uri(key)}'
+
+
+def url_cache_timeout(storage):
+    expire = getattr(storage, 'querystring_expire', 3600)
+    return max(expire - min(MEDIA_URL_EXPIRY_MARGIN, expire // 10), 0)
+
+
+def _remember(storage, name, url, timeout):
+    if timeout <= 0:
+        return
+    if len(_local_memo) >= LOCAL_MEMO_MAX_SIZE:
+        _local_memo.clear()
+    _local_memo[(_storage_key(storage), name)] = (url, time.monotonic() + timeout)
+
+
+def _build_entry(storage, name):
+    """Entrée du cache partagé : (url, expire_à en secondes epoch)"""
+    return storage.build_url(name), time.time() + url_cache_timeout(storage)
+
+
+def _remaining(entry):
+    """Durée de vie restante d'une entrée du cache partagé, None si inutilisable"""
+    if not isinstance(entry, tuple) or len(entry) != 2:
+        return None
+    remaining = entry[1] - time.time()
+    return remaining if remaining > 0 else None
+
+
+def _recall(storage, name):
+    entry = _local_memo.get((_storage_key(storage), name))
+    if entry and entry[1] > time.monotonic():
+        return entry[0]
+    return None
+
+
+def resolve(storage, name):
+    """URL d'un objet du stockage (mémoïsée si signée)"""
+    if is_public(storage):
+        return public_url(storage, name)
+    if not needs_signing(storage):
+        return storage.build_url(name)
+
+    url = _recall(storage, name)
+    if url is not None:
+        return url
+    key = _cache_key(storage, name)
+    entry = cache.get(key)
+    remaining = _remaining(entry)
+    if remaining is None:
+        entry = _build_entry(storage, name)
+        remaining = url_cache_timeout(storage)
+        cache.set(key, entry, remaining)
+    # Mémoire locale limitée à la durée de vie restante de l'entrée partagée
+    _remember(storage, name, entry[0], remaining)
+    return entry[0]
+
+
+def resolve_many(storage, names):
+    """URLs de plusieurs objets : {nom: url}, un seul get_many/set_many sur le cache partagé"""
+    names = [name for name in dict.fromkeys(names) if name]
+    if is_public(storage) or not needs_signing(storage):
+        return {name: resolve(storage, name) for name in names}
+
+    urls = {}
+    missing = []
+    for name in names:
+        url = _recall(storage, name)
+        if url is None:
+            missing.append(name)
+        else:
+            urls[name] = url
+    if not missing:
+        return urls
+
+    timeout = url_cache_timeout(storage)
+    keys = {_cache_key(storage, name): name for name in missing}
+    cached = cache.get_many(list(keys))
+    to_cache = {}
+    for key, name in keys.items():
+        entry = cached.get(key)
+        remaining = _remaining(entry)
+        if remaining is None:
+            entry = _build_entry(storage, name)
+            remaining = timeout
+            to_cache[key] = entry
+        urls[name] = entry[0]
+        _remember(storage, name, entry[0], remaining)
+    if to_cache:
+        cache.set_many(to_cache, timeout)
+    return urls
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.utils import timezone
 import os
+import uuid
 
 def get_product_image_path(instance, filename, image_type):
     """
@@ -45,5 +46,8 @@ def get_product_image_path(instance, filename, image_type):
     else:
         raise ValueError('Type d\'image non supporté')
     
+    # Jeton aléatoire : clé unique sans vérifier l'existence de l'objet sur S3
+    token = uuid.uuid4().hex[:12]
+
     # Construire le chemin complet (sans le préfixe media/products car il est déjà géré par le stockage)
-    return f"{folder}/{date_path}/{slug}{ext}" 
\ No newline at end of file
+    return f"{folder}/{date_path}/{slug}-{token}{ext}" 
\ No newline at end of file
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Test de charge minimal : débit et latences sous requêtes concurrentes.
+
+Sert à comparer le déploiement WSGI (workers sync) et ASGI (workers uvicorn)
+sur les mêmes URLs, voir docs/ASGI_DEPLOIEMENT.md.
+
+Exemples :
+    python scripts/load_test.py http://localhost:8080/api/inventory/products/synced/ -c 50 -n 1000
+    python scripts/load_test.py http://localhost:8080/cart/orange-money/return/ \
+        --cookie "sessionid=..." -c 20 -n 200 --no-redirects
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(ratio * (len(values) - 1))))
+    return values[index]
+
+
+def run(urls, concurrency, total, headers, timeout, allow_redirects):
+    """Envoie `total` requêtes (URLs en alternance) avec `concurrency` clients"""
+    local = threading.local()
+    latencies = []
+    statuses = {}
+    errors = []
+    lock = threading.Lock()
+
+    def hit(index):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        url = urls[index % len(urls)]
+        started = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, timeout=timeout, allow_redirects=allow_redirects)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        except requests.RequestException as exc:
+            with lock:
+                errors.append(str(exc))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(hit, range(total)))
+    duration = time.perf_counter() - started
+
+    return {
+        'duration': duration,
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': statuses,
+        'throughput': len(latencies) / duration if duration else 0.0,
+        'mean': statistics.mean(latencies) if latencies else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+', help='URL(s) à interroger (en alternance)')
+    parser.add_argument('-c', '--concurrency', type=int, default=20, help='Clients concurrents (défaut: 20)')
+    parser.add_argument('-n', '--requests', type=int, default=200, help='Nombre total de requêtes (défaut: 200)')
+    parser.add_argument('--header', action='append', default=[], help='En-tête "Nom: valeur" (répétable)')
+    parser.add_argument('--cookie', help='En-tête Cookie (ex: "sessionid=...")')
+    parser.add_argument('--timeout', type=float, default=60, help='Timeout par requête en secondes')
+    parser.add_argument('--no-redirects', action='store_true', help='Ne pas suivre les redirections')
+    args = parser.parse_args(argv)
+
+    headers = {}
+    for header in args.header:
+        name, _, value = header.partition(':')
+        headers[name.strip()] = value.strip()
+    if args.cookie:
+        headers['Cookie'] = args.cookie
+
+    report = run(args.urls, args.concurrency, args.requests, headers, args.timeout, not args.no_redirects)
+
+    print(f"Requêtes       : {report['requests']} en {report['duration']:.2f}s ({args.concurrency} clients)")
+    print(f"Débit          : {report['throughput']:.1f} req/s")
+    print(
+        f"Latence (s)    : moyenne {report['mean']:.3f} | p50 {report['p50']:.3f} "
+        f"| p95 {report['p95']:.3f} | p99 {report['p99']:.3f}"
+    )
+    print(f"Statuts HTTP   : {dict(sorted(report['statuses'].items()))}")
+    if report['errors']:
+        print(f"Erreurs        : {len(report['errors'])} (ex: {report['errors'][0]})")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())